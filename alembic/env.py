@@ -47,11 +47,23 @@ import models.paroisse
 
 #service modules
 from modules.file.models import File
+from modules.audit.models import AuditEvent
+from modules.archive.models import ARCHIVE_TABLES
+from modules.stats.models import StatsFidele, StatsFideleCle
+from modules.batch.models import BatchOperation
+from modules.verification.models import VerificationScan, VerificationValidite
+from modules.census_feed.models import CensusEvent
+from modules.dedup.models import FideleDoublon, FideleDoublonCle
 
 
 target_metadata = SQLModel.metadata
 
 
+def include_name(name, type_, parent_names) -> bool:
+    # Bookkeeping of core.backfill, like alembic_version: not a model
+    return not (type_ == "table" and name == "alembic_backfill")
+
+
 def run_migrations_offline() -> None:
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
@@ -60,19 +72,49 @@ def run_migrations_offline() -> None:
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
         compare_type=True,
+        include_name=include_name,
     )
 
     with context.begin_transaction():
         context.run_migrations()
 
 
-def do_run_migrations(connection: Connection) -> None:
-    context.configure(
-        connection=connection,
-        target_metadata=target_metadata,
-        compare_type=True,
-    )
+def _check_backfill_dry_run_target() -> None:
+    """A backfill dry run applies the revisions up to the backfill one for real: only allow one."""
+    from alembic.script import ScriptDirectory
+
+    script = ScriptDirectory.from_config(config)
+    heads = context.get_context().get_current_heads()
+    pending = list(script.iterate_revisions(context.get_revision_argument(), heads or "base"))
+    if len(pending) != 1:
+        raise RuntimeError(
+            f"backfill_dry_run: {len(pending)} revision(s) to apply. Upgrade to the revision before "
+            "the backfill one first, then dry run `upgrade <backfill revision>` alone."
+        )
 
+
+def do_run_migrations(connection: Connection) -> None:
+    def _configure() -> None:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            compare_type=True,
+            include_name=include_name,
+        )
+
+    if context.get_x_argument(as_dictionary=True).get("backfill_dry_run", "0") not in ("", "0"):
+        from core.backfill import BackfillDryRun
+
+        # Transaction opened before configure: alembic sees it as external and commits nothing,
+        # not even the version stamp (MySQL's DDL being non transactional, it would otherwise)
+        with connection.begin():
+            _configure()
+            _check_backfill_dry_run_target()
+            context.run_migrations()
+            # The backfills only logged their estimates: roll the revision back
+            raise BackfillDryRun("backfill_dry_run: estimates logged above, migration rolled back")
+
+    _configure()
     with context.begin_transaction():
         context.run_migrations()
 
@@ -0,0 +1,50 @@
+"""add verification_validite
+
+Revision ID: 0b5e7c9a3d21
+Revises: f2c8d4b6a1e9
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = "0b5e7c9a3d21"
+down_revision = "f2c8d4b6a1e9"
+branch_labels = None
+depends_on = None
+
+
+def _has_table(table_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def _blob() -> sa.types.TypeEngine:
+    return sa.LargeBinary().with_variant(mysql.LONGBLOB(), "mysql")
+
+
+def upgrade() -> None:
+    if _has_table("verification_validite"):
+        return
+    op.create_table(
+        "verification_validite",
+        sa.Column("version", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("nombre", sa.Integer(), nullable=False),
+        sa.Column("empreintes", _blob(), nullable=False),
+        sa.Column("ajouts", _blob(), nullable=True),
+        sa.Column("retraits", _blob(), nullable=True),
+        sa.Column("date_creation", sa.DateTime(), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=False),
+        sa.PrimaryKeyConstraint("version"),
+    )
+
+
+def downgrade() -> None:
+    if _has_table("verification_validite"):
+        op.drop_table("verification_validite")
@@ -0,0 +1,131 @@
+"""add audit_event
+
+Revision ID: 3b7e9c2d4f10
+Revises: 1e2f3a4b5c6d
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from __future__ import annotations
+
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect, text
+
+
+# revision identifiers, used by Alembic.
+revision = "3b7e9c2d4f10"
+down_revision = "1e2f3a4b5c6d"
+branch_labels = None
+depends_on = None
+
+# Monthly partitions created with the table (the app adds the next ones, see modules/audit)
+PARTITIONS_MONTHS_AHEAD = 3
+
+
+def _has_table(table_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def _has_trigger(trigger_name: str) -> bool:
+    bind = op.get_bind()
+    result = bind.execute(
+        text(
+            """
+            SELECT COUNT(*)
+            FROM information_schema.TRIGGERS
+            WHERE TRIGGER_SCHEMA = DATABASE() AND TRIGGER_NAME = :trigger_name
+            """
+        ),
+        {"trigger_name": trigger_name},
+    )
+    count = result.scalar_one()
+    return bool(count)
+
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.month - 1 + months
+    return date(day.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    if not _has_table("audit_event"):
+        # The partitioning column must be part of every unique key: (id, date_creation).
+        # Partitioned tables can't have foreign keys: id_fidele_acteur is a plain column.
+        op.create_table(
+            "audit_event",
+            sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column(
+                "date_creation",
+                sa.DateTime(),
+                server_default=sa.text("CURRENT_TIMESTAMP"),
+                nullable=False,
+            ),
+            sa.Column("id_fidele_acteur", sa.Integer(), nullable=True),
+            sa.Column("methode_http", sa.String(length=10), nullable=True),
+            sa.Column("route", sa.String(length=255), nullable=True),
+            sa.Column("entite", sa.String(length=64), nullable=False),
+            sa.Column("id_entite", sa.Integer(), nullable=True),
+            sa.Column("action", sa.String(length=16), nullable=False),
+            sa.Column("changements", sa.JSON(), nullable=True),
+            sa.PrimaryKeyConstraint("id", "date_creation"),
+        )
+        op.create_index(
+            "idx_audit_event_entite", "audit_event", ["entite", "id_entite", "date_creation"]
+        )
+        op.create_index(
+            "idx_audit_event_acteur", "audit_event", ["id_fidele_acteur", "date_creation"]
+        )
+
+        # RANGE partitions by month: purging a month is a DROP PARTITION, not a DELETE
+        current_month = date.today().replace(day=1)
+        partitions = [f"PARTITION p000000 VALUES LESS THAN (TO_DAYS('{current_month.isoformat()}'))"]
+        for offset in range(PARTITIONS_MONTHS_AHEAD + 1):
+            month = _add_months(current_month, offset)
+            partitions.append(
+                f"PARTITION p{month:%Y%m} VALUES LESS THAN (TO_DAYS('{_add_months(month, 1).isoformat()}'))"
+            )
+        partitions.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+        op.execute(
+            "ALTER TABLE audit_event PARTITION BY RANGE (TO_DAYS(date_creation)) (\n    "
+            + ",\n    ".join(partitions)
+            + "\n)"
+        )
+
+    # Append-only: rows can't be changed nor deleted one by one (DROP PARTITION still works)
+    if not _has_trigger("trg_audit_event_no_update"):
+        op.execute(
+            """
+            CREATE TRIGGER trg_audit_event_no_update
+            BEFORE UPDATE ON audit_event
+            FOR EACH ROW
+            BEGIN
+                SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'audit_event is append-only';
+            END
+            """
+        )
+
+    if not _has_trigger("trg_audit_event_no_delete"):
+        op.execute(
+            """
+            CREATE TRIGGER trg_audit_event_no_delete
+            BEFORE DELETE ON audit_event
+            FOR EACH ROW
+            BEGIN
+                SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'audit_event is append-only';
+            END
+            """
+        )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_audit_event_no_delete")
+    op.execute("DROP TRIGGER IF EXISTS trg_audit_event_no_update")
+
+    if _has_table("audit_event"):
+        op.drop_index("idx_audit_event_acteur", table_name="audit_event")
+        op.drop_index("idx_audit_event_entite", table_name="audit_event")
+        op.drop_table("audit_event")
@@ -0,0 +1,69 @@
+"""add fidele_doublon_cle and fidele_doublon
+
+Revision ID: 3f6b9d1c7a58
+Revises: 8c4e2a6f0d17
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "3f6b9d1c7a58"
+down_revision = "8c4e2a6f0d17"
+branch_labels = None
+depends_on = None
+
+
+def _has_table(table_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    if not _has_table("fidele_doublon_cle"):
+        op.create_table(
+            "fidele_doublon_cle",
+            sa.Column("id_fidele", sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column("cle", sa.String(length=64), nullable=False),
+            sa.ForeignKeyConstraint(["id_fidele"], ["fidele.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id_fidele", "cle"),
+        )
+        op.create_index("idx_fidele_doublon_cle_cle", "fidele_doublon_cle", ["cle", "id_fidele"])
+
+    if not _has_table("fidele_doublon"):
+        op.create_table(
+            "fidele_doublon",
+            sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column("id_fidele_a", sa.Integer(), nullable=False),
+            sa.Column("id_fidele_b", sa.Integer(), nullable=False),
+            sa.Column("score", sa.Float(), nullable=False),
+            sa.Column("details", sa.JSON(), nullable=True),
+            sa.Column("statut", sa.String(length=16), server_default=sa.text("'a_verifier'"), nullable=False),
+            sa.Column("id_fidele_revue", sa.Integer(), nullable=True),
+            sa.Column("date_creation", sa.DateTime(), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=False),
+            sa.Column("date_modification", sa.DateTime(), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=False),
+            sa.Column("date_revue", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["id_fidele_a"], ["fidele.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["id_fidele_b"], ["fidele.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("id_fidele_a", "id_fidele_b", name="uq_fidele_doublon_paire"),
+        )
+        op.create_index("idx_fidele_doublon_statut_score", "fidele_doublon", ["statut", "score"])
+        op.create_index("idx_fidele_doublon_fidele_b", "fidele_doublon", ["id_fidele_b"])
+    # The pairs of the existing fideles: POST /superadmin/doublon once deployed
+
+
+def downgrade() -> None:
+    if _has_table("fidele_doublon"):
+        op.drop_index("idx_fidele_doublon_fidele_b", table_name="fidele_doublon")
+        op.drop_index("idx_fidele_doublon_statut_score", table_name="fidele_doublon")
+        op.drop_table("fidele_doublon")
+    if _has_table("fidele_doublon_cle"):
+        op.drop_index("idx_fidele_doublon_cle_cle", table_name="fidele_doublon_cle")
+        op.drop_table("fidele_doublon_cle")
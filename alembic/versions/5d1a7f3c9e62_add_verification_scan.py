@@ -0,0 +1,86 @@
+"""add verification_scan
+
+Revision ID: 5d1a7f3c9e62
+Revises: 0b5e7c9a3d21
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from __future__ import annotations
+
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "5d1a7f3c9e62"
+down_revision = "0b5e7c9a3d21"
+branch_labels = None
+depends_on = None
+
+# Monthly partitions created with the table (the app adds the next ones, see modules/verification/scans)
+PARTITIONS_MONTHS_AHEAD = 3
+
+
+def _has_table(table_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.month - 1 + months
+    return date(day.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    if _has_table("verification_scan"):
+        return
+
+    # Same layout as audit_event: (id, date_scan) primary key, no foreign key on id_fidele
+    op.create_table(
+        "verification_scan",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("date_scan", sa.DateTime(), nullable=False),
+        sa.Column(
+            "date_reception",
+            sa.DateTime(),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+        sa.Column("id_fidele", sa.Integer(), nullable=True),
+        sa.Column("code_matriculation", sa.String(length=12), nullable=True),
+        sa.Column("resultat", sa.String(length=16), nullable=False),
+        sa.Column("point_controle", sa.String(length=64), nullable=True),
+        sa.Column("id_appareil", sa.String(length=64), nullable=True),
+        sa.Column("id_fidele_agent", sa.Integer(), nullable=True),
+        sa.Column("duree_ms", sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint("id", "date_scan"),
+    )
+    op.create_index("idx_verification_scan_fidele", "verification_scan", ["id_fidele", "date_scan"])
+    op.create_index(
+        "idx_verification_scan_point_controle", "verification_scan", ["point_controle", "date_scan"]
+    )
+
+    current_month = date.today().replace(day=1)
+    partitions = [f"PARTITION p000000 VALUES LESS THAN (TO_DAYS('{current_month.isoformat()}'))"]
+    for offset in range(PARTITIONS_MONTHS_AHEAD + 1):
+        month = _add_months(current_month, offset)
+        partitions.append(
+            f"PARTITION p{month:%Y%m} VALUES LESS THAN (TO_DAYS('{_add_months(month, 1).isoformat()}'))"
+        )
+    partitions.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    op.execute(
+        "ALTER TABLE verification_scan PARTITION BY RANGE (TO_DAYS(date_scan)) (\n    "
+        + ",\n    ".join(partitions)
+        + "\n)"
+    )
+
+
+def downgrade() -> None:
+    if _has_table("verification_scan"):
+        op.drop_index("idx_verification_scan_point_controle", table_name="verification_scan")
+        op.drop_index("idx_verification_scan_fidele", table_name="verification_scan")
+        op.drop_table("verification_scan")
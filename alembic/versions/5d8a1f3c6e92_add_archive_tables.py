@@ -0,0 +1,87 @@
+"""add archive tables
+
+Revision ID: 5d8a1f3c6e92
+Revises: 3b7e9c2d4f10
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "5d8a1f3c6e92"
+down_revision = "3b7e9c2d4f10"
+branch_labels = None
+depends_on = None
+
+# Hot table -> indexed lookup columns of its `<table>_archive` copy (see modules/archive/models.py)
+ARCHIVED_TABLES: dict[str, tuple[tuple[str, ...], ...]] = {
+    "fidele": (),
+    "fidele_structure": (("id_fidele",),),
+    "fidele_paroisse": (("id_fidele",), ("id_paroisse",)),
+    "fidele_bapteme": (("id_fidele",),),
+    "fidele_famille": (("id_fidele",),),
+    "fidele_origine": (("id_fidele",),),
+    "fidele_occupation": (("id_fidele",),),
+    "fidele_recensement_etape": (("id_fidele",),),
+    "paroisse": (),
+    "direction": (),
+    "direction_fonction": (("id_direction",), ("id_fidele",)),
+    "adresse": (("id_document_type", "id_document"),),
+    "contact": (("id_document_type", "id_document"),),
+    "file": (("id_document_type", "id_document"),),
+}
+
+
+def _has_table(table_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    metadata = sa.MetaData()
+
+    for table_name, indexes in ARCHIVED_TABLES.items():
+        archive_name = f"{table_name}_archive"
+        if _has_table(archive_name):
+            continue
+
+        # Same columns as the hot table, without FKs / unique constraints / defaults
+        hot = sa.Table(table_name, metadata, autoload_with=bind)
+        columns = [
+            sa.Column(
+                column.name,
+                column.type,
+                primary_key=column.primary_key,
+                autoincrement=False,
+                nullable=column.nullable,
+            )
+            for column in hot.columns
+        ]
+        op.create_table(
+            archive_name,
+            *columns,
+            sa.Column(
+                "date_archivage",
+                sa.DateTime(),
+                server_default=sa.text("CURRENT_TIMESTAMP"),
+                nullable=False,
+            ),
+        )
+        op.create_index(f"idx_{archive_name}_date_archivage", archive_name, ["date_archivage"])
+        for index_columns in indexes:
+            op.create_index(f"idx_{archive_name}_{index_columns[-1]}", archive_name, list(index_columns))
+
+
+def downgrade() -> None:
+    # Archived rows are lost: restore them (PUT /.../restore) before downgrading
+    for table_name in reversed(ARCHIVED_TABLES):
+        archive_name = f"{table_name}_archive"
+        if _has_table(archive_name):
+            op.drop_table(archive_name)
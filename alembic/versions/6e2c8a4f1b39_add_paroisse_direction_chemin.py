@@ -0,0 +1,59 @@
+"""add paroisse.chemin and direction.chemin (materialized ancestry)
+
+Revision ID: 6e2c8a4f1b39
+Revises: 3f6b9d1c7a58
+Create Date: 2026-10-19 23:30:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "6e2c8a4f1b39"
+down_revision = "3f6b9d1c7a58"
+branch_labels = None
+depends_on = None
+
+# The *_archive tables mirror the columns of their hot table (see modules.archive.models)
+TABLES = ("paroisse", "paroisse_archive", "direction", "direction_archive")
+# (table, index, columns)
+INDEXES = (
+    ("paroisse", "idx_paroisse_chemin", ["chemin"]),
+    ("direction", "idx_direction_chemin", ["chemin", "id_structure"]),
+)
+
+
+def _has_column(table_name: str, column_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if table_name not in inspector.get_table_names():
+        return False
+    return any(column["name"] == column_name for column in inspector.get_columns(table_name))
+
+
+def _has_index(table_name: str, index_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    return any(idx["name"] == index_name for idx in inspector.get_indexes(table_name))
+
+
+def upgrade() -> None:
+    for table_name in TABLES:
+        if not _has_column(table_name, "chemin"):
+            op.add_column(table_name, sa.Column("chemin", sa.String(length=255), nullable=True))
+    for table_name, index_name, columns in INDEXES:
+        if not _has_index(table_name, index_name):
+            op.create_index(index_name, table_name, columns)
+
+
+def downgrade() -> None:
+    for table_name, index_name, _ in INDEXES:
+        if _has_index(table_name, index_name):
+            op.drop_index(index_name, table_name=table_name)
+    for table_name in TABLES:
+        if _has_column(table_name, "chemin"):
+            op.drop_column(table_name, "chemin")
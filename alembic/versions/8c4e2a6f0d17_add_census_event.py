@@ -0,0 +1,51 @@
+"""add census_event
+
+Revision ID: 8c4e2a6f0d17
+Revises: 5d1a7f3c9e62
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "8c4e2a6f0d17"
+down_revision = "5d1a7f3c9e62"
+branch_labels = None
+depends_on = None
+
+
+def _has_table(table_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    if _has_table("census_event"):
+        return
+    op.create_table(
+        "census_event",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("date_creation", sa.DateTime(), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=False),
+        sa.Column("type", sa.String(length=32), nullable=False),
+        sa.Column("id_fidele", sa.Integer(), nullable=False),
+        sa.Column("id_paroisse", sa.Integer(), nullable=True),
+        sa.Column("id_nation", sa.Integer(), nullable=True),
+        sa.Column("donnees", sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(["id_fidele"], ["fidele.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("idx_census_event_date_creation", "census_event", ["date_creation"])
+    op.create_index("idx_census_event_fidele", "census_event", ["id_fidele"])
+
+
+def downgrade() -> None:
+    if _has_table("census_event"):
+        op.drop_index("idx_census_event_fidele", table_name="census_event")
+        op.drop_index("idx_census_event_date_creation", table_name="census_event")
+        op.drop_table("census_event")
@@ -0,0 +1,113 @@
+"""add stats_fidele rollup
+
+Revision ID: 8e4b2c7a9d15
+Revises: 5d8a1f3c6e92
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "8e4b2c7a9d15"
+down_revision = "5d8a1f3c6e92"
+branch_labels = None
+depends_on = None
+
+
+def _has_table(table_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def _dimension_columns() -> list[sa.Column]:
+    return [
+        sa.Column("id_paroisse", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("id_grade", sa.Integer(), nullable=False),
+        sa.Column("id_fidele_type", sa.Integer(), nullable=False),
+        sa.Column("sexe", sa.Enum("M", "F", name="gender"), nullable=False),
+        sa.Column("id_document_statut", sa.Integer(), nullable=False),
+        sa.Column("recensement_complete", sa.Boolean(), server_default=sa.text("0"), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    if not _has_table("stats_fidele_cle"):
+        op.create_table(
+            "stats_fidele_cle",
+            *_dimension_columns(),
+            sa.Column("id_fidele", sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column(
+                "date_modification",
+                sa.DateTime(),
+                server_default=sa.text("CURRENT_TIMESTAMP"),
+                nullable=False,
+            ),
+            sa.PrimaryKeyConstraint("id_fidele"),
+        )
+
+        # Backfill: combination of every (non deleted) fidele
+        op.execute(
+            """
+            INSERT INTO stats_fidele_cle
+                (id_fidele, id_paroisse, id_grade, id_fidele_type, sexe, id_document_statut, recensement_complete)
+            SELECT
+                f.id,
+                COALESCE((
+                    SELECT MIN(fp.id_paroisse)
+                    FROM fidele_paroisse fp
+                    WHERE fp.id_fidele = f.id
+                      AND fp.est_paroisse_principale = 1
+                      AND fp.est_supprimee = 0
+                ), 0),
+                f.id_grade,
+                f.id_fidele_type,
+                f.sexe,
+                f.id_document_statut,
+                COALESCE(f.rencensement_statut, 0) >= 100
+            FROM fidele f
+            WHERE f.est_supprimee = 0
+            """
+        )
+
+    if not _has_table("stats_fidele"):
+        op.create_table(
+            "stats_fidele",
+            *_dimension_columns(),
+            sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column("nombre", sa.Integer(), server_default=sa.text("0"), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint(
+                "id_paroisse",
+                "id_grade",
+                "id_fidele_type",
+                "sexe",
+                "id_document_statut",
+                "recensement_complete",
+                name="uq_stats_fidele_dimensions",
+            ),
+        )
+        op.create_index("idx_stats_fidele_grade", "stats_fidele", ["id_grade"])
+
+        op.execute(
+            """
+            INSERT INTO stats_fidele
+                (id_paroisse, id_grade, id_fidele_type, sexe, id_document_statut, recensement_complete, nombre)
+            SELECT id_paroisse, id_grade, id_fidele_type, sexe, id_document_statut, recensement_complete, COUNT(*)
+            FROM stats_fidele_cle
+            GROUP BY id_paroisse, id_grade, id_fidele_type, sexe, id_document_statut, recensement_complete
+            """
+        )
+
+
+def downgrade() -> None:
+    if _has_table("stats_fidele"):
+        op.drop_index("idx_stats_fidele_grade", table_name="stats_fidele")
+        op.drop_table("stats_fidele")
+    if _has_table("stats_fidele_cle"):
+        op.drop_table("stats_fidele_cle")
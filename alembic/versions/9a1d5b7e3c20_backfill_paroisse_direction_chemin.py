@@ -0,0 +1,57 @@
+"""backfill paroisse.chemin and direction.chemin
+
+Revision ID: 9a1d5b7e3c20
+Revises: 6e2c8a4f1b39
+Create Date: 2026-10-19 23:40:00.000000
+
+"""
+from __future__ import annotations
+
+from core.backfill import backfill
+
+
+# revision identifiers, used by Alembic.
+revision = "9a1d5b7e3c20"
+down_revision = "6e2c8a4f1b39"
+branch_labels = None
+depends_on = None
+
+
+# Same paths as modules.ancestry.ancestry_path (paroisse: from its adresse)
+PAROISSE_CHEMIN = """
+    UPDATE paroisse p
+    JOIN adresse a ON a.id_document_type = 3 AND a.id_document = p.id AND a.est_supprimee = 0
+    JOIN nation n ON n.id = a.id_nation
+    SET p.chemin = CONCAT('/GENERALE/', n.id_continent, ':CONTINENT/', n.id, ':NATION/', p.id, ':PAROISSE')
+    WHERE p.id > :start_id AND p.id <= :end_id AND p.chemin IS NULL
+"""
+
+# Scope PAROISSE (3): path of the paroisse, NATION (6), CONTINENT (7), GENERALE (8); the others stay NULL
+DIRECTION_CHEMIN = """
+    UPDATE direction d
+    LEFT JOIN paroisse p ON d.id_document_type = 3 AND p.id = d.id_document
+    LEFT JOIN nation n ON d.id_document_type = 6 AND n.id = d.id_document
+    SET d.chemin = CASE d.id_document_type
+        WHEN 3 THEN p.chemin
+        WHEN 6 THEN CONCAT('/GENERALE/', n.id_continent, ':CONTINENT/', n.id, ':NATION')
+        WHEN 7 THEN CONCAT('/GENERALE/', d.id_document, ':CONTINENT')
+        WHEN 8 THEN '/GENERALE'
+    END
+    WHERE d.id > :start_id AND d.id <= :end_id AND d.chemin IS NULL AND d.id_document_type IN (3, 6, 7, 8)
+"""
+
+
+def upgrade() -> None:
+    backfill("9a1d5b7e3c20_paroisse_chemin", "paroisse", PAROISSE_CHEMIN, where="chemin IS NULL")
+    # After the paroisses: the paroisse directions copy their path
+    backfill(
+        "9a1d5b7e3c20_direction_chemin",
+        "direction",
+        DIRECTION_CHEMIN,
+        where="chemin IS NULL AND id_document_type IN (3, 6, 7, 8)",
+    )
+
+
+def downgrade() -> None:
+    # The columns are dropped by the previous revision
+    pass
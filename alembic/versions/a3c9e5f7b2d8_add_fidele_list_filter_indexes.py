@@ -0,0 +1,49 @@
+"""add fidele list filter indexes
+
+Revision ID: a3c9e5f7b2d8
+Revises: 8e4b2c7a9d15
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "a3c9e5f7b2d8"
+down_revision = "8e4b2c7a9d15"
+branch_labels = None
+depends_on = None
+
+# (table, index, columns): one index per GET /fidele filter (see build_fidele_filters_conditions)
+INDEXES = (
+    ("fidele", "idx_fidele_liste_document_statut", ["est_supprimee", "id_document_statut", "id"]),
+    ("fidele", "idx_fidele_liste_grade", ["est_supprimee", "id_grade", "id"]),
+    ("fidele", "idx_fidele_liste_fidele_type", ["est_supprimee", "id_fidele_type", "id"]),
+    ("fidele", "idx_fidele_liste_sexe", ["est_supprimee", "sexe", "id"]),
+    ("fidele", "idx_fidele_liste_nationalite", ["est_supprimee", "id_nation_nationalite", "id"]),
+    ("fidele", "idx_fidele_liste_date_naissance", ["est_supprimee", "date_naissance"]),
+    ("fidele", "idx_fidele_liste_rencensement_statut", ["est_supprimee", "rencensement_statut"]),
+    ("fidele_paroisse", "idx_fidele_paroisse_membres", ["id_paroisse", "est_supprimee", "id_fidele"]),
+    ("fidele_structure", "idx_fidele_structure_membres", ["id_structure", "est_supprimee", "id_fidele"]),
+)
+
+
+def _has_index(table_name: str, index_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    return any(idx["name"] == index_name for idx in inspector.get_indexes(table_name))
+
+
+def upgrade() -> None:
+    for table_name, index_name, columns in INDEXES:
+        if not _has_index(table_name, index_name):
+            op.create_index(index_name, table_name, columns)
+
+
+def downgrade() -> None:
+    for table_name, index_name, _columns in reversed(INDEXES):
+        if _has_index(table_name, index_name):
+            op.drop_index(index_name, table_name=table_name)
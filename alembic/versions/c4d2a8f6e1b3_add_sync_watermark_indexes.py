@@ -0,0 +1,48 @@
+"""add sync watermark indexes
+
+Revision ID: c4d2a8f6e1b3
+Revises: a3c9e5f7b2d8
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "c4d2a8f6e1b3"
+down_revision = "a3c9e5f7b2d8"
+branch_labels = None
+depends_on = None
+
+# GET /sync reads the rows after a (date_modification, id) watermark (see modules.sync)
+SYNCED_TABLES = (
+    "fidele",
+    "fidele_paroisse",
+    "fidele_structure",
+    "paroisse",
+    "direction",
+    "direction_fonction",
+)
+
+
+def _has_index(table_name: str, index_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    return any(idx["name"] == index_name for idx in inspector.get_indexes(table_name))
+
+
+def upgrade() -> None:
+    for table_name in SYNCED_TABLES:
+        index_name = f"idx_{table_name}_sync"
+        if not _has_index(table_name, index_name):
+            op.create_index(index_name, table_name, ["date_modification", "id"])
+
+
+def downgrade() -> None:
+    for table_name in reversed(SYNCED_TABLES):
+        index_name = f"idx_{table_name}_sync"
+        if _has_index(table_name, index_name):
+            op.drop_index(index_name, table_name=table_name)
@@ -0,0 +1,46 @@
+"""add batch_operation
+
+Revision ID: e7b3f1a9c5d4
+Revises: c4d2a8f6e1b3
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "e7b3f1a9c5d4"
+down_revision = "c4d2a8f6e1b3"
+branch_labels = None
+depends_on = None
+
+
+def _has_table(table_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    if _has_table("batch_operation"):
+        return
+    op.create_table(
+        "batch_operation",
+        sa.Column("cle", sa.String(length=64), autoincrement=False, nullable=False),
+        sa.Column("operation", sa.String(length=64), nullable=False),
+        sa.Column("id_fidele_acteur", sa.Integer(), nullable=True),
+        sa.Column("statut", sa.Integer(), nullable=True),
+        sa.Column("reponse", sa.JSON(), nullable=True),
+        sa.Column("date_creation", sa.DateTime(), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=False),
+        sa.PrimaryKeyConstraint("cle"),
+    )
+    op.create_index("idx_batch_operation_date_creation", "batch_operation", ["date_creation"])
+
+
+def downgrade() -> None:
+    if _has_table("batch_operation"):
+        op.drop_table("batch_operation")
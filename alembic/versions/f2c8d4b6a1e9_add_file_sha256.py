@@ -0,0 +1,42 @@
+"""add file sha256
+
+Revision ID: f2c8d4b6a1e9
+Revises: e7b3f1a9c5d4
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "f2c8d4b6a1e9"
+down_revision = "e7b3f1a9c5d4"
+branch_labels = None
+depends_on = None
+
+# file_archive mirrors the columns of file (see modules.archive.models)
+TABLES = ("file", "file_archive")
+
+
+def _has_column(table_name: str, column_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if table_name not in inspector.get_table_names():
+        return False
+    return any(column["name"] == column_name for column in inspector.get_columns(table_name))
+
+
+def upgrade() -> None:
+    for table_name in TABLES:
+        if not _has_column(table_name, "sha256"):
+            op.add_column(table_name, sa.Column("sha256", sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    for table_name in TABLES:
+        if _has_column(table_name, "sha256"):
+            op.drop_column(table_name, "sha256")
@@ -0,0 +1,194 @@
+"""Chunked online backfills for the Alembic data migrations.
+
+A single `UPDATE fidele ...` over millions of rows holds its locks and its undo
+log until the end. `backfill` runs the same statement range by range on the
+primary key (keyset chunks of `batch_size` rows, each committed on its own,
+with a pause in between), so the table stays usable while it runs:
+
+    from core.backfill import backfill
+
+    def upgrade() -> None:
+        backfill(
+            "c1d2e3f4a5b6_fidele_nom_normalise",
+            "fidele",
+            "UPDATE fidele SET nom_normalise = LOWER(nom) WHERE id > :start_id AND id <= :end_id",
+            where="nom_normalise IS NULL",
+        )
+
+- The statement gets the chunk bounds as `:start_id` (excluded) and `:end_id`
+  (included).
+- Progress (key reached, rows, rate, remaining time) is logged after each chunk.
+- The position is saved after each chunk in `alembic_backfill`, under `name`:
+  a migration stopped (or failed) halfway resumes where it was, and a
+  completed backfill is skipped.
+- `alembic -x backfill_dry_run=1 upgrade <rev>` logs the estimated number of
+  rows and chunks of each backfill, writes no chunk and doesn't create
+  `alembic_backfill`; alembic/env.py then aborts the migration (rolled back).
+  The database must already be at the revision before `<rev>`, and `<rev>`
+  must be the data-only backfill revision: env.py refuses a dry run applying
+  more than one revision, since the earlier ones (and any DDL, which MySQL
+  commits at once) would be applied for real.
+- `-x backfill_batch_size=...` / `-x backfill_sleep_seconds=...` override the
+  defaults (`Config.BACKFILL_BATCH_SIZE`, `Config.BACKFILL_SLEEP_SECONDS`).
+
+The chunks are committed as they go: what the migration did before `backfill`
+is committed first. Without downtime, a column change ships in three steps,
+each its own revision: add the column nullable (expand), backfill it, then make
+it NOT NULL / drop the old column once the code no longer uses it (contract).
+"""
+from __future__ import annotations
+
+import logging
+import time
+
+import sqlalchemy as sa
+from alembic import context, op
+from sqlalchemy.engine import Connection
+
+from core.config import Config
+
+logger = logging.getLogger("alembic.backfill")
+
+BACKFILL_TABLE = "alembic_backfill"
+
+
+class BackfillDryRun(RuntimeError):
+    """Raised by alembic/env.py at the end of a dry run, to roll the migration back."""
+
+
+def _x_argument(name: str, default):
+    value = context.get_x_argument(as_dictionary=True).get(name)
+    return type(default)(value) if value is not None else default
+
+
+def _ensure_backfill_table(bind: Connection) -> None:
+    bind.execute(sa.text(
+        f"""
+        CREATE TABLE IF NOT EXISTS {BACKFILL_TABLE} (
+            name VARCHAR(128) NOT NULL PRIMARY KEY,
+            table_name VARCHAR(64) NOT NULL,
+            last_key BIGINT NOT NULL DEFAULT 0,
+            rows_done BIGINT NOT NULL DEFAULT 0,
+            date_debut DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            date_modification DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            date_fin DATETIME NULL
+        )
+        """
+    ))
+
+
+def _get_checkpoint(bind: Connection, name: str):
+    return bind.execute(
+        sa.text(f"SELECT last_key, rows_done, date_fin FROM {BACKFILL_TABLE} WHERE name = :name"),
+        {"name": name},
+    ).first()
+
+
+def _estimate_rows(bind: Connection, table: str, key: str, where: str | None, start_id: int) -> int:
+    condition = f"{key} > :start_id" + (f" AND ({where})" if where else "")
+    if bind.dialect.name == "mysql":
+        # Optimizer estimate: no scan of the table
+        plan = bind.execute(
+            sa.text(f"EXPLAIN SELECT {key} FROM {table} WHERE {condition}"), {"start_id": start_id}
+        ).mappings().first()
+        return int(plan["rows"] or 0) if plan is not None else 0
+    return bind.execute(
+        sa.text(f"SELECT COUNT(*) FROM {table} WHERE {condition}"), {"start_id": start_id}
+    ).scalar() or 0
+
+
+def backfill(
+    name: str,
+    table: str,
+    statement: str,
+    *,
+    key: str = "id",
+    where: str | None = None,
+    batch_size: int | None = None,
+    sleep_seconds: float | None = None,
+) -> int:
+    """Run `statement` over `table` by chunks of its `key`. Returns the rows written (all runs).
+
+    `where` only narrows the dry run estimate and the progress: the statement
+    must filter the rows it doesn't write itself.
+    """
+    batch_size = batch_size or _x_argument("backfill_batch_size", Config.BACKFILL_BATCH_SIZE.value)
+    sleep_seconds = (
+        sleep_seconds if sleep_seconds is not None
+        else _x_argument("backfill_sleep_seconds", float(Config.BACKFILL_SLEEP_SECONDS.value))
+    )
+    if _x_argument("backfill_dry_run", 0):
+        # Read only, in the migration's transaction (rolled back by env.py)
+        bind = op.get_bind()
+        checkpoint = _get_checkpoint(bind, name) if sa.inspect(bind).has_table(BACKFILL_TABLE) else None
+        if checkpoint is not None and checkpoint.date_fin is not None:
+            logger.info("%s: dry run, already completed (%s rows)", name, checkpoint.rows_done)
+            return checkpoint.rows_done
+        last_key = checkpoint.last_key if checkpoint is not None else 0
+        estimate = _estimate_rows(bind, table, key, where, last_key)
+        logger.info(
+            "%s: dry run, ~%s row(s) to backfill in %s from %s=%s, ~%s chunk(s) of %s; nothing written",
+            name, estimate, table, key, last_key, -(-estimate // batch_size), batch_size,
+        )
+        return checkpoint.rows_done if checkpoint is not None else 0
+
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        _ensure_backfill_table(bind)
+
+        checkpoint = _get_checkpoint(bind, name)
+        if checkpoint is not None and checkpoint.date_fin is not None:
+            logger.info("%s: already completed (%s rows), skipped", name, checkpoint.rows_done)
+            return checkpoint.rows_done
+
+        last_key, rows_done = (checkpoint.last_key, checkpoint.rows_done) if checkpoint is not None else (0, 0)
+        max_key = bind.execute(sa.text(f"SELECT MAX({key}) FROM {table}")).scalar() or 0
+        estimate = _estimate_rows(bind, table, key, where, last_key)
+        logger.info(
+            "%s: ~%s row(s) to backfill in %s from %s=%s, by chunks of %s",
+            name, estimate, table, key, last_key, batch_size,
+        )
+
+        if checkpoint is None:
+            bind.execute(
+                sa.text(f"INSERT INTO {BACKFILL_TABLE} (name, table_name) VALUES (:name, :table)"),
+                {"name": name, "table": table},
+            )
+
+        next_boundary = sa.text(
+            f"SELECT {key} FROM {table} WHERE {key} > :start_id ORDER BY {key} LIMIT 1 OFFSET :offset"
+        )
+        started_at, start_key, rows_this_run = time.monotonic(), last_key, 0
+        while last_key < max_key:
+            end_key = bind.execute(next_boundary, {"start_id": last_key, "offset": batch_size - 1}).scalar()
+            # Last (partial) chunk: up to the max key seen at the start (the app writes the new rows)
+            end_key = end_key if end_key is not None else max_key
+
+            written = bind.execute(sa.text(statement), {"start_id": last_key, "end_id": end_key}).rowcount
+            written = max(written or 0, 0)
+            last_key, rows_done, rows_this_run = end_key, rows_done + written, rows_this_run + written
+            bind.execute(
+                sa.text(
+                    f"UPDATE {BACKFILL_TABLE} SET last_key = :last_key, rows_done = :rows_done, "
+                    "date_modification = CURRENT_TIMESTAMP WHERE name = :name"
+                ),
+                {"last_key": last_key, "rows_done": rows_done, "name": name},
+            )
+
+            elapsed = time.monotonic() - started_at
+            keys_done = last_key - start_key
+            logger.info(
+                "%s: %s=%s/%s, %s row(s) written (%.0f rows/s, ~%.0fs left)",
+                name, key, last_key, max_key, rows_done,
+                rows_this_run / elapsed if elapsed > 0 else 0,
+                elapsed * (max_key - last_key) / keys_done if keys_done > 0 else 0,
+            )
+            if sleep_seconds:
+                time.sleep(sleep_seconds)
+
+        bind.execute(
+            sa.text(f"UPDATE {BACKFILL_TABLE} SET date_fin = CURRENT_TIMESTAMP WHERE name = :name"),
+            {"name": name},
+        )
+        logger.info("%s: completed, %s row(s) written", name, rows_done)
+        return rows_done
@@ -5,5 +5,64 @@ class Config(Enum):
     DEBUG = True
     DEFAULT_ITEMS_PER_PAGE = 10
     MAX_ITEMS_PER_PAGE = 100
+    MAX_BATCH_IDS = 100
     SIGNED_URL_EXPIRATION_PUBLIC_FILE = (24 * 7) * 60 * 60  # secs = 24 * 7 hours = 7 day
     SIGNED_URL_EXPIRATION_PRIVATE_FILE = 30 * 60  # 30 mins
+    REFERENCE_DATA_TTL_SECONDS = 5 * 60  # reference data (grade, nation...) cache
+    AUDIT_QUEUE_MAX_SIZE = 10_000  # events kept in memory before dropping
+    AUDIT_BATCH_SIZE = 500  # rows per INSERT into audit_event
+    AUDIT_FLUSH_INTERVAL_SECONDS = 2
+    AUDIT_PARTITIONS_MONTHS_AHEAD = 3  # monthly partitions created in advance
+    ARCHIVE_AFTER_DAYS = 90  # soft-deleted rows older than this go to the *_archive tables
+    ARCHIVE_CHUNK_SIZE = 200  # root rows moved per transaction
+    ARCHIVE_CHUNK_PAUSE_SECONDS = 0.5  # pause between two chunks
+    ARCHIVE_INTERVAL_SECONDS = 24 * 60 * 60
+    STATS_RECONCILE_INTERVAL_SECONDS = 60 * 60
+    STATS_RECONCILE_CHUNK_SIZE = 1000  # fideles refreshed per transaction by the reconciler
+    COUNT_CACHE_TTL_SECONDS = 30  # totals of the paginated lists (with_total)
+    COUNT_CACHE_MAX_ENTRIES = 2048
+    SYNC_DEFAULT_CHUNK_SIZE = 250  # rows per entity and per /sync call
+    SYNC_MAX_CHUNK_SIZE = 2000
+    SYNC_SETTLE_SECONDS = 5  # rows modified more recently are left to the next /sync call
+    BATCH_MAX_OPERATIONS = 50  # operations per POST /batch
+    BATCH_IDEMPOTENCY_RETENTION_DAYS = 60  # idempotency keys kept (replays answered) this long
+    CREDENTIAL_EXPIRATION_DAYS = 7  # signed QR credentials (see modules.verification.credential)
+    VALIDITY_INDEX_INTERVAL_SECONDS = 15 * 60  # rebuild of the valid matricules set
+    VALIDITY_INDEX_VERSIONS_KEPT = 96  # versions kept for the incremental downloads
+    VERIFICATION_LOOKUP_CACHE_TTL_SECONDS = 5 * 60  # scanned matricules profiles (below the photo URL expiry)
+    VERIFICATION_LOOKUP_CACHE_MAX_ENTRIES = 50_000
+    VERIFICATION_MAX_BATCH_CODES = 500  # codes per POST /verification/fidele/batch
+    VERIFICATION_SCAN_QUEUE_MAX_SIZE = 50_000  # scans buffered in memory before answering 503
+    VERIFICATION_SCAN_BATCH_SIZE = 1000  # rows per INSERT into verification_scan
+    VERIFICATION_SCAN_FLUSH_INTERVAL_SECONDS = 1
+    VERIFICATION_SCAN_MAX_PER_REQUEST = 500
+    VERIFICATION_SCAN_PARTITIONS_MONTHS_AHEAD = 3
+    CENSUS_FEED_POLL_INTERVAL_SECONDS = 2  # new census events read from the other workers' commits
+    CENSUS_FEED_SUBSCRIBER_QUEUE_SIZE = 256  # events waiting per dashboard before it's disconnected
+    CENSUS_FEED_HEARTBEAT_SECONDS = 15
+    CENSUS_FEED_BATCH_SIZE = 500  # events per read (and at most replayed on reconnection)
+    CENSUS_FEED_RETENTION_DAYS = 7
+    CENSUS_FEED_LATE_COMMIT_SECONDS = 30  # an event id skipped this long ago is taken as rolled back
+    LOG_LEVEL = "INFO"
+    LOG_QUEUE_MAX_SIZE = 10_000  # records waiting for the writer thread before dropping
+    LOG_DEBUG_SAMPLE_RATE = 0.01  # share of the DEBUG records written
+    LOG_ERROR_DEDUP_WINDOW_SECONDS = 60  # an identical error is written once per window
+    LOOP_WATCHDOG_INTERVAL_SECONDS = 0.25  # event loop heartbeat
+    LOOP_WATCHDOG_THRESHOLD_SECONDS = 0.1  # lag from which the loop is considered blocked (stack taken)
+    LOOP_WATCHDOG_STALLS_KEPT = 20  # last stalls shown in the metrics
+    PROFILER_MAX_DURATION_SECONDS = 60  # superadmin CPU/memory profiles
+    PROFILER_DEFAULT_RATE_HZ = 100
+    PROFILER_MAX_RATE_HZ = 1000
+    PROFILER_TRACEMALLOC_FRAMES = 10  # frames kept per allocation in memory profiles
+    TRACING_SAMPLE_RATE = 0.01  # requests traced when the caller didn't decide (traceparent)
+    TRACING_TAIL_LATENCY_MS = 1000  # other requests exported when this slow (None: not recorded)
+    TRACING_MAX_SPANS_PER_TRACE = 500
+    TRACING_STATEMENT_MAX_LENGTH = 300  # SQL kept in the db.query spans
+    TRACING_QUEUE_MAX_SIZE = 1000  # kept traces waiting for the exporter before dropping
+    TRACING_EXPORT_BATCH_SIZE = 50  # traces per export call
+    BACKFILL_BATCH_SIZE = 1000  # rows per chunk of the Alembic backfills (core.backfill)
+    BACKFILL_SLEEP_SECONDS = 0.1  # pause between two chunks
+    DEDUP_MIN_SCORE = 0.85  # duplicate fidele candidates from this score go to the review queue
+    DEDUP_MAX_BLOCK_SIZE = 200  # blocking keys shared by more fideles are ignored (not discriminating)
+    DEDUP_CHUNK_SIZE = 500  # fideles refreshed per transaction by the batch detection
+    DEDUP_CHUNK_PAUSE_SECONDS = 0.1  # between two chunks of the batch detection
@@ -1,6 +1,8 @@
 import os
+from contextvars import ContextVar
 from typing import AsyncGenerator
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker
 from sqlmodel.ext.asyncio.session import AsyncSession
 
@@ -14,6 +16,23 @@ Schema management is handled by Alembic migrations (see alembic/).
 _engine: AsyncEngine | None = None
 _SessionLocal: async_sessionmaker[AsyncSession] | None = None
 
+# Per-request SQL statements counter (see `start_query_count`). A list is used as a
+# mutable box so the count is shared with the tasks/greenlets spawned by the request.
+_query_count: ContextVar[list[int] | None] = ContextVar("db_query_count", default=None)
+
+
+def start_query_count() -> list[int]:
+    """Start counting the SQL statements executed in the current context."""
+    counter = [0]
+    _query_count.set(counter)
+    return counter
+
+
+def _count_query(*_args) -> None:
+    counter = _query_count.get()
+    if counter is not None:
+        counter[0] += 1
+
 
 def get_engine() -> AsyncEngine:
     global _engine
@@ -26,6 +45,7 @@ def get_engine() -> AsyncEngine:
 
     echo_db_queries = False #Config.DEBUG.value
     _engine = create_async_engine(db_url, echo=echo_db_queries)
+    event.listen(_engine.sync_engine, "before_cursor_execute", _count_query)
     return _engine
 
 
@@ -0,0 +1,193 @@
+"""Structured (JSON lines) logging, written off the event loop.
+
+The handlers of the "ejcsk" logger only put the records on a bounded queue: a
+`QueueListener` thread formats them as JSON and writes them to stdout. On the
+request path, logging costs the filters below and a queue put (a record is
+dropped, and counted, when the queue is full rather than blocking).
+
+- Every record carries the request context (see `set_log_request`): request id,
+  method, route template, actor (and trace id when traced).
+- DEBUG records are sampled (`Config.LOG_DEBUG_SAMPLE_RATE`).
+- An ERROR repeated within `Config.LOG_ERROR_DEDUP_WINDOW_SECONDS` (same logger,
+  message and exception type) is written once per window, with the number of
+  occurrences suppressed meanwhile (`repeated`).
+"""
+from __future__ import annotations
+
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+from fastapi import Request
+
+from core.config import Config
+
+logger = logging.getLogger("ejcsk")
+
+# (request id, request) of the request being handled (set by the logging middleware)
+_log_request: ContextVar[tuple[str, Request] | None] = ContextVar("log_request", default=None)
+
+# Attributes of every LogRecord: the other ones come from `extra=` and are written as fields
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: QueueListener | None = None
+_queue_handler: _DroppingQueueHandler | None = None
+_error_dedup_filter: _ErrorDedupFilter | None = None
+
+
+def set_log_request(request: Request) -> str:
+    """Attach `request` to the records logged while handling it. Returns its request id."""
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    _log_request.set((request_id, request))
+    return request_id
+
+
+# ============================================================================
+# REQUEST PATH (filters and queue handler)
+# ============================================================================
+
+class _RequestContextFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _log_request.get()
+        if context is None:
+            return True
+        request_id, request = context
+        record.request_id = request_id
+        record.method = request.method
+        # Route template (ex: /fidele/{id}) once routed, raw path before
+        route = request.scope.get("route")
+        record.route = getattr(route, "path", None) or request.url.path
+        current_fidele = getattr(request.state, "current_fidele", None)
+        if current_fidele is not None and str(current_fidele.sub).isdigit():
+            record.actor = int(current_fidele.sub)
+        # Set by the tracing middleware when the request is traced
+        trace_id = getattr(request.state, "trace_id", None)
+        if trace_id is not None:
+            record.trace_id = trace_id
+        return True
+
+
+class _DebugSamplingFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or random.random() < Config.LOG_DEBUG_SAMPLE_RATE.value
+
+
+class _ErrorDedupFilter(logging.Filter):
+    """Lets through one occurrence of an error per window; counts the other ones."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        # key -> (start of the window, occurrences suppressed in it)
+        self._windows: dict[tuple[Any, ...], tuple[float, int]] = {}
+        self.suppressed_records = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.ERROR:
+            return True
+        exc_type = record.exc_info[0].__name__ if record.exc_info and record.exc_info[0] else None
+        key = (record.name, record.msg, exc_type, record.pathname, record.lineno)
+        now = time.monotonic()
+        window = self._windows.get(key)
+        if window is not None and now - window[0] < Config.LOG_ERROR_DEDUP_WINDOW_SECONDS.value:
+            self._windows[key] = (window[0], window[1] + 1)
+            self.suppressed_records += 1
+            return False
+        if window is not None and window[1]:
+            record.repeated = window[1]
+        if len(self._windows) >= 1024:
+            self._windows.clear()
+        self._windows[key] = (now, 0)
+        return True
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """Never blocks the caller: a record that doesn't fit in the queue is dropped."""
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped_records = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The traceback must be rendered now, while its frames exist; the JSON is built by the listener
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped_records += 1
+
+
+# ============================================================================
+# LISTENER THREAD
+# ============================================================================
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(
+            (key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES
+        )
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def setup_logging() -> None:
+    """Route the "ejcsk" records through the queue to the writer thread (idempotent)."""
+    global _listener, _queue_handler, _error_dedup_filter
+    if _listener is not None:
+        return
+
+    log_queue: queue.Queue = queue.Queue(maxsize=Config.LOG_QUEUE_MAX_SIZE.value)
+    queue_handler = _DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(_DebugSamplingFilter())
+    error_dedup_filter = _ErrorDedupFilter()
+    queue_handler.addFilter(error_dedup_filter)
+    queue_handler.addFilter(_RequestContextFilter())
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+
+    logger.handlers = [queue_handler]
+    logger.setLevel(Config.LOG_LEVEL.value)
+    logger.propagate = False
+
+    _queue_handler, _error_dedup_filter = queue_handler, error_dedup_filter
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Write the queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def logging_metrics() -> dict[str, Any]:
+    return {
+        "queued": _queue_handler.queue.qsize() if _queue_handler is not None else 0,
+        "dropped": _queue_handler.dropped_records if _queue_handler is not None else 0,
+        "errors_suppressed": _error_dedup_filter.suppressed_records if _error_dedup_filter is not None else 0,
+    }
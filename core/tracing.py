@@ -0,0 +1,360 @@
+"""Request tracing: spans of the SQL statements, S3 calls, password hashing,
+JWT verification and response serialization of each request.
+
+The tracing middleware (see main) starts a trace per request, continuing the
+caller's one when it sends a W3C `traceparent` header. `span()` records a
+child of the current span; it does nothing outside a recorded trace.
+
+Sampling keeps the overhead low:
+- head: the caller's sampled flag, otherwise `Config.TRACING_SAMPLE_RATE` of the
+  requests are kept;
+- tail: the other requests are recorded too (in memory only) but exported only
+  when they took `Config.TRACING_TAIL_LATENCY_MS` or more, or failed (5xx).
+  None records the head sampled requests only.
+
+The kept traces are exported by a background thread, so the request path never
+waits on the exporter:
+- OTLP/HTTP (JSON encoding) when `OTEL_EXPORTER_OTLP_ENDPOINT` is set
+  (OpenTelemetry collector, Jaeger, Tempo...);
+- one JSON line per span appended to `TRACING_FILE_PATH` (offline testing);
+- or any `SpanExporter` given to `setup_tracing`.
+Without exporter nothing is recorded.
+"""
+from __future__ import annotations
+
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from core.config import Config
+from utils.utils import log
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attributes", "start_ns", "end_ns", "error")
+
+    def __init__(self, trace_id: str, parent_id: str | None, name: str, attributes: dict[str, Any]) -> None:
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: int | None = None
+        self.error: str | None = None
+
+    def end(self, error: BaseException | None = None) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Trace:
+    """Spans recorded for one request, exported together if the trace is kept."""
+
+    def __init__(self, trace_id: str, parent_id: str | None, sampled: bool) -> None:
+        self.trace_id = trace_id
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.spans: list[Span] = []
+        self.dropped_spans = 0
+
+
+_current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+# ============================================================================
+# SPANS
+# ============================================================================
+
+def start_span(name: str, **attributes: Any) -> Span | None:
+    """Child of the current span, to `end()` by the caller. None when not tracing."""
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    if len(trace.spans) >= Config.TRACING_MAX_SPANS_PER_TRACE.value:
+        trace.dropped_spans += 1
+        return None
+    parent = _current_span.get()
+    new_span = Span(trace.trace_id, parent.span_id if parent is not None else trace.parent_id, name, attributes)
+    trace.spans.append(new_span)
+    return new_span
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | None]:
+    """Record the block as a child of the current span (and the parent of the spans inside it)."""
+    new_span = start_span(name, **attributes)
+    if new_span is None:
+        yield None
+        return
+    token = _current_span.set(new_span)
+    try:
+        yield new_span
+    except BaseException as e:
+        new_span.end(e)
+        raise
+    finally:
+        new_span.end()
+        _current_span.reset(token)
+
+
+# SQL statements: the span can't live in the context var here (greenlet), it's kept on the execution context
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_db_span(conn, cursor, statement, parameters, context, executemany) -> None:
+    db_span = start_span(
+        "db.query",
+        **{"db.statement": statement[: Config.TRACING_STATEMENT_MAX_LENGTH.value], "db.executemany": executemany},
+    )
+    if db_span is not None and context is not None:
+        context._tracing_span = db_span
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_db_span(conn, cursor, statement, parameters, context, executemany) -> None:
+    db_span = getattr(context, "_tracing_span", None)
+    if db_span is not None:
+        db_span.end()
+
+
+@event.listens_for(Engine, "handle_error")
+def _fail_db_span(exception_context) -> None:
+    db_span = getattr(exception_context.execution_context, "_tracing_span", None)
+    if db_span is not None:
+        db_span.end(exception_context.original_exception)
+
+
+# ============================================================================
+# TRACES (one per request)
+# ============================================================================
+
+def start_trace(traceparent: str | None) -> Trace | None:
+    """Trace of the current request (continuing `traceparent`), or None when it's not recorded."""
+    if _processor is None:
+        return None
+    match = _TRACEPARENT.match(traceparent or "")
+    if match is not None and match.group(1) != "0" * 32:
+        trace_id, parent_id, sampled = match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+    else:
+        trace_id, parent_id = os.urandom(16).hex(), None
+        sampled = random.random() < Config.TRACING_SAMPLE_RATE.value
+    if not sampled and Config.TRACING_TAIL_LATENCY_MS.value is None:
+        return None
+    trace = Trace(trace_id, parent_id, sampled)
+    _current_trace.set(trace)
+    return trace
+
+
+def end_trace(trace: Trace, root_span: Span, failed: bool = False) -> None:
+    """Export the trace if it was head sampled, or is slow or failed (tail sampling)."""
+    root_span.end()
+    tail_latency_ms = Config.TRACING_TAIL_LATENCY_MS.value
+    if trace.dropped_spans:
+        root_span.attributes["tracing.dropped_spans"] = trace.dropped_spans
+    keep = (
+        trace.sampled
+        or failed
+        or (tail_latency_ms is not None and root_span.duration_ms >= tail_latency_ms)
+    )
+    if keep and _processor is not None:
+        _processor.submit(trace.spans)
+
+
+def traceparent(trace: Trace, current_span: Span) -> str:
+    return f"00-{trace.trace_id}-{current_span.span_id}-{'01' if trace.sampled else '00'}"
+
+
+# ============================================================================
+# EXPORT
+# ============================================================================
+
+class SpanExporter:
+    """Writes the spans of the kept traces somewhere. Called from the export thread only."""
+
+    def export(self, spans: list[Span]) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+class JsonFileSpanExporter(SpanExporter):
+    """One JSON object per span and per line, appended to `path`."""
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, spans: list[Span]) -> None:
+        self._file.write("".join(json.dumps(s.to_dict(), default=str) + "\n" for s in spans))
+        self._file.flush()
+
+    def shutdown(self) -> None:
+        self._file.close()
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpHttpSpanExporter(SpanExporter):
+    """OTLP over HTTP, JSON encoding (POST {endpoint}/v1/traces)."""
+
+    def __init__(self, endpoint: str, headers: dict[str, str] | None = None, service_name: str = "ejcsk-api") -> None:
+        self._url = endpoint if endpoint.rstrip("/").endswith("/v1/traces") else endpoint.rstrip("/") + "/v1/traces"
+        self._headers = {"Content-Type": "application/json", **(headers or {})}
+        self._service_name = service_name
+
+    def _otlp_span(self, exported: Span) -> dict[str, Any]:
+        otlp_span = {
+            "traceId": exported.trace_id,
+            "spanId": exported.span_id,
+            "name": exported.name,
+            # SERVER for the request span, INTERNAL for the others
+            "kind": 2 if exported.name.startswith("HTTP ") else 1,
+            "startTimeUnixNano": str(exported.start_ns),
+            "endTimeUnixNano": str(exported.end_ns or exported.start_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in exported.attributes.items()],
+            "status": {"code": 2, "message": exported.error} if exported.error else {"code": 1},
+        }
+        if exported.parent_id:
+            otlp_span["parentSpanId"] = exported.parent_id
+        return otlp_span
+
+    def export(self, spans: list[Span]) -> None:
+        body = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self._service_name}}]},
+                    "scopeSpans": [{"scope": {"name": "ejcsk"}, "spans": [self._otlp_span(s) for s in spans]}],
+                }
+            ]
+        }
+        request = urllib.request.Request(
+            self._url, data=json.dumps(body).encode(), headers=self._headers, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=10):
+            pass
+
+
+class _ExportProcessor:
+    """Bounded queue of kept traces, drained in batches by a background thread."""
+
+    def __init__(self, exporter: SpanExporter) -> None:
+        self._exporter = exporter
+        self._queue: queue.Queue[list[Span] | None] = queue.Queue(maxsize=Config.TRACING_QUEUE_MAX_SIZE.value)
+        self._thread = threading.Thread(target=self._run, name="tracing-export", daemon=True)
+        self.exported_traces = 0
+        self.dropped_traces = 0
+        self._thread.start()
+
+    def submit(self, spans: list[Span]) -> None:
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped_traces += 1
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while len(batch) < Config.TRACING_EXPORT_BATCH_SIZE.value:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                stopping = True
+                batch = [spans for spans in batch if spans is not None]
+            if not batch:
+                continue
+            try:
+                self._exporter.export([s for spans in batch for s in spans])
+                self.exported_traces += len(batch)
+            except Exception as e:
+                self.dropped_traces += len(batch)
+                log(e)
+
+    def shutdown(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        self._exporter.shutdown()
+
+
+_processor: _ExportProcessor | None = None
+
+
+def _exporter_from_env() -> SpanExporter | None:
+    otlp_endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+    if otlp_endpoint:
+        # Same format as the OpenTelemetry SDKs: "key1=value1,key2=value2"
+        headers = dict(
+            item.split("=", 1) for item in os.getenv("OTEL_EXPORTER_OTLP_HEADERS", "").split(",") if "=" in item
+        )
+        return OtlpHttpSpanExporter(otlp_endpoint, headers, os.getenv("OTEL_SERVICE_NAME", "ejcsk-api"))
+    file_path = os.getenv("TRACING_FILE_PATH")
+    if file_path:
+        return JsonFileSpanExporter(file_path)
+    return None
+
+
+def setup_tracing(exporter: SpanExporter | None = None) -> None:
+    """Start exporting with `exporter` (default: from the environment, see above)."""
+    global _processor
+    exporter = exporter or _exporter_from_env()
+    if exporter is None or _processor is not None:
+        return
+    _processor = _ExportProcessor(exporter)
+
+
+def stop_tracing() -> None:
+    """Export what is queued and stop the export thread."""
+    global _processor
+    if _processor is not None:
+        _processor.shutdown()
+        _processor = None
+
+
+def tracing_metrics() -> dict[str, Any]:
+    return {
+        "enabled": _processor is not None,
+        "exported_traces": _processor.exported_traces if _processor is not None else 0,
+        "dropped_traces": _processor.dropped_traces if _processor is not None else 0,
+    }
@@ -1,5 +1,6 @@
 # External modules
 import re
+import time
 from fastapi import Depends, FastAPI, Request
 from fastapi.exceptions import RequestValidationError, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
@@ -8,6 +9,19 @@ from pydantic import ValidationError
 from sqlalchemy.exc import IntegrityError, OperationalError
 
 from modules.oauth2.dependencies import get_token_payload_dependency
+from core.db import start_query_count
+from core.logger import logger, set_log_request, setup_logging, stop_logging
+from core.tracing import end_trace, setup_tracing, span, start_trace, stop_tracing
+from modules.audit import audit_writer, set_audit_request
+import modules.ancestry  # noqa: F401 (session hooks maintaining paroisse/direction.chemin)
+from modules.archive import soft_delete_archiver
+from modules.census_feed import census_feed_hub
+from modules.dedup import duplicate_detector
+from modules.loop_watchdog import loop_watchdog
+from modules.oauth2.password_pool import password_pool
+from modules.stats import stats_reconciler
+from modules.verification.scans import scan_ingestor
+from modules.verification.validity import validity_index_builder
 
 # Loading critic stuff needed accross diff local modules
 from dotenv import load_dotenv
@@ -23,6 +37,7 @@ from routers.utils.http_utils import (
     send409,
     send403,
     send401,
+    send503,
 )
 
 # models
@@ -37,15 +52,42 @@ from routers.direction import direction_router
 from routers.constant import constant_router
 from routers.oauth import oauth_router
 from routers.superadmin import superadmin_router
+from routers.stats import stats_router
+from routers.sync import sync_router
+from routers.batch import batch_router
+from routers.verification import verification_router
+from routers.recensement import recensement_router
+from routers.doublon import doublon_router
+
+setup_logging()
+setup_tracing()
 
 # Lifespan event handler
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup code
-    print("Starting up...")
+    logger.info("Starting up...")
+    await audit_writer.start()
+    await soft_delete_archiver.start()
+    await stats_reconciler.start()
+    await validity_index_builder.start()
+    await scan_ingestor.start()
+    await census_feed_hub.start()
+    await loop_watchdog.start(app)
     yield
     # Shutdown code 
-    print("Shutting down...")
+    logger.info("Shutting down...")
+    await loop_watchdog.stop()
+    password_pool.shutdown()
+    await duplicate_detector.stop()
+    await census_feed_hub.stop()
+    await scan_ingestor.stop()
+    await validity_index_builder.stop()
+    await stats_reconciler.stop()
+    await soft_delete_archiver.stop()
+    await audit_writer.stop()
+    stop_tracing()
+    stop_logging()
 
 app = FastAPI(
     title="EJCSK API",
@@ -63,6 +105,60 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# In debug, expose the number of SQL statements run by each request (round trips check)
+@app.middleware("http")
+async def db_query_count_middleware(request: Request, call_next):
+    if not Config.DEBUG.value:
+        return await call_next(request)
+
+    counter = start_query_count()
+    response = await call_next(request)
+    response.headers["X-DB-Query-Count"] = str(counter[0])
+    return response
+
+# Actor and route of the audit events recorded while handling the request
+@app.middleware("http")
+async def audit_request_middleware(request: Request, call_next):
+    set_audit_request(request)
+    return await call_next(request)
+
+# Spans of the request (see core.tracing), continuing the caller's W3C traceparent
+@app.middleware("http")
+async def tracing_middleware(request: Request, call_next):
+    trace = start_trace(request.headers.get("traceparent"))
+    if trace is None:
+        return await call_next(request)
+
+    request.state.trace_id = trace.trace_id
+    failed = True
+    with span(f"HTTP {request.method}", **{"http.method": request.method}) as root_span:
+        try:
+            response = await call_next(request)
+            failed = response.status_code >= 500
+            root_span.attributes["http.status_code"] = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            root_span.attributes["http.route"] = getattr(route, "path", None) or request.url.path
+            root_span.name = f"HTTP {request.method} {root_span.attributes['http.route']}"
+            end_trace(trace, root_span, failed)
+
+# Request id, route, actor of the log records; one access record per request (added last: outermost)
+@app.middleware("http")
+async def logging_middleware(request: Request, call_next):
+    request_id = set_log_request(request)
+    started_at = time.perf_counter()
+    response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
+    logger.info(
+        "request",
+        extra={
+            "status": response.status_code,
+            "latency_ms": round((time.perf_counter() - started_at) * 1000, 1),
+        },
+    )
+    return response
+
 # 401: Uncontroled or automatically generated
 @app.exception_handler(401)
 def exc_handler_401(request: Request, e: HTTPException):
@@ -73,6 +169,12 @@ def exc_handler_401(request: Request, e: HTTPException):
 def exc_handler_403(request: Request, e: HTTPException):
     return send403(str(e) or None)
 
+# 503: Overloaded (ex: password pool saturated), the client retries after Retry-After
+@app.exception_handler(503)
+def exc_handler_503(request: Request, e: HTTPException):
+    retry_after = (e.headers or {}).get("Retry-After")
+    return send503(e.detail or None, retry_after=int(retry_after) if retry_after else None)
+
 # 404: Resource not found
 @app.exception_handler(404)
 def exc_handler_404(request: Request, e: HTTPException):
@@ -176,6 +278,12 @@ app.include_router(adresse_router, prefix="/adresse")
 app.include_router(contact_router, prefix="/contact")
 app.include_router(constant_router, prefix="/constant")
 app.include_router(superadmin_router, prefix="/superadmin")
+app.include_router(stats_router, prefix="/stats")
+app.include_router(sync_router, prefix="/sync")
+app.include_router(batch_router, prefix="/batch")
+app.include_router(verification_router, prefix="/verification")
+app.include_router(recensement_router, prefix="/recensement")
+app.include_router(doublon_router, prefix="/doublon")
 
 
 # start the app with: uvicorn main:app --reload
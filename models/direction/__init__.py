@@ -27,11 +27,15 @@ class Direction(DirectionBase, BaseModelClass, table=True):
             nullable=False,
         )
     )
+    # Ascendance géographique de la portée (id_document_type, id_document), voir modules.ancestry
+    chemin: str | None = SQLModelField(default=None, max_length=255)
 
     __table_args__ = (
         Index("idx_direction_doc", "id_document_type", "id_document"),
         Index("idx_direction_structure", "id_structure"),
         Index("idx_direction_est_supprimee", "est_supprimee"),
+        Index("idx_direction_sync", "date_modification", "id"),
+        Index("idx_direction_chemin", "chemin", "id_structure"),
     )
 
     structure: Structure = Relationship()
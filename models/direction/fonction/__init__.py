@@ -44,6 +44,7 @@ class DirectionFonction(DirectionFonctionBase, BaseModelClass, table=True):
         Index("idx_direction_fonction_current", "id_direction", "est_actif"),
         Index("idx_direction_fonction_fidele", "id_fidele"),
         Index("idx_direction_fonction_est_supprimee", "est_supprimee"),
+        Index("idx_direction_fonction_sync", "date_modification", "id"),
     )
 
     direction: Direction = Relationship()
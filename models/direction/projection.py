@@ -23,6 +23,7 @@ class DirectionProjFlat(BaseModel):
     id_document_type: int
     id_document: int
     nom: str | None
+    chemin: str | None = None
 
     est_supprimee: bool
     date_suppression: datetime | None
@@ -106,6 +106,16 @@ class Fidele(FideleBase, BaseModelClass, table=True):
         Index("idx_fidele_nom", "nom"),
         Index("idx_fidele_grade", "id_grade"),
         Index("idx_fidele_est_supprimee", "est_supprimee"),
+        # GET /fidele filters (see build_fidele_filters_conditions), pages ordered by id
+        Index("idx_fidele_liste_document_statut", "est_supprimee", "id_document_statut", "id"),
+        Index("idx_fidele_liste_grade", "est_supprimee", "id_grade", "id"),
+        Index("idx_fidele_liste_fidele_type", "est_supprimee", "id_fidele_type", "id"),
+        Index("idx_fidele_liste_sexe", "est_supprimee", "sexe", "id"),
+        Index("idx_fidele_liste_nationalite", "est_supprimee", "id_nation_nationalite", "id"),
+        Index("idx_fidele_liste_date_naissance", "est_supprimee", "date_naissance"),
+        Index("idx_fidele_liste_rencensement_statut", "est_supprimee", "rencensement_statut"),
+        # GET /sync watermarks
+        Index("idx_fidele_sync", "date_modification", "id"),
     )
 
     # Relationships
@@ -196,6 +206,8 @@ class FideleStructure(FideleStructureBase, BaseModelClass, table=True):
         Index("idx_fidele_structure_fidele", "id_fidele"),
         Index("idx_fidele_structure_structure", "id_structure"),
         Index("idx_fidele_structure_est_supprimee", "est_supprimee"),
+        Index("idx_fidele_structure_membres", "id_structure", "est_supprimee", "id_fidele"),
+        Index("idx_fidele_structure_sync", "date_modification", "id"),
     )
 
     # Relationships
@@ -234,6 +246,8 @@ class FideleParoisse(FideleParoisseBase, BaseModelClass, table=True):
         Index("idx_fidele_paroisse_fidele", "id_fidele"),
         Index("idx_fidele_paroisse_paroisse", "id_paroisse"),
         Index("idx_fidele_paroisse_est_supprimee", "est_supprimee"),
+        Index("idx_fidele_paroisse_membres", "id_paroisse", "est_supprimee", "id_fidele"),
+        Index("idx_fidele_paroisse_sync", "date_modification", "id"),
     )
 
     fidele: Fidele = Relationship(back_populates="paroisses")
@@ -1,6 +1,6 @@
 # External modules
 from sqlmodel import SQLModel
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 from datetime import date
 from models.constants.types import GradeEnum, FideleTypeEnum
 from utils.utils import PydanticField
@@ -124,6 +124,34 @@ class FideleUpdate(BaseModel):
 class FideleStatutUpdate(BaseModel):
     id_document_statut: int = PydanticField(..., **FIDELE_FIELDS_CONFIG["id_document_statut"])
 
+
+# ---- FIDELE LIST FILTERS -----#
+class FideleFilters(BaseModel):
+    """Filtres de GET /fidele (tous optionnels, combinés en ET)"""
+    id_grade: GradeEnum | None = PydanticField(None, **FIDELE_FIELDS_CONFIG["id_grade"])
+    id_fidele_type: FideleTypeEnum | None = PydanticField(None, **FIDELE_FIELDS_CONFIG["id_fidele_type"])
+    id_document_statut: int | None = PydanticField(None, **FIDELE_FIELDS_CONFIG["id_document_statut"])
+    sexe: Gender | None = PydanticField(None, **FIDELE_FIELDS_CONFIG["sexe"])
+    id_nation_nationalite: int | None = PydanticField(None, **FIDELE_FIELDS_CONFIG["id_nation_nationalite"])
+    date_naissance_min: date | None = PydanticField(None, description="Né(e) à partir de cette date (incluse)")
+    date_naissance_max: date | None = PydanticField(None, description="Né(e) jusqu'à cette date (incluse)")
+    rencensement_statut_min: int | None = PydanticField(None, ge=0, le=100, description="Progression minimale du recensement (%)")
+    rencensement_statut_max: int | None = PydanticField(None, ge=0, le=100, description="Progression maximale du recensement (%)")
+    id_paroisse: int | None = PydanticField(None, description="Membre (non supprimé) de cette paroisse")
+    id_structure: int | None = PydanticField(None, description="Membre (non supprimé) de cette structure")
+
+    @model_validator(mode="after")
+    def check_ranges(self) -> "FideleFilters":
+        if self.date_naissance_min and self.date_naissance_max and self.date_naissance_min > self.date_naissance_max:
+            raise ValueError("date_naissance_min doit être antérieure à date_naissance_max")
+        if (
+            self.rencensement_statut_min is not None
+            and self.rencensement_statut_max is not None
+            and self.rencensement_statut_min > self.rencensement_statut_max
+        ):
+            raise ValueError("rencensement_statut_min doit être inférieur à rencensement_statut_max")
+        return self
+
 class FideleStructureBase(BaseModel):
     est_structure_principale: bool = PydanticField(
         False,
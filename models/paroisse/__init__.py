@@ -22,10 +22,14 @@ class Paroisse(ParoisseBase, BaseModelClass, table=True):
     __tablename__ = "paroisse"
 
     code_matriculation: str | None = SQLModelField(default=None, max_length=10)
+    # Ascendance géographique, ex: /GENERALE/7:CONTINENT/42:NATION/1003:PAROISSE (voir modules.ancestry)
+    chemin: str | None = SQLModelField(default=None, max_length=255)
 
     __table_args__ = (
         UniqueConstraint("nom", name="uq_paroisse_nom"),
         UniqueConstraint("code_matriculation", name="uq_paroisse_code_matriculation"),
+        Index("idx_paroisse_sync", "date_modification", "id"),
+        Index("idx_paroisse_chemin", "chemin"),
     )
     
     # Relationships
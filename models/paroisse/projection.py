@@ -12,6 +12,7 @@ class ParoisseProjFlat(BaseModel):
     id: int
     nom: str
     code_matriculation: str | None = None
+    chemin: str | None = None
     
     est_supprimee: bool
     date_suppression: datetime | None = None
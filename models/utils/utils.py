@@ -9,6 +9,7 @@ from sqlalchemy import text
 from utils.utils import SQLModelField
 
 from modules.oauth2.utils import password_context
+from modules.oauth2.password_pool import hash_password, verify_password
 
 class BaseModelClass(SQLModel):
     """Base class with soft delete support"""
@@ -92,6 +93,16 @@ class Password(str):
     def check(cls, plain: str, hashed: str | None):
         return password_context.verify(plain, hashed)
 
+    # In the request handlers: off the event loop (see modules.oauth2.password_pool)
+    @classmethod
+    async def hash_async(cls, password: str | None) -> str | None:
+        return await hash_password(password) if password else None
+
+    @classmethod
+    async def check_async(cls, plain: str, hashed: str | None) -> tuple[bool, str | None]:
+        """(is valid, new hash to store when the Argon2 parameters changed)"""
+        return await verify_password(plain, hashed)
+
 
 PSW_FIELD_PROPS = {
     "min_length": 8,
@@ -0,0 +1,277 @@
+"""Materialized geographic ancestry of the paroisses and of the direction scopes.
+
+`Paroisse.chemin` and `Direction.chemin` hold the path from the generale down
+to the paroisse (or to the scope of the direction):
+
+    /GENERALE/7:CONTINENT/42:NATION/1003:PAROISSE
+
+The ancestors are read from that one column (`parse_ancestry_path`,
+`ancestor_paths`), and a subtree ("everything under Europe") is a prefix:
+`in_subtree(Paroisse.chemin, path)` is one range scan of the chemin index.
+
+The paroisse's place comes from its adresse (Adresse -> Nation -> Continent).
+When a transaction creating or changing an adresse, a paroisse, a direction or
+a nation's continent commits, the paths are recomputed in the same transaction.
+A paroisse without adresse (and its directions) has no path.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Iterable
+
+from sqlalchemy import Connection, bindparam, event, inspect, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.sql.elements import ColumnElement
+
+from models.adresse import Adresse, Nation
+from models.constants.types import DocumentTypeEnum
+from models.direction import Direction
+from models.paroisse import Paroisse
+
+_PENDING_KEY = "ancestry_pending"
+
+# Levels of the path, from the root
+_LEVELS = (DocumentTypeEnum.CONTINENT, DocumentTypeEnum.NATION, DocumentTypeEnum.PAROISSE)
+
+GENERALE_PATH = f"/{DocumentTypeEnum.GENERALE.name}"
+
+
+# ============================================================================
+# PATHS
+# ============================================================================
+
+def ancestry_path(
+    id_continent: int | None = None,
+    id_nation: int | None = None,
+    id_paroisse: int | None = None,
+) -> str:
+    """Path down to the last given level (GENERALE_PATH when none is given)."""
+    path = GENERALE_PATH
+    for document_type, id_document in zip(_LEVELS, (id_continent, id_nation, id_paroisse)):
+        if id_document is None:
+            break
+        path += f"/{id_document}:{document_type.name}"
+    return path
+
+
+def parse_ancestry_path(path: str) -> list[tuple[DocumentTypeEnum, int | None]]:
+    """(id_document_type, id_document) from the generale (id None) down to the end of `path`."""
+    scopes: list[tuple[DocumentTypeEnum, int | None]] = [(DocumentTypeEnum.GENERALE, None)]
+    for segment in path.removeprefix(GENERALE_PATH).split("/")[1:]:
+        id_document, document_type = segment.split(":", 1)
+        scopes.append((DocumentTypeEnum[document_type], int(id_document)))
+    return scopes
+
+
+def ancestor_paths(path: str) -> list[str]:
+    """Paths of the ancestors of `path` (itself excluded), from the generale down."""
+    segments = path.split("/")
+    return ["/".join(segments[:end]) for end in range(2, len(segments))]
+
+
+def ancestry_document_id(path: str | None, document_type: DocumentTypeEnum) -> int | None:
+    """Id of the `document_type` ancestor (continent, nation...) in `path`."""
+    if not path:
+        return None
+    return dict(parse_ancestry_path(path)).get(document_type)
+
+
+def in_subtree(column: Any, path: str) -> ColumnElement[bool]:
+    """`column` is `path` or below it (the ':TYPE' ending each segment keeps 7 from matching 70)."""
+    return column.like(f"{path}%")
+
+
+# ============================================================================
+# REFRESH
+# ============================================================================
+
+def _update_paths(connection: Connection, model: type, paths: dict[int, str | None]) -> None:
+    if not paths:
+        return
+    table = model.__table__
+    connection.execute(
+        update(table)
+        .where(table.c.id == bindparam("b_id"))
+        .values(chemin=bindparam("b_chemin"), date_modification=datetime.now(timezone.utc)),
+        [{"b_id": id_row, "b_chemin": path} for id_row, path in paths.items()],
+    )
+
+
+def refresh_paroisse_ancestry(connection: Connection, ids: Iterable[int]) -> dict[int, str | None]:
+    """Recompute the path of the paroisses `ids`. Returns the changed ones."""
+    ids = set(ids)
+    if not ids:
+        return {}
+    rows = connection.execute(
+        select(Paroisse.id, Paroisse.chemin, Nation.id_continent, Nation.id)
+        .select_from(Paroisse)
+        .outerjoin(
+            Adresse,
+            (Adresse.id_document_type == DocumentTypeEnum.PAROISSE.value)
+            & (Adresse.id_document == Paroisse.id)
+            & (Adresse.est_supprimee == False),
+        )
+        .outerjoin(Nation, Nation.id == Adresse.id_nation)
+        .where(Paroisse.id.in_(ids))
+    )
+    changed = {}
+    for id_paroisse, chemin, id_continent, id_nation in rows:
+        path = ancestry_path(id_continent, id_nation, id_paroisse) if id_nation is not None else None
+        if path != chemin:
+            changed[id_paroisse] = path
+    _update_paths(connection, Paroisse, changed)
+    return changed
+
+
+def refresh_direction_ancestry(connection: Connection, ids: Iterable[int]) -> dict[int, str | None]:
+    """Recompute the path of the scope of the directions `ids`. Returns the changed ones."""
+    ids = set(ids)
+    if not ids:
+        return {}
+    directions = connection.execute(
+        select(Direction.id, Direction.chemin, Direction.id_document_type, Direction.id_document)
+        .where(Direction.id.in_(ids))
+    ).all()
+
+    def _ids_of(document_type: DocumentTypeEnum) -> set[int]:
+        return {d.id_document for d in directions if d.id_document_type == document_type.value}
+
+    paroisse_paths, nation_continents = {}, {}
+    if paroisse_ids := _ids_of(DocumentTypeEnum.PAROISSE):
+        paroisse_paths = dict(connection.execute(
+            select(Paroisse.id, Paroisse.chemin).where(Paroisse.id.in_(paroisse_ids))
+        ).all())
+    if nation_ids := _ids_of(DocumentTypeEnum.NATION):
+        nation_continents = dict(connection.execute(
+            select(Nation.id, Nation.id_continent).where(Nation.id.in_(nation_ids))
+        ).all())
+
+    changed = {}
+    for direction in directions:
+        document_type, id_document = direction.id_document_type, direction.id_document
+        if document_type == DocumentTypeEnum.PAROISSE.value:
+            path = paroisse_paths.get(id_document)
+        elif document_type == DocumentTypeEnum.NATION.value and id_document in nation_continents:
+            path = ancestry_path(nation_continents[id_document], id_document)
+        elif document_type == DocumentTypeEnum.CONTINENT.value:
+            path = ancestry_path(id_document)
+        elif document_type == DocumentTypeEnum.GENERALE.value:
+            path = GENERALE_PATH
+        else:
+            # Scopes outside the geography (ville, province...)
+            path = None
+        if path != direction.chemin:
+            changed[direction.id] = path
+    _update_paths(connection, Direction, changed)
+    return changed
+
+
+def refresh_ancestry(
+    connection: Connection,
+    *,
+    paroisse_ids: Iterable[int] = (),
+    direction_ids: Iterable[int] = (),
+    nation_ids: Iterable[int] = (),
+) -> tuple[dict[int, str | None], dict[int, str | None]]:
+    """Refresh the paths depending on the given rows. Returns the changed (paroisse, direction) paths."""
+    paroisse_ids, direction_ids, nation_ids = set(paroisse_ids), set(direction_ids), set(nation_ids)
+    if nation_ids:
+        paroisse_ids.update(
+            connection.execute(
+                select(Adresse.id_document).where(
+                    (Adresse.id_document_type == DocumentTypeEnum.PAROISSE.value)
+                    & Adresse.id_nation.in_(nation_ids)
+                )
+            ).scalars()
+        )
+        direction_ids.update(
+            connection.execute(
+                select(Direction.id).where(
+                    (Direction.id_document_type == DocumentTypeEnum.NATION.value)
+                    & Direction.id_document.in_(nation_ids)
+                )
+            ).scalars()
+        )
+
+    paroisse_paths = refresh_paroisse_ancestry(connection, paroisse_ids)
+    if paroisse_paths:
+        direction_ids.update(
+            connection.execute(
+                select(Direction.id).where(
+                    (Direction.id_document_type == DocumentTypeEnum.PAROISSE.value)
+                    & Direction.id_document.in_(list(paroisse_paths))
+                )
+            ).scalars()
+        )
+    return paroisse_paths, refresh_direction_ancestry(connection, direction_ids)
+
+
+# ============================================================================
+# SESSION HOOKS
+# ============================================================================
+
+def _changed(instance: Any, names: tuple[str, ...]) -> bool:
+    state = inspect(instance)
+    return any(state.attrs[name].history.has_changes() for name in names)
+
+
+def _values(instance: Any, name: str) -> set[Any]:
+    """Current and previous values of an attribute."""
+    history = inspect(instance).attrs[name].history
+    return {*history.unchanged, *history.added, *history.deleted}
+
+
+def _collect(pending: dict[str, set[Any]], instance: Any, is_dirty: bool) -> None:
+    if isinstance(instance, Adresse):
+        if is_dirty and not _changed(instance, ("id_nation", "id_document_type", "id_document", "est_supprimee")):
+            return
+        if DocumentTypeEnum.PAROISSE.value in _values(instance, "id_document_type"):
+            pending["paroisse"].update(_values(instance, "id_document"))
+    elif isinstance(instance, Paroisse) and not is_dirty:
+        pending["paroisse"].add(instance.id)
+    elif isinstance(instance, Direction):
+        if not is_dirty or _changed(instance, ("id_document_type", "id_document")):
+            pending["direction"].add(instance.id)
+    elif isinstance(instance, Nation) and is_dirty and _changed(instance, ("id_continent",)):
+        pending["nation"].add(instance.id)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_ancestry_changes(session: Session, _flush_context) -> None:
+    pending: dict[str, set[Any]] = {"paroisse": set(), "direction": set(), "nation": set()}
+    for instance in (*session.new, *session.deleted):
+        _collect(pending, instance, is_dirty=False)
+    for instance in session.dirty:
+        _collect(pending, instance, is_dirty=True)
+
+    if any(pending.values()):
+        stored = session.info.setdefault(_PENDING_KEY, {kind: set() for kind in pending})
+        for kind, ids in pending.items():
+            stored[kind].update(ids - {None})
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_ancestry(session: Session) -> None:
+    # The commit flushes after this hook: flush now so the last changes are collected too
+    session.flush()
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    paroisse_paths, direction_paths = refresh_ancestry(
+        session.connection(),
+        paroisse_ids=pending["paroisse"],
+        direction_ids=pending["direction"],
+        nation_ids=pending["nation"],
+    )
+    # Written with Core: the loaded instances get the new paths too
+    for model, paths in ((Paroisse, paroisse_paths), (Direction, direction_paths)):
+        for id_row, path in paths.items():
+            instance = session.identity_map.get(session.identity_key(model, id_row))
+            if instance is not None:
+                set_committed_value(instance, "chemin", path)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_ancestry_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,297 @@
+"""Archival of the soft-deleted rows into the cold `<table>_archive` tables.
+
+Rows soft-deleted for more than `Config.ARCHIVE_AFTER_DAYS` are moved (INSERT ...
+SELECT then DELETE) together with their dependent rows, by chunks of
+`Config.ARCHIVE_CHUNK_SIZE` roots, one transaction per chunk and a pause between
+chunks so the job never holds long locks on the hot tables. The hot tables (and
+their indexes) then only hold the live data plus the recent deletions.
+
+`restore_archived_resource` moves a row and its dependents back: the restore_*
+endpoints call it when the row isn't in the hot table anymore.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, NamedTuple
+
+from fastapi import HTTPException
+from sqlalchemy import Table, and_, delete, exists, insert, literal, or_, select
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import Config
+from core.db import get_sessionmaker
+from models.adresse import Adresse
+from models.constants.types import DocumentTypeEnum
+from models.contact import Contact
+from models.direction import Direction
+from models.direction.fonction import DirectionFonction
+from models.fidele import (
+    Fidele,
+    FideleBapteme,
+    FideleFamille,
+    FideleOccupation,
+    FideleOrigine,
+    FideleParoisse,
+    FideleRecensementEtape,
+    FideleStructure,
+)
+from models.paroisse import Paroisse
+from modules.archive.models import ARCHIVE_TABLES
+from modules.batch import purge_batch_operations
+from modules.file.models import File
+from utils.utils import log
+
+
+class ArchiveLink(NamedTuple):
+    """Rows of `model` pointing to a root through `column` (and `document_type` when polymorphic)."""
+    model: type[SQLModel]
+    column: str
+    document_type: DocumentTypeEnum | None = None
+
+
+class ArchivePlan(NamedTuple):
+    # Moved along with the root
+    dependents: tuple[ArchiveLink, ...] = ()
+    # Hot rows that would lose their reference (ON DELETE SET NULL, polymorphic): the root stays hot
+    blockers: tuple[ArchiveLink, ...] = ()
+
+
+def _document_links(document_type: DocumentTypeEnum) -> tuple[ArchiveLink, ...]:
+    return tuple(ArchiveLink(model, "id_document", document_type) for model in (Adresse, Contact, File))
+
+
+ARCHIVE_PLANS: dict[type[SQLModel], ArchivePlan] = {
+    Fidele: ArchivePlan(
+        dependents=(
+            ArchiveLink(FideleStructure, "id_fidele"),
+            ArchiveLink(FideleParoisse, "id_fidele"),
+            ArchiveLink(FideleBapteme, "id_fidele"),
+            ArchiveLink(FideleFamille, "id_fidele"),
+            ArchiveLink(FideleOrigine, "id_fidele"),
+            ArchiveLink(FideleOccupation, "id_fidele"),
+            ArchiveLink(FideleRecensementEtape, "id_fidele"),
+            ArchiveLink(DirectionFonction, "id_fidele"),
+            *_document_links(DocumentTypeEnum.FIDELE),
+        ),
+        blockers=(ArchiveLink(Fidele, "id_fidele_recenseur"),),
+    ),
+    Paroisse: ArchivePlan(
+        dependents=(
+            ArchiveLink(FideleParoisse, "id_paroisse"),
+            *_document_links(DocumentTypeEnum.PAROISSE),
+        ),
+        blockers=(
+            ArchiveLink(FideleBapteme, "id_paroisse"),
+            ArchiveLink(Direction, "id_document", DocumentTypeEnum.PAROISSE),
+        ),
+    ),
+    Direction: ArchivePlan(dependents=(ArchiveLink(DirectionFonction, "id_direction"),)),
+    DirectionFonction: ArchivePlan(),
+    FideleStructure: ArchivePlan(),
+    FideleParoisse: ArchivePlan(),
+}
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def _link_condition(table: Table, link: ArchiveLink, ids: list[int]) -> ColumnElement[bool]:
+    condition = table.c[link.column].in_(ids)
+    if link.document_type is not None:
+        condition = and_(table.c.id_document_type == link.document_type.value, condition)
+    return condition
+
+
+def _parents_exist(hot: Table, source: Table, skip_column: str | None = None) -> list[ColumnElement[bool]]:
+    """Conditions keeping the `source` rows whose archivable parents (FKs of `hot`) are hot."""
+    conditions = []
+    for foreign_key in hot.foreign_keys:
+        column = foreign_key.parent.name
+        parent = foreign_key.column.table
+        if column == skip_column or parent.name not in ARCHIVE_TABLES:
+            continue
+        parent = parent.alias()
+        conditions.append(
+            or_(
+                source.c[column].is_(None),
+                exists().where(parent.c[foreign_key.column.name] == source.c[column]),
+            )
+        )
+    return conditions
+
+
+async def _move_rows(
+    session: AsyncSession,
+    source: Table,
+    target: Table,
+    conditions: list[ColumnElement[bool]],
+    archived_at: datetime | None = None,
+) -> int:
+    """INSERT ... SELECT the matching rows of `source` into `target`, then DELETE them from `source`."""
+    hot = target if archived_at is None else source
+    columns = [column.name for column in hot.columns]
+    selected = [source.c[name] for name in columns]
+    if archived_at is not None:
+        columns.append("date_archivage")
+        selected.append(literal(archived_at))
+
+    await session.execute(insert(target).from_select(columns, select(*selected).where(*conditions)))
+    result = await session.execute(delete(source).where(*conditions))
+    return result.rowcount
+
+
+# ============================================================================
+# ARCHIVE
+# ============================================================================
+
+async def _archive_chunk(session: AsyncSession, model: type[SQLModel], cutoff: datetime) -> int:
+    hot = model.__table__
+    plan = ARCHIVE_PLANS[model]
+
+    statement = select(hot.c.id).where(
+        hot.c.est_supprimee == True,
+        hot.c.date_suppression < cutoff,
+    )
+    for blocker in plan.blockers:
+        blocking = blocker.model.__table__.alias()
+        condition = blocking.c[blocker.column] == hot.c.id
+        if blocker.document_type is not None:
+            condition = and_(blocking.c.id_document_type == blocker.document_type.value, condition)
+        statement = statement.where(~exists().where(condition))
+    # SKIP LOCKED: two workers running the job never pick the same rows
+    statement = (
+        statement.order_by(hot.c.id)
+        .limit(Config.ARCHIVE_CHUNK_SIZE.value)
+        .with_for_update(skip_locked=True)
+    )
+    ids = (await session.execute(statement)).scalars().all()
+    if not ids:
+        return 0
+
+    archived_at = datetime.now(timezone.utc)
+    # Dependents first: deleting the root would cascade on them
+    for dependent in plan.dependents:
+        table = dependent.model.__table__
+        await _move_rows(
+            session, table, ARCHIVE_TABLES[table.name], [_link_condition(table, dependent, ids)], archived_at
+        )
+    await _move_rows(session, hot, ARCHIVE_TABLES[hot.name], [hot.c.id.in_(ids)], archived_at)
+    return len(ids)
+
+
+async def archive_soft_deleted_rows(older_than_days: int | None = None) -> dict[str, int]:
+    """Archive the roots soft-deleted more than `older_than_days` ago. Returns the count per table."""
+    if older_than_days is None:
+        older_than_days = Config.ARCHIVE_AFTER_DAYS.value
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+
+    archived = {}
+    for model in ARCHIVE_PLANS:
+        total = 0
+        while True:
+            async with get_sessionmaker()() as session:
+                count = await _archive_chunk(session, model, cutoff)
+                await session.commit()
+            total += count
+            if count < Config.ARCHIVE_CHUNK_SIZE.value:
+                break
+            # Throttle: leave room to the requests between two chunks
+            await asyncio.sleep(Config.ARCHIVE_CHUNK_PAUSE_SECONDS.value)
+        archived[model.__tablename__] = total
+    return archived
+
+
+# ============================================================================
+# RESTORE
+# ============================================================================
+
+async def restore_archived_resource(
+    session: AsyncSession,
+    model: type[SQLModel],
+    id: int,
+    filters: dict[str, Any] | None = None,
+) -> bool:
+    """Move the archived row `id` of `model` (and its dependents) back to the hot tables.
+
+    Returns False when the row isn't archived (or doesn't match `filters`). Dependents still referencing another
+    archived root (ex: the fidele_paroisse of an archived paroisse) stay archived;
+    they come back with that root. Doesn't commit.
+    """
+    hot = model.__table__
+    archive = ARCHIVE_TABLES[hot.name]
+
+    conditions = [archive.c.id == id]
+    for field, value in (filters or {}).items():
+        conditions.append(archive.c[field] == value)
+
+    archived = (await session.execute(select(archive.c.id).where(*conditions))).first()
+    if archived is None:
+        return False
+
+    parents = _parents_exist(hot, archive)
+    if parents:
+        restorable = await session.execute(select(archive.c.id).where(archive.c.id == id, *parents))
+        if restorable.first() is None:
+            raise HTTPException(
+                status_code=409,
+                detail=f"{model.__name__} {id} references an archived resource: restore it first",
+            )
+
+    await _move_rows(session, archive, hot, [archive.c.id == id])
+    for dependent in ARCHIVE_PLANS[model].dependents:
+        table = dependent.model.__table__
+        dependent_archive = ARCHIVE_TABLES[table.name]
+        await _move_rows(
+            session,
+            dependent_archive,
+            table,
+            [
+                _link_condition(dependent_archive, dependent, [id]),
+                *_parents_exist(table, dependent_archive, skip_column=dependent.column),
+            ],
+        )
+    return True
+
+
+# ============================================================================
+# JOB
+# ============================================================================
+
+class SoftDeleteArchiver:
+    """Background task running `archive_soft_deleted_rows` every `Config.ARCHIVE_INTERVAL_SECONDS`.
+
+    Also forgets the expired /batch idempotency keys.
+    """
+
+    def __init__(self) -> None:
+        self._task: asyncio.Task | None = None
+        self.last_run: float | None = None
+        self.last_result: dict[str, int] = {}
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="soft-delete-archiver")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(Config.ARCHIVE_INTERVAL_SECONDS.value)
+            try:
+                self.last_result = await archive_soft_deleted_rows()
+                self.last_result["batch_operation"] = await purge_batch_operations()
+                self.last_run = time.time()
+            except Exception as e:
+                log(e)
+
+
+soft_delete_archiver = SoftDeleteArchiver()
@@ -0,0 +1,70 @@
+"""Cold `<table>_archive` copies of the soft-deletable tables (see modules.archive).
+
+An archive table has the columns of its hot table (without foreign keys, unique
+constraints nor defaults) plus `date_archivage`. A migration adding a column to
+an archived table must add it to `<table>_archive` too.
+"""
+from sqlalchemy import Column, DateTime, Index, Table, text
+from sqlmodel import SQLModel
+
+from models.adresse import Adresse
+from models.contact import Contact
+from models.direction import Direction
+from models.direction.fonction import DirectionFonction
+from models.fidele import (
+    Fidele,
+    FideleBapteme,
+    FideleFamille,
+    FideleOccupation,
+    FideleOrigine,
+    FideleParoisse,
+    FideleRecensementEtape,
+    FideleStructure,
+)
+from models.paroisse import Paroisse
+from modules.file.models import File
+
+
+def _archive_table(model: type[SQLModel], *indexes: tuple[str, ...]) -> Table:
+    table = model.__table__
+    name = f"{table.name}_archive"
+    columns = [
+        Column(
+            column.name,
+            column.type,
+            primary_key=column.primary_key,
+            autoincrement=False,
+            nullable=column.nullable,
+        )
+        for column in table.columns
+    ]
+    return Table(
+        name,
+        SQLModel.metadata,
+        *columns,
+        Column("date_archivage", DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP")),
+        Index(f"idx_{name}_date_archivage", "date_archivage"),
+        *(Index(f"idx_{name}_{index_columns[-1]}", *index_columns) for index_columns in indexes),
+    )
+
+
+# Hot table name -> archive table. Indexes cover the lookups done by the restores.
+ARCHIVE_TABLES: dict[str, Table] = {
+    table.name.removesuffix("_archive"): table
+    for table in (
+        _archive_table(Fidele),
+        _archive_table(FideleStructure, ("id_fidele",)),
+        _archive_table(FideleParoisse, ("id_fidele",), ("id_paroisse",)),
+        _archive_table(FideleBapteme, ("id_fidele",)),
+        _archive_table(FideleFamille, ("id_fidele",)),
+        _archive_table(FideleOrigine, ("id_fidele",)),
+        _archive_table(FideleOccupation, ("id_fidele",)),
+        _archive_table(FideleRecensementEtape, ("id_fidele",)),
+        _archive_table(Paroisse),
+        _archive_table(Direction),
+        _archive_table(DirectionFonction, ("id_direction",), ("id_fidele",)),
+        _archive_table(Adresse, ("id_document_type", "id_document")),
+        _archive_table(Contact, ("id_document_type", "id_document")),
+        _archive_table(File, ("id_document_type", "id_document")),
+    )
+}
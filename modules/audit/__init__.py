@@ -0,0 +1,337 @@
+"""Audit trail: who changed what, when and through which route.
+
+Changes are captured from the ORM flushes (no code needed in the endpoints),
+kept on the session until the transaction commits, then put on an in-process
+queue. `audit_writer` empties the queue in the background with multi-row
+INSERTs into the append-only `audit_event` table, so a request only pays for
+building a few dicts.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from contextvars import ContextVar
+from datetime import date, datetime, timezone
+from enum import Enum
+from typing import Any
+
+from fastapi import Request
+from sqlalchemy import event, insert, inspect, text
+from sqlalchemy.orm import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import Config
+from core.logger import logger
+from core.db import get_sessionmaker
+from modules.audit.models import AuditActionEnum, AuditEvent
+from modules.batch.models import BatchOperation
+from modules.census_feed.models import CensusEvent
+from utils.utils import log
+
+_PENDING_EVENTS_KEY = "audit_pending_events"
+_EXCLUDED_TABLES = {AuditEvent.__tablename__, BatchOperation.__tablename__, CensusEvent.__tablename__}
+_EXCLUDED_FIELDS = {"date_modification"}
+_MASKED_FIELDS = {"password"}
+
+# Current request (set by the audit middleware): gives the actor and the route
+_audit_request: ContextVar[Request | None] = ContextVar("audit_request", default=None)
+
+
+def set_audit_request(request: Request) -> None:
+    _audit_request.set(request)
+
+
+# ============================================================================
+# CAPTURE
+# ============================================================================
+
+def _json_value(key: str, value: Any) -> Any:
+    if key in _MASKED_FIELDS and value is not None:
+        return "***"
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _request_info() -> tuple[int | None, str | None, str | None]:
+    request = _audit_request.get()
+    if request is None:
+        return None, None, None
+
+    id_fidele_acteur = None
+    current_fidele = getattr(request.state, "current_fidele", None)
+    if current_fidele is not None and str(current_fidele.sub).isdigit():
+        id_fidele_acteur = int(current_fidele.sub)
+
+    # Route template (ex: /fidele/{id}) rather than the raw path
+    route = request.scope.get("route")
+    route_path = getattr(route, "path", None) or request.url.path
+    return id_fidele_acteur, request.method, route_path
+
+
+def _build_event(instance: Any, action: AuditActionEnum, changements: dict[str, Any]) -> dict[str, Any]:
+    id_fidele_acteur, methode_http, route = _request_info()
+    return {
+        "date_creation": datetime.now(timezone.utc),
+        "id_fidele_acteur": id_fidele_acteur,
+        "methode_http": methode_http,
+        "route": route,
+        "entite": instance.__tablename__,
+        "id_entite": getattr(instance, "id", None),
+        "action": action.value,
+        "changements": changements or None,
+    }
+
+
+def _snapshot(instance: Any, side: str) -> dict[str, Any]:
+    """Loaded column values of `instance` as {"champ": {side: value}}."""
+    state = inspect(instance)
+    other = "apres" if side == "avant" else "avant"
+    return {
+        attr.key: {side: _json_value(attr.key, state.dict[attr.key]), other: None}
+        for attr in state.mapper.column_attrs
+        if attr.key in state.dict and attr.key not in _EXCLUDED_FIELDS
+    }
+
+
+def _diff(instance: Any) -> dict[str, Any]:
+    state = inspect(instance)
+    changements = {}
+    for attr in state.mapper.column_attrs:
+        if attr.key in _EXCLUDED_FIELDS:
+            continue
+        history = state.attrs[attr.key].history
+        if not history.has_changes():
+            continue
+        avant = history.deleted[0] if history.deleted else None
+        apres = history.added[0] if history.added else None
+        changements[attr.key] = {
+            "avant": _json_value(attr.key, avant),
+            "apres": _json_value(attr.key, apres),
+        }
+    return changements
+
+
+def _is_audited(instance: Any) -> bool:
+    return getattr(instance, "__tablename__", None) not in (None, *_EXCLUDED_TABLES)
+
+
+@event.listens_for(Session, "after_flush")
+def _capture_flushed_changes(session: Session, _flush_context) -> None:
+    events = []
+    for instance in session.new:
+        if _is_audited(instance):
+            events.append(_build_event(instance, AuditActionEnum.CREATE, _snapshot(instance, "apres")))
+
+    for instance in session.dirty:
+        if not _is_audited(instance):
+            continue
+        changements = _diff(instance)
+        if not changements:
+            continue
+        action = AuditActionEnum.UPDATE
+        if "est_supprimee" in changements:
+            action = (
+                AuditActionEnum.SOFT_DELETE
+                if changements["est_supprimee"]["apres"]
+                else AuditActionEnum.RESTORE
+            )
+        events.append(_build_event(instance, action, changements))
+
+    for instance in session.deleted:
+        if _is_audited(instance):
+            events.append(_build_event(instance, AuditActionEnum.DELETE, _snapshot(instance, "avant")))
+
+    if events:
+        session.info.setdefault(_PENDING_EVENTS_KEY, []).extend(events)
+
+
+@event.listens_for(Session, "after_commit")
+def _enqueue_committed_changes(session: Session) -> None:
+    for audit_event in session.info.pop(_PENDING_EVENTS_KEY, ()):
+        audit_writer.enqueue(audit_event)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_changes(session: Session) -> None:
+    session.info.pop(_PENDING_EVENTS_KEY, None)
+
+
+# ============================================================================
+# PARTITIONS (MySQL, RANGE by month on date_creation)
+# ============================================================================
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.month - 1 + months
+    return date(day.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+async def ensure_audit_partitions(
+    session: AsyncSession,
+    months_ahead: int,
+    table_name: str = AuditEvent.__tablename__,
+) -> list[str]:
+    """Split `pmax` so that the current month and the `months_ahead` next ones have a partition.
+
+    `table_name`: any table partitioned the same way (ex: verification_scan).
+    """
+    if session.bind.dialect.name != "mysql":
+        return []
+
+    result = await session.execute(
+        text(
+            """
+            SELECT PARTITION_NAME
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE()
+              AND TABLE_NAME = :table_name
+              AND PARTITION_NAME IS NOT NULL
+            """
+        ),
+        {"table_name": table_name},
+    )
+    existing = {row[0] for row in result.all()}
+    if "pmax" not in existing:
+        return []
+
+    created = []
+    current_month = date.today().replace(day=1)
+    for offset in range(months_ahead + 1):
+        month = _add_months(current_month, offset)
+        name = f"p{month:%Y%m}"
+        if name in existing:
+            continue
+        await session.execute(
+            text(
+                f"""
+                ALTER TABLE {table_name} REORGANIZE PARTITION pmax INTO (
+                    PARTITION {name} VALUES LESS THAN (TO_DAYS('{_add_months(month, 1).isoformat()}')),
+                    PARTITION pmax VALUES LESS THAN MAXVALUE
+                )
+                """
+            )
+        )
+        created.append(name)
+    return created
+
+
+async def purge_audit_partitions(
+    session: AsyncSession,
+    before: date,
+    table_name: str = AuditEvent.__tablename__,
+) -> list[str]:
+    """Drop the monthly partitions that only hold events older than `before` (no row by row DELETE)."""
+    if session.bind.dialect.name != "mysql":
+        return []
+
+    result = await session.execute(
+        text(
+            """
+            SELECT PARTITION_NAME
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE()
+              AND TABLE_NAME = :table_name
+              AND PARTITION_NAME IS NOT NULL
+              AND PARTITION_DESCRIPTION <> 'MAXVALUE'
+              AND CAST(PARTITION_DESCRIPTION AS UNSIGNED) <= TO_DAYS(:before)
+            """
+        ),
+        {"before": before, "table_name": table_name},
+    )
+    names = [row[0] for row in result.all()]
+    if names:
+        await session.execute(text(f"ALTER TABLE {table_name} DROP PARTITION {', '.join(names)}"))
+    return names
+
+
+# ============================================================================
+# WRITER
+# ============================================================================
+
+class AuditWriter:
+    """Background task writing the queued audit events in batches."""
+
+    def __init__(self) -> None:
+        self._queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(
+            maxsize=Config.AUDIT_QUEUE_MAX_SIZE.value
+        )
+        self._task: asyncio.Task | None = None
+        self._last_maintenance = 0.0
+        self.written_events = 0
+        self.dropped_events = 0
+
+    def enqueue(self, audit_event: dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait(audit_event)
+        except asyncio.QueueFull:
+            # Never block nor fail the request because of the audit
+            self.dropped_events += 1
+            if self.dropped_events % 1000 == 1:
+                logger.warning("Audit queue full", extra={"dropped_events": self.dropped_events})
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        await self._maintain_partitions()
+        self._task = asyncio.create_task(self._run(), name="audit-writer")
+
+    async def stop(self) -> None:
+        """Stop the background task and write what is still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def flush(self) -> int:
+        written = 0
+        while not self._queue.empty():
+            written += await self._write(self._take_batch())
+        return written
+
+    def _take_batch(self, first: dict[str, Any] | None = None) -> list[dict[str, Any]]:
+        batch = [first] if first is not None else []
+        while len(batch) < Config.AUDIT_BATCH_SIZE.value and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            first = await self._queue.get()
+            # Let a few more events come in so they share the same INSERT
+            if self._queue.qsize() < Config.AUDIT_BATCH_SIZE.value:
+                await asyncio.sleep(Config.AUDIT_FLUSH_INTERVAL_SECONDS.value)
+            await self._write(self._take_batch(first))
+
+            if time.monotonic() - self._last_maintenance > 24 * 60 * 60:
+                await self._maintain_partitions()
+
+    async def _write(self, batch: list[dict[str, Any]]) -> int:
+        if not batch:
+            return 0
+        try:
+            async with get_sessionmaker()() as session:
+                await session.execute(insert(AuditEvent).values(batch))
+                await session.commit()
+        except Exception as e:
+            log(e)
+            self.dropped_events += len(batch)
+            return 0
+
+        self.written_events += len(batch)
+        return len(batch)
+
+    async def _maintain_partitions(self) -> None:
+        self._last_maintenance = time.monotonic()
+        try:
+            async with get_sessionmaker()() as session:
+                await ensure_audit_partitions(session, Config.AUDIT_PARTITIONS_MONTHS_AHEAD.value)
+        except Exception as e:
+            log(e)
+
+
+audit_writer = AuditWriter()
@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any
+
+from sqlmodel import SQLModel, Field
+from sqlalchemy import JSON, BigInteger, Column, DateTime, Index, Integer, String, text
+
+
+class AuditActionEnum(str, Enum):
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"           # hard delete
+    SOFT_DELETE = "soft_delete"  # est_supprimee: False -> True
+    RESTORE = "restore"          # est_supprimee: True -> False
+
+
+class AuditEvent(SQLModel, table=True):
+    """Journal d'audit (append-only): qui a modifié quoi, quand et par quelle route.
+
+    La table est partitionnée par mois (RANGE sur date_creation, voir la migration):
+    la date fait donc partie de la clé primaire et aucune clé étrangère n'est posée.
+    """
+
+    __tablename__ = "audit_event"
+
+    id: int | None = Field(
+        default=None,
+        sa_column=Column(BigInteger, primary_key=True, autoincrement=True),
+    )
+    date_creation: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(
+            DateTime,
+            primary_key=True,
+            nullable=False,
+            server_default=text("CURRENT_TIMESTAMP"),
+        ),
+    )
+
+    id_fidele_acteur: int | None = Field(default=None, sa_column=Column(Integer, nullable=True))
+    methode_http: str | None = Field(default=None, sa_column=Column(String(10), nullable=True))
+    route: str | None = Field(default=None, sa_column=Column(String(255), nullable=True))
+
+    entite: str = Field(sa_column=Column(String(64), nullable=False))
+    id_entite: int | None = Field(default=None, sa_column=Column(Integer, nullable=True))
+    action: str = Field(sa_column=Column(String(16), nullable=False))
+    # {"champ": {"avant": ..., "apres": ...}}
+    changements: dict[str, Any] | None = Field(default=None, sa_column=Column(JSON, nullable=True))
+
+    __table_args__ = (
+        Index("idx_audit_event_entite", "entite", "id_entite", "date_creation"),
+        Index("idx_audit_event_acteur", "id_fidele_acteur", "date_creation"),
+    )
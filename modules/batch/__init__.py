@@ -0,0 +1,33 @@
+"""Idempotency keys of the POST /batch operations (see routers.batch).
+
+The `batch_operation` row of a key is added to the operation's own session, so
+it is committed together with the operation: a key is either unknown or
+applied. The response is saved on it right after, and sent back as is when the
+client replays the key (a retry after a dropped connection costs one SELECT).
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import Config
+from core.db import get_sessionmaker
+from modules.batch.models import BatchOperation
+
+
+async def get_batch_operation(session: AsyncSession, cle: str) -> BatchOperation | None:
+    return await session.get(BatchOperation, cle)
+
+
+async def purge_batch_operations(older_than_days: int | None = None) -> int:
+    """Forget the keys older than `older_than_days`: clients don't replay after that long."""
+    if older_than_days is None:
+        older_than_days = Config.BATCH_IDEMPOTENCY_RETENTION_DAYS.value
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+
+    async with get_sessionmaker()() as session:
+        result = await session.execute(delete(BatchOperation).where(BatchOperation.date_creation < cutoff))
+        await session.commit()
+    return result.rowcount
@@ -0,0 +1,30 @@
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlmodel import SQLModel, Field
+from sqlalchemy import JSON, Column, DateTime, Index, Integer, String, text
+
+
+class BatchOperation(SQLModel, table=True):
+    """Opération d'un POST /batch déjà appliquée, par clé d'idempotence (générée par le client).
+
+    La ligne est commitée avec l'opération elle-même; `statut` et `reponse` sont
+    renseignés juste après et renvoyés tels quels quand le client rejoue la clé.
+    """
+
+    __tablename__ = "batch_operation"
+
+    cle: str = Field(sa_column=Column(String(64), primary_key=True, autoincrement=False))
+    operation: str = Field(sa_column=Column(String(64), nullable=False))
+    id_fidele_acteur: int | None = Field(default=None, sa_column=Column(Integer, nullable=True))
+    statut: int | None = Field(default=None, sa_column=Column(Integer, nullable=True))
+    # Enveloppe renvoyée (code, data, error)
+    reponse: dict[str, Any] | None = Field(default=None, sa_column=Column(JSON, nullable=True))
+    date_creation: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP")),
+    )
+
+    __table_args__ = (
+        Index("idx_batch_operation_date_creation", "date_creation"),
+    )
@@ -0,0 +1,375 @@
+"""Census progress feed: pushes to the supervisors' dashboards (SSE) instead of polling.
+
+The census endpoints record a `CensusEvent` in the transaction of the change
+(`record_census_event`), with the scope of the fidele (main paroisse and its
+nation). `census_feed_hub` reads the new rows (`id` greater than the last one
+seen) and fans them out to its subscribers, each with a bounded queue:
+
+- on the worker that committed, right after the commit (`_notify_committed_events`);
+- on the other workers, at the next poll (`Config.CENSUS_FEED_POLL_INTERVAL_SECONDS`).
+
+The ids are given at insert time but the transactions commit in any order: an
+id skipped by a read (N+1 read while N isn't committed yet) is re-read at each
+poll until it shows up or `Config.CENSUS_FEED_LATE_COMMIT_SECONDS` have passed
+(rolled back). The replay on reconnection re-reads the events of that window
+too, so a dashboard may get an event twice: it deduplicates by id.
+
+The table is the broker: no other service to run. Nothing is polled while a
+worker has no subscriber. A subscriber too slow to keep up is closed (its queue
+is full); it reconnects with `Last-Event-ID` and gets the missed events replayed.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, NamedTuple
+
+from sqlalchemy import and_, delete, event, func, or_, select
+from sqlalchemy.orm import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import Config
+from core.db import get_sessionmaker
+from models.adresse import Adresse, Nation
+from models.constants.types import DocumentTypeEnum
+from models.fidele import FideleParoisse
+from modules.ancestry import parse_ancestry_path
+from modules.census_feed.models import CensusEvent, CensusEventTypeEnum
+from utils.utils import log
+
+_PENDING_EVENTS_KEY = "census_feed_pending_events"
+
+
+# ============================================================================
+# RECORD
+# ============================================================================
+
+async def _fidele_scope(session: AsyncSession, id_fidele: int) -> tuple[int | None, int | None]:
+    """(main paroisse, nation of that paroisse) of the fidele."""
+    result = await session.execute(
+        select(FideleParoisse.id_paroisse, Adresse.id_nation)
+        .outerjoin(
+            Adresse,
+            and_(
+                Adresse.id_document == FideleParoisse.id_paroisse,
+                Adresse.id_document_type == DocumentTypeEnum.PAROISSE.value,
+                Adresse.est_supprimee == False,
+            ),
+        )
+        .where(
+            FideleParoisse.id_fidele == id_fidele,
+            FideleParoisse.est_paroisse_principale == True,
+            FideleParoisse.est_supprimee == False,
+        )
+        .limit(1)
+    )
+    row = result.first()
+    return (row[0], row[1]) if row is not None else (None, None)
+
+
+async def record_census_event(
+    session: AsyncSession,
+    type: CensusEventTypeEnum,
+    *,
+    id_fidele: int,
+    **donnees: Any,
+) -> None:
+    """Add the event to the caller's transaction: it's pushed once the caller commits."""
+    id_paroisse, id_nation = await _fidele_scope(session, id_fidele)
+    session.add(
+        CensusEvent(
+            type=type.value,
+            id_fidele=id_fidele,
+            id_paroisse=id_paroisse,
+            id_nation=id_nation,
+            donnees=donnees or None,
+        )
+    )
+    session.info[_PENDING_EVENTS_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_committed_events(session: Session) -> None:
+    if session.info.pop(_PENDING_EVENTS_KEY, False):
+        census_feed_hub.notify()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_events(session: Session) -> None:
+    session.info.pop(_PENDING_EVENTS_KEY, None)
+
+
+# ============================================================================
+# SCOPE (the events a caller may see, see routers.utils.permissions)
+# ============================================================================
+
+class CensusScope(NamedTuple):
+    """Paroisses and nations whose events are visible (None instead of a scope: all of them)."""
+
+    paroisse_ids: frozenset[int]
+    nation_ids: frozenset[int]
+
+    def contains(self, id_paroisse: int | None, id_nation: int | None) -> bool:
+        return id_paroisse in self.paroisse_ids or id_nation in self.nation_ids
+
+    def condition(self):
+        return or_(CensusEvent.id_paroisse.in_(self.paroisse_ids), CensusEvent.id_nation.in_(self.nation_ids))
+
+
+async def get_census_scope(session: AsyncSession, scope_paths: list[str] | None) -> CensusScope | None:
+    """
+    The ancestry paths of a caller's scope as the (paroisse, nation) ids the events
+    carry. A continent covers its nations.
+    """
+    if scope_paths is None:
+        return None
+
+    ids: dict[DocumentTypeEnum, set[int]] = {
+        DocumentTypeEnum.PAROISSE: set(),
+        DocumentTypeEnum.NATION: set(),
+        DocumentTypeEnum.CONTINENT: set(),
+    }
+    for path in scope_paths:
+        document_type, id_document = parse_ancestry_path(path)[-1]
+        ids[document_type].add(id_document)
+
+    nation_ids = ids[DocumentTypeEnum.NATION]
+    if ids[DocumentTypeEnum.CONTINENT]:
+        result = await session.execute(
+            select(Nation.id).where(Nation.id_continent.in_(ids[DocumentTypeEnum.CONTINENT]))
+        )
+        nation_ids |= set(result.scalars().all())
+    return CensusScope(frozenset(ids[DocumentTypeEnum.PAROISSE]), frozenset(nation_ids))
+
+
+# ============================================================================
+# READ
+# ============================================================================
+
+def census_event_payload(census_event: CensusEvent) -> dict[str, Any]:
+    return {
+        "id": census_event.id,
+        "type": census_event.type,
+        "date_creation": census_event.date_creation,
+        "id_fidele": census_event.id_fidele,
+        "id_paroisse": census_event.id_paroisse,
+        "id_nation": census_event.id_nation,
+        "donnees": census_event.donnees,
+    }
+
+
+async def get_last_census_event_id(session: AsyncSession) -> int:
+    return (await session.execute(select(func.max(CensusEvent.id)))).scalar() or 0
+
+
+async def get_census_events(
+    session: AsyncSession,
+    after_id: int,
+    limit: int,
+    *,
+    id_paroisse: int | None = None,
+    id_nation: int | None = None,
+    scope: CensusScope | None = None,
+    with_late_commits: bool = False,
+) -> list[dict[str, Any]]:
+    """
+    Events after `after_id` (of the paroisse, nation and scope when given), oldest first.
+    `with_late_commits` adds the recent events below it, which may have committed after
+    `after_id` was read.
+    """
+    condition = CensusEvent.id > after_id
+    if with_late_commits:
+        late_since = datetime.now(timezone.utc) - timedelta(seconds=Config.CENSUS_FEED_LATE_COMMIT_SECONDS.value)
+        condition = or_(condition, CensusEvent.date_creation >= late_since.replace(tzinfo=None))
+    statement = select(CensusEvent).where(condition)
+    if id_paroisse is not None:
+        statement = statement.where(CensusEvent.id_paroisse == id_paroisse)
+    if id_nation is not None:
+        statement = statement.where(CensusEvent.id_nation == id_nation)
+    if scope is not None:
+        statement = statement.where(scope.condition())
+    result = await session.execute(statement.order_by(CensusEvent.id).limit(limit))
+    return [census_event_payload(census_event) for census_event in result.scalars().all()]
+
+
+async def get_census_events_by_ids(session: AsyncSession, ids: list[int]) -> list[dict[str, Any]]:
+    result = await session.execute(select(CensusEvent).where(CensusEvent.id.in_(ids)).order_by(CensusEvent.id))
+    return [census_event_payload(census_event) for census_event in result.scalars().all()]
+
+
+# ============================================================================
+# FAN-OUT
+# ============================================================================
+
+class CensusFeedSubscriber:
+    """A connected dashboard: its filters, its caller's scope and its queue (None = closed, reconnect)."""
+
+    def __init__(
+        self,
+        since_id: int,
+        id_paroisse: int | None,
+        id_nation: int | None,
+        scope: CensusScope | None = None,
+    ) -> None:
+        self.since_id = since_id
+        self.id_paroisse = id_paroisse
+        self.id_nation = id_nation
+        self.scope = scope
+        self.queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue(
+            maxsize=Config.CENSUS_FEED_SUBSCRIBER_QUEUE_SIZE.value
+        )
+        # Ids recently sent: a late commit may come through both the replay and the hub
+        self._sent_ids: set[int] = set()
+        self._sent_order: deque[int] = deque()
+
+    def matches(self, payload: dict[str, Any], late: bool = False) -> bool:
+        """`late`: committed after higher ids were read, possibly below `since_id`."""
+        return (
+            (late or payload["id"] > self.since_id)
+            and (self.id_paroisse is None or payload["id_paroisse"] == self.id_paroisse)
+            and (self.id_nation is None or payload["id_nation"] == self.id_nation)
+            and (self.scope is None or self.scope.contains(payload["id_paroisse"], payload["id_nation"]))
+        )
+
+    def mark_sent(self, id: int) -> bool:
+        """Remember `id` as sent. False when it already was."""
+        if id in self._sent_ids:
+            return False
+        self._sent_ids.add(id)
+        self._sent_order.append(id)
+        if len(self._sent_order) > 2 * Config.CENSUS_FEED_BATCH_SIZE.value:
+            self._sent_ids.discard(self._sent_order.popleft())
+        return True
+
+    def close(self) -> None:
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class CensusFeedHub:
+    """Background task reading the new census events and fanning them out to the subscribers."""
+
+    def __init__(self) -> None:
+        self._subscribers: set[CensusFeedSubscriber] = set()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._last_id: int | None = None
+        # Ids skipped below _last_id (not committed yet when read) -> when first skipped
+        self._late_ids: dict[int, float] = {}
+        self._last_purge = 0.0
+        self.published_events = 0
+        self.overflowed_subscribers = 0
+
+    def subscribe(
+        self,
+        since_id: int,
+        id_paroisse: int | None,
+        id_nation: int | None,
+        scope: CensusScope | None = None,
+    ) -> CensusFeedSubscriber:
+        subscriber = CensusFeedSubscriber(since_id, id_paroisse, id_nation, scope)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: CensusFeedSubscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="census-feed-hub")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for subscriber in self._subscribers:
+            subscriber.close()
+        self._subscribers.clear()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), Config.CENSUS_FEED_POLL_INTERVAL_SECONDS.value)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                if self._subscribers:
+                    await self._poll()
+                else:
+                    # Nobody listens: resume from the subscribers' position next time
+                    self._last_id = None
+                    self._late_ids.clear()
+                if time.monotonic() - self._last_purge > 24 * 60 * 60:
+                    await self._purge()
+            except Exception as e:
+                log(e)
+
+    async def _poll(self) -> None:
+        if self._last_id is None:
+            # The events before it are replayed by the subscribers themselves (see routers.recensement)
+            self._last_id = max(subscriber.since_id for subscriber in self._subscribers)
+        async with get_sessionmaker()() as session:
+            if self._late_ids:
+                await self._poll_late_ids(session)
+            while True:
+                payloads = await get_census_events(session, self._last_id, Config.CENSUS_FEED_BATCH_SIZE.value)
+                now = time.monotonic()
+                for payload in payloads:
+                    # Holes: ids given to transactions not committed yet (or rolled back)
+                    hole_start = max(self._last_id + 1, payload["id"] - Config.CENSUS_FEED_BATCH_SIZE.value)
+                    for id in range(hole_start, payload["id"]):
+                        self._late_ids.setdefault(id, now)
+                    self._last_id = payload["id"]
+                    self._publish(payload)
+                if len(payloads) < Config.CENSUS_FEED_BATCH_SIZE.value:
+                    return
+
+    async def _poll_late_ids(self, session: AsyncSession) -> None:
+        given_up = time.monotonic() - Config.CENSUS_FEED_LATE_COMMIT_SECONDS.value
+        self._late_ids = {id: skipped_at for id, skipped_at in self._late_ids.items() if skipped_at > given_up}
+        if not self._late_ids:
+            return
+        for payload in await get_census_events_by_ids(session, list(self._late_ids)):
+            del self._late_ids[payload["id"]]
+            self._publish(payload, late=True)
+
+    def _publish(self, payload: dict[str, Any], late: bool = False) -> None:
+        self.published_events += 1
+        for subscriber in list(self._subscribers):
+            if not subscriber.matches(payload, late):
+                continue
+            try:
+                subscriber.queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                # Never let a slow dashboard hold the others back
+                self.overflowed_subscribers += 1
+                self.unsubscribe(subscriber)
+                subscriber.close()
+
+    async def _purge(self) -> None:
+        self._last_purge = time.monotonic()
+        before = datetime.now(timezone.utc) - timedelta(days=Config.CENSUS_FEED_RETENTION_DAYS.value)
+        async with get_sessionmaker()() as session:
+            while True:
+                ids = (
+                    await session.execute(
+                        select(CensusEvent.id)
+                        .where(CensusEvent.date_creation < before)
+                        .limit(Config.CENSUS_FEED_BATCH_SIZE.value)
+                    )
+                ).scalars().all()
+                if not ids:
+                    return
+                await session.execute(delete(CensusEvent).where(CensusEvent.id.in_(ids)))
+                await session.commit()
+
+
+census_feed_hub = CensusFeedHub()
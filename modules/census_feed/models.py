@@ -0,0 +1,43 @@
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any
+
+from sqlmodel import SQLModel, Field
+from sqlalchemy import JSON, BigInteger, Column, DateTime, ForeignKey, Index, Integer, String, text
+
+
+class CensusEventTypeEnum(str, Enum):
+    RECENSEMENT_ETAPE = "recensement_etape"  # étape du recensement complétée
+    STATUT = "statut"                        # statut du fidèle modifié (validation...)
+
+
+class CensusEvent(SQLModel, table=True):
+    """Événement de progression du recensement, diffusé aux tableaux de bord (SSE).
+
+    Écrit dans la transaction du changement: chaque worker lit les nouvelles
+    lignes (voir modules.census_feed) et les diffuse à ses abonnés.
+    """
+
+    __tablename__ = "census_event"
+
+    id: int | None = Field(
+        default=None,
+        sa_column=Column(BigInteger, primary_key=True, autoincrement=True),
+    )
+    date_creation: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP")),
+    )
+    type: str = Field(sa_column=Column(String(32), nullable=False))
+    id_fidele: int = Field(
+        sa_column=Column(Integer, ForeignKey("fidele.id", ondelete="CASCADE"), nullable=False)
+    )
+    # Périmètre (paroisse principale du fidèle et sa nation) au moment de l'événement
+    id_paroisse: int | None = Field(default=None, sa_column=Column(Integer, nullable=True))
+    id_nation: int | None = Field(default=None, sa_column=Column(Integer, nullable=True))
+    donnees: dict[str, Any] | None = Field(default=None, sa_column=Column(JSON, nullable=True))
+
+    __table_args__ = (
+        Index("idx_census_event_date_creation", "date_creation"),
+        Index("idx_census_event_fidele", "id_fidele"),
+    )
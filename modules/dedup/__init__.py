@@ -0,0 +1,392 @@
+"""Duplicate fidele detection (the same person registered twice).
+
+Comparing every fidele with every other one doesn't scale: each fidele gets a
+few blocking keys (`fidele_blocking_keys`) stored in `fidele_doublon_cle`, and
+only the fideles sharing a key are compared:
+- sexe + birth year + consonant skeleton of nom and prenom, in any order
+  (MOULAMBA / MULAMBA, nom and prenom swapped);
+- exact birth date + two letters of the nom, or of the prenom
+  (`extract_two_letters_prefer_consonants`, as in the matricule);
+- the last digits of the tel.
+
+The candidates are scored (`score_fidele_pair`: fuzzy match of the names, birth
+date, sexe, tel) and the pairs reaching `Config.DEDUP_MIN_SCORE` go to
+`fidele_doublon`, the review queue (see routers.doublon). A pair reviewed as
+`doublon` or `distinct` is never proposed again or rescored.
+
+When a transaction changing the identity of fideles commits, their keys and
+pairs are refreshed in the same transaction. `detect_fidele_duplicates` runs
+the same refresh over all the fideles, chunk by chunk (first run, writes done
+outside the ORM), in the background (`duplicate_detector`, started by POST
+/superadmin/doublon).
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import date, datetime, timezone
+from difflib import SequenceMatcher
+from typing import Any, Iterable
+
+from sqlalchemy import Connection, delete, event, func, insert, inspect, or_, select, update
+from sqlalchemy.orm import Session
+
+from core.config import Config
+from core.db import get_engine
+from models.fidele import Fidele
+from modules.dedup.models import FideleDoublon, FideleDoublonCle, FideleDoublonStatutEnum
+from routers.fidele.utils import extract_two_letters_prefer_consonants, flatten_letters
+from utils.utils import log
+
+_PENDING_FIDELES_KEY = "dedup_pending_fideles"
+
+# Attributes the keys and the scores are computed from
+_TRACKED_ATTRIBUTES = {"nom", "postnom", "prenom", "sexe", "date_naissance", "tel", "est_supprimee"}
+
+_VOWELS = set("AEIOUY")
+# Spellings of the same sound
+_SOUNDS = (("PH", "F"), ("C", "K"), ("Q", "K"), ("Z", "S"), ("W", "V"))
+_TEL_KEY_DIGITS = 9
+
+_cle_table = FideleDoublonCle.__table__
+_doublon_table = FideleDoublon.__table__
+
+_IDENTITY_COLUMNS = (
+    Fidele.id, Fidele.nom, Fidele.postnom, Fidele.prenom, Fidele.sexe, Fidele.date_naissance, Fidele.tel,
+)
+
+
+# ============================================================================
+# KEYS AND SCORE
+# ============================================================================
+
+def consonant_key(value: str | None, length: int = 4) -> str:
+    """First letter then the consonants, same sounds and doubled letters merged (MOULAMBA, MULAMBA -> MLMB)."""
+    letters = flatten_letters(value or "")
+    for spelling, sound in _SOUNDS:
+        letters = letters.replace(spelling, sound)
+    if not letters:
+        return ""
+    key = [letters[0]]
+    for ch in letters[1:]:
+        if ch not in _VOWELS and ch != key[-1]:
+            key.append(ch)
+    return "".join(key[:length])
+
+
+def _tel_digits(tel: str | None) -> str:
+    return "".join(ch for ch in tel or "" if ch.isdigit())
+
+
+def _sexe(value: Any) -> str:
+    return str(getattr(value, "value", value) or "")
+
+
+def fidele_blocking_keys(
+    nom: str | None,
+    prenom: str | None,
+    sexe: Any,
+    date_naissance: date | None,
+    tel: str | None,
+) -> set[str]:
+    keys = set()
+    name_keys = sorted(key for key in (consonant_key(nom), consonant_key(prenom)) if key)
+    if name_keys and date_naissance is not None:
+        keys.add(f"N:{_sexe(sexe)}{date_naissance.year}:{':'.join(name_keys)}")
+    if date_naissance is not None:
+        for value in (nom, prenom):
+            if flatten_letters(value or ""):
+                keys.add(f"D:{date_naissance.isoformat()}:{extract_two_letters_prefer_consonants(value)}")
+    digits = _tel_digits(tel)
+    if len(digits) >= 8:
+        keys.add(f"T:{digits[-_TEL_KEY_DIGITS:]}")
+    return keys
+
+
+def _similarity(a: str | None, b: str | None) -> float:
+    a, b = flatten_letters(a or ""), flatten_letters(b or "")
+    if not a or not b:
+        return 0.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def _birth_similarity(a: date | None, b: date | None) -> float:
+    if a is None or b is None:
+        return 0.0
+    if a == b:
+        return 1.0
+    if a.year == b.year and (a.month, a.day) == (b.day, b.month):
+        return 0.8  # day and month inverted
+    if abs(a.year - b.year) == 1 and (a.month, a.day) == (b.month, b.day):
+        return 0.6  # year typo
+    if a.year == b.year:
+        return 0.4
+    return 0.0
+
+
+def score_fidele_pair(a: Any, b: Any) -> tuple[float, dict[str, float]]:
+    """Score (0..1) of two fidele rows being the same person, and its detail per criterion."""
+    straight = (_similarity(a.nom, b.nom) + _similarity(a.prenom, b.prenom)) / 2
+    swapped = (_similarity(a.nom, b.prenom) + _similarity(a.prenom, b.nom)) / 2
+    noms = max(straight, swapped)
+    if a.postnom and b.postnom:
+        noms = 0.8 * noms + 0.2 * _similarity(a.postnom, b.postnom)
+    naissance = _birth_similarity(a.date_naissance, b.date_naissance)
+    sexe = 1.0 if _sexe(a.sexe) == _sexe(b.sexe) else 0.0
+    digits_a, digits_b = _tel_digits(a.tel), _tel_digits(b.tel)
+    tel = 1.0 if digits_a and digits_a[-_TEL_KEY_DIGITS:] == digits_b[-_TEL_KEY_DIGITS:] else 0.0
+
+    score = 0.6 * noms + 0.25 * naissance + 0.1 * sexe + 0.05 * tel
+    details = {"noms": noms, "naissance": naissance, "sexe": sexe, "tel": tel}
+    return round(score, 4), {name: round(value, 4) for name, value in details.items()}
+
+
+def is_probable_duplicate(score: float) -> bool:
+    """The pair goes to the review queue (`Config.DEDUP_MIN_SCORE` reached)."""
+    return score >= Config.DEDUP_MIN_SCORE.value
+
+
+# ============================================================================
+# REFRESH
+# ============================================================================
+
+def _store_keys(connection: Connection, rows: list[Any], removed: set[int]) -> dict[int, set[str]]:
+    """Replace the keys of the fideles. Returns the keys of each live fidele."""
+    keys = {
+        row.id: fidele_blocking_keys(row.nom, row.prenom, row.sexe, row.date_naissance, row.tel)
+        for row in rows
+    }
+    connection.execute(delete(_cle_table).where(_cle_table.c.id_fidele.in_(keys.keys() | removed)))
+    values = [{"id_fidele": id_fidele, "cle": cle} for id_fidele, cles in keys.items() for cle in cles]
+    if values:
+        # IGNORE: a concurrent transaction refreshing the same fidele
+        connection.execute(
+            insert(_cle_table).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite"),
+            values,
+        )
+    return keys
+
+
+def _candidate_pairs(connection: Connection, keys: dict[int, set[str]]) -> dict[tuple[int, int], set[str]]:
+    """Pairs (smallest id first) of fideles sharing a key, with their shared keys."""
+    all_keys = set().union(*keys.values()) if keys else set()
+    if not all_keys:
+        return {}
+    # Keys shared by too many fideles (placeholder tel, very common name...) don't discriminate
+    block_sizes = connection.execute(
+        select(_cle_table.c.cle, func.count())
+        .where(_cle_table.c.cle.in_(all_keys))
+        .group_by(_cle_table.c.cle)
+    ).all()
+    usable = {cle for cle, size in block_sizes if 1 < size <= Config.DEDUP_MAX_BLOCK_SIZE.value}
+    if not usable:
+        return {}
+
+    members: dict[str, list[int]] = {}
+    for cle, id_fidele in connection.execute(
+        select(_cle_table.c.cle, _cle_table.c.id_fidele).where(_cle_table.c.cle.in_(usable))
+    ):
+        members.setdefault(cle, []).append(id_fidele)
+
+    pairs: dict[tuple[int, int], set[str]] = {}
+    for id_fidele, cles in keys.items():
+        for cle in cles & usable:
+            for other in members.get(cle, ()):
+                if other != id_fidele:
+                    pairs.setdefault((min(id_fidele, other), max(id_fidele, other)), set()).add(cle)
+    return pairs
+
+
+def refresh_fidele_duplicates(connection: Connection, ids: Iterable[int]) -> int:
+    """Refresh the keys and the pending pairs of the fideles `ids`. Returns their pending pairs count."""
+    ids = set(ids)
+    if not ids:
+        return 0
+
+    rows = connection.execute(
+        select(*_IDENTITY_COLUMNS).where(Fidele.id.in_(ids), Fidele.est_supprimee == False)
+    ).all()
+    # Deleted (soft or hard): out of the blocks and of the queue
+    removed = ids - {row.id for row in rows}
+    keys = _store_keys(connection, rows, removed)
+    candidates = _candidate_pairs(connection, keys)
+
+    identities = {row.id: row for row in rows}
+    others = {id_fidele for pair in candidates for id_fidele in pair} - identities.keys()
+    if others:
+        identities.update(
+            (row.id, row)
+            for row in connection.execute(
+                select(*_IDENTITY_COLUMNS).where(Fidele.id.in_(others), Fidele.est_supprimee == False)
+            )
+        )
+
+    scored: dict[tuple[int, int], tuple[float, dict[str, Any]]] = {}
+    for (id_a, id_b), cles in candidates.items():
+        if id_a not in identities or id_b not in identities:
+            continue
+        score, details = score_fidele_pair(identities[id_a], identities[id_b])
+        if is_probable_duplicate(score):
+            scored[(id_a, id_b)] = (score, {**details, "cles": sorted(cles)})
+
+    existing = connection.execute(
+        select(_doublon_table.c.id, _doublon_table.c.id_fidele_a, _doublon_table.c.id_fidele_b,
+               _doublon_table.c.statut, _doublon_table.c.score)
+        .where(or_(_doublon_table.c.id_fidele_a.in_(ids), _doublon_table.c.id_fidele_b.in_(ids)))
+    ).all()
+
+    now = datetime.now(timezone.utc)
+    stale, pending = [], len(scored)
+    for row in existing:
+        found = scored.pop((row.id_fidele_a, row.id_fidele_b), None)
+        # Reviewed: the decision stands
+        if row.statut != FideleDoublonStatutEnum.A_VERIFIER.value:
+            continue
+        if found is None:
+            stale.append(row.id)
+            continue
+        if found[0] != row.score:
+            connection.execute(
+                update(_doublon_table)
+                .where(_doublon_table.c.id == row.id)
+                .values(score=found[0], details=found[1], date_modification=now)
+            )
+    if stale:
+        connection.execute(delete(_doublon_table).where(_doublon_table.c.id.in_(stale)))
+    if scored:
+        connection.execute(
+            insert(_doublon_table).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite"),
+            [
+                {"id_fidele_a": id_a, "id_fidele_b": id_b, "score": score, "details": details,
+                 "statut": FideleDoublonStatutEnum.A_VERIFIER.value, "date_creation": now, "date_modification": now}
+                for (id_a, id_b), (score, details) in scored.items()
+            ],
+        )
+    return pending - len(stale)
+
+
+# ============================================================================
+# SESSION HOOKS
+# ============================================================================
+
+@event.listens_for(Session, "after_flush")
+def _collect_affected_fideles(session: Session, _flush_context) -> None:
+    ids = {instance.id for instance in (*session.new, *session.deleted) if isinstance(instance, Fidele)}
+    for instance in session.dirty:
+        if isinstance(instance, Fidele):
+            state = inspect(instance)
+            if any(state.attrs[name].history.has_changes() for name in _TRACKED_ATTRIBUTES):
+                ids.add(instance.id)
+    ids.discard(None)
+    if ids:
+        session.info.setdefault(_PENDING_FIDELES_KEY, set()).update(ids)
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_affected_fideles(session: Session) -> None:
+    # The commit flushes after this hook: flush now so the last changes are collected too
+    session.flush()
+    ids = session.info.pop(_PENDING_FIDELES_KEY, None)
+    if ids:
+        refresh_fidele_duplicates(session.connection(), ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_affected_fideles(session: Session) -> None:
+    session.info.pop(_PENDING_FIDELES_KEY, None)
+
+
+# ============================================================================
+# BATCH
+# ============================================================================
+
+def _detect_chunk(connection: Connection, after_id: int) -> int | None:
+    """Refresh the next chunk of fideles (by id). Returns the last id seen, None when done."""
+    ids = connection.execute(
+        select(Fidele.id).where(Fidele.id > after_id).order_by(Fidele.id).limit(Config.DEDUP_CHUNK_SIZE.value)
+    ).scalars().all()
+    if not ids:
+        return None
+    refresh_fidele_duplicates(connection, ids)
+    return ids[-1]
+
+
+async def detect_fidele_duplicates(progress: dict[str, Any] | None = None) -> dict[str, int]:
+    """Refresh the keys and the pairs of all the fideles, one transaction per chunk.
+
+    `progress` (when given) is kept up to date: last id done, chunks, max id at the start.
+    """
+    progress = progress if progress is not None else {}
+    engine = get_engine()
+    async with engine.connect() as connection:
+        progress.update(chunks=0, last_id=0, max_id=await connection.scalar(select(func.max(Fidele.id))) or 0)
+
+    after_id = 0
+    while after_id is not None:
+        async with engine.begin() as connection:
+            after_id = await connection.run_sync(_detect_chunk, after_id)
+        progress["chunks"] += 1
+        if after_id is not None:
+            progress["last_id"] = after_id
+            # Throttle: leave room to the requests between two chunks
+            await asyncio.sleep(Config.DEDUP_CHUNK_PAUSE_SECONDS.value)
+
+    async with engine.connect() as connection:
+        pending = await connection.scalar(
+            select(func.count()).select_from(_doublon_table)
+            .where(_doublon_table.c.statut == FideleDoublonStatutEnum.A_VERIFIER.value)
+        )
+    return {"chunks": progress["chunks"], "a_verifier": pending or 0}
+
+
+class DuplicateDetector:
+    """Background run of `detect_fidele_duplicates` over the whole table, on demand (one at a time per worker)."""
+
+    def __init__(self) -> None:
+        self._task: asyncio.Task | None = None
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.progress: dict[str, Any] = {}
+        self.last_result: dict[str, int] | None = None
+        self.last_error: str | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> bool:
+        """Start a run. False when one is already running."""
+        if self.running:
+            return False
+        self.started_at, self.finished_at = time.time(), None
+        self.progress, self.last_result, self.last_error = {}, None, None
+        self._task = asyncio.create_task(self._run(), name="duplicate-detector")
+        return True
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        try:
+            self.last_result = await detect_fidele_duplicates(self.progress)
+        except Exception as e:
+            self.last_error = str(e)
+            log(e)
+        finally:
+            self.finished_at = time.time()
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "en_cours": self.running,
+            "date_debut": self.started_at,
+            "date_fin": self.finished_at,
+            "progression": self.progress,
+            "resultat": self.last_result,
+            "erreur": self.last_error,
+        }
+
+
+duplicate_detector = DuplicateDetector()
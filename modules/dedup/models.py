@@ -0,0 +1,95 @@
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any
+
+from pydantic import BaseModel
+from sqlmodel import SQLModel, Field
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+    text,
+)
+
+from utils.utils import PydanticField
+
+
+class FideleDoublonStatutEnum(str, Enum):
+    A_VERIFIER = "a_verifier"  # candidat détecté, en attente de revue
+    DOUBLON = "doublon"        # confirmé: même personne
+    DISTINCT = "distinct"      # confirmé: personnes différentes (n'est plus proposé)
+
+
+class FideleDoublonCle(SQLModel, table=True):
+    """Clé de blocage d'un fidèle: seuls les fidèles partageant une clé sont comparés.
+
+    Maintenue avec le fidèle (voir modules.dedup).
+    """
+
+    __tablename__ = "fidele_doublon_cle"
+
+    id_fidele: int = Field(
+        sa_column=Column(
+            Integer,
+            ForeignKey("fidele.id", ondelete="CASCADE"),
+            primary_key=True,
+            autoincrement=False,
+        )
+    )
+    cle: str = Field(sa_column=Column(String(64), primary_key=True))
+
+    __table_args__ = (
+        Index("idx_fidele_doublon_cle_cle", "cle", "id_fidele"),
+    )
+
+
+class FideleDoublon(SQLModel, table=True):
+    """Paire de fidèles probablement en double (id_fidele_a < id_fidele_b), à vérifier."""
+
+    __tablename__ = "fidele_doublon"
+
+    id: int | None = Field(default=None, primary_key=True)
+    id_fidele_a: int = Field(
+        sa_column=Column(Integer, ForeignKey("fidele.id", ondelete="CASCADE"), nullable=False)
+    )
+    id_fidele_b: int = Field(
+        sa_column=Column(Integer, ForeignKey("fidele.id", ondelete="CASCADE"), nullable=False)
+    )
+    score: float = Field(sa_column=Column(Float, nullable=False))
+    # Similarité par critère (noms, naissance, sexe, tel) et clés de blocage partagées
+    details: dict[str, Any] | None = Field(default=None, sa_column=Column(JSON, nullable=True))
+    statut: str = Field(
+        default=FideleDoublonStatutEnum.A_VERIFIER.value,
+        sa_column=Column(
+            String(16),
+            nullable=False,
+            server_default=text(f"'{FideleDoublonStatutEnum.A_VERIFIER.value}'"),
+        ),
+    )
+    # Fidèle (connecté) ayant tranché
+    id_fidele_revue: int | None = Field(default=None, sa_column=Column(Integer, nullable=True))
+    date_creation: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP")),
+    )
+    date_modification: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP")),
+    )
+    date_revue: datetime | None = Field(default=None, sa_column=Column(DateTime, nullable=True))
+
+    __table_args__ = (
+        UniqueConstraint("id_fidele_a", "id_fidele_b", name="uq_fidele_doublon_paire"),
+        Index("idx_fidele_doublon_statut_score", "statut", "score"),
+        Index("idx_fidele_doublon_fidele_b", "id_fidele_b"),
+    )
+
+
+class FideleDoublonRevue(BaseModel):
+    statut: FideleDoublonStatutEnum = PydanticField(..., description="Décision: doublon, distinct (ou a_verifier pour la rouvrir)")
@@ -1,2 +1,5 @@
+from core.logger import logger
+
+
 async def send_email():
-	print("Send Email Place holder fx: Sending email...")
\ No newline at end of file
+	logger.info("Send Email Place holder fx: Sending email...")
\ No newline at end of file
@@ -1,3 +1,4 @@
+import hashlib
 import os
 from datetime import datetime, timedelta, timezone
 
@@ -9,6 +10,7 @@ from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from core.config import Config
+from core.tracing import span
 from modules.file.models import File as FileModel, FileProjFlat
 from modules.file.utils import get_upload_file_extension
 
@@ -28,12 +30,13 @@ class S3Service:
             raise HTTPException(500, "Configuration AWS S3 incomplète")
 
         try:
-            self.client = boto3.client(
-                "s3",
-                aws_access_key_id=aws_access_key_id,
-                aws_secret_access_key=aws_secret_access_key,
-                region_name=aws_region,
-            )
+            with span("s3.client"):
+                self.client = boto3.client(
+                    "s3",
+                    aws_access_key_id=aws_access_key_id,
+                    aws_secret_access_key=aws_secret_access_key,
+                    region_name=aws_region,
+                )
         except Exception:
             raise HTTPException(500, "Impossible d'initialiser le client AWS S3")
 
@@ -65,6 +68,7 @@ class S3Service:
         id_document: int,
         url_expires_in: int,
         original_name: str | None,
+        sha256: str | None = None,
     ) -> FileProjFlat:
         statement = select(FileModel).where(FileModel.file_name == s3_key)
         result = await session.exec(statement)
@@ -74,6 +78,7 @@ class S3Service:
             db_file.original_name = original_name
             db_file.mimetype = self.file.content_type
             db_file.size = self.file.size or 0
+            db_file.sha256 = sha256
             db_file.id_document_type = id_document_type
             db_file.id_document = id_document
             db_file.est_supprimee = False
@@ -85,6 +90,7 @@ class S3Service:
                 file_name=s3_key,
                 mimetype=self.file.content_type,
                 size=self.file.size or 0,
+                sha256=sha256,
                 id_document_type=id_document_type,
                 id_document=id_document,
             )
@@ -143,12 +149,14 @@ class S3Service:
             )
 
         try:
-            self.client.upload_fileobj(
-                self.file.file,
-                self.bucket,
-                s3_key,
-                ExtraArgs={"ContentType": self.file.content_type},
-            )
+            sha256 = self._content_sha256()
+            with span("s3.upload", **{"s3.key": s3_key}):
+                self.client.upload_fileobj(
+                    self.file.file,
+                    self.bucket,
+                    s3_key,
+                    ExtraArgs={"ContentType": self.file.content_type},
+                )
 
             return await self.save_metadata_to_db(
                 session,
@@ -157,6 +165,7 @@ class S3Service:
                 id_document=id_document,
                 url_expires_in=url_expires_in,
                 original_name=original_name,
+                sha256=sha256,
             )
         except ClientError:
             raise HTTPException(500, "Échec de l'upload du fichier vers S3")
@@ -169,14 +178,23 @@ class S3Service:
             await session.rollback()
             raise HTTPException(500, "Erreur interne pendant l'upload du fichier")
 
+    def _content_sha256(self) -> str:
+        """Hash of the uploaded content, read by chunks then rewound for the upload."""
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: self.file.file.read(1024 * 1024), b""):
+            digest.update(chunk)
+        self.file.file.seek(0)
+        return digest.hexdigest()
+
     def sign_url(self, s3_key: str, expires_in: int = 3600 * 60):
         normalized_expires_in = self._normalize_expires_in(expires_in)
         try:
-            return self.client.generate_presigned_url(
-                "get_object",
-                Params={"Bucket": self.bucket, "Key": s3_key},
-                ExpiresIn=normalized_expires_in,
-            )
+            with span("s3.sign_url"):
+                return self.client.generate_presigned_url(
+                    "get_object",
+                    Params={"Bucket": self.bucket, "Key": s3_key},
+                    ExpiresIn=normalized_expires_in,
+                )
         except Exception:
             raise HTTPException(500, "Erreur interne pendant la génération de l'URL signée")
 
@@ -191,7 +209,8 @@ class S3Service:
             if not db_file:
                 raise HTTPException(404, "Fichier non trouvé")
 
-            self.client.delete_object(Bucket=self.bucket, Key=s3_key)
+            with span("s3.delete", **{"s3.key": s3_key}):
+                self.client.delete_object(Bucket=self.bucket, Key=s3_key)
 
             db_file.est_supprimee = True
             db_file.date_suppression = datetime.now(timezone.utc)
@@ -16,6 +16,8 @@ class File(SQLModel, table=True):
     file_name: str = Field(..., max_length=255, unique=True)
     mimetype: str = Field(..., max_length=255)
     size: int = Field(...)
+    # Empreinte du contenu (hex), embarquée dans les justificatifs QR (voir modules.verification)
+    sha256: str | None = Field(default=None, nullable=True, max_length=64)
 
     est_supprimee: bool = Field(
         default=False,
@@ -69,6 +71,7 @@ class FileProjFlat(BaseModel):
     file_name: str
     mimetype: str
     size: int
+    sha256: str | None = None
     signed_url: str | None = None
     signed_url_expiration_date: datetime | None = None
     id_document_type: int
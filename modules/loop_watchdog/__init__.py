@@ -0,0 +1,146 @@
+"""Event loop lag watchdog: finds the code blocking the event loop.
+
+A heartbeat task sleeps `Config.LOOP_WATCHDOG_INTERVAL_SECONDS` in a loop: the
+extra time it actually slept is the event loop lag (time during which no other
+request could progress). A sampler thread watches the heartbeat; when it's late
+by more than `Config.LOOP_WATCHDOG_THRESHOLD_SECONDS`, the loop is stuck in some
+synchronous call: the thread takes the stack of the loop thread
+(`sys._current_frames`), while it's still blocked, and the route whose endpoint
+is in that stack.
+
+Once the loop resumes, the stall is logged (lag, route, stack) and kept in the
+metrics (`GET /superadmin/metrics`). Cost: a few wake-ups per second, on the
+loop and on the thread; the stack is only taken during a stall.
+"""
+from __future__ import annotations
+
+import asyncio
+import inspect
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+from types import CodeType, FrameType
+from typing import Any
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+
+from core.config import Config
+from core.logger import logger
+
+_MAX_STACK_FRAMES = 40
+
+
+class LoopWatchdog:
+    """Heartbeat task (on the loop) and sampler thread (off the loop), with the stalls seen."""
+
+    def __init__(self) -> None:
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stopping = threading.Event()
+        self._loop_thread_id: int | None = None
+        self._route_by_code: dict[CodeType, str] = {}
+        self._last_beat = 0.0
+        # (route, stack) taken by the sampler thread during the current stall
+        self._captured: tuple[str | None, list[str]] | None = None
+        self.beats = 0
+        self.stalls = 0
+        self.total_lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+        self.recent_stalls: deque[dict[str, Any]] = deque(maxlen=Config.LOOP_WATCHDOG_STALLS_KEPT.value)
+
+    async def start(self, app: FastAPI) -> None:
+        if self._task is not None:
+            return
+        self._route_by_code = {
+            inspect.unwrap(route.endpoint).__code__: route.path
+            for route in app.routes
+            if isinstance(route, APIRoute)
+        }
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._heartbeat(), name="loop-watchdog")
+        self._thread = threading.Thread(target=self._sample, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    # ------------------------------------------------------------------ loop
+
+    async def _heartbeat(self) -> None:
+        interval = Config.LOOP_WATCHDOG_INTERVAL_SECONDS.value
+        while True:
+            expected = time.monotonic() + interval
+            await asyncio.sleep(interval)
+            self._last_beat = time.monotonic()
+            self._record(max(0.0, self._last_beat - expected))
+
+    def _record(self, lag: float) -> None:
+        self.beats += 1
+        self.total_lag_seconds += lag
+        self.max_lag_seconds = max(self.max_lag_seconds, lag)
+        captured, self._captured = self._captured, None
+        if lag < Config.LOOP_WATCHDOG_THRESHOLD_SECONDS.value:
+            return
+
+        route, stack = captured if captured is not None else (None, [])
+        self.stalls += 1
+        stall = {
+            "date": datetime.now(timezone.utc),
+            "lag_ms": round(lag * 1000, 1),
+            "route": route,
+            "stack": stack,
+        }
+        self.recent_stalls.append(stall)
+        logger.warning("Event loop blocked", extra={key: value for key, value in stall.items() if key != "date"})
+
+    # ---------------------------------------------------------------- thread
+
+    def _sample(self) -> None:
+        interval = Config.LOOP_WATCHDOG_INTERVAL_SECONDS.value
+        threshold = Config.LOOP_WATCHDOG_THRESHOLD_SECONDS.value
+        while not self._stopping.wait(threshold / 2):
+            if self._captured is not None or time.monotonic() - self._last_beat < interval + threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._captured = self._describe(frame)
+
+    def _describe(self, frame: FrameType) -> tuple[str | None, list[str]]:
+        """(route whose endpoint is in the stack, stack with the innermost call last)."""
+        route = None
+        frames = []
+        current: FrameType | None = frame
+        while current is not None:
+            if route is None:
+                route = self._route_by_code.get(current.f_code)
+            frames.append(current)
+            current = current.f_back
+        summary = traceback.StackSummary.extract(
+            ((f, f.f_lineno) for f in frames[:_MAX_STACK_FRAMES]), lookup_lines=False
+        )
+        return route, [f"{entry.filename}:{entry.lineno} {entry.name}" for entry in reversed(summary)]
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "threshold_ms": Config.LOOP_WATCHDOG_THRESHOLD_SECONDS.value * 1000,
+            "avg_lag_ms": round(self.total_lag_seconds / self.beats * 1000, 1) if self.beats else None,
+            "max_lag_ms": round(self.max_lag_seconds * 1000, 1),
+            "stalls": self.stalls,
+            "recent_stalls": list(self.recent_stalls),
+        }
+
+
+loop_watchdog = LoopWatchdog()
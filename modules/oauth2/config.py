@@ -4,6 +4,14 @@ from pydantic import BaseModel
 class _ConfigClass(BaseModel):
     TOKEN_EXPIRATION_DAYS: Annotated[int, 1, 365] = 7
     TOKEN_ALGORITHM: Literal["HS256", "RS256"] = "HS256"
+    # Argon2id parameters of the new hashes. Changing them rehashes each password at its next login.
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST_KIB: int = 64 * 1024
+    ARGON2_PARALLELISM: int = 4
+    # Pool hashing/verifying the passwords off the event loop (see modules.oauth2.password_pool)
+    PASSWORD_POOL_SIZE: int = 2
+    PASSWORD_POOL_MAX_WAITING: int = 64  # beyond, 503 with Retry-After
+    PASSWORD_POOL_TIMEOUT_SECONDS: float = 10
 
 # Customize your config values here
-Config = _ConfigClass()
\ No newline at end of file
+Config = _ConfigClass()
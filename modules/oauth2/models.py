@@ -5,6 +5,7 @@ from fastapi import HTTPException
 from pydantic import BaseModel, Field
 from typing import Type, TypeVar, Generic, Protocol, runtime_checkable
 
+from core.tracing import span
 from .utils import get_token_exp, OAUTH_INVALID_TOKEN_ERROR_MESS, OAUTH_TOKEN_ERROR_CODE
 from .config import Config
 
@@ -70,7 +71,8 @@ class AccessToken(BaseModel, Generic[CustomizedGenericTokenPayload]):
         if not token:
             return None
         try:
-            json_payload = jwt.decode(token, key, algorithms=[algorithm])
+            with span("jwt.verify"):
+                json_payload = jwt.decode(token, key, algorithms=[algorithm])
             return TokenPayloadClass(**json_payload)
         except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
             # If the token is expired or invalid,
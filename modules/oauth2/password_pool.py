@@ -0,0 +1,137 @@
+"""Password hashing and verification off the event loop.
+
+Argon2 burns tens of milliseconds of CPU (and `ARGON2_MEMORY_COST_KIB` of
+memory) per call on purpose: run on the event loop, it would freeze every other
+request of the worker. The calls go to a dedicated thread pool instead
+(argon2-cffi releases the GIL while hashing) of `PASSWORD_POOL_SIZE` threads.
+
+At most `PASSWORD_POOL_MAX_WAITING` calls wait for a thread: beyond, and when a
+call doesn't get its result within `PASSWORD_POOL_TIMEOUT_SECONDS`, the request
+gets a 503 (Retry-After). A login storm then slows down the logins only, not
+the rest of the API.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from fastapi import HTTPException
+
+from core.tracing import span
+from modules.oauth2.config import Config
+from modules.oauth2.utils import password_context
+
+T = TypeVar("T")
+
+_RETRY_AFTER_SECONDS = 2
+
+
+class PasswordPool:
+    """Bounded thread pool running the Argon2 calls, with its metrics."""
+
+    def __init__(self, size: int, max_waiting: int, timeout: float) -> None:
+        self._size = size
+        self._max_waiting = max_waiting
+        self._timeout = timeout
+        self._executor: ThreadPoolExecutor | None = None
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.total_run_seconds = 0.0
+        self.max_run_seconds = 0.0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._size, thread_name_prefix="password")
+        return self._executor
+
+    def _busy(self, message: str) -> HTTPException:
+        return HTTPException(
+            status_code=503,
+            detail=message,
+            headers={"Retry-After": str(_RETRY_AFTER_SECONDS)},
+        )
+
+    def _timed(self, submitted_at: float, function: Callable[..., T], *args: Any) -> T:
+        started_at = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            wait, run = started_at - submitted_at, time.perf_counter() - started_at
+            self.total_wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+            self.total_run_seconds += run
+            self.max_run_seconds = max(self.max_run_seconds, run)
+
+    async def run(self, function: Callable[..., T], *args: Any) -> T:
+        """`function(*args)` on a pool thread. Raises a 503 HTTPException when the pool is saturated."""
+        if self.pending >= self._size + self._max_waiting:
+            self.rejected += 1
+            raise self._busy("Trop de connexions en cours, réessayer dans quelques instants")
+
+        self.pending += 1
+        loop = asyncio.get_running_loop()
+        future = self._get_executor().submit(self._timed, time.perf_counter(), function, *args)
+        # Released when the thread is done with it, not when the caller stops waiting:
+        # a timed out call keeps its thread busy and still counts against the bound
+        future.add_done_callback(lambda _: self._release_threadsafe(loop))
+        try:
+            with span(f"password.{function.__name__}", **{"password_pool.pending": self.pending}):
+                result = await asyncio.wait_for(asyncio.wrap_future(future), self._timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise self._busy("Délai de vérification du mot de passe dépassé, réessayer")
+        self.completed += 1
+        return result
+
+    def _release(self) -> None:
+        self.pending -= 1
+
+    def _release_threadsafe(self, loop: asyncio.AbstractEventLoop) -> None:
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            # Loop closed (shutdown): nothing waits on the pool anymore
+            pass
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "size": self._size,
+            "max_waiting": self._max_waiting,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "avg_run_ms": round(self.total_run_seconds / self.completed * 1000, 1) if self.completed else None,
+            "max_run_ms": round(self.max_run_seconds * 1000, 1),
+            "avg_wait_ms": round(self.total_wait_seconds / self.completed * 1000, 1) if self.completed else None,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 1),
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_pool = PasswordPool(
+    size=Config.PASSWORD_POOL_SIZE,
+    max_waiting=Config.PASSWORD_POOL_MAX_WAITING,
+    timeout=Config.PASSWORD_POOL_TIMEOUT_SECONDS,
+)
+
+
+async def hash_password(password: str) -> str:
+    return await password_pool.run(password_context.hash, password)
+
+
+async def verify_password(plain: str, hashed: str | None) -> tuple[bool, str | None]:
+    """(is valid, new hash when `hashed` was made with older Argon2 parameters)."""
+    if not hashed:
+        return False, None
+    return await password_pool.run(password_context.verify_and_update, plain, hashed)
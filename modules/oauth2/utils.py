@@ -5,7 +5,13 @@ from datetime import datetime, timedelta
 from .config import Config
 
 secury_scheme = OAuth2PasswordBearer(tokenUrl="oauth", auto_error=False)
-password_context = CryptContext(schemes=["argon2"], deprecated="auto")
+password_context = CryptContext(
+  schemes=["argon2"],
+  deprecated="auto",
+  argon2__rounds=Config.ARGON2_TIME_COST,
+  argon2__memory_cost=Config.ARGON2_MEMORY_COST_KIB,
+  argon2__parallelism=Config.ARGON2_PARALLELISM,
+)
 
 OAUTH_TOKEN_ERROR_CODE = 401
 OAUTH_TOKEN_ERROR_MESS = "Authentification required"
@@ -0,0 +1,126 @@
+"""On-demand profiling of the running worker (see routers.superadmin.profile).
+
+- `profile_cpu`: statistical profiler. A thread samples the stacks of all the
+  threads (`sys._current_frames`) `rate_hz` times per second during `duration`
+  seconds; the result is in the collapsed stack format (`frame;frame;... count`)
+  read by flamegraph.pl, speedscope, etc. Nothing is instrumented: the overhead
+  is the sampling thread only, and only while a profile runs.
+- `profile_memory`: `tracemalloc` snapshots taken `duration` seconds apart and
+  compared, biggest growth first (tracing is started for the profile only when
+  it wasn't already on: it slows allocations down).
+
+One profile at a time per worker (`profiling_in_progress`).
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from types import FrameType
+from typing import Any, Literal
+
+from core.config import Config
+
+_profile_lock = asyncio.Lock()
+
+_SITE_PACKAGES = "site-packages" + os.sep
+
+
+def _short_path(filename: str) -> str:
+    if _SITE_PACKAGES in filename:
+        return filename.split(_SITE_PACKAGES, 1)[1]
+    return os.path.relpath(filename) if filename.startswith(os.getcwd()) else filename
+
+
+def _collapsed_stack(thread_name: str, frame: FrameType | None) -> str:
+    labels = []
+    while frame is not None:
+        code = frame.f_code
+        labels.append(f"{code.co_qualname} ({_short_path(code.co_filename)})".replace(";", ","))
+        frame = frame.f_back
+    labels.append(thread_name.replace(";", ","))
+    return ";".join(reversed(labels))
+
+
+def _sample_stacks(duration: float, rate_hz: int) -> tuple[Counter[str], int]:
+    """(count per collapsed stack, number of samplings). Runs on its own thread."""
+    stacks: Counter[str] = Counter()
+    samplings = 0
+    sampler_id = threading.get_ident()
+    interval = 1 / rate_hz
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id != sampler_id:
+                stacks[_collapsed_stack(thread_names.get(thread_id, str(thread_id)), frame)] += 1
+        samplings += 1
+        time.sleep(interval)
+    return stacks, samplings
+
+
+def profiling_in_progress() -> bool:
+    return _profile_lock.locked()
+
+
+async def profile_cpu(duration: float, rate_hz: int) -> dict[str, Any]:
+    async with _profile_lock:
+        stacks, samplings = await asyncio.to_thread(_sample_stacks, duration, rate_hz)
+    return {
+        "duration_seconds": duration,
+        "rate_hz": rate_hz,
+        "samplings": samplings,
+        "stacks": stacks.most_common(),
+    }
+
+
+def collapsed_profile(profile: dict[str, Any]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in profile["stacks"])
+
+
+async def profile_memory(
+    duration: float,
+    top: int,
+    group_by: Literal["lineno", "filename", "traceback"],
+) -> dict[str, Any]:
+    async with _profile_lock:
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(Config.PROFILER_TRACEMALLOC_FRAMES.value)
+        try:
+            before = await asyncio.to_thread(tracemalloc.take_snapshot)
+            await asyncio.sleep(duration)
+            after = await asyncio.to_thread(tracemalloc.take_snapshot)
+            traced_current, traced_peak = tracemalloc.get_traced_memory()
+        finally:
+            if started_here:
+                tracemalloc.stop()
+
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ]
+    differences = await asyncio.to_thread(
+        lambda: after.filter_traces(filters).compare_to(before.filter_traces(filters), group_by)
+    )
+    return {
+        "duration_seconds": duration,
+        "group_by": group_by,
+        "traced_current_kib": round(traced_current / 1024, 1),
+        "traced_peak_kib": round(traced_peak / 1024, 1),
+        "top": [
+            {
+                "location": [f"{_short_path(frame.filename)}:{frame.lineno}" for frame in difference.traceback],
+                "size_diff_kib": round(difference.size_diff / 1024, 1),
+                "count_diff": difference.count_diff,
+                "size_kib": round(difference.size / 1024, 1),
+                "count": difference.count,
+            }
+            for difference in differences[:top]
+        ],
+    }
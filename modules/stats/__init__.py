@@ -0,0 +1,271 @@
+"""Census statistics: fidele counts per paroisse/grade/type/sexe/statut/recensement.
+
+`stats_fidele` holds one counter per combination of dimensions, and
+`stats_fidele_cle` the combination each fidele is currently counted under.
+When a transaction touching `Fidele`, `FideleParoisse` or
+`FideleRecensementEtape` commits, the combination of the affected fideles is
+recomputed and, if it changed, the counters are moved (-1 on the old one, +1 on
+the new one) in the same transaction.
+
+Writes that bypass the ORM (hard delete, archival...) are caught up by
+`stats_reconciler`, which also rebuilds the counters from `stats_fidele_cle`.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import Counter
+from typing import Any, Iterable
+
+from sqlalchemy import Connection, delete, event, func, inspect, select, union
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.orm import Session, aliased
+
+from core.config import Config
+from core.db import get_engine
+from models.fidele import Fidele, FideleParoisse, FideleRecensementEtape
+from modules.stats.models import STATS_FIDELE_DIMENSIONS, StatsFidele, StatsFideleCle
+from utils.utils import log
+
+_PENDING_FIDELES_KEY = "stats_pending_fideles"
+
+# Attributes changing the combination a fidele is counted under
+_TRACKED_ATTRIBUTES = {
+    Fidele: {
+        "id_grade", "id_fidele_type", "sexe", "id_document_statut",
+        "rencensement_statut", "est_supprimee",
+    },
+    FideleParoisse: {"id_fidele", "id_paroisse", "est_paroisse_principale", "est_supprimee"},
+    FideleRecensementEtape: {"id_fidele", "id_document_statut", "est_supprimee"},
+}
+
+_stats_table = StatsFidele.__table__
+_cle_table = StatsFideleCle.__table__
+
+Key = tuple[Any, ...]
+
+
+# ============================================================================
+# REFRESH
+# ============================================================================
+
+def _current_keys_statement(ids: Iterable[int]):
+    """Combination of each (non deleted) fidele of `ids`."""
+    principale = aliased(FideleParoisse)
+    id_paroisse_principale = (
+        select(func.min(principale.id_paroisse))
+        .where(
+            (principale.id_fidele == Fidele.id)
+            & (principale.est_paroisse_principale == True)
+            & (principale.est_supprimee == False)
+        )
+        .scalar_subquery()
+    )
+    return select(
+        Fidele.id,
+        func.coalesce(id_paroisse_principale, 0),
+        Fidele.id_grade,
+        Fidele.id_fidele_type,
+        Fidele.sexe,
+        Fidele.id_document_statut,
+        func.coalesce(Fidele.rencensement_statut, 0) >= 100,
+    ).where(Fidele.id.in_(list(ids)), Fidele.est_supprimee == False)
+
+
+def _lock_order(key: Key) -> tuple:
+    """Sort key of a combination, None first in each dimension."""
+    return tuple((value is not None, value) for value in key)
+
+
+def _apply_deltas(connection: Connection, deltas: Counter[Key]) -> None:
+    # Always in the same order: two transactions moving fideles in opposite directions
+    # lock the same counter rows one after the other instead of deadlocking
+    rows = [
+        {**dict(zip(STATS_FIDELE_DIMENSIONS, key)), "nombre": deltas[key]}
+        for key in sorted(deltas, key=_lock_order)
+        if deltas[key]
+    ]
+    if not rows:
+        return
+    # One statement for all the moved counters (a row is created the first time a combination is seen)
+    statement = insert(_stats_table).values(rows)
+    connection.execute(
+        statement.on_duplicate_key_update(nombre=_stats_table.c.nombre + statement.inserted.nombre)
+    )
+
+
+def refresh_fidele_stats(connection: Connection, ids: Iterable[int]) -> int:
+    """Move the counters of the fideles `ids` whose combination changed. Returns how many moved."""
+    ids = set(ids)
+    if not ids:
+        return 0
+
+    current = {
+        row[0]: tuple(row[1:])
+        for row in connection.execute(_current_keys_statement(ids))
+    }
+    # FOR UPDATE: concurrent transactions moving the same fidele are serialized
+    stored = {
+        row[0]: tuple(row[1:])
+        for row in connection.execute(
+            select(_cle_table.c.id_fidele, *(_cle_table.c[name] for name in STATS_FIDELE_DIMENSIONS))
+            .where(_cle_table.c.id_fidele.in_(ids))
+            .with_for_update()
+        )
+    }
+
+    deltas: Counter[Key] = Counter()
+    upserts, removed = [], []
+    for id_fidele in sorted(ids):
+        old, new = stored.get(id_fidele), current.get(id_fidele)
+        if old == new:
+            continue
+        if old is not None:
+            deltas[old] -= 1
+        if new is not None:
+            deltas[new] += 1
+            upserts.append({"id_fidele": id_fidele, **dict(zip(STATS_FIDELE_DIMENSIONS, new))})
+        else:
+            removed.append(id_fidele)
+
+    _apply_deltas(connection, deltas)
+    if upserts:
+        statement = insert(_cle_table).values(upserts)
+        connection.execute(
+            statement.on_duplicate_key_update(
+                {name: statement.inserted[name] for name in STATS_FIDELE_DIMENSIONS},
+                date_modification=func.now(),
+            )
+        )
+    if removed:
+        connection.execute(delete(_cle_table).where(_cle_table.c.id_fidele.in_(removed)))
+    return len(upserts) + len(removed)
+
+
+# ============================================================================
+# SESSION HOOKS
+# ============================================================================
+
+def _affected_fidele_id(instance: Any, is_dirty: bool) -> int | None:
+    tracked = _TRACKED_ATTRIBUTES.get(type(instance))
+    if tracked is None:
+        return None
+    if is_dirty:
+        state = inspect(instance)
+        if not any(state.attrs[name].history.has_changes() for name in tracked):
+            return None
+    return instance.id if isinstance(instance, Fidele) else instance.id_fidele
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_affected_fideles(session: Session, _flush_context) -> None:
+    ids = set()
+    for instance in (*session.new, *session.deleted):
+        ids.add(_affected_fidele_id(instance, is_dirty=False))
+    for instance in session.dirty:
+        ids.add(_affected_fidele_id(instance, is_dirty=True))
+    ids.discard(None)
+    if ids:
+        session.info.setdefault(_PENDING_FIDELES_KEY, set()).update(ids)
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_affected_fideles(session: Session) -> None:
+    # The commit flushes after this hook: flush now so the last changes are collected too
+    session.flush()
+    ids = session.info.pop(_PENDING_FIDELES_KEY, None)
+    if ids:
+        refresh_fidele_stats(session.connection(), ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_affected_fideles(session: Session) -> None:
+    session.info.pop(_PENDING_FIDELES_KEY, None)
+
+
+# ============================================================================
+# RECONCILER
+# ============================================================================
+
+def _reconcile_keys(connection: Connection, after_id: int) -> int | None:
+    """Refresh the next chunk of fideles (by id). Returns the last id seen, None when done."""
+    ids_statement = union(
+        select(Fidele.id.label("id")).where(Fidele.id > after_id),
+        select(_cle_table.c.id_fidele.label("id")).where(_cle_table.c.id_fidele > after_id),
+    ).subquery()
+    ids = connection.execute(
+        select(ids_statement.c.id).order_by(ids_statement.c.id).limit(Config.STATS_RECONCILE_CHUNK_SIZE.value)
+    ).scalars().all()
+    if not ids:
+        return None
+    refresh_fidele_stats(connection, ids)
+    return ids[-1]
+
+
+def _reconcile_counters(connection: Connection) -> int:
+    """Rebuild the counters from stats_fidele_cle. Returns how many counters were fixed."""
+    dimensions = [_cle_table.c[name] for name in STATS_FIDELE_DIMENSIONS]
+    expected = {
+        tuple(row[:-1]): row[-1]
+        for row in connection.execute(select(*dimensions, func.count()).group_by(*dimensions))
+    }
+    actual = {
+        tuple(row[:-1]): row[-1]
+        for row in connection.execute(
+            select(*(_stats_table.c[name] for name in STATS_FIDELE_DIMENSIONS), _stats_table.c.nombre)
+        )
+    }
+
+    deltas: Counter[Key] = Counter()
+    for key in expected.keys() | actual.keys():
+        deltas[key] = expected.get(key, 0) - actual.get(key, 0)
+    _apply_deltas(connection, deltas)
+    connection.execute(delete(_stats_table).where(_stats_table.c.nombre <= 0))
+    return sum(1 for delta in deltas.values() if delta)
+
+
+async def reconcile_fidele_stats() -> dict[str, int]:
+    """Catch up the writes done outside the ORM, chunk by chunk, then fix the counters."""
+    engine = get_engine()
+    refreshed_chunks = 0
+    after_id = 0
+    while after_id is not None:
+        async with engine.begin() as connection:
+            after_id = await connection.run_sync(_reconcile_keys, after_id)
+        refreshed_chunks += 1
+        await asyncio.sleep(0)
+
+    async with engine.begin() as connection:
+        fixed_counters = await connection.run_sync(_reconcile_counters)
+    return {"chunks": refreshed_chunks, "fixed_counters": fixed_counters}
+
+
+class StatsReconciler:
+    """Background task running `reconcile_fidele_stats` every `Config.STATS_RECONCILE_INTERVAL_SECONDS`."""
+
+    def __init__(self) -> None:
+        self._task: asyncio.Task | None = None
+        self.last_run: float | None = None
+        self.last_result: dict[str, int] = {}
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="stats-reconciler")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(Config.STATS_RECONCILE_INTERVAL_SECONDS.value)
+            try:
+                self.last_result = await reconcile_fidele_stats()
+                self.last_run = time.time()
+            except Exception as e:
+                log(e)
+
+
+stats_reconciler = StatsReconciler()
@@ -0,0 +1,61 @@
+from datetime import datetime, timezone
+
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Column, DateTime, Index, Integer, UniqueConstraint, text
+
+from models.utils.utils import Gender
+
+
+# Dimensions of the rollup, in the order of the unique key
+STATS_FIDELE_DIMENSIONS = (
+    "id_paroisse",
+    "id_grade",
+    "id_fidele_type",
+    "sexe",
+    "id_document_statut",
+    "recensement_complete",
+)
+
+
+class StatsFideleDimensions(SQLModel):
+    # 0 quand le fidèle n'a pas de paroisse principale (une clé unique ne déduplique pas les NULL)
+    id_paroisse: int = Field(default=0, nullable=False, sa_column_kwargs={"server_default": text("0")})
+    id_grade: int = Field(nullable=False)
+    id_fidele_type: int = Field(nullable=False)
+    sexe: Gender = Field(nullable=False)
+    id_document_statut: int = Field(nullable=False)
+    recensement_complete: bool = Field(
+        default=False,
+        nullable=False,
+        sa_column_kwargs={"server_default": text("0")},
+    )
+
+
+class StatsFidele(StatsFideleDimensions, table=True):
+    """Nombre de fidèles (non supprimés) par combinaison de dimensions.
+
+    Maintenue incrémentalement (voir modules.stats); la nation et le continent se
+    déduisent de la paroisse (Adresse -> Nation -> Continent) à la lecture.
+    """
+
+    __tablename__ = "stats_fidele"
+
+    id: int | None = Field(default=None, primary_key=True)
+    nombre: int = Field(default=0, sa_column=Column(Integer, nullable=False, server_default=text("0")))
+
+    __table_args__ = (
+        UniqueConstraint(*STATS_FIDELE_DIMENSIONS, name="uq_stats_fidele_dimensions"),
+        Index("idx_stats_fidele_grade", "id_grade"),
+    )
+
+
+class StatsFideleCle(StatsFideleDimensions, table=True):
+    """Combinaison sous laquelle chaque fidèle est actuellement compté dans stats_fidele."""
+
+    __tablename__ = "stats_fidele_cle"
+
+    id_fidele: int = Field(sa_column=Column(Integer, primary_key=True, autoincrement=False))
+    date_modification: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP")),
+    )
@@ -0,0 +1,94 @@
+"""Delta sync for the mobile apps: rows changed since a `(date_modification, id)` watermark.
+
+A chunk is the next rows of a table ordered by `(date_modification, id)`
+(served by the idx_<table>_sync indexes), soft-deleted ones included: they are
+sent as tombstones. Only the rows older than `Config.SYNC_SETTLE_SECONDS` are
+returned, so a transaction committing a bit after its `date_modification`
+isn't skipped by a client whose watermark already moved past it.
+
+`date_modification` is bumped on every ORM update (see
+`_touch_date_modification`): the routers not setting it themselves are covered.
+
+The archiver hard deletes the tombstones older than `Config.ARCHIVE_AFTER_DAYS`:
+a client which hasn't synced for that long may have missed some, so a cursor
+issued before that starts the entity over (`cursor_is_expired`). The age of the
+cursor is what matters, not the one of the rows it points to: a table whose
+rows are all older than that is still synced incrementally.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, Sequence
+
+from sqlalchemy import and_, event, inspect, or_, select
+from sqlalchemy.orm import Session
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import Config
+
+Watermark = tuple[datetime, int]
+
+
+class SyncChunk(NamedTuple):
+    rows: Sequence[SQLModel]
+    deleted_ids: list[int]
+    watermark: Watermark | None
+    has_more: bool
+
+
+def cursor_is_expired(issued_at: datetime) -> bool:
+    """The tombstones written since a cursor issued at `issued_at` may be archived (hard deleted) already."""
+    oldest = (
+        datetime.now(timezone.utc)
+        - timedelta(days=Config.ARCHIVE_AFTER_DAYS.value)
+        + timedelta(seconds=Config.SYNC_SETTLE_SECONDS.value)
+    )
+    return issued_at.replace(tzinfo=timezone.utc) < oldest
+
+
+async def get_sync_chunk(
+    session: AsyncSession,
+    model: type[SQLModel],
+    watermark: Watermark | None,
+    limit: int,
+) -> SyncChunk:
+    """Rows of `model` changed after `watermark` (everything alive when None), `limit` at most."""
+    settled = datetime.now(timezone.utc) - timedelta(seconds=Config.SYNC_SETTLE_SECONDS.value)
+    statement = select(model).where(model.date_modification < settled)
+    if watermark is None:
+        # First sync: the client has nothing to delete
+        statement = statement.where(model.est_supprimee == False)
+    else:
+        date_modification, id = watermark
+        statement = statement.where(
+            or_(
+                model.date_modification > date_modification,
+                and_(model.date_modification == date_modification, model.id > id),
+            )
+        )
+    statement = statement.order_by(model.date_modification, model.id).limit(limit + 1)
+
+    rows = (await session.execute(statement)).scalars().all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        watermark = (rows[-1].date_modification, rows[-1].id)
+
+    return SyncChunk(
+        rows=[row for row in rows if not row.est_supprimee],
+        deleted_ids=[row.id for row in rows if row.est_supprimee],
+        watermark=watermark,
+        has_more=has_more,
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _touch_date_modification(session: Session, _flush_context, _instances) -> None:
+    now = datetime.now(timezone.utc)
+    for instance in session.dirty:
+        state = inspect(instance)
+        if "date_modification" not in state.mapper.columns or not session.is_modified(instance):
+            continue
+        if not state.attrs.date_modification.history.has_changes():
+            instance.date_modification = now
@@ -0,0 +1,7 @@
+"""Identity checks at the pilgrimage checkpoints (security verification app).
+
+- `credential`: signed QR credentials, verified offline without any query.
+- `validity`: versioned set of the valid matricules (revocations), downloaded incrementally.
+- `lookup`: scanned matricule -> compact profile with the signed photo URL (LRU cached).
+- `scans`: checkpoint scans, buffered in memory and bulk-inserted into verification_scan.
+"""
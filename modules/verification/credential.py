@@ -0,0 +1,159 @@
+"""Signed QR credentials of the validated fideles, verifiable offline.
+
+A credential is a compact JWT (short claim names, no `sub`: it can't be mistaken
+for an access token) holding the matricule, the name initials, the hash of the
+photo, the document statut and an expiry. It is signed with Ed25519 (EdDSA):
+the private key (`CREDENTIAL_SIGNING_KEY`, PKCS8 PEM) never leaves the API, the
+verification devices only get the public keys (GET /verification/credential/jwks),
+which can check a credential but not issue one.
+
+Key rotation: the `kid` header (RFC 7638 thumbprint) names the signing key. The
+public keys of the previous signing keys (`CREDENTIAL_PREVIOUS_PUBLIC_KEYS`, PEM
+blocks) stay published and accepted until their credentials have expired
+(`Config.CREDENTIAL_EXPIRATION_DAYS` after the rotation).
+
+`verify_credential` is pure CPU work (one signature check and a JSON decode): no database.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+from pydantic import BaseModel, Field
+
+from core.config import Config
+from models.constants.types import DocumentStatutEnum
+from models.fidele import Fidele
+
+CREDENTIAL_VERSION = 1
+_CREDENTIAL_TYPE = "EJCV"
+_CREDENTIAL_ALGORITHM = "EdDSA"
+_PEM_PUBLIC_KEY = re.compile(r"-----BEGIN PUBLIC KEY-----.+?-----END PUBLIC KEY-----", re.DOTALL)
+# Statuts for which a credential is issued
+VALID_DOCUMENT_STATUTS = {DocumentStatutEnum.VALIDE.value, DocumentStatutEnum.COMPLETE.value}
+
+
+class CredentialClaims(BaseModel):
+    v: int = Field(CREDENTIAL_VERSION, description="Version du format")
+    m: str = Field(..., description="code_matriculation")
+    i: str = Field(..., description="Initiales (nom, postnom, prénom)")
+    p: str | None = Field(None, description="sha256 (hex, 16 premiers caractères) de la photo")
+    s: int = Field(..., description="id_document_statut à l'émission")
+    iat: int
+    exp: int
+
+
+class CredentialError(ValueError):
+    pass
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def public_key_jwk(public_key: Ed25519PublicKey) -> dict[str, str]:
+    """JWK of `public_key`, its `kid` being the RFC 7638 thumbprint."""
+    x = _b64url(public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw))
+    thumbprint = json.dumps({"crv": "Ed25519", "kty": "OKP", "x": x}, separators=(",", ":"), sort_keys=True)
+    kid = _b64url(hashlib.sha256(thumbprint.encode()).digest())
+    return {"kty": "OKP", "crv": "Ed25519", "x": x, "kid": kid, "alg": _CREDENTIAL_ALGORITHM, "use": "sig"}
+
+
+@lru_cache(maxsize=1)
+def get_credential_signing_key() -> tuple[str, Ed25519PrivateKey]:
+    """(kid, private key) signing the credentials, from CREDENTIAL_SIGNING_KEY."""
+    pem = os.getenv("CREDENTIAL_SIGNING_KEY")
+    if not pem:
+        raise RuntimeError("CREDENTIAL_SIGNING_KEY is not set")
+    key = serialization.load_pem_private_key(pem.encode(), password=None)
+    if not isinstance(key, Ed25519PrivateKey):
+        raise RuntimeError("CREDENTIAL_SIGNING_KEY must be an Ed25519 private key")
+    return public_key_jwk(key.public_key())["kid"], key
+
+
+@lru_cache(maxsize=1)
+def get_credential_public_keys() -> dict[str, Ed25519PublicKey]:
+    """Public keys accepted for the credentials by kid: the current one, then the previous ones."""
+    _, signing_key = get_credential_signing_key()
+    keys = [signing_key.public_key()]
+    for pem in _PEM_PUBLIC_KEY.findall(os.getenv("CREDENTIAL_PREVIOUS_PUBLIC_KEYS", "")):
+        key = serialization.load_pem_public_key(pem.encode())
+        if not isinstance(key, Ed25519PublicKey):
+            raise RuntimeError("CREDENTIAL_PREVIOUS_PUBLIC_KEYS must hold Ed25519 public keys")
+        keys.append(key)
+    return {public_key_jwk(key)["kid"]: key for key in keys}
+
+
+def get_credential_jwks() -> dict[str, Any]:
+    """JWKS of the public keys the verification devices check the credentials with."""
+    return {"keys": [public_key_jwk(key) for key in get_credential_public_keys().values()]}
+
+
+def _initials(fidele: Fidele) -> str:
+    return "".join(name.strip()[0].upper() for name in (fidele.nom, fidele.postnom, fidele.prenom) if name and name.strip())
+
+
+def build_credential_claims(fidele: Fidele, photo_sha256: str | None) -> CredentialClaims:
+    """Claims of `fidele`'s credential. Raises CredentialError when the fidele can't have one."""
+    if not fidele.code_matriculation or fidele.est_supprimee:
+        raise CredentialError("Le fidèle n'a pas de code de matriculation")
+    if fidele.id_document_statut not in VALID_DOCUMENT_STATUTS:
+        raise CredentialError("Le fidèle n'est pas validé")
+
+    now = datetime.now(timezone.utc)
+    return CredentialClaims(
+        m=fidele.code_matriculation,
+        i=_initials(fidele),
+        p=photo_sha256[:16] if photo_sha256 else None,
+        s=fidele.id_document_statut,
+        iat=int(now.timestamp()),
+        exp=int((now + timedelta(days=Config.CREDENTIAL_EXPIRATION_DAYS.value)).timestamp()),
+    )
+
+
+def issue_credential(claims: CredentialClaims) -> str:
+    kid, signing_key = get_credential_signing_key()
+    return jwt.encode(
+        claims.model_dump(exclude_none=True),
+        signing_key,
+        algorithm=_CREDENTIAL_ALGORITHM,
+        headers={"typ": _CREDENTIAL_TYPE, "kid": kid},
+    )
+
+
+def verify_credential(credential: str) -> CredentialClaims:
+    """Check the signature and the expiry of `credential`. Raises CredentialError when invalid."""
+    try:
+        header = jwt.get_unverified_header(credential)
+        if header.get("typ") != _CREDENTIAL_TYPE:
+            raise CredentialError("Ce n'est pas un justificatif de vérification")
+        public_key = get_credential_public_keys().get(header.get("kid"))
+        if public_key is None:
+            raise CredentialError("Justificatif signé par une clé inconnue")
+        payload = jwt.decode(
+            credential,
+            public_key,
+            algorithms=[_CREDENTIAL_ALGORITHM],
+            options={"require": ["exp", "iat"]},
+        )
+    except jwt.ExpiredSignatureError:
+        raise CredentialError("Justificatif expiré")
+    except jwt.InvalidTokenError as e:
+        raise CredentialError(f"Justificatif invalide: {e}")
+
+    try:
+        claims = CredentialClaims.model_validate(payload)
+    except ValueError:
+        raise CredentialError("Justificatif invalide: contenu inattendu")
+    if claims.v != CREDENTIAL_VERSION:
+        raise CredentialError(f"Version de justificatif non supportée: {claims.v}")
+    return claims
@@ -0,0 +1,252 @@
+"""Scanned matricule -> what the checkpoint agent needs to recognize the fidele.
+
+One query per lookup (or per batch of codes): the fidele by its unique
+`code_matriculation` (uq_fidele_code_matriculation), joined to its grade, its
+document statut, its main paroisse and its photo. The signed photo URL is
+computed along (`Config.SIGNED_URL_EXPIRATION_PRIVATE_FILE`).
+
+The profiles are kept in an in-process LRU (`Config.VERIFICATION_LOOKUP_CACHE_*`)
+whose TTL stays well below the photo URL expiry. An entry is dropped as soon as a
+transaction of this process writing the fidele, its paroisses or its photo
+commits (see `_collect_written_fideles`); other workers pick the change up after
+the TTL. Unknown codes aren't cached: a fidele validated meanwhile is found.
+"""
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Sequence
+
+from pydantic import BaseModel
+from sqlalchemy import Table, and_, event, inspect, select
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import Config
+from models.constants import DocumentStatut, Grade
+from models.constants.types import DocumentTypeEnum
+from models.fidele import Fidele, FideleParoisse
+from models.paroisse import Paroisse
+from modules.file import S3Service
+from modules.file.models import File
+from modules.verification.credential import VALID_DOCUMENT_STATUTS
+
+_WRITTEN_FIDELES_KEY = "verification_lookup_written_fideles"
+# Written with a bulk statement (or a renamed grade/paroisse...): every entry may be stale
+_ALL = "*"
+_LOOKUP_TABLES = {"fidele", "fidele_paroisse", "file", "paroisse", "grade", "document_statut"}
+
+
+class VerificationProfile(BaseModel):
+    """Projection compacte d'un fidèle pour les points de contrôle."""
+
+    id: int
+    code_matriculation: str
+    nom: str
+    postnom: str | None = None
+    prenom: str | None = None
+    grade: str
+    paroisse: str | None = None
+    id_document_statut: int
+    document_statut: str
+    valide: bool
+    photo_url: str | None = None
+    photo_url_expiration_date: datetime | None = None
+    photo_sha256: str | None = None
+
+
+# code_matriculation -> (loaded_at, profile), least recently used first
+_cache: OrderedDict[str, tuple[float, VerificationProfile]] = OrderedDict()
+# fidele id -> code_matriculation of its cached profile
+_codes_by_id: dict[int, str] = {}
+
+
+def _get_cached(code: str) -> VerificationProfile | None:
+    cached = _cache.get(code)
+    if cached is None:
+        return None
+    if time.monotonic() - cached[0] >= Config.VERIFICATION_LOOKUP_CACHE_TTL_SECONDS.value:
+        _drop(code)
+        return None
+    _cache.move_to_end(code)
+    return cached[1]
+
+
+def _set_cached(profile: VerificationProfile) -> None:
+    _drop(profile.code_matriculation)
+    while len(_cache) >= Config.VERIFICATION_LOOKUP_CACHE_MAX_ENTRIES.value:
+        _drop(next(iter(_cache)))
+    _cache[profile.code_matriculation] = (time.monotonic(), profile)
+    _codes_by_id[profile.id] = profile.code_matriculation
+
+
+def _drop(code: str) -> None:
+    cached = _cache.pop(code, None)
+    if cached is not None and _codes_by_id.get(cached[1].id) == code:
+        del _codes_by_id[cached[1].id]
+
+
+def invalidate_verification_lookups(fidele_ids: Iterable[int] = (), codes: Iterable[str] = ()) -> None:
+    """Drop the cached profiles of `fidele_ids` / `codes`."""
+    for id in fidele_ids:
+        code = _codes_by_id.get(id)
+        if code is not None:
+            _drop(code)
+    for code in codes:
+        _drop(code)
+
+
+def clear_verification_lookups() -> None:
+    _cache.clear()
+    _codes_by_id.clear()
+
+
+# ============================================================================
+# LOOKUP
+# ============================================================================
+
+def _lookup_statement(codes: Sequence[str]):
+    return (
+        select(
+            Fidele.id,
+            Fidele.code_matriculation,
+            Fidele.nom,
+            Fidele.postnom,
+            Fidele.prenom,
+            Fidele.id_document_statut,
+            Grade.nom.label("grade"),
+            DocumentStatut.nom.label("document_statut"),
+            Paroisse.nom.label("paroisse"),
+            File.file_name.label("photo_file_name"),
+            File.sha256.label("photo_sha256"),
+        )
+        .join(Grade, Grade.id == Fidele.id_grade)
+        .join(DocumentStatut, DocumentStatut.id == Fidele.id_document_statut)
+        .outerjoin(
+            FideleParoisse,
+            and_(
+                FideleParoisse.id_fidele == Fidele.id,
+                FideleParoisse.est_paroisse_principale == True,
+                FideleParoisse.est_supprimee == False,
+            ),
+        )
+        .outerjoin(Paroisse, Paroisse.id == FideleParoisse.id_paroisse)
+        .outerjoin(
+            File,
+            and_(
+                File.id_document == Fidele.id,
+                File.id_document_type == DocumentTypeEnum.FIDELE.value,
+                File.est_supprimee == False,
+            ),
+        )
+        .where(Fidele.code_matriculation.in_(codes), Fidele.est_supprimee == False)
+    )
+
+
+async def _load_profiles(session: AsyncSession, codes: Sequence[str]) -> dict[str, VerificationProfile]:
+    rows = (await session.execute(_lookup_statement(codes))).all()
+    file_service = S3Service() if any(row.photo_file_name for row in rows) else None
+    expires_in = Config.SIGNED_URL_EXPIRATION_PRIVATE_FILE.value
+
+    profiles: dict[str, VerificationProfile] = {}
+    for row in rows:
+        # Several main paroisses (or photos) would give several rows: the first one wins
+        if row.code_matriculation in profiles:
+            continue
+        photo_url = file_service.sign_url(row.photo_file_name, expires_in) if row.photo_file_name else None
+        profiles[row.code_matriculation] = VerificationProfile(
+            id=row.id,
+            code_matriculation=row.code_matriculation,
+            nom=row.nom,
+            postnom=row.postnom,
+            prenom=row.prenom,
+            grade=row.grade,
+            paroisse=row.paroisse,
+            id_document_statut=row.id_document_statut,
+            document_statut=row.document_statut,
+            valide=row.id_document_statut in VALID_DOCUMENT_STATUTS,
+            photo_url=photo_url,
+            photo_url_expiration_date=(
+                datetime.now(timezone.utc) + timedelta(seconds=expires_in) if photo_url else None
+            ),
+            photo_sha256=row.photo_sha256,
+        )
+    return profiles
+
+
+async def lookup_verification_profiles(
+    session: AsyncSession,
+    codes: Sequence[str],
+) -> tuple[list[VerificationProfile], list[str]]:
+    """Profiles of `codes`. Returns (found profiles in the order of `codes`, codes not found)."""
+    found: dict[str, VerificationProfile] = {}
+    misses = []
+    for code in codes:
+        profile = _get_cached(code)
+        if profile is not None:
+            found[code] = profile
+        else:
+            misses.append(code)
+
+    if misses:
+        for code, profile in (await _load_profiles(session, misses)).items():
+            _set_cached(profile)
+            found[code] = profile
+
+    return [found[code] for code in codes if code in found], [code for code in codes if code not in found]
+
+
+# ============================================================================
+# SESSION HOOKS
+# ============================================================================
+
+def _add_written(session: Session, fidele_ids: Iterable[int] = (), codes: Iterable[str] = ()) -> None:
+    written = session.info.setdefault(_WRITTEN_FIDELES_KEY, (set(), set()))
+    written[0].update(fidele_ids)
+    written[1].update(codes)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_written_fideles(session: Session, _flush_context) -> None:
+    fidele_ids: set[int] = set()
+    codes: set[str] = set()
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, Fidele):
+            history = inspect(instance).attrs.code_matriculation.history
+            codes.update(code for code in (*history.sum(), instance.code_matriculation) if code)
+            if instance.id is not None:
+                fidele_ids.add(instance.id)
+        elif isinstance(instance, FideleParoisse):
+            fidele_ids.add(instance.id_fidele)
+        elif isinstance(instance, File) and instance.id_document_type == DocumentTypeEnum.FIDELE.value:
+            fidele_ids.add(instance.id_document)
+        elif isinstance(instance, (Paroisse, Grade, DocumentStatut)) and instance in session.dirty:
+            codes.add(_ALL)
+    if fidele_ids or codes:
+        _add_written(session, fidele_ids, codes)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_written_fideles(orm_execute_state: ORMExecuteState) -> None:
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if isinstance(table, Table) and table.name in _LOOKUP_TABLES:
+            _add_written(orm_execute_state.session, codes={_ALL})
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_fideles(session: Session) -> None:
+    written = session.info.pop(_WRITTEN_FIDELES_KEY, None)
+    if written is None:
+        return
+    fidele_ids, codes = written
+    if _ALL in codes:
+        clear_verification_lookups()
+    else:
+        invalidate_verification_lookups(fidele_ids, codes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_written_fideles(session: Session) -> None:
+    session.info.pop(_WRITTEN_FIDELES_KEY, None)
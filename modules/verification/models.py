@@ -0,0 +1,76 @@
+from datetime import datetime, timezone
+from enum import Enum
+
+from sqlmodel import SQLModel, Field
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, LargeBinary, String, text
+from sqlalchemy.dialects.mysql import LONGBLOB
+
+# BLOB is limited to 64 KB on MySQL
+_Blob = LargeBinary().with_variant(LONGBLOB(), "mysql")
+
+
+class VerificationValidite(SQLModel, table=True):
+    """Version de l'ensemble des matricules valides, téléchargé par les appareils de vérification.
+
+    `empreintes`: empreintes triées de tous les matricules valides (voir
+    modules.verification.validity); `ajouts`/`retraits`: différence avec la
+    version précédente, pour les mises à jour incrémentales.
+    """
+
+    __tablename__ = "verification_validite"
+
+    version: int | None = Field(default=None, primary_key=True)
+    nombre: int = Field(sa_column=Column(Integer, nullable=False))
+    empreintes: bytes = Field(sa_column=Column(_Blob, nullable=False))
+    ajouts: bytes | None = Field(default=None, sa_column=Column(_Blob, nullable=True))
+    retraits: bytes | None = Field(default=None, sa_column=Column(_Blob, nullable=True))
+    date_creation: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP")),
+    )
+
+
+class VerificationScanResultatEnum(str, Enum):
+    VALIDE = "valide"
+    INVALIDE = "invalide"    # fidele trouvé mais pas validé
+    REVOQUE = "revoque"      # justificatif authentique, matricule retiré de l'ensemble des valides
+    EXPIRE = "expire"
+    FALSIFIE = "falsifie"    # signature du justificatif invalide
+    INCONNU = "inconnu"      # matricule introuvable
+
+
+class VerificationScan(SQLModel, table=True):
+    """Scan d'un justificatif à un point de contrôle (append-only).
+
+    Partitionnée par mois (RANGE sur date_scan, voir la migration), comme
+    audit_event: la date fait partie de la clé primaire et `id_fidele` n'a pas
+    de clé étrangère.
+    """
+
+    __tablename__ = "verification_scan"
+
+    id: int | None = Field(
+        default=None,
+        sa_column=Column(BigInteger, primary_key=True, autoincrement=True),
+    )
+    date_scan: datetime = Field(
+        sa_column=Column(DateTime, primary_key=True, nullable=False),
+    )
+    date_reception: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP")),
+    )
+
+    id_fidele: int | None = Field(default=None, sa_column=Column(Integer, nullable=True))
+    code_matriculation: str | None = Field(default=None, sa_column=Column(String(12), nullable=True))
+    resultat: str = Field(sa_column=Column(String(16), nullable=False))
+    point_controle: str | None = Field(default=None, sa_column=Column(String(64), nullable=True))
+    id_appareil: str | None = Field(default=None, sa_column=Column(String(64), nullable=True))
+    id_fidele_agent: int | None = Field(default=None, sa_column=Column(Integer, nullable=True))
+    # Temps de vérification (du scan à la décision de l'agent)
+    duree_ms: int | None = Field(default=None, sa_column=Column(Integer, nullable=True))
+
+    __table_args__ = (
+        Index("idx_verification_scan_fidele", "id_fidele", "date_scan"),
+        Index("idx_verification_scan_point_controle", "point_controle", "date_scan"),
+    )
@@ -0,0 +1,179 @@
+"""Checkpoint scans: recorded for the verification time and fraud metrics.
+
+The scan endpoints only append to an in-process buffer and answer at once;
+`scan_ingestor` empties it in the background with multi-row INSERTs into the
+monthly partitioned `verification_scan` table, resolving the missing
+`id_fidele` from the matricules with one query per batch.
+
+Back-pressure: when the buffer can't take a whole request
+(`Config.VERIFICATION_SCAN_QUEUE_MAX_SIZE`), the request is refused (503) and
+the device keeps its scans for later. A failed INSERT puts its batch back at
+the front of the buffer when the database is unreachable: the buffer fills up
+and the devices are told to retry instead of scans being lost.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from core.config import Config
+from core.db import get_sessionmaker
+from models.fidele import Fidele
+from modules.audit import ensure_audit_partitions
+from modules.verification.models import VerificationScan
+from utils.utils import log
+
+
+class ScanIngestor:
+    """Background task writing the buffered scans in batches."""
+
+    def __init__(self) -> None:
+        # (monotonic time of reception, row), oldest first
+        self._buffer: deque[tuple[float, dict[str, Any]]] = deque()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._last_maintenance = 0.0
+        self.accepted_scans = 0
+        self.rejected_scans = 0
+        self.written_scans = 0
+        self.dropped_scans = 0
+        self.failed_writes = 0
+        self.last_flush_lag: float | None = None
+        self.max_flush_lag = 0.0
+        self.last_flush_at: float | None = None
+
+    def enqueue(self, scans: list[dict[str, Any]]) -> bool:
+        """Buffer `scans` (all or none). False when the buffer is full: the caller answers 503."""
+        if len(self._buffer) + len(scans) > Config.VERIFICATION_SCAN_QUEUE_MAX_SIZE.value:
+            self.rejected_scans += len(scans)
+            return False
+        received = time.monotonic()
+        self._buffer.extend((received, scan) for scan in scans)
+        self.accepted_scans += len(scans)
+        self._wakeup.set()
+        return True
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "buffered": len(self._buffer),
+            "capacity": Config.VERIFICATION_SCAN_QUEUE_MAX_SIZE.value,
+            "oldest_buffered_age_seconds": (
+                round(time.monotonic() - self._buffer[0][0], 3) if self._buffer else 0.0
+            ),
+            "accepted": self.accepted_scans,
+            "rejected": self.rejected_scans,
+            "written": self.written_scans,
+            "dropped": self.dropped_scans,
+            "failed_writes": self.failed_writes,
+            "last_flush_lag_seconds": (
+                round(self.last_flush_lag, 3) if self.last_flush_lag is not None else None
+            ),
+            "max_flush_lag_seconds": round(self.max_flush_lag, 3),
+            "last_flush_at": (
+                datetime.fromtimestamp(self.last_flush_at, timezone.utc) if self.last_flush_at else None
+            ),
+        }
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        await self._maintain_partitions()
+        self._task = asyncio.create_task(self._run(), name="scan-ingestor")
+
+    async def stop(self) -> None:
+        """Stop the background task and write what is still buffered (dropped if that fails)."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if not await self.flush():
+            self.dropped_scans += len(self._buffer)
+            self._buffer.clear()
+
+    async def flush(self) -> bool:
+        """Write the whole buffer. False when a write failed (its batch is back in the buffer)."""
+        while self._buffer:
+            if not await self._write(self._take_batch()):
+                return False
+        return True
+
+    def _take_batch(self) -> list[tuple[float, dict[str, Any]]]:
+        size = min(len(self._buffer), Config.VERIFICATION_SCAN_BATCH_SIZE.value)
+        return [self._buffer.popleft() for _ in range(size)]
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # Let a few more scans come in so they share the same INSERT
+            if len(self._buffer) < Config.VERIFICATION_SCAN_BATCH_SIZE.value:
+                await asyncio.sleep(Config.VERIFICATION_SCAN_FLUSH_INTERVAL_SECONDS.value)
+            if not await self.flush():
+                # Database unavailable: retry later, the buffer applies the back-pressure meanwhile
+                await asyncio.sleep(Config.VERIFICATION_SCAN_FLUSH_INTERVAL_SECONDS.value)
+                self._wakeup.set()
+
+            if time.monotonic() - self._last_maintenance > 24 * 60 * 60:
+                await self._maintain_partitions()
+
+    async def _write(self, batch: list[tuple[float, dict[str, Any]]]) -> bool:
+        if not batch:
+            return True
+        rows = [scan for _, scan in batch]
+        try:
+            async with get_sessionmaker()() as session:
+                codes = {
+                    row["code_matriculation"]
+                    for row in rows
+                    if row["id_fidele"] is None and row["code_matriculation"]
+                }
+                if codes:
+                    result = await session.execute(
+                        select(Fidele.code_matriculation, Fidele.id).where(Fidele.code_matriculation.in_(codes))
+                    )
+                    ids_by_code = dict(result.all())
+                    for row in rows:
+                        if row["id_fidele"] is None:
+                            row["id_fidele"] = ids_by_code.get(row["code_matriculation"])
+                await session.execute(insert(VerificationScan).values(rows))
+                await session.commit()
+        except (OperationalError, InterfaceError, OSError) as e:
+            # Connection lost / database down: the batch waits in the buffer
+            log(e)
+            self.failed_writes += 1
+            self._buffer.extendleft(reversed(batch))
+            return False
+        except Exception as e:
+            # Rejected rows wouldn't pass on a retry either
+            log(e)
+            self.failed_writes += 1
+            self.dropped_scans += len(batch)
+            return True
+
+        now = time.monotonic()
+        self.written_scans += len(batch)
+        self.last_flush_lag = now - batch[0][0]
+        self.max_flush_lag = max(self.max_flush_lag, self.last_flush_lag)
+        self.last_flush_at = time.time()
+        return True
+
+    async def _maintain_partitions(self) -> None:
+        self._last_maintenance = time.monotonic()
+        try:
+            async with get_sessionmaker()() as session:
+                await ensure_audit_partitions(
+                    session,
+                    Config.VERIFICATION_SCAN_PARTITIONS_MONTHS_AHEAD.value,
+                    VerificationScan.__tablename__,
+                )
+        except Exception as e:
+            log(e)
+
+
+scan_ingestor = ScanIngestor()
@@ -0,0 +1,201 @@
+"""Set of the currently valid matricules, for the offline verification devices.
+
+A matricule is valid while its fidele is validated (`VALID_DOCUMENT_STATUTS`)
+and not deleted: a credential whose matricule left the set is revoked, even if
+its signature and expiry are fine.
+
+The set is shipped as 32-bit fingerprints (first 4 bytes of the sha256 of the
+matricule), sorted, delta-encoded as varints then zlib-compressed. Every build
+that changes the set is stored as a new version along with its difference
+with the previous one, so a device holding version N downloads only the
+additions and removals since N. Locally the fingerprints go into a hash set:
+`ValidityIndex.is_valid` is O(1). An unknown matricule matches a fingerprint
+with a probability of (number of matricules) / 2^32.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+import zlib
+from typing import Iterable
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import defer
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import Config
+from core.db import get_sessionmaker
+from models.fidele import Fidele
+from modules.verification.credential import VALID_DOCUMENT_STATUTS
+from modules.verification.models import VerificationValidite
+from utils.utils import log
+
+
+# ============================================================================
+# ENCODING (shared with the devices)
+# ============================================================================
+
+def code_fingerprint(code_matriculation: str) -> int:
+    return int.from_bytes(hashlib.sha256(code_matriculation.encode()).digest()[:4], "big")
+
+
+def encode_fingerprints(fingerprints: Iterable[int]) -> bytes:
+    buffer = bytearray()
+    previous = 0
+    for fingerprint in sorted(fingerprints):
+        delta = fingerprint - previous
+        previous = fingerprint
+        while delta >= 0x80:
+            buffer.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        buffer.append(delta)
+    return zlib.compress(bytes(buffer), 9)
+
+
+def decode_fingerprints(data: bytes) -> list[int]:
+    fingerprints = []
+    previous = delta = shift = 0
+    for byte in zlib.decompress(data):
+        delta |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        previous += delta
+        fingerprints.append(previous)
+        delta = shift = 0
+    return fingerprints
+
+
+class ValidityIndex:
+    """Local copy of a version of the set (what a device keeps between two downloads)."""
+
+    def __init__(self, version: int, empreintes: bytes) -> None:
+        self.version = version
+        self._fingerprints = set(decode_fingerprints(empreintes))
+
+    def apply_delta(self, version: int, ajouts: bytes | None, retraits: bytes | None) -> None:
+        if retraits:
+            self._fingerprints.difference_update(decode_fingerprints(retraits))
+        if ajouts:
+            self._fingerprints.update(decode_fingerprints(ajouts))
+        self.version = version
+
+    def is_valid(self, code_matriculation: str) -> bool:
+        return code_fingerprint(code_matriculation) in self._fingerprints
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+
+# ============================================================================
+# BUILD
+# ============================================================================
+
+async def _current_fingerprints(session: AsyncSession) -> set[int]:
+    statement = select(Fidele.code_matriculation).where(
+        Fidele.est_supprimee == False,
+        Fidele.id_document_statut.in_(VALID_DOCUMENT_STATUTS),
+        Fidele.code_matriculation.is_not(None),
+    )
+    fingerprints = set()
+    async for code_matriculation in await session.stream_scalars(statement):
+        fingerprints.add(code_fingerprint(code_matriculation))
+    return fingerprints
+
+
+async def build_validity_version() -> VerificationValidite | None:
+    """Store a new version when the set changed. Returns it (None when unchanged)."""
+    async with get_sessionmaker()() as session:
+        # FOR UPDATE: two workers building at the same time don't store the same version twice
+        latest = (
+            await session.execute(
+                select(VerificationValidite)
+                .order_by(VerificationValidite.version.desc())
+                .limit(1)
+                .with_for_update()
+            )
+        ).scalars().first()
+        current = await _current_fingerprints(session)
+        previous = set(decode_fingerprints(latest.empreintes)) if latest is not None else set()
+        if latest is not None and current == previous:
+            await session.rollback()
+            return None
+
+        validite = VerificationValidite(
+            nombre=len(current),
+            empreintes=encode_fingerprints(current),
+            ajouts=encode_fingerprints(current - previous) if latest is not None else None,
+            retraits=encode_fingerprints(previous - current) if latest is not None else None,
+        )
+        session.add(validite)
+        await session.flush()
+        # The oldest versions only serve the deltas of devices offline for too long: they get a full copy
+        await session.execute(
+            delete(VerificationValidite).where(
+                VerificationValidite.version <= validite.version - Config.VALIDITY_INDEX_VERSIONS_KEPT.value
+            )
+        )
+        await session.commit()
+    return validite
+
+
+async def get_validity_versions(
+    session: AsyncSession,
+    since_version: int | None,
+) -> tuple[VerificationValidite | None, list[VerificationValidite]]:
+    """What a device holding `since_version` downloads: (full copy, []) or (None, deltas after it)."""
+    latest_version = (await session.execute(select(func.max(VerificationValidite.version)))).scalar()
+    if latest_version is None or since_version == latest_version:
+        return None, []
+    if since_version is not None and since_version < latest_version:
+        # The full copies of the deltas aren't needed
+        deltas = (
+            await session.execute(
+                select(VerificationValidite)
+                .where(VerificationValidite.version > since_version)
+                .order_by(VerificationValidite.version)
+                .options(defer(VerificationValidite.empreintes))
+            )
+        ).scalars().all()
+        # A purged version (or a first version, without delta) breaks the chain: full copy
+        if (
+            len(deltas) == latest_version - since_version
+            and deltas[0].version == since_version + 1
+            and deltas[0].ajouts is not None
+        ):
+            return None, list(deltas)
+    return await session.get(VerificationValidite, latest_version), []
+
+
+class ValidityIndexBuilder:
+    """Background task running `build_validity_version` every `Config.VALIDITY_INDEX_INTERVAL_SECONDS`."""
+
+    def __init__(self) -> None:
+        self._task: asyncio.Task | None = None
+        self.last_run: float | None = None
+        self.last_version: int | None = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="validity-index-builder")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                validite = await build_validity_version()
+                if validite is not None:
+                    self.last_version = validite.version
+                self.last_run = time.time()
+            except Exception as e:
+                log(e)
+            await asyncio.sleep(Config.VALIDITY_INDEX_INTERVAL_SECONDS.value)
+
+
+validity_index_builder = ValidityIndexBuilder()
@@ -12,9 +12,10 @@ from models.adresse.utils import AdresseBase, AdresseUpdate
 from models.adresse.projection import AdresseProjFlat, AdresseProjShallow
 from models.constants.types import DocumentTypeEnum, RecensementEtapeEnum
 from routers.fidele.recensement_etape import mark_fidele_recensement_etape_completed
-from routers.utils import apply_projection, check_document_reference_exists
+from routers.utils import apply_projection, check_document_reference_exists, save_resource
 from routers.utils.http_utils import send200
 from routers.utils import check_resource_exists
+from routers.utils.reference_data import get_reference_resource
 from utils.constants import ProjDepth
 
 # ============================================================================
@@ -57,8 +58,8 @@ async def create_adresse(
     
     Body: AdresseBase (contient id_document_type, id_document et autres champs)
     """
-    await check_resource_exists(Nation, session, filters={"id": body.id_nation})
-    await check_document_reference_exists(
+    nation = await get_reference_resource(Nation, session, body.id_nation)
+    document = await check_document_reference_exists(
         session,
         id_document_type=body.id_document_type,
         id_document=body.id_document,
@@ -66,21 +67,23 @@ async def create_adresse(
 
     # Create adresse
     adresse = Adresse(**body.model_dump(mode='json'))
-    
-    session.add(adresse)
-    await session.commit()
-    await session.refresh(adresse)
+    await save_resource(
+        session,
+        adresse,
+        relations={"nation": nation} if proj == ProjDepth.SHALLOW else None,
+        commit=False,
+    )
 
+    # The adresse and the fidele's recensement step are committed together
     if int(body.id_document_type) == DocumentTypeEnum.FIDELE.value:
         await mark_fidele_recensement_etape_completed(
             session,
             id_fidele=int(body.id_document),
             id_recensement_etape=RecensementEtapeEnum.ADRESSE,
+            fidele=document,
         )
-
-    # Re-fetch the adresse with relations for the Shallow Projection response
-    if proj == ProjDepth.SHALLOW:
-        adresse = await get_adresse_complete_data_by_id(adresse.id, session)
+    else:
+        await session.commit()
 
     projected_response = apply_projection(
         adresse,
@@ -126,22 +129,25 @@ async def update_adresse(
     """
     update_data = body.model_dump(mode='json', exclude_unset=True)
 
+    nation = None
     if "id_nation" in update_data and update_data["id_nation"] is not None:
-        await check_resource_exists(Nation, session, filters={"id": update_data["id_nation"]})
+        nation = await get_reference_resource(Nation, session, update_data["id_nation"])
 
     # Update fields
     for field, value in update_data.items():
         setattr(adresse, field, value)
     
     adresse.date_modification = datetime.now(timezone.utc)
-        
-    session.add(adresse)
-    await session.commit()
-    await session.refresh(adresse)
 
-    # Fetch the complete data with relations for the response for the Shallow Projection
-    if proj == ProjDepth.SHALLOW:
-        adresse = await get_adresse_complete_data_by_id(adresse.id, session)
+    # The nation comes from the reference data cache: no re-fetch for the Shallow Projection
+    if proj == ProjDepth.SHALLOW and nation is None and adresse.id_nation is not None:
+        nation = await get_reference_resource(Nation, session, adresse.id_nation)
+
+    await save_resource(
+        session,
+        adresse,
+        relations={"nation": nation} if proj == ProjDepth.SHALLOW else None,
+    )
     
     projected_response = apply_projection(
         adresse,
@@ -0,0 +1,288 @@
+import inspect
+import json
+from enum import Enum
+from typing import Any, Awaitable, Callable, NamedTuple
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
+from pydantic import BaseModel, Field, ValidationError, model_validator
+from sqlalchemy.exc import IntegrityError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import Config
+from core.db import get_engine
+from models.adresse.utils import AdresseUpdate
+from models.contact.utils import ContactUpdate
+from models.fidele.utils import FideleBase, FideleUpdate
+from modules.batch import get_batch_operation
+from modules.batch.models import BatchOperation
+from routers.fidele import (
+    create_fidele,
+    delete_fidele,
+    update_fidele,
+    update_fidele_adresse,
+    update_fidele_contact,
+)
+from routers.fidele.utils import required_fidele, required_fidele_complete_data
+from routers.utils.http_utils import send200, send409, send422
+from utils.constants import ProjDepth
+from utils.utils import log
+
+# ============================================================================
+# ROUTER SETUP
+# ============================================================================
+batch_router = APIRouter(tags=["Batch"])
+
+
+class BatchOperationType(Enum):
+    FIDELE_CREATE = "fidele.create"
+    FIDELE_UPDATE = "fidele.update"
+    FIDELE_DELETE = "fidele.delete"
+    FIDELE_ADRESSE_UPDATE = "fidele.adresse.update"
+    FIDELE_CONTACT_UPDATE = "fidele.contact.update"
+
+
+class BatchOnError(Enum):
+    STOP = "stop"
+    CONTINUE = "continue"
+
+
+class BatchOperationIn(BaseModel):
+    idempotency_key: str = Field(..., min_length=8, max_length=64, description="Clé unique générée par le client")
+    operation: BatchOperationType
+    # "$<idempotency_key>": id créé par une opération précédente (de ce batch ou d'un batch déjà envoyé)
+    id: int | str | None = None
+    body: dict[str, Any] = Field(default_factory=dict)
+    on_error: BatchOnError = BatchOnError.STOP
+
+
+class BatchIn(BaseModel):
+    operations: list[BatchOperationIn] = Field(..., min_length=1, max_length=Config.BATCH_MAX_OPERATIONS.value)
+
+    @model_validator(mode="after")
+    def check_unique_keys(self):
+        keys = [operation.idempotency_key for operation in self.operations]
+        if len(keys) != len(set(keys)):
+            raise ValueError("Les idempotency_key doivent être uniques dans un batch.")
+        return self
+
+
+# ============================================================================
+# OPERATIONS (the per-resource endpoints, called with a FLAT projection)
+# ============================================================================
+
+class BatchHandler(NamedTuple):
+    body: type[BaseModel] | None
+    run: Callable[[AsyncSession, int | None, Any], Awaitable[Response]]
+    needs_id: bool = True
+
+
+async def _create_fidele(session: AsyncSession, _id: None, body: FideleBase) -> Response:
+    return await create_fidele(body, session, proj=ProjDepth.FLAT)
+
+
+async def _update_fidele(session: AsyncSession, id: int, body: FideleUpdate) -> Response:
+    fidele = await required_fidele_complete_data(id, session, ProjDepth.FLAT)
+    return await update_fidele(body, session, fidele, proj=ProjDepth.FLAT)
+
+
+async def _delete_fidele(session: AsyncSession, id: int, _body: None) -> Response:
+    return await delete_fidele(session, await required_fidele(id, session))
+
+
+async def _update_fidele_adresse(session: AsyncSession, id: int, body: AdresseUpdate) -> Response:
+    return await update_fidele_adresse(body, session, await required_fidele(id, session), proj=ProjDepth.FLAT)
+
+
+async def _update_fidele_contact(session: AsyncSession, id: int, body: ContactUpdate) -> Response:
+    return await update_fidele_contact(body, session, await required_fidele(id, session), proj=ProjDepth.FLAT)
+
+
+BATCH_OPERATIONS: dict[BatchOperationType, BatchHandler] = {
+    BatchOperationType.FIDELE_CREATE: BatchHandler(FideleBase, _create_fidele, needs_id=False),
+    BatchOperationType.FIDELE_UPDATE: BatchHandler(FideleUpdate, _update_fidele),
+    BatchOperationType.FIDELE_DELETE: BatchHandler(None, _delete_fidele),
+    BatchOperationType.FIDELE_ADRESSE_UPDATE: BatchHandler(AdresseUpdate, _update_fidele_adresse),
+    BatchOperationType.FIDELE_CONTACT_UPDATE: BatchHandler(ContactUpdate, _update_fidele_contact),
+}
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def _current_fidele_id(request: Request) -> int | None:
+    current_fidele = getattr(request.state, "current_fidele", None)
+    if current_fidele is not None and str(current_fidele.sub).isdigit():
+        return int(current_fidele.sub)
+    return None
+
+
+async def _error_response(request: Request, e: Exception) -> Response:
+    """The response the app's exception handlers give to `e` (same errors as the per-resource routes)."""
+    handlers = request.app.exception_handlers
+    handler = handlers.get(e.status_code) if isinstance(e, HTTPException) else None
+    if handler is None:
+        handler = next((handlers[cls] for cls in type(e).__mro__ if cls in handlers), None)
+    if handler is None:
+        raise e
+    response = handler(request, e)
+    return await response if inspect.isawaitable(response) else response
+
+
+def _result(operation: BatchOperationIn, status_code: int | None, content: dict | None, **flags) -> dict[str, Any]:
+    return {
+        "idempotency_key": operation.idempotency_key,
+        "operation": operation.operation.value,
+        "status_code": status_code,
+        "data": (content or {}).get("data"),
+        "error": (content or {}).get("error") or (content or {}).get("detail"),
+        "replayed": flags.get("replayed", False),
+        "skipped": flags.get("skipped", False),
+    }
+
+
+def _replayed_result(operation: BatchOperationIn, stored: BatchOperation | None, actor: int | None) -> dict[str, Any]:
+    if (
+        stored is None
+        or stored.id_fidele_acteur != actor
+        or stored.operation != operation.operation.value
+        or stored.statut is None
+    ):
+        content = json.loads(send409(
+            ["body", "idempotency_key"],
+            "Cette idempotency_key a déjà été utilisée pour une autre opération",
+        ).body)
+        return _result(operation, content["code"], content)
+    return _result(operation, stored.statut, stored.reponse, replayed=True)
+
+
+async def _resolve_id(
+    session: AsyncSession,
+    operation: BatchOperationIn,
+    created_ids: dict[str, int],
+    actor: int | None,
+) -> int | None:
+    if not isinstance(operation.id, str):
+        return operation.id
+    if operation.id.isdigit():
+        return int(operation.id)
+
+    key = operation.id.removeprefix("$")
+    if key in created_ids:
+        return created_ids[key]
+    stored = await get_batch_operation(session, key)
+    if stored is not None and stored.id_fidele_acteur == actor and stored.reponse:
+        id = (stored.reponse.get("data") or {}).get("id")
+        if isinstance(id, int):
+            return id
+    raise ValueError(f"Référence non résolue: {operation.id}")
+
+
+# ============================================================================
+# RUN
+# ============================================================================
+
+class _OperationSession(AsyncSession):
+    """
+    Session of one operation: the handler's `commit()` only flushes, so the operation,
+    its idempotency key and the stored response are committed together (`commit_operation`).
+    A key is never left without its response by a failure between two commits.
+    """
+
+    async def commit(self) -> None:
+        await self.flush()
+
+    async def commit_operation(self) -> None:
+        await super().commit()
+
+
+async def _run_operation(
+    request: Request,
+    operation: BatchOperationIn,
+    created_ids: dict[str, int],
+    actor: int | None,
+) -> dict[str, Any]:
+    handler = BATCH_OPERATIONS[operation.operation]
+
+    async with _OperationSession(get_engine(), expire_on_commit=False) as session:
+        stored = await get_batch_operation(session, operation.idempotency_key)
+        if stored is not None:
+            return _replayed_result(operation, stored, actor)
+
+        try:
+            id = await _resolve_id(session, operation, created_ids, actor)
+            if handler.needs_id and id is None:
+                raise ValueError("id requis pour cette opération")
+            body = handler.body.model_validate(operation.body) if handler.body is not None else None
+        except ValidationError as e:
+            content = json.loads(send422(exception=e).body)
+            return _result(operation, content["code"], content)
+        except ValueError as e:
+            content = json.loads(send422(["body", "id"], str(e)).body)
+            return _result(operation, content["code"], content)
+
+        # Reserved first: a concurrent replay of the key waits on it, then gets the stored response
+        record = BatchOperation(
+            cle=operation.idempotency_key,
+            operation=operation.operation.value,
+            id_fidele_acteur=actor,
+        )
+        session.add(record)
+        try:
+            await session.flush()
+        except IntegrityError:
+            await session.rollback()
+            stored = await get_batch_operation(session, operation.idempotency_key)
+            return _replayed_result(operation, stored, actor)
+
+        try:
+            response = await handler.run(session, id, body)
+        except Exception as e:
+            await session.rollback()
+            response = await _error_response(request, e)
+        content = json.loads(response.body)
+
+        if response.status_code >= 400:
+            await session.rollback()
+            return _result(operation, response.status_code, content)
+
+        record.statut = response.status_code
+        record.reponse = content
+        session.add(record)
+        await session.commit_operation()
+    return _result(operation, response.status_code, content)
+
+
+@batch_router.post("")
+async def run_batch(request: Request, batch: BatchIn) -> dict[str, Any]:
+    """
+    Appliquer une file d'opérations hors ligne (création/modification de fidèles...), dans l'ordre.
+
+    Chaque opération a sa propre transaction et les validations de sa route. Une
+    `idempotency_key` déjà appliquée n'est pas rejouée: la réponse d'origine est
+    renvoyée (`replayed`). En cas d'échec, `on_error` arrête le batch (`stop`,
+    les opérations suivantes sont `skipped`) ou passe à la suivante (`continue`).
+    """
+    actor = _current_fidele_id(request)
+    created_ids: dict[str, int] = {}
+    results = []
+    stopped = False
+    for operation in batch.operations:
+        if stopped:
+            results.append(_result(operation, None, None, skipped=True))
+            continue
+        try:
+            result = await _run_operation(request, operation, created_ids, actor)
+        except Exception as e:
+            log(e)
+            result = _result(operation, 500, {"error": {"message": "Erreur interne"}})
+        results.append(result)
+
+        status_code = result["status_code"] or 500
+        if status_code < 400 and isinstance((result["data"] or {}).get("id"), int):
+            created_ids[operation.idempotency_key] = result["data"]["id"]
+        if status_code >= 400 and operation.on_error == BatchOnError.STOP:
+            stopped = True
+
+    return send200({"results": results})
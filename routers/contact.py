@@ -13,7 +13,7 @@ from models.contact.projection import ContactProjFlat
 from routers.fidele.recensement_etape import mark_fidele_recensement_etape_completed
 from routers.utils.http_utils import send200, send404
 from routers.utils import check_resource_exists
-from routers.utils import check_document_reference_exists
+from routers.utils import check_document_reference_exists, save_resource
 
 # ============================================================================
 # ROUTER SETUP
@@ -52,7 +52,7 @@ async def create_contact(
 
     Body: ContactBase (contient id_document_type, id_document et autres champs)
     """
-    await check_document_reference_exists(
+    document = await check_document_reference_exists(
         session,
         id_document_type=body.id_document_type,
         id_document=body.id_document,
@@ -60,17 +60,18 @@ async def create_contact(
 
     # Create contact
     contact = Contact(**body.model_dump(mode="json"))
+    await save_resource(session, contact, commit=False)
 
-    session.add(contact)
-    await session.commit()
-    await session.refresh(contact)
-
+    # The contact and the fidele's recensement step are committed together
     if int(body.id_document_type) == DocumentTypeEnum.FIDELE.value:
         await mark_fidele_recensement_etape_completed(
             session,
             id_fidele=int(body.id_document),
             id_recensement_etape=RecensementEtapeEnum.CONTACT,
+            fidele=document,
         )
+    else:
+        await session.commit()
 
     return send200(ContactProjFlat.model_validate(contact))
 
@@ -112,14 +113,9 @@ async def update_contact(
 
     contact.date_modification = datetime.now(timezone.utc)
 
-    session.add(contact)
-    await session.commit()
-    await session.refresh(contact)
+    await save_resource(session, contact)
 
-    # Fetch the complete data with relations for the response for the Shallow Projection
-    contact_complet_data = await get_contact_complete_data_by_id(contact.id, session)
-
-    return send200(ContactProjFlat.model_validate(contact_complet_data))
+    return send200(ContactProjFlat.model_validate(contact))
 
 
 @contact_router.delete("/{id}")
@@ -16,11 +16,19 @@ from models.direction.fonction import DirectionFonction
 from routers.utils import check_resource_exists
 from routers.direction.docs import DIRECTION_CREATE_DESCRIPTION
 from routers.utils import (
+    BatchProj,
     apply_projection,
     check_document_reference_exists,
+    get_resources_by_ids_batch,
+    parse_ids_query,
+    project_document_reference,
     resolve_document_reference,
     resolve_document_references_batch,
+    save_resource,
 )
+from routers.utils.count_cache import TotalQuery, get_total_meta
+from routers.utils.reference_data import get_reference_resource
+from modules.archive import restore_archived_resource
 from routers.utils.http_utils import send200, send404
 from utils.constants import ProjDepth
 
@@ -35,22 +43,49 @@ async def required_direction(
     return await check_resource_exists(Direction, session, filters={"id": id})
 
 
-async def get_direction_any_by_id(direction_id: int, session: AsyncSession) -> Direction | None:
+async def required_direction_complete_data(
+    id: Annotated[int, Path(..., description="Direction ID")],
+    session: Annotated[AsyncSession, Depends(get_session)],
+    proj: Annotated[ProjDepth, Query()] = ProjDepth.SHALLOW,
+) -> Direction:
+    """Same as `required_direction`, with the relations needed by `proj` loaded in the same fetch."""
+    return await check_resource_exists(
+        Direction,
+        session,
+        filters={"id": id},
+        options=get_direction_complete_data_options(proj),
+    )
+
+
+async def get_direction_any_by_id(
+    direction_id: int,
+    session: AsyncSession,
+    proj: ProjDepth = ProjDepth.FLAT,
+) -> Direction | None:
     statement = select(Direction).where(Direction.id == direction_id)
+    options = get_direction_complete_data_options(proj)
+    if options:
+        statement = statement.options(*options)
     result = await session.exec(statement)
     return result.first()
 
 
+def get_direction_complete_data_options(proj: ProjDepth = ProjDepth.SHALLOW) -> list:
+    """Eager-load options needed to project a Direction with the given depth."""
+    if proj == ProjDepth.SHALLOW:
+        return [selectinload(Direction.structure).selectinload(Structure.structure_type)]
+    return []
+
+
 async def get_direction_complete_data_by_id(
     direction_id: int,
     session: AsyncSession,
     proj: ProjDepth = ProjDepth.SHALLOW,
 ) -> Direction | None:
     statement = select(Direction).where(Direction.id == direction_id)
-    if proj == ProjDepth.SHALLOW:
-        statement = statement.options(
-            selectinload(Direction.structure).selectinload(Structure.structure_type)
-        )
+    options = get_direction_complete_data_options(proj)
+    if options:
+        statement = statement.options(*options)
 
     result = await session.exec(statement)
     return result.first()
@@ -69,29 +104,23 @@ async def create_direction(
 ) -> DirectionProjShallow | DirectionProjFlat:
     """Créer une direction."""
 
-    await check_resource_exists(Structure, session, filters={"id": body.id_structure})
-    await check_document_reference_exists(
+    structure = await get_reference_resource(Structure, session, body.id_structure)
+    document = await check_document_reference_exists(
         session,
         id_document_type=body.id_document_type,
         id_document=body.id_document,
     )
 
     direction = Direction(**body.model_dump(mode="json"))
-
-    session.add(direction)
-    await session.commit()
-    await session.refresh(direction)
-
-    if proj == ProjDepth.SHALLOW:
-        direction = await get_direction_complete_data_by_id(direction.id, session, proj)
+    await save_resource(
+        session,
+        direction,
+        relations={"structure": structure} if proj == ProjDepth.SHALLOW else None,
+    )
 
     projected = apply_projection(direction, DirectionProjFlat, DirectionProjShallow, proj)
-    if proj == ProjDepth.SHALLOW and direction is not None:
-        projected.document = await resolve_document_reference(
-            session,
-            id_document_type=direction.id_document_type,
-            id_document=direction.id_document,
-        )
+    if proj == ProjDepth.SHALLOW:
+        projected.document = project_document_reference(direction.id_document_type, document)
 
     return send200(projected)
 
@@ -99,6 +128,7 @@ async def create_direction(
 @direction_router.get("", tags=["Direction"])
 async def get_directions(
     session: Annotated[AsyncSession, Depends(get_session)],
+    total_query: Annotated[TotalQuery, Depends()],
     proj: Annotated[ProjDepth, Query()] = ProjDepth.FLAT,
     offset: int = 0,
     limit: int = Query(
@@ -107,7 +137,8 @@ async def get_directions(
 ) -> List[DirectionProjFlat] | List[DirectionProjShallow]:
     """Lister les directions (soft-delete filtré)."""
 
-    statement = select(Direction).where(Direction.est_supprimee == False)
+    conditions = [Direction.est_supprimee == False]
+    statement = select(Direction).where(*conditions)
     if proj == ProjDepth.SHALLOW:
         statement = statement.options(
             selectinload(Direction.structure).selectinload(Structure.structure_type)
@@ -130,21 +161,53 @@ async def get_directions(
             if hasattr(projected, "document"):
                 projected.document = docs.get(key)
 
-    return send200(projected_directions)
+    meta = await get_total_meta(session, Direction, conditions, total_query, filtered=False)
+    return send200(projected_directions, meta=meta)
+
+
+@direction_router.get("/batch", tags=["Direction"])
+async def get_directions_batch(
+    session: Annotated[AsyncSession, Depends(get_session)],
+    ids: Annotated[
+        str,
+        Query(description=f"Ids des directions séparés par des virgules (max {Config.MAX_BATCH_IDS.value})")
+    ],
+    proj: Annotated[ProjDepth, Query()] = ProjDepth.FLAT,
+) -> BatchProj[DirectionProjFlat | DirectionProjShallow]:
+    """Récupérer plusieurs directions par IDs (ordre conservé, ids manquants dans `missing_ids`)."""
+
+    id_list = parse_ids_query(ids, max_items=Config.MAX_BATCH_IDS.value)
+
+    directions, missing_ids = await get_resources_by_ids_batch(
+        Direction,
+        session,
+        id_list,
+        options=get_direction_complete_data_options(proj),
+    )
+
+    projected_directions = [
+        apply_projection(d, DirectionProjFlat, DirectionProjShallow, proj)
+        for d in directions
+    ]
+
+    if proj == ProjDepth.SHALLOW:
+        refs = [(d.id_document_type, d.id_document) for d in directions]
+        docs = await resolve_document_references_batch(session, refs)
+        for d, projected in zip(directions, projected_directions):
+            key = (int(d.id_document_type), int(d.id_document))
+            projected.document = docs.get(key)
+
+    return send200(BatchProj(items=projected_directions, missing_ids=missing_ids))
 
 
 @direction_router.get("/{id}", tags=["Direction"])
 async def get_direction(
-    id: Annotated[int, Path(..., description="Direction ID")],
     session: Annotated[AsyncSession, Depends(get_session)],
-    direction: Annotated[Direction, Depends(required_direction)],
+    direction: Annotated[Direction, Depends(required_direction_complete_data)],
     proj: Annotated[ProjDepth, Query()] = ProjDepth.SHALLOW,
 ) -> DirectionProjShallow | DirectionProjFlat:
     """Récupérer une direction par ID."""
 
-    if proj == ProjDepth.SHALLOW:
-        direction = await get_direction_complete_data_by_id(id, session, proj)
-
     projected = apply_projection(direction, DirectionProjFlat, DirectionProjShallow, proj)
     if proj == ProjDepth.SHALLOW and direction is not None:
         projected.document = await resolve_document_reference(
@@ -160,7 +223,7 @@ async def get_direction(
 async def update_direction(
     body: DirectionUpdate,
     session: Annotated[AsyncSession, Depends(get_session)],
-    direction: Annotated[Direction, Depends(required_direction)],
+    direction: Annotated[Direction, Depends(required_direction_complete_data)],
     proj: Annotated[ProjDepth, Query()] = ProjDepth.SHALLOW,
 ) -> DirectionProjShallow | DirectionProjFlat:
     """Modifier une direction existante."""
@@ -168,14 +231,16 @@ async def update_direction(
     update_data = body.model_dump(mode="json", exclude_unset=True)
 
     # Validate foreign keys when present
+    structure = None
     if "id_structure" in update_data and update_data["id_structure"] is not None:
-        await check_resource_exists(Structure, session, filters={"id": update_data["id_structure"]})
+        structure = await get_reference_resource(Structure, session, update_data["id_structure"])
 
     # Validate polymorphic document reference if either component changes
+    document = None
     if ("id_document_type" in update_data) or ("id_document" in update_data):
         new_id_document_type = update_data.get("id_document_type", direction.id_document_type)
         new_id_document = update_data.get("id_document", direction.id_document)
-        await check_document_reference_exists(
+        document = await check_document_reference_exists(
             session,
             id_document_type=new_id_document_type,
             id_document=new_id_document,
@@ -184,20 +249,24 @@ async def update_direction(
     for field, value in update_data.items():
         setattr(direction, field, value)
 
-    direction.date_modification = datetime.now(timezone.utc)
+    # Keep the already loaded relation in sync instead of re-fetching the direction
+    if structure is not None and proj == ProjDepth.SHALLOW:
+        direction.structure = structure
 
-    session.add(direction)
-    await session.commit()
+    direction.date_modification = datetime.now(timezone.utc)
 
-    if proj == ProjDepth.SHALLOW:
-        direction = await get_direction_complete_data_by_id(direction.id, session, proj)
+    await save_resource(session, direction)
 
     projected = apply_projection(direction, DirectionProjFlat, DirectionProjShallow, proj)
-    if proj == ProjDepth.SHALLOW and direction is not None:
-        projected.document = await resolve_document_reference(
-            session,
-            id_document_type=direction.id_document_type,
-            id_document=direction.id_document,
+    if proj == ProjDepth.SHALLOW:
+        projected.document = (
+            project_document_reference(direction.id_document_type, document)
+            if document is not None
+            else await resolve_document_reference(
+                session,
+                id_document_type=direction.id_document_type,
+                id_document=direction.id_document,
+            )
         )
     
     return send200(projected)
@@ -211,7 +280,10 @@ async def restore_direction(
 ) -> DirectionProjShallow | DirectionProjFlat:
     """Restaurer une direction supprimée (soft delete)."""
 
-    direction = await get_direction_any_by_id(id, session)
+    direction = await get_direction_any_by_id(id, session, proj)
+    # Archived (see modules.archive): bring it back to the hot tables first
+    if not direction and await restore_archived_resource(session, Direction, id):
+        direction = await get_direction_any_by_id(id, session, proj)
     if not direction:
         return send404(["path", "id"], "Direction non trouvée")
 
@@ -223,9 +295,6 @@ async def restore_direction(
         session.add(direction)
         await session.commit()
 
-    if proj == ProjDepth.SHALLOW:
-        direction = await get_direction_complete_data_by_id(direction.id, session, proj)
-
     projected = apply_projection(direction, DirectionProjFlat, DirectionProjShallow, proj)
     if proj == ProjDepth.SHALLOW and direction is not None:
         projected.document = await resolve_document_reference(
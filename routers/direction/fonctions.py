@@ -18,7 +18,10 @@ from models.direction.fonction.projection import (
 )
 from models.direction.fonction.utils import DirectionFonctionCreate, DirectionFonctionUpdate
 from models.fidele import Fidele
-from routers.utils import check_resource_exists
+from routers.utils import check_resource_exists, save_resource
+from routers.utils.count_cache import TotalQuery, get_total_meta
+from routers.utils.reference_data import get_reference_resource
+from modules.archive import restore_archived_resource
 from routers.utils.http_utils import send200, send400, send404
 from sqlalchemy.orm import selectinload
 
@@ -52,6 +55,23 @@ async def required_direction_fonction(
     )
 
 
+async def required_direction_fonction_complete_data(
+    id: Annotated[int, Path(..., description="Direction ID")],
+    id_direction_fonction: Annotated[int, Path(..., description="DirectionFonction ID")],
+    session: Annotated[AsyncSession, Depends(get_session)],
+) -> DirectionFonction:
+    """Same as `required_direction_fonction`, with fidele and fonction loaded in the same fetch."""
+    return await check_resource_exists(
+        DirectionFonction,
+        session,
+        filters={"id": id_direction_fonction, "id_direction": id},
+        options=[
+            selectinload(DirectionFonction.fidele),
+            selectinload(DirectionFonction.fonction),
+        ],
+    )
+
+
 async def get_direction_fonction_any_by_id(
     direction_id: int,
     direction_fonction_id: int,
@@ -94,8 +114,8 @@ async def create_direction_fonction(
     """Assigner un fidèle à une fonction dans une direction."""
 
     await check_resource_exists(Direction, session, filters={"id": id})
-    await check_resource_exists(Fidele, session, filters={"id": body.id_fidele})
-    await check_resource_exists(Fonction, session, filters={"id": body.id_fonction})
+    fidele = await check_resource_exists(Fidele, session, filters={"id": body.id_fidele})
+    fonction = await get_reference_resource(Fonction, session, body.id_fonction)
 
     if not are_mandate_dates_valid(body.date_debut, body.date_fin):
         return send400(["body"], "Dates de mandat invalides")
@@ -112,11 +132,8 @@ async def create_direction_fonction(
         est_actif=est_actif,
     )
 
-    session.add(item)
-    await session.commit()
-    await session.refresh(item)
+    await save_resource(session, item, relations={"fidele": fidele, "fonction": fonction})
 
-    item = await get_direction_fonction_complete_data_by_id(id, item.id, session)
     return send200(DirectionFonctionProjShallowWithoutDirectionData.model_validate(item))
 
 
@@ -124,6 +141,7 @@ async def create_direction_fonction(
 async def list_direction_fonctions(
     id: Annotated[int, Path(..., description="Direction ID")],
     session: Annotated[AsyncSession, Depends(get_session)],
+    total_query: Annotated[TotalQuery, Depends()],
     offset: int = 0,
     limit: int = Query(
         Config.DEFAULT_ITEMS_PER_PAGE.value, ge=1, le=Config.MAX_ITEMS_PER_PAGE.value
@@ -133,16 +151,18 @@ async def list_direction_fonctions(
 
     await check_resource_exists(Direction, session, filters={"id": id})
 
+    conditions = [(DirectionFonction.id_direction == id) & (DirectionFonction.est_supprimee == False)]
     statement = (
         select(DirectionFonction)
-        .where((DirectionFonction.id_direction == id) & (DirectionFonction.est_supprimee == False))
+        .where(*conditions)
         .offset(offset)
         .limit(limit)
     )
     result = await session.exec(statement)
     items = result.all()
+    meta = await get_total_meta(session, DirectionFonction, conditions, total_query)
 
-    return send200([DirectionFonctionProjFlat.model_validate(i) for i in items])
+    return send200([DirectionFonctionProjFlat.model_validate(i) for i in items], meta=meta)
 
 
 @direction_fonctions_router.get("/{id_direction_fonction}")
@@ -160,7 +180,7 @@ async def get_direction_fonction(
 async def update_direction_fonction(
     body: DirectionFonctionUpdate,
     session: Annotated[AsyncSession, Depends(get_session)],
-    direction_fonction: Annotated[DirectionFonction, Depends(required_direction_fonction)],
+    direction_fonction: Annotated[DirectionFonction, Depends(required_direction_fonction_complete_data)],
 ) -> DirectionFonctionProjShallowWithoutDirectionData:
     """Mettre à jour dates/statut d'un mandat, en gardant la cohérence date_fin/est_actif."""
 
@@ -181,14 +201,9 @@ async def update_direction_fonction(
     direction_fonction.est_actif = effective_est_actif
     direction_fonction.date_modification = datetime.now(timezone.utc)
 
-    session.add(direction_fonction)
-    await session.commit()
-    await session.refresh(direction_fonction)
+    await save_resource(session, direction_fonction)
 
-    item = await get_direction_fonction_complete_data_by_id(
-        direction_fonction.id_direction, direction_fonction.id, session
-    )
-    return send200(DirectionFonctionProjShallowWithoutDirectionData.model_validate(item))
+    return send200(DirectionFonctionProjShallowWithoutDirectionData.model_validate(direction_fonction))
 
 
 @direction_fonctions_router.put("/{id_direction_fonction}/restore")
@@ -197,7 +212,13 @@ async def restore_direction_fonction(
     id_direction_fonction: Annotated[int, Path(..., description="DirectionFonction ID")],
     session: Annotated[AsyncSession, Depends(get_session)],
 ) -> DirectionFonctionProjShallowWithoutDirectionData:
-    item = await get_direction_fonction_any_by_id(id, id_direction_fonction, session)
+    # Relations are loaded with the row: no re-fetch after the restore
+    item = await get_direction_fonction_complete_data_by_id(id, id_direction_fonction, session)
+    # Archived (see modules.archive): bring it back to the hot tables first
+    if not item and await restore_archived_resource(
+        session, DirectionFonction, id_direction_fonction, filters={"id_direction": id}
+    ):
+        item = await get_direction_fonction_complete_data_by_id(id, id_direction_fonction, session)
     if not item:
         return send404(["path", "id_direction_fonction"], "Mandat non trouvé")
 
@@ -207,11 +228,8 @@ async def restore_direction_fonction(
         item.est_actif = compute_est_actif(item.date_fin, item.est_suspendu)
         item.date_modification = datetime.now(timezone.utc)
 
-        session.add(item)
-        await session.commit()
-        await session.refresh(item)
+        await save_resource(session, item)
 
-    item = await get_direction_fonction_complete_data_by_id(id, item.id, session)
     return send200(DirectionFonctionProjShallowWithoutDirectionData.model_validate(item))
 
 
@@ -0,0 +1,161 @@
+from datetime import datetime, timezone
+from typing import Annotated, Any, List
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from pydantic import BaseModel
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import Config
+from core.db import get_session
+from models.fidele import Fidele
+from models.constants.types import FonctionEnum
+from models.fidele.projection import FideleProjFlat
+from models.oauth import TokenPayload
+from modules.dedup.models import FideleDoublon, FideleDoublonRevue, FideleDoublonStatutEnum
+from modules.oauth2.dependencies import get_required_token_payload_dependency
+from routers.utils import check_resource_exists
+from routers.utils.count_cache import TotalQuery, get_total_meta
+from routers.utils.http_utils import send200
+from routers.utils.permissions import get_caller_scope_paths, get_fidele_scope_paths, scope_fidele_condition
+
+# ============================================================================
+# ROUTER SETUP
+# ============================================================================
+doublon_router = APIRouter(tags=["Doublon"])
+
+# Mandates allowed to decide a pair (same as the statut validation of a fidele)
+DOUBLON_REVIEW_FONCTIONS = {
+    FonctionEnum.RESPONSABLE_PRESIDENT,
+    FonctionEnum.SECRETAIRE,
+    FonctionEnum.SECRETAIRE_ADJOINT,
+}
+
+
+def _scope_doublon_conditions(scope_paths: list[str] | None) -> list:
+    """Both fideles of the pair in the scopes: the records of the pair are shown in full."""
+    if scope_paths is None:
+        return []
+    return [
+        scope_fidele_condition(scope_paths, FideleDoublon.id_fidele_a),
+        scope_fidele_condition(scope_paths, FideleDoublon.id_fidele_b),
+    ]
+
+
+class FideleDoublonProj(BaseModel):
+    id: int
+    score: float
+    details: dict[str, Any] | None = None
+    statut: FideleDoublonStatutEnum
+    id_fidele_revue: int | None = None
+    date_creation: datetime
+    date_revue: datetime | None = None
+    fidele_a: FideleProjFlat | None = None
+    fidele_b: FideleProjFlat | None = None
+
+
+async def _project_doublons(session: AsyncSession, doublons: list[FideleDoublon]) -> list[FideleDoublonProj]:
+    ids = {d.id_fidele_a for d in doublons} | {d.id_fidele_b for d in doublons}
+    fideles = {}
+    if ids:
+        result = await session.exec(select(Fidele).where(Fidele.id.in_(ids)))
+        fideles = {f.id: FideleProjFlat.model_validate(f) for f in result.all()}
+    return [
+        FideleDoublonProj(
+            **d.model_dump(exclude={"id_fidele_a", "id_fidele_b"}),
+            fidele_a=fideles.get(d.id_fidele_a),
+            fidele_b=fideles.get(d.id_fidele_b),
+        )
+        for d in doublons
+    ]
+
+
+@doublon_router.get("")
+async def get_doublons(
+    session: Annotated[AsyncSession, Depends(get_session)],
+    scope_paths: Annotated[list[str] | None, Depends(get_caller_scope_paths)],
+    total_query: Annotated[TotalQuery, Depends()],
+    statut: Annotated[FideleDoublonStatutEnum, Query()] = FideleDoublonStatutEnum.A_VERIFIER,
+    score_min: Annotated[float | None, Query(ge=0, le=1, description="Score minimal")] = None,
+    id_fidele: Annotated[int | None, Query(description="Seulement les paires de ce fidèle")] = None,
+    offset: int = 0,
+    limit: int = Query(
+        Config.DEFAULT_ITEMS_PER_PAGE.value, ge=1, le=Config.MAX_ITEMS_PER_PAGE.value
+    ),
+) -> List[FideleDoublonProj]:
+    """
+    File de revue des doublons probables de fidèles (même personne enregistrée deux fois),
+    les plus probables d'abord.
+
+    Les paires sont détectées à la création/modification des fidèles (et par
+    POST /superadmin/doublon); `details` donne la similarité par critère.
+    Seules les paires dont les deux fidèles sont dans les périmètres de l'appelant
+    sont listées (une paire entre deux nations revient au continent).
+    """
+    conditions = [FideleDoublon.statut == statut.value, *_scope_doublon_conditions(scope_paths)]
+    if score_min is not None:
+        conditions.append(FideleDoublon.score >= score_min)
+    if id_fidele is not None:
+        conditions.append((FideleDoublon.id_fidele_a == id_fidele) | (FideleDoublon.id_fidele_b == id_fidele))
+
+    statement = (
+        select(FideleDoublon)
+        .where(*conditions)
+        .order_by(FideleDoublon.score.desc(), FideleDoublon.id)
+        .offset(offset)
+        .limit(limit)
+    )
+    result = await session.exec(statement)
+    doublons = result.all()
+
+    meta = await get_total_meta(session, FideleDoublon, conditions, total_query)
+    return send200(await _project_doublons(session, doublons), meta=meta)
+
+
+@doublon_router.put("/{id}/statut")
+async def review_doublon(
+    id: Annotated[int, Path(description="Id de la paire")],
+    body: FideleDoublonRevue,
+    session: Annotated[AsyncSession, Depends(get_session)],
+    current_fidele: Annotated[
+        TokenPayload,
+        Depends(get_required_token_payload_dependency(TokenPayload)),
+    ],
+) -> FideleDoublonProj:
+    """
+    Trancher une paire: `doublon` (même personne) ou `distinct` (personnes différentes,
+    la paire n'est plus proposée). `a_verifier` la remet dans la file.
+
+    Réservé aux responsables (présidents), secrétaires et secrétaires adjoints dont
+    les mandats couvrent les deux fidèles (403 sinon).
+    La fusion des deux fiches n'est pas faite ici.
+    """
+    doublon = await check_resource_exists(FideleDoublon, session, filters={"id": id})
+
+    mandate_paths = await get_fidele_scope_paths(
+        session,
+        id_fidele=int(current_fidele.sub),
+        functions_set=DOUBLON_REVIEW_FONCTIONS,
+        include_paroisses=False,
+    )
+    if mandate_paths is not None:
+        statement = select(FideleDoublon.id).where(
+            FideleDoublon.id == doublon.id, *_scope_doublon_conditions(mandate_paths)
+        )
+        if (await session.exec(statement)).first() is None:
+            raise HTTPException(
+                status_code=403,
+                detail="Permission refusée: aucun mandat de l'appelant ne couvre les deux fidèles de la paire.",
+            )
+
+    doublon.statut = body.statut.value
+    if body.statut == FideleDoublonStatutEnum.A_VERIFIER:
+        doublon.id_fidele_revue, doublon.date_revue = None, None
+    else:
+        doublon.id_fidele_revue, doublon.date_revue = int(current_fidele.sub), datetime.now(timezone.utc)
+    doublon.date_modification = datetime.now(timezone.utc)
+    session.add(doublon)
+    await session.commit()
+    await session.refresh(doublon)
+
+    return send200((await _project_doublons(session, [doublon]))[0])
@@ -1,5 +1,5 @@
 # External moduls
-from fastapi import APIRouter, HTTPException, Request, Depends, Path, Query
+from fastapi import APIRouter, HTTPException, Depends, Path, Query
 from typing import Annotated, List
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import selectinload
@@ -10,7 +10,7 @@ from datetime import datetime, timezone
 from core.config import Config
 from models.constants.types import DocumentTypeEnum, RecensementEtapeEnum
 from models.fidele import Fidele
-from models.fidele.utils import FideleBase, FideleUpdate
+from models.fidele.utils import FideleBase, FideleFilters, FideleUpdate
 from models.fidele.projection import FideleProjFlat, FideleProjFlatWithPhoto, FideleProjShallow
 from models.adresse import Adresse, Nation
 from models.adresse.utils import AdresseUpdate
@@ -23,22 +23,49 @@ from models.oauth import TokenPayload
 from models.utils.utils import Password
 from modules.oauth2.dependencies import get_required_token_payload_dependency
 from routers.fidele.utils import (
+    build_fidele_filters_conditions,
+    build_fidele_list_statement,
     required_fidele,
+    required_fidele_complete_data,
+    required_fidele_complete_data_with_include,
     get_fidele_complete_data_by_id,
+    get_fidele_complete_data_options,
     parse_fidele_include,
 )
 from routers.fidele.recensement_etape import mark_fidele_recensement_etape_completed
 from routers.utils import check_resource_exists
 from routers.utils.http_utils import send200, send400, send404
-from routers.utils import apply_projection
+from routers.utils import (
+    BatchProj,
+    apply_projection,
+    get_resources_by_ids_batch,
+    parse_ids_query,
+    save_resource,
+)
+from routers.utils.count_cache import TotalQuery, get_total_meta
+from routers.utils.permissions import get_caller_scope_paths, scope_fidele_condition
+from routers.utils.reference_data import get_reference_resource
 from utils.constants import ProjDepth
 from models.constants import DocumentType, FideleType, Grade, DocumentStatut
 from modules.file import S3Service
+from modules.archive import restore_archived_resource
+from modules.verification.credential import (
+    CredentialError,
+    build_credential_claims,
+    issue_credential,
+)
 
 fidele_router = APIRouter()
 
-async def get_fidele_any_by_id(fidele_id: int, session: AsyncSession) -> Fidele | None:
+async def get_fidele_any_by_id(
+    fidele_id: int,
+    session: AsyncSession,
+    proj: ProjDepth = ProjDepth.FLAT,
+) -> Fidele | None:
     statement = select(Fidele).where(Fidele.id == fidele_id)
+    options = get_fidele_complete_data_options(proj)
+    if options:
+        statement = statement.options(*options)
     result = await session.exec(statement)
     return result.first()
 
@@ -76,17 +103,20 @@ async def create_fidele(
         body (FideleBase): Les données du fidele à créer
     """
 
-    await check_resource_exists(Grade, session, filters={"id": int(body.id_grade)})
-    await check_resource_exists(
-        FideleType, session, filters={"id": int(body.id_fidele_type)}
-    )
+    grade = await get_reference_resource(Grade, session, int(body.id_grade))
+    fidele_type = await get_reference_resource(FideleType, session, int(body.id_fidele_type))
+    fidele_recenseur = None
     if body.id_fidele_recenseur is not None:
-        await check_resource_exists(Fidele, session, filters={"id": body.id_fidele_recenseur})
-    await check_resource_exists(Nation, session, filters={"id": body.id_nation_nationalite})
-    await check_resource_exists(DocumentStatut, session, filters={"id": int(body.id_document_statut)})
+        fidele_recenseur = await check_resource_exists(
+            Fidele, session, filters={"id": body.id_fidele_recenseur}
+        )
+    nation_nationalite = await get_reference_resource(Nation, session, body.id_nation_nationalite)
+    document_statut = await get_reference_resource(
+        DocumentStatut, session, int(body.id_document_statut)
+    )
 
     # remove password from body and hash it
-    password = Password.hash(body.password) if body.password else None
+    password = await Password.hash_async(body.password)
 
     # Transform it into dict for fast processings
     body_dict: dict = body.model_dump(exclude={"password", "role"}, mode="json")
@@ -95,21 +125,35 @@ async def create_fidele(
     fidele = Fidele(**body_dict, password=password)
     fidele.code_matriculation = None
 
-    # Add to session and commit
-    session.add(fidele)
-    await session.commit()
-    await session.refresh(fidele)
-
+    # A new fidele has no sub-resources yet: the shallow relations are known without re-fetch
+    relations = None
+    if proj == ProjDepth.SHALLOW:
+        relations = {
+            "grade": grade,
+            "fidele_type": fidele_type,
+            "fidele_recenseur": fidele_recenseur,
+            "nation_nationalite": nation_nationalite,
+            "document_statut": document_statut,
+            "contact": None,
+            "adresse": None,
+            "photo": None,
+            "structures": [],
+            "paroisses": [],
+            "bapteme": None,
+            "famille": None,
+            "origine": None,
+            "occupation": None,
+        }
+
+    # The fidele and its first recensement step are committed together
+    await save_resource(session, fidele, relations=relations, commit=False)
     await mark_fidele_recensement_etape_completed(
         session,
         id_fidele=fidele.id,
         id_recensement_etape=RecensementEtapeEnum.INFORMATIONS_DE_BASE,
+        fidele=fidele,
     )
 
-    # re-fetch to get related data for shallow projection
-    if proj == ProjDepth.SHALLOW:
-        fidele = await get_fidele_complete_data_by_id(fidele.id, session, proj)
-
     # Return the created fidele
     projected_response = apply_projection(fidele, FideleProjFlat, FideleProjShallow, proj)
     return send200(projected_response)
@@ -118,31 +162,43 @@ async def create_fidele(
 @fidele_router.get("", tags=["Fidele"])
 async def get_fideles(
     session: Annotated[AsyncSession, Depends(get_session)],
-    offset: int = 0,
-    limit: int = Query(Config.DEFAULT_ITEMS_PER_PAGE, ge=1, le=Config.MAX_ITEMS_PER_PAGE),
+    filters: Annotated[FideleFilters, Depends()],
+    total_query: Annotated[TotalQuery, Depends()],
+    scope_paths: Annotated[list[str] | None, Depends(get_caller_scope_paths)],
+    offset: int = Query(0, ge=0),
+    limit: int = Query(Config.DEFAULT_ITEMS_PER_PAGE.value, ge=1, le=Config.MAX_ITEMS_PER_PAGE.value),
     include: Annotated[
         str | None,
         Query(description="Relations à inclure en flat (ex: photo_url)")
     ] = None,
 ) -> List[FideleProjFlat | FideleProjFlatWithPhoto]:
     """
-    Recuperer la liste des fideles avec pagination
+    Recuperer la liste des fideles avec pagination, filtrable (grade, type, statut,
+    sexe, nationalité, date de naissance, recensement, paroisse, structure).
+    `with_total=true` ajoute meta.total (mis en cache, voir routers.utils.count_cache)
+
+    Token requis. L'appelant ne voit que les fideles membres d'une paroisse de ses
+    périmètres (filtré en SQL): ses propres paroisses et les périmètres de ses
+    mandats (paroisse, nation, continent). Un mandat à la générale voit tout.
     """
     # Fetching main data
     include_fields = parse_fidele_include(include)
     should_include_photo = "photo_url" in include_fields
 
-    statement = (
-        select(Fidele)
-        .where(Fidele.est_supprimee == False)
-        .offset(offset)
-        .limit(limit)
-    )
+    scope_conditions = [scope_fidele_condition(scope_paths)] if scope_paths is not None else []
+    statement = build_fidele_list_statement(filters, offset, limit, scope_conditions)
     if should_include_photo:
         statement = statement.options(selectinload(Fidele.photo))
 
     result = await session.exec(statement)
     fidele_list = result.all()
+    meta = await get_total_meta(
+        session,
+        Fidele,
+        [*build_fidele_filters_conditions(filters), *scope_conditions],
+        total_query,
+        filtered=bool(filters.model_dump(exclude_none=True) or scope_conditions),
+    )
 
     # Returning the list
     if should_include_photo:
@@ -153,9 +209,9 @@ async def get_fideles(
             if projected.photo:
                 projected.photo = file_service.hydrate_signed_url(projected.photo)
             projected_list.append(projected)
-        return send200(projected_list)
+        return send200(projected_list, meta=meta)
 
-    return send200([FideleProjFlat.model_validate(fidele) for fidele in fidele_list])
+    return send200([FideleProjFlat.model_validate(fidele) for fidele in fidele_list], meta=meta)
 
 
 @fidele_router.get("/me", tags=["Fidele"])
@@ -189,12 +245,88 @@ async def get_my_fidele_profile(
     return send200(projected)
 
 
+@fidele_router.get("/me/credential", tags=["Fidele"])
+async def get_my_credential(
+    session: Annotated[AsyncSession, Depends(get_session)],
+    current_fidele: Annotated[
+        TokenPayload,
+        Depends(get_required_token_payload_dependency(TokenPayload)),
+    ],
+):
+    """
+    Justificatif signé (QR) du fidèle courant, vérifiable hors ligne aux points de contrôle.
+    Seuls les fidèles validés (avec un code de matriculation) en reçoivent un.
+    """
+    try:
+        fidele_id = int(current_fidele.sub)
+    except (TypeError, ValueError) as exc:
+        raise HTTPException(status_code=401, detail="Invalid token subject") from exc
+
+    fidele = await get_fidele_complete_data_by_id(fidele_id, session, ProjDepth.FLAT, {"photo_url"})
+    if not fidele:
+        return send404(["token", "sub"], "Fidele non trouvé")
+
+    try:
+        claims = build_credential_claims(fidele, fidele.photo.sha256 if fidele.photo else None)
+    except CredentialError as e:
+        return send400(["token", "sub"], str(e))
+
+    return send200({
+        "credential": issue_credential(claims),
+        "expiration_date": datetime.fromtimestamp(claims.exp, timezone.utc),
+    })
+
+
+@fidele_router.get("/batch", tags=["Fidele"])
+async def get_fideles_batch(
+    session: Annotated[AsyncSession, Depends(get_session)],
+    scope_paths: Annotated[list[str] | None, Depends(get_caller_scope_paths)],
+    ids: Annotated[
+        str,
+        Query(description=f"Ids des fideles séparés par des virgules (max {Config.MAX_BATCH_IDS.value})")
+    ],
+    proj: Annotated[ProjDepth, Query()] = ProjDepth.FLAT,
+    include: Annotated[
+        str | None,
+        Query(description="Relations à inclure en flat (ex: photo_url)")
+    ] = None,
+) -> BatchProj[FideleProjShallow | FideleProjFlat | FideleProjFlatWithPhoto]:
+    """
+    Recuperer plusieurs fideles par leurs Ids en une seule requête (+1 requête par relation).
+
+    L'ordre des `ids` est conservé dans `items`; les ids introuvables, supprimés ou
+    hors des périmètres de l'appelant sont retournés dans `missing_ids`.
+    """
+    id_list = parse_ids_query(ids, max_items=Config.MAX_BATCH_IDS.value)
+    include_fields = parse_fidele_include(include)
+    should_include_photo = proj == ProjDepth.FLAT and "photo_url" in include_fields
+
+    fidele_list, missing_ids = await get_resources_by_ids_batch(
+        Fidele,
+        session,
+        id_list,
+        options=get_fidele_complete_data_options(proj, include_fields),
+        conditions=[scope_fidele_condition(scope_paths)] if scope_paths is not None else (),
+    )
+
+    flat_projection = FideleProjFlatWithPhoto if should_include_photo else FideleProjFlat
+    projected_list = [
+        apply_projection(fidele, flat_projection, FideleProjShallow, proj)
+        for fidele in fidele_list
+    ]
+
+    if should_include_photo:
+        file_service = S3Service()
+        for projected in projected_list:
+            if projected.photo:
+                projected.photo = file_service.hydrate_signed_url(projected.photo)
+
+    return send200(BatchProj(items=projected_list, missing_ids=missing_ids))
+
+
 @fidele_router.get("/{id}", tags=["Fidele"])
 async def get_fidele(
-    id: Annotated[int, Path(..., description="Fidele's Id")],
-    fidele: Annotated[AsyncSession, Depends(required_fidele)],
-    session: Annotated[AsyncSession, Depends(get_session)],
-    request: Request,
+    fidele: Annotated[Fidele, Depends(required_fidele_complete_data_with_include)],
     proj: Annotated[ProjDepth, Query()] = ProjDepth.SHALLOW,
     include: Annotated[
         str | None,
@@ -208,16 +340,10 @@ async def get_fidele(
         id (int): L'Id du fidele à récupérer
     """
 
-    print("Current_fidele:", request.state.current_fidele)
-    
     include_fields = parse_fidele_include(include)
     should_include_photo = proj == ProjDepth.FLAT and "photo_url" in include_fields
 
-    # Fetching related data for the shallow projection
-    if proj == ProjDepth.SHALLOW or should_include_photo:
-        fidele = await get_fidele_complete_data_by_id(id, session, proj, include_fields)
-
-    # Return the fidele as projection
+    # Relations needed by the projection were loaded by the dependency (single fetch)
     flat_projection = FideleProjFlatWithPhoto if should_include_photo else FideleProjFlat
     projected_response = apply_projection(fidele, flat_projection, FideleProjShallow, proj)
 
@@ -232,7 +358,7 @@ async def get_fidele(
 async def update_fidele(
     body: FideleUpdate,
     session: Annotated[AsyncSession, Depends(get_session)],
-    fidele: Annotated[Fidele, Depends(required_fidele)],
+    fidele: Annotated[Fidele, Depends(required_fidele_complete_data)],
     proj: Annotated[ProjDepth, Query()] = ProjDepth.SHALLOW,
 ) -> FideleProjShallow | FideleProjFlat:
     """
@@ -245,25 +371,34 @@ async def update_fidele(
 
     update_data = body.model_dump(mode="json", exclude_unset=True)
 
+    if "id_nation_nationalite" in update_data and update_data["id_nation_nationalite"] is None:
+        return send400(["body", "id_nation_nationalite"], "id_nation_nationalite est obligatoire")
+
+    # The validated rows are kept to refresh the already loaded relations (no re-query)
+    related: dict[str, object] = {}
     if "id_grade" in update_data and update_data["id_grade"] is not None:
-        await check_resource_exists(Grade, session, filters={"id": int(update_data["id_grade"])})
+        related["grade"] = await get_reference_resource(Grade, session, int(update_data["id_grade"]))
     if "id_fidele_type" in update_data and update_data["id_fidele_type"] is not None:
-        await check_resource_exists(
-            FideleType, session, filters={"id": int(update_data["id_fidele_type"]) }
+        related["fidele_type"] = await get_reference_resource(
+            FideleType, session, int(update_data["id_fidele_type"])
         )
     if "id_fidele_recenseur" in update_data and update_data["id_fidele_recenseur"] is not None:
-        await check_resource_exists(Fidele, session, filters={"id": update_data["id_fidele_recenseur"]})
+        related["fidele_recenseur"] = await check_resource_exists(Fidele, session, filters={"id": update_data["id_fidele_recenseur"]})
     if "id_nation_nationalite" in update_data and update_data["id_nation_nationalite"] is not None:
-        await check_resource_exists(Nation, session, filters={"id": update_data["id_nation_nationalite"]})
-    if "id_nation_nationalite" in update_data and update_data["id_nation_nationalite"] is None:
-        return send400(["body", "id_nation_nationalite"], "id_nation_nationalite est obligatoire")
+        related["nation_nationalite"] = await get_reference_resource(Nation, session, update_data["id_nation_nationalite"])
     if "id_document_statut" in update_data and update_data["id_document_statut"] is not None:
-        await check_resource_exists(DocumentStatut, session, filters={"id": update_data["id_document_statut"]})
+        related["document_statut"] = await get_reference_resource(DocumentStatut, session, update_data["id_document_statut"])
 
     # Update fields (only provided fields)
     for field, value in update_data.items():
         setattr(fidele, field, value)
 
+    if proj == ProjDepth.SHALLOW:
+        if "id_fidele_recenseur" in update_data and update_data["id_fidele_recenseur"] is None:
+            related["fidele_recenseur"] = None
+        for relation, value in related.items():
+            setattr(fidele, relation, value)
+
     # Update modification timestamp
     fidele.date_modification = datetime.now(timezone.utc)
 
@@ -271,10 +406,6 @@ async def update_fidele(
     session.add(fidele)
     await session.commit()
 
-    # Re-query with eager loads so relationships are available for projection
-    if proj == ProjDepth.SHALLOW:
-        fidele = await get_fidele_complete_data_by_id(fidele.id, session, proj)
-
     # Return the updated fidele with related objects already loaded
     projected_response = apply_projection(fidele, FideleProjFlat, FideleProjShallow, proj)
     return send200(projected_response)
@@ -293,7 +424,10 @@ async def restore_fidele(
         id (int): L'Id du fidele à restaurer
     """
 
-    fidele = await get_fidele_any_by_id(id, session)
+    fidele = await get_fidele_any_by_id(id, session, proj)
+    # Archived (see modules.archive): bring it back to the hot tables first
+    if not fidele and await restore_archived_resource(session, Fidele, id):
+        fidele = await get_fidele_any_by_id(id, session, proj)
     if not fidele:
         return send404(["path", "id"], "Fidele non trouvé")
 
@@ -307,10 +441,6 @@ async def restore_fidele(
         session.add(fidele)
         await session.commit()
 
-    # Re-query with eager loads so relationships are available for projection
-    if proj == ProjDepth.SHALLOW:
-        fidele = await get_fidele_complete_data_by_id(fidele.id, session, proj)
-
     projected_response = apply_projection(fidele, FideleProjFlat, FideleProjShallow, proj)
     return send200(projected_response)
 
@@ -382,23 +512,21 @@ async def update_fidele_adresse(
     adresse = await get_fidele_adresse_complete_data_by_id(fidele.id, session, proj)
 
     if not adresse:
+        nation = None
         if body.id_nation is not None:
-            await check_resource_exists(Nation, session, filters={"id": body.id_nation})
-        await check_resource_exists(
-            DocumentType, session, filters={"id": DocumentTypeEnum.FIDELE.value}
-        )
+            nation = await get_reference_resource(Nation, session, body.id_nation)
+        await get_reference_resource(DocumentType, session, DocumentTypeEnum.FIDELE.value)
         # Create new adresse if not found
         new_adresse = Adresse(
             id_document_type=DocumentTypeEnum.FIDELE.value,
             id_document=fidele.id,
             **body.model_dump(mode="json", exclude_unset=True)
         )
-        session.add(new_adresse)
-        await session.commit()
-        await session.refresh(new_adresse)
-
-        if proj == ProjDepth.SHALLOW: # if shallow fetc related data
-            new_adresse = await get_fidele_adresse_complete_data_by_id(fidele.id, session, proj)
+        await save_resource(
+            session,
+            new_adresse,
+            relations={"nation": nation} if proj == ProjDepth.SHALLOW else None,
+        )
 
         projected_response = apply_projection(new_adresse, AdresseProjFlat, AdresseProjShallow, proj)
         return send200(projected_response)
@@ -407,8 +535,9 @@ async def update_fidele_adresse(
     update_data = body.model_dump(
         mode="json", exclude_unset=True, exclude={"id_document_type", "id_document"}
     )
+    nation = None
     if "id_nation" in update_data and update_data["id_nation"] is not None:
-        await check_resource_exists(Nation, session, filters={"id": update_data["id_nation"]})
+        nation = await get_reference_resource(Nation, session, update_data["id_nation"])
     for field, value in update_data.items():
         setattr(adresse, field, value)
 
@@ -419,10 +548,12 @@ async def update_fidele_adresse(
     # Update modification timestamp
     adresse.date_modification = datetime.now(timezone.utc)
 
-    # Commit changes
-    session.add(adresse)
-    await session.commit()
-    await session.refresh(adresse)
+    # Commit changes (keeping the loaded nation in sync instead of refreshing)
+    await save_resource(
+        session,
+        adresse,
+        relations={"nation": nation} if "id_nation" in update_data and proj == ProjDepth.SHALLOW else None,
+    )
 
     # Return the updated adresse
     projected_response = apply_projection(adresse, AdresseProjFlat, AdresseProjShallow, proj)
@@ -511,18 +642,14 @@ async def update_fidele_contact(
     contact = contact_result.first()
 
     if not contact:
-        await check_resource_exists(
-            DocumentType, session, filters={"id": DocumentTypeEnum.FIDELE.value}
-        )
+        await get_reference_resource(DocumentType, session, DocumentTypeEnum.FIDELE.value)
         # Create new contact if not found
         new_contact = Contact(
             id_document_type=DocumentTypeEnum.FIDELE.value,
             id_document=fidele.id,
             **body.model_dump(mode="json", exclude_unset=True)
         )
-        session.add(new_contact)
-        await session.commit()
-        await session.refresh(new_contact)
+        await save_resource(session, new_contact)
         projected_response = apply_projection(new_contact, ContactProjFlat, ContactProjShallow, proj)
         return send200(projected_response)
 
@@ -541,9 +668,7 @@ async def update_fidele_contact(
     contact.date_modification = datetime.now(timezone.utc)
 
     # Commit changes
-    session.add(contact)
-    await session.commit()
-    await session.refresh(contact)
+    await save_resource(session, contact)
 
     # Return the updated contact
     projected_response = apply_projection(contact, ContactProjFlat, ContactProjShallow, proj)
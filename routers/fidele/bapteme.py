@@ -17,7 +17,7 @@ from models.paroisse import Paroisse
 from routers.fidele.recensement_etape import mark_fidele_recensement_etape_completed
 from routers.utils import check_resource_exists
 from routers.fidele.utils import required_fidele
-from routers.utils import apply_projection
+from routers.utils import apply_projection, save_resource
 from routers.utils.http_utils import send200, send400, send404
 from utils.constants import ProjDepth
 
@@ -50,58 +50,47 @@ async def create_fidele_bapteme(
     """Créer les informations de baptême d'un fidèle."""
 
     payload = body.model_dump(mode="json", exclude_unset=True)
+    paroisse = None
     if "id_paroisse" in payload and payload["id_paroisse"] is not None:
-        await check_resource_exists(Paroisse, session, filters={"id": payload["id_paroisse"]})
+        paroisse = await check_resource_exists(Paroisse, session, filters={"id": payload["id_paroisse"]})
 
     statement = select(FideleBapteme).where(FideleBapteme.id_fidele == fidele.id)
+    if proj == ProjDepth.SHALLOW:
+        statement = statement.options(selectinload(FideleBapteme.paroisse))
     result = await session.exec(statement)
-    existing = result.first()
+    bapteme = result.first()
 
-    if existing and existing.est_supprimee == False:
+    if bapteme and bapteme.est_supprimee == False:
         return send400(["path", "id"], "Les informations de baptême existent déjà pour ce fidèle")
 
-    if existing and existing.est_supprimee == True:
+    if bapteme and bapteme.est_supprimee == True:
         for field, value in payload.items():
-            setattr(existing, field, value)
-        existing.est_supprimee = False
-        existing.date_suppression = None
-        existing.date_modification = datetime.now(timezone.utc)
-
-        session.add(existing)
-        await session.commit()
-        await session.refresh(existing)
-
-        await mark_fidele_recensement_etape_completed(
-            session,
-            id_fidele=fidele.id,
-            id_recensement_etape=RecensementEtapeEnum.BAPTEME,
-        )
-
-        if proj == ProjDepth.SHALLOW:
-            existing = await get_fidele_bapteme_complete_data_by_fidele_id(fidele.id, session, proj)
-
-        projected_response = apply_projection(
-            existing,
-            FideleBaptemeProjFlat,
-            FideleBaptemeProjShallowWithoutFideleData,
-            proj,
-        )
-        return send200(projected_response)
-
-    bapteme = FideleBapteme(id_fidele=fidele.id, **payload)
-    session.add(bapteme)
-    await session.commit()
-    await session.refresh(bapteme)
-
+            setattr(bapteme, field, value)
+        bapteme.est_supprimee = False
+        bapteme.date_suppression = None
+        bapteme.date_modification = datetime.now(timezone.utc)
+    else:
+        bapteme = FideleBapteme(id_fidele=fidele.id, **payload)
+
+    # Keep the shallow relation in sync instead of re-fetching the bapteme
+    relations = None
+    if proj == ProjDepth.SHALLOW and ("id_paroisse" in payload or bapteme.id is None):
+        relations = {"paroisse": paroisse}
+
+    # The bapteme and its recensement step are committed together
+    await save_resource(
+        session,
+        bapteme,
+        relations=relations,
+        commit=False,
+    )
     await mark_fidele_recensement_etape_completed(
         session,
         id_fidele=fidele.id,
         id_recensement_etape=RecensementEtapeEnum.BAPTEME,
+        fidele=fidele,
     )
 
-    if proj == ProjDepth.SHALLOW:
-        bapteme = await get_fidele_bapteme_complete_data_by_fidele_id(fidele.id, session, proj)
-
     projected_response = apply_projection(
         bapteme,
         FideleBaptemeProjFlat,
@@ -142,43 +131,36 @@ async def update_fidele_bapteme(
     """Créer/mettre à jour les informations de baptême d'un fidèle."""
 
     update_data = body.model_dump(mode="json", exclude_unset=True)
+    paroisse = None
     if "id_paroisse" in update_data and update_data["id_paroisse"] is not None:
-        await check_resource_exists(Paroisse, session, filters={"id": update_data["id_paroisse"]})
+        paroisse = await check_resource_exists(Paroisse, session, filters={"id": update_data["id_paroisse"]})
 
     statement = select(FideleBapteme).where(FideleBapteme.id_fidele == fidele.id)
+    if proj == ProjDepth.SHALLOW:
+        statement = statement.options(selectinload(FideleBapteme.paroisse))
     result = await session.exec(statement)
     bapteme = result.first()
 
     if not bapteme:
         bapteme = FideleBapteme(id_fidele=fidele.id, **update_data)
-        session.add(bapteme)
-        await session.commit()
-        await session.refresh(bapteme)
-
-        if proj == ProjDepth.SHALLOW:
-            bapteme = await get_fidele_bapteme_complete_data_by_fidele_id(fidele.id, session, proj)
-
-        projected_response = apply_projection(
-            bapteme,
-            FideleBaptemeProjFlat,
-            FideleBaptemeProjShallowWithoutFideleData,
-            proj,
-        )
-        return send200(projected_response)
-
-    for field, value in update_data.items():
-        setattr(bapteme, field, value)
-
-    bapteme.est_supprimee = False
-    bapteme.date_suppression = None
-    bapteme.date_modification = datetime.now(timezone.utc)
+    else:
+        for field, value in update_data.items():
+            setattr(bapteme, field, value)
 
-    session.add(bapteme)
-    await session.commit()
-    await session.refresh(bapteme)
+        bapteme.est_supprimee = False
+        bapteme.date_suppression = None
+        bapteme.date_modification = datetime.now(timezone.utc)
 
-    if proj == ProjDepth.SHALLOW:
-        bapteme = await get_fidele_bapteme_complete_data_by_fidele_id(fidele.id, session, proj)
+    # Keep the shallow relation in sync instead of re-fetching the bapteme
+    relations = None
+    if proj == ProjDepth.SHALLOW and ("id_paroisse" in update_data or bapteme.id is None):
+        relations = {"paroisse": paroisse}
+
+    await save_resource(
+        session,
+        bapteme,
+        relations=relations,
+    )
 
     projected_response = apply_projection(
         bapteme,
@@ -14,8 +14,9 @@ from models.fidele import Fidele, FideleFamille
 from models.fidele.projection import FideleFamilleProjFlat
 from models.fidele.utils import FideleFamilleCreate, FideleFamilleUpdate
 from routers.fidele.recensement_etape import mark_fidele_recensement_etape_completed
-from routers.utils import check_resource_exists
 from routers.fidele.utils import required_fidele
+from routers.utils import save_resource
+from routers.utils.reference_data import get_reference_resource
 from routers.utils.http_utils import send200, send400, send404
 
 
@@ -40,42 +41,31 @@ async def create_fidele_famille(
     """Créer les informations familiales d'un fidèle."""
 
     payload = body.model_dump(mode="json", exclude_unset=True)
-    await check_resource_exists(EtatCivile, session, filters={"id": payload["id_etat_civile"]})
+    await get_reference_resource(EtatCivile, session, payload["id_etat_civile"])
 
     statement = select(FideleFamille).where(FideleFamille.id_fidele == fidele.id)
     result = await session.exec(statement)
-    existing = result.first()
+    famille = result.first()
 
-    if existing and existing.est_supprimee == False:
+    if famille and famille.est_supprimee == False:
         return send400(["path", "id"], "Les informations familiales existent déjà pour ce fidèle")
 
-    if existing and existing.est_supprimee == True:
+    if famille and famille.est_supprimee == True:
         for field, value in payload.items():
-            setattr(existing, field, value)
-        existing.est_supprimee = False
-        existing.date_suppression = None
-        existing.date_modification = datetime.now(timezone.utc)
-
-        session.add(existing)
-        await session.commit()
-        await session.refresh(existing)
-
-        await mark_fidele_recensement_etape_completed(
-            session,
-            id_fidele=fidele.id,
-            id_recensement_etape=RecensementEtapeEnum.FAMILLE,
-        )
-        return send200(FideleFamilleProjFlat.model_validate(existing))
-
-    famille = FideleFamille(id_fidele=fidele.id, **payload)
-    session.add(famille)
-    await session.commit()
-    await session.refresh(famille)
-
+            setattr(famille, field, value)
+        famille.est_supprimee = False
+        famille.date_suppression = None
+        famille.date_modification = datetime.now(timezone.utc)
+    else:
+        famille = FideleFamille(id_fidele=fidele.id, **payload)
+
+    # The famille and its recensement step are committed together
+    await save_resource(session, famille, commit=False)
     await mark_fidele_recensement_etape_completed(
         session,
         id_fidele=fidele.id,
         id_recensement_etape=RecensementEtapeEnum.FAMILLE,
+        fidele=fidele,
     )
 
     return send200(FideleFamilleProjFlat.model_validate(famille))
@@ -104,7 +94,7 @@ async def update_fidele_famille(
     """Créer/mettre à jour les informations familiales d'un fidèle."""
 
     update_data = body.model_dump(mode="json", exclude_unset=True)
-    await check_resource_exists(EtatCivile, session, filters={"id": update_data["id_etat_civile"]})
+    await get_reference_resource(EtatCivile, session, update_data["id_etat_civile"])
 
     statement = select(FideleFamille).where(FideleFamille.id_fidele == fidele.id)
     result = await session.exec(statement)
@@ -112,21 +102,15 @@ async def update_fidele_famille(
 
     if not famille:
         famille = FideleFamille(id_fidele=fidele.id, **update_data)
-        session.add(famille)
-        await session.commit()
-        await session.refresh(famille)
-        return send200(FideleFamilleProjFlat.model_validate(famille))
+    else:
+        for field, value in update_data.items():
+            setattr(famille, field, value)
 
-    for field, value in update_data.items():
-        setattr(famille, field, value)
+        famille.est_supprimee = False
+        famille.date_suppression = None
+        famille.date_modification = datetime.now(timezone.utc)
 
-    famille.est_supprimee = False
-    famille.date_suppression = None
-    famille.date_modification = datetime.now(timezone.utc)
-
-    session.add(famille)
-    await session.commit()
-    await session.refresh(famille)
+    await save_resource(session, famille)
 
     return send200(FideleFamilleProjFlat.model_validate(famille))
 
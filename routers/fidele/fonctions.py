@@ -13,6 +13,7 @@ from models.direction.fonction import DirectionFonction
 from models.direction.fonction.projection import DirectionFonctionProjShallowWithoutFideleData
 from models.fidele import Fidele
 from routers.fidele.utils import required_fidele
+from routers.utils.count_cache import TotalQuery, get_total_meta
 from routers.utils.http_utils import send200
 
 
@@ -23,6 +24,7 @@ fidele_fonctions_router = APIRouter(prefix="/{id}/fonction", tags=["Fidele - Fon
 async def list_fidele_fonctions(
     session: Annotated[AsyncSession, Depends(get_session)],
     fidele: Annotated[Fidele, Depends(required_fidele)],
+    total_query: Annotated[TotalQuery, Depends()],
     offset: int = 0,
     limit: int = Query(
         Config.DEFAULT_ITEMS_PER_PAGE.value, ge=1, le=Config.MAX_ITEMS_PER_PAGE.value
@@ -30,12 +32,13 @@ async def list_fidele_fonctions(
 ) -> List[DirectionFonctionProjShallowWithoutFideleData]:
     """Lister les mandats (fonctions) d'un fidèle, toutes directions confondues."""
 
+    conditions = [
+        (DirectionFonction.id_fidele == fidele.id)
+        & (DirectionFonction.est_supprimee == False)
+    ]
     statement = (
         select(DirectionFonction)
-        .where(
-            (DirectionFonction.id_fidele == fidele.id)
-            & (DirectionFonction.est_supprimee == False)
-        )
+        .where(*conditions)
         .options(
             selectinload(DirectionFonction.direction),
             selectinload(DirectionFonction.fonction),
@@ -45,7 +48,9 @@ async def list_fidele_fonctions(
     )
     result = await session.exec(statement)
     items = result.all()
+    meta = await get_total_meta(session, DirectionFonction, conditions, total_query)
 
-    return send200([
-        DirectionFonctionProjShallowWithoutFideleData.model_validate(i) for i in items
-    ])
+    return send200(
+        [DirectionFonctionProjShallowWithoutFideleData.model_validate(i) for i in items],
+        meta=meta,
+    )
@@ -18,9 +18,9 @@ from models.fidele.projection import (
 )
 from models.fidele.utils import FideleOccupationCreate, FideleOccupationUpdate
 from routers.fidele.recensement_etape import mark_fidele_recensement_etape_completed
-from routers.utils import check_resource_exists
 from routers.fidele.utils import required_fidele
-from routers.utils import apply_projection
+from routers.utils import apply_projection, save_resource
+from routers.utils.reference_data import get_reference_resource
 from routers.utils.http_utils import send200, send400, send404
 from utils.constants import ProjDepth
 
@@ -57,58 +57,43 @@ async def create_fidele_occupation(
     """Créer les informations d'occupation d'un fidèle."""
 
     payload = body.model_dump(mode="json", exclude_unset=True)
-    await check_resource_exists(NiveauEtudes, session, filters={"id": payload["id_niveau_etude"]})
-    await check_resource_exists(Profession, session, filters={"id": payload["id_profession"]})
+    niveau_etude = await get_reference_resource(NiveauEtudes, session, payload["id_niveau_etude"])
+    profession = await get_reference_resource(Profession, session, payload["id_profession"])
 
     statement = select(FideleOccupation).where(FideleOccupation.id_fidele == fidele.id)
     result = await session.exec(statement)
-    existing = result.first()
+    occupation = result.first()
 
-    if existing and existing.est_supprimee == False:
+    if occupation and occupation.est_supprimee == False:
         return send400(["path", "id"], "Les informations d'occupation existent déjà pour ce fidèle")
 
-    if existing and existing.est_supprimee == True:
+    if occupation and occupation.est_supprimee == True:
         for field, value in payload.items():
-            setattr(existing, field, value)
-        existing.est_supprimee = False
-        existing.date_suppression = None
-        existing.date_modification = datetime.now(timezone.utc)
-
-        session.add(existing)
-        await session.commit()
-        await session.refresh(existing)
-
-        await mark_fidele_recensement_etape_completed(
-            session,
-            id_fidele=fidele.id,
-            id_recensement_etape=RecensementEtapeEnum.OCCUPATION,
-        )
-
-        if proj == ProjDepth.SHALLOW:
-            existing = await get_fidele_occupation_complete_data_by_fidele_id(fidele.id, session, proj)
-
-        projected_response = apply_projection(
-            existing,
-            FideleOccupationProjFlat,
-            FideleOccupationProjShallowWithoutFideleData,
-            proj,
-        )
-        return send200(projected_response)
-
-    occupation = FideleOccupation(id_fidele=fidele.id, **payload)
-    session.add(occupation)
-    await session.commit()
-    await session.refresh(occupation)
-
+            setattr(occupation, field, value)
+        occupation.est_supprimee = False
+        occupation.date_suppression = None
+        occupation.date_modification = datetime.now(timezone.utc)
+    else:
+        occupation = FideleOccupation(id_fidele=fidele.id, **payload)
+
+    # The occupation and its recensement step are committed together
+    await save_resource(
+        session,
+        occupation,
+        relations=(
+            {"niveau_etude": niveau_etude, "profession": profession}
+            if proj == ProjDepth.SHALLOW
+            else None
+        ),
+        commit=False,
+    )
     await mark_fidele_recensement_etape_completed(
         session,
         id_fidele=fidele.id,
         id_recensement_etape=RecensementEtapeEnum.OCCUPATION,
+        fidele=fidele,
     )
 
-    if proj == ProjDepth.SHALLOW:
-        occupation = await get_fidele_occupation_complete_data_by_fidele_id(fidele.id, session, proj)
-
     projected_response = apply_projection(
         occupation,
         FideleOccupationProjFlat,
@@ -149,8 +134,8 @@ async def update_fidele_occupation(
     """Créer/mettre à jour les informations d'occupation d'un fidèle."""
 
     update_data = body.model_dump(mode="json", exclude_unset=True)
-    await check_resource_exists(NiveauEtudes, session, filters={"id": update_data["id_niveau_etude"]})
-    await check_resource_exists(Profession, session, filters={"id": update_data["id_profession"]})
+    niveau_etude = await get_reference_resource(NiveauEtudes, session, update_data["id_niveau_etude"])
+    profession = await get_reference_resource(Profession, session, update_data["id_profession"])
 
     statement = select(FideleOccupation).where(FideleOccupation.id_fidele == fidele.id)
     result = await session.exec(statement)
@@ -158,34 +143,23 @@ async def update_fidele_occupation(
 
     if not occupation:
         occupation = FideleOccupation(id_fidele=fidele.id, **update_data)
-        session.add(occupation)
-        await session.commit()
-        await session.refresh(occupation)
-
-        if proj == ProjDepth.SHALLOW:
-            occupation = await get_fidele_occupation_complete_data_by_fidele_id(fidele.id, session, proj)
-
-        projected_response = apply_projection(
-            occupation,
-            FideleOccupationProjFlat,
-            FideleOccupationProjShallowWithoutFideleData,
-            proj,
-        )
-        return send200(projected_response)
-
-    for field, value in update_data.items():
-        setattr(occupation, field, value)
-
-    occupation.est_supprimee = False
-    occupation.date_suppression = None
-    occupation.date_modification = datetime.now(timezone.utc)
+    else:
+        for field, value in update_data.items():
+            setattr(occupation, field, value)
 
-    session.add(occupation)
-    await session.commit()
-    await session.refresh(occupation)
+        occupation.est_supprimee = False
+        occupation.date_suppression = None
+        occupation.date_modification = datetime.now(timezone.utc)
 
-    if proj == ProjDepth.SHALLOW:
-        occupation = await get_fidele_occupation_complete_data_by_fidele_id(fidele.id, session, proj)
+    await save_resource(
+        session,
+        occupation,
+        relations=(
+            {"niveau_etude": niveau_etude, "profession": profession}
+            if proj == ProjDepth.SHALLOW
+            else None
+        ),
+    )
 
     projected_response = apply_projection(
         occupation,
@@ -15,9 +15,9 @@ from models.fidele import Fidele, FideleOrigine
 from models.fidele.projection import FideleOrigineProjFlat, FideleOrigineProjShallowWithoutFideleData
 from models.fidele.utils import FideleOrigineCreate, FideleOrigineUpdate
 from routers.fidele.recensement_etape import mark_fidele_recensement_etape_completed
-from routers.utils import check_resource_exists
 from routers.fidele.utils import required_fidele
-from routers.utils import apply_projection
+from routers.utils import apply_projection, save_resource
+from routers.utils.reference_data import get_reference_resource
 from routers.utils.http_utils import send200, send400, send404
 from utils.constants import ProjDepth
 
@@ -50,58 +50,42 @@ async def create_fidele_origine(
     """Créer les informations d'origine d'un fidèle."""
 
     payload = body.model_dump(mode="json", exclude_unset=True)
+    nation = None
     if "id_nation_origine" in payload and payload["id_nation_origine"] is not None:
-        await check_resource_exists(Nation, session, filters={"id": payload["id_nation_origine"]})
+        nation = await get_reference_resource(Nation, session, payload["id_nation_origine"])
 
     statement = select(FideleOrigine).where(FideleOrigine.id_fidele == fidele.id)
+    if proj == ProjDepth.SHALLOW:
+        statement = statement.options(selectinload(FideleOrigine.nation))
     result = await session.exec(statement)
-    existing = result.first()
+    origine = result.first()
 
-    if existing and existing.est_supprimee == False:
+    if origine and origine.est_supprimee == False:
         return send400(["path", "id"], "Les informations d'origine existent déjà pour ce fidèle")
 
-    if existing and existing.est_supprimee == True:
+    if origine and origine.est_supprimee == True:
         for field, value in payload.items():
-            setattr(existing, field, value)
-        existing.est_supprimee = False
-        existing.date_suppression = None
-        existing.date_modification = datetime.now(timezone.utc)
-
-        session.add(existing)
-        await session.commit()
-        await session.refresh(existing)
-
-        await mark_fidele_recensement_etape_completed(
-            session,
-            id_fidele=fidele.id,
-            id_recensement_etape=RecensementEtapeEnum.ORIGINES,
-        )
-
-        if proj == ProjDepth.SHALLOW:
-            existing = await get_fidele_origine_complete_data_by_fidele_id(fidele.id, session, proj)
-
-        projected_response = apply_projection(
-            existing,
-            FideleOrigineProjFlat,
-            FideleOrigineProjShallowWithoutFideleData,
-            proj,
-        )
-        return send200(projected_response)
-
-    origine = FideleOrigine(id_fidele=fidele.id, **payload)
-    session.add(origine)
-    await session.commit()
-    await session.refresh(origine)
-
+            setattr(origine, field, value)
+        origine.est_supprimee = False
+        origine.date_suppression = None
+        origine.date_modification = datetime.now(timezone.utc)
+    else:
+        origine = FideleOrigine(id_fidele=fidele.id, **payload)
+
+    # Keep the shallow relation in sync instead of re-fetching the origine
+    relations = None
+    if proj == ProjDepth.SHALLOW and ("id_nation_origine" in payload or origine.id is None):
+        relations = {"nation": nation}
+
+    # The origine and its recensement step are committed together
+    await save_resource(session, origine, relations=relations, commit=False)
     await mark_fidele_recensement_etape_completed(
         session,
         id_fidele=fidele.id,
         id_recensement_etape=RecensementEtapeEnum.ORIGINES,
+        fidele=fidele,
     )
 
-    if proj == ProjDepth.SHALLOW:
-        origine = await get_fidele_origine_complete_data_by_fidele_id(fidele.id, session, proj)
-
     projected_response = apply_projection(
         origine,
         FideleOrigineProjFlat,
@@ -142,43 +126,32 @@ async def update_fidele_origine(
     """Créer/mettre à jour les informations d'origine d'un fidèle."""
 
     update_data = body.model_dump(mode="json", exclude_unset=True)
+    nation = None
     if "id_nation_origine" in update_data and update_data["id_nation_origine"] is not None:
-        await check_resource_exists(Nation, session, filters={"id": update_data["id_nation_origine"]})
+        nation = await get_reference_resource(Nation, session, update_data["id_nation_origine"])
 
     statement = select(FideleOrigine).where(FideleOrigine.id_fidele == fidele.id)
+    if proj == ProjDepth.SHALLOW:
+        statement = statement.options(selectinload(FideleOrigine.nation))
     result = await session.exec(statement)
     origine = result.first()
 
     if not origine:
         origine = FideleOrigine(id_fidele=fidele.id, **update_data)
-        session.add(origine)
-        await session.commit()
-        await session.refresh(origine)
-
-        if proj == ProjDepth.SHALLOW:
-            origine = await get_fidele_origine_complete_data_by_fidele_id(fidele.id, session, proj)
-
-        projected_response = apply_projection(
-            origine,
-            FideleOrigineProjFlat,
-            FideleOrigineProjShallowWithoutFideleData,
-            proj,
-        )
-        return send200(projected_response)
-
-    for field, value in update_data.items():
-        setattr(origine, field, value)
-
-    origine.est_supprimee = False
-    origine.date_suppression = None
-    origine.date_modification = datetime.now(timezone.utc)
+    else:
+        for field, value in update_data.items():
+            setattr(origine, field, value)
 
-    session.add(origine)
-    await session.commit()
-    await session.refresh(origine)
+        origine.est_supprimee = False
+        origine.date_suppression = None
+        origine.date_modification = datetime.now(timezone.utc)
 
-    if proj == ProjDepth.SHALLOW:
-        origine = await get_fidele_origine_complete_data_by_fidele_id(fidele.id, session, proj)
+    # Keep the shallow relation in sync instead of re-fetching the origine
+    relations = None
+    if proj == ProjDepth.SHALLOW and ("id_nation_origine" in update_data or origine.id is None):
+        relations = {"nation": nation}
+
+    await save_resource(session, origine, relations=relations)
 
     projected_response = apply_projection(
         origine,
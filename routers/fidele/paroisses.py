@@ -17,7 +17,7 @@ from models.fidele.projection import (
 )
 from models.fidele.utils import FideleParoisseCreate, FideleParoisseUpdate
 from models.paroisse import Paroisse
-from routers.utils import check_resource_exists
+from routers.utils import check_resource_exists, save_resource
 from routers.fidele.recensement_etape import mark_fidele_recensement_etape_completed
 from routers.fidele.utils import required_fidele
 from routers.utils.http_utils import send200, send400
@@ -39,8 +39,12 @@ async def _set_unique_principale_paroisse(
     session: AsyncSession,
     *,
     id_fidele: int,
-    keep_membership_id: int,
+    keep_membership: FideleParoisse,
 ) -> None:
+    """Keep `keep_membership` as the only principale one (not committed).
+
+    The SELECT autoflushes `keep_membership`, so it works for a new membership too.
+    """
     statement = select(FideleParoisse).where(
         (FideleParoisse.id_fidele == id_fidele)
         & (FideleParoisse.est_supprimee == False)
@@ -50,14 +54,12 @@ async def _set_unique_principale_paroisse(
 
     now = datetime.now(timezone.utc)
     for membership in memberships:
-        should_be_principale = membership.id == keep_membership_id
+        should_be_principale = membership.id == keep_membership.id
         if membership.est_paroisse_principale != should_be_principale:
             membership.est_paroisse_principale = should_be_principale
             membership.date_modification = now
             session.add(membership)
 
-    await session.commit()
-
 
 def are_membership_dates_valid(date_adhesion: date | None, date_sortie: date | None) -> bool:
     if date_adhesion and date_sortie and date_sortie < date_adhesion:
@@ -104,7 +106,7 @@ async def add_fidele_paroisse(
 ) -> FideleParoisseProjShallowWithoutFideleData:
     """Ajouter une paroisse à un fidèle (historique d'appartenance)."""
 
-    await check_resource_exists(Paroisse, session, filters={"id": body.id_paroisse})
+    paroisse = await check_resource_exists(Paroisse, session, filters={"id": body.id_paroisse})
 
     if not are_membership_dates_valid(body.date_adhesion, body.date_sortie):
         return send400(["body"], "Dates d'adhésion/sortie invalides")
@@ -114,77 +116,51 @@ async def add_fidele_paroisse(
         & (FideleParoisse.id_paroisse == body.id_paroisse)
     )
     existing_result = await session.exec(existing_stmt)
-    existing = existing_result.first()
+    fidele_paroisse = existing_result.first()
 
-    if existing and existing.est_supprimee == False:
+    if fidele_paroisse and fidele_paroisse.est_supprimee == False:
         return send400(["body", "id_paroisse"], "Ce fidèle appartient déjà à cette paroisse")
 
-    if existing and existing.est_supprimee == True:
-        active_count = await _count_active_fidele_paroisses(session, id_fidele=fidele.id)
-        should_be_principale = bool(body.est_paroisse_principale)
-        if active_count == 0:
-            should_be_principale = True
-
-        existing.est_supprimee = False
-        existing.date_suppression = None
-        existing.date_adhesion = body.date_adhesion
-        existing.date_sortie = body.date_sortie
-        existing.est_actif = compute_est_actif(body.date_sortie)
-        existing.est_paroisse_principale = should_be_principale
-        existing.date_modification = datetime.now(timezone.utc)
-
-        session.add(existing)
-        await session.commit()
-        await session.refresh(existing)
-
-        if should_be_principale:
-            await _set_unique_principale_paroisse(
-                session,
-                id_fidele=fidele.id,
-                keep_membership_id=existing.id,
-            )
-
-        await mark_fidele_recensement_etape_completed(
-            session,
-            id_fidele=fidele.id,
-            id_recensement_etape=RecensementEtapeEnum.PAROISSES,
-        )
-
-        existing = await get_fidele_paroisse_complete_data_by_id(existing.id, session)
-        return send200(FideleParoisseProjShallowWithoutFideleData.model_validate(existing))
-
     active_count = await _count_active_fidele_paroisses(session, id_fidele=fidele.id)
     should_be_principale = bool(body.est_paroisse_principale)
     if active_count == 0:
         should_be_principale = True
 
-    fidele_paroisse = FideleParoisse(
-        id_fidele=fidele.id,
-        id_paroisse=body.id_paroisse,
-        date_adhesion=body.date_adhesion,
-        date_sortie=body.date_sortie,
-        est_actif=compute_est_actif(body.date_sortie),
-        est_paroisse_principale=should_be_principale,
-    )
+    if fidele_paroisse and fidele_paroisse.est_supprimee == True:
+        fidele_paroisse.est_supprimee = False
+        fidele_paroisse.date_suppression = None
+        fidele_paroisse.date_adhesion = body.date_adhesion
+        fidele_paroisse.date_sortie = body.date_sortie
+        fidele_paroisse.est_actif = compute_est_actif(body.date_sortie)
+        fidele_paroisse.est_paroisse_principale = should_be_principale
+        fidele_paroisse.date_modification = datetime.now(timezone.utc)
+    else:
+        fidele_paroisse = FideleParoisse(
+            id_fidele=fidele.id,
+            id_paroisse=body.id_paroisse,
+            date_adhesion=body.date_adhesion,
+            date_sortie=body.date_sortie,
+            est_actif=compute_est_actif(body.date_sortie),
+            est_paroisse_principale=should_be_principale,
+        )
 
-    session.add(fidele_paroisse)
-    await session.commit()
-    await session.refresh(fidele_paroisse)
+    # Membership, principale flags and recensement step are committed together
+    await save_resource(session, fidele_paroisse, relations={"paroisse": paroisse}, commit=False)
 
     if should_be_principale:
         await _set_unique_principale_paroisse(
             session,
             id_fidele=fidele.id,
-            keep_membership_id=fidele_paroisse.id,
+            keep_membership=fidele_paroisse,
         )
 
     await mark_fidele_recensement_etape_completed(
         session,
         id_fidele=fidele.id,
         id_recensement_etape=RecensementEtapeEnum.PAROISSES,
+        fidele=fidele,
     )
 
-    fidele_paroisse = await get_fidele_paroisse_complete_data_by_id(fidele_paroisse.id, session)
     return send200(FideleParoisseProjShallowWithoutFideleData.model_validate(fidele_paroisse))
 
 
@@ -234,15 +210,13 @@ async def update_fidele_paroisse(
     fidele_paroisse.date_modification = datetime.now(timezone.utc)
 
     session.add(fidele_paroisse)
-    await session.commit()
-    await session.refresh(fidele_paroisse)
-
     if requested_principale is True:
         await _set_unique_principale_paroisse(
             session,
             id_fidele=fidele_paroisse.id_fidele,
-            keep_membership_id=fidele_paroisse.id,
+            keep_membership=fidele_paroisse,
         )
+    await session.commit()
 
     return send200(FideleParoisseProjFlat.model_validate(fidele_paroisse))
 
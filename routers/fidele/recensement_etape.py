@@ -14,7 +14,10 @@ from models.constants import RecensementEtape
 from models.constants.types import DocumentStatutEnum, RecensementEtapeEnum
 from models.fidele import Fidele, FideleRecensementEtape
 from models.fidele.projection import FideleRecensementEtapeProjShallow
+from modules.census_feed import record_census_event
+from modules.census_feed.models import CensusEventTypeEnum
 from routers.fidele.utils import required_fidele
+from routers.utils.reference_data import count_reference_resources
 from routers.utils.http_utils import send200
 
 fidele_recensement_etape_router = APIRouter(
@@ -133,12 +136,7 @@ async def get_fidele_recensement_completion_details(
     id_fidele: int,
 ) -> dict[str, int | bool]:
     """Return completion details for a fidele recensement workflow."""
-    total_stmt = (
-        select(func.count(RecensementEtape.id))
-        .where(RecensementEtape.est_supprimee == False)
-    )
-    total_result = await session.exec(total_stmt)
-    total_steps = int(total_result.one() or 0)
+    total_steps = await count_reference_resources(RecensementEtape)
 
     completed_stmt = (
         select(func.count(FideleRecensementEtape.id))
@@ -168,16 +166,21 @@ async def refresh_fidele_rencensement_statut(
     session: AsyncSession,
     *,
     id_fidele: int,
+    fidele: Fidele | None = None,
 ) -> dict[str, int | bool]:
-    """Recompute and persist fidele.rencensement_statut from recensement progress."""
+    """Recompute and persist fidele.rencensement_statut from recensement progress.
+
+    Pass `fidele` when the caller already holds it to avoid selecting it again.
+    """
     status_details = await get_fidele_recensement_completion_details(
         session,
         id_fidele=id_fidele,
     )
 
-    fidele_stmt = select(Fidele).where(Fidele.id == id_fidele)
-    fidele_result = await session.exec(fidele_stmt)
-    fidele = fidele_result.first()
+    if fidele is None:
+        fidele_stmt = select(Fidele).where(Fidele.id == id_fidele)
+        fidele_result = await session.exec(fidele_stmt)
+        fidele = fidele_result.first()
 
     if fidele is None:
         return status_details
@@ -195,8 +198,14 @@ async def mark_fidele_recensement_etape_completed(
     *,
     id_fidele: int,
     id_recensement_etape: RecensementEtapeEnum | int,
+    fidele: Fidele | None = None,
+    commit: bool = True,
 ) -> dict[str, int | bool]:
-    """Mark one recensement step as completed and refresh global fidele status."""
+    """Mark one recensement step as completed and refresh global fidele status.
+
+    With `commit=True` (default) this commits the caller's pending changes too, so
+    write endpoints can persist their resource and the step in ONE transaction.
+    """
     etape_id = int(id_recensement_etape)
 
     await _upsert_fidele_recensement_etape_without_commit(
@@ -209,9 +218,18 @@ async def mark_fidele_recensement_etape_completed(
     status_details = await refresh_fidele_rencensement_statut(
         session,
         id_fidele=id_fidele,
+        fidele=fidele,
+    )
+    await record_census_event(
+        session,
+        CensusEventTypeEnum.RECENSEMENT_ETAPE,
+        id_fidele=id_fidele,
+        id_recensement_etape=etape_id,
+        **status_details,
     )
 
-    await session.commit()
+    if commit:
+        await session.commit()
     return status_details
 
 
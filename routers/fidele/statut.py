@@ -4,12 +4,11 @@ from datetime import datetime, timezone
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import selectinload
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from core.db import get_session
-from models.adresse import Adresse
+from models.adresse import Nation
 from models.constants.types import (
     DocumentStatutEnum,
     DocumentTypeEnum,
@@ -25,18 +24,23 @@ from models.fidele import (
 )
 from models.fidele.projection import FideleProjFlat, FideleProjShallow
 from models.fidele.utils import FideleStatutUpdate
+from models.constants import DocumentStatut
+from models.paroisse import Paroisse
+from modules.ancestry import ancestry_document_id
+from modules.census_feed import record_census_event
+from modules.census_feed.models import CensusEventTypeEnum
 from modules.oauth2.dependencies import get_required_token_payload_dependency
 from routers.utils import check_resource_exists
 from routers.fidele.utils import (
     build_fidele_matricule,
-    get_fidele_complete_data_by_id,
-    required_fidele,
+    required_fidele_complete_data,
 )
 from routers.utils import apply_projection
 from routers.utils.http_utils import send200, send400
 from routers.fidele.docs import FIDELE_STATUT_UPDATE_DESCRIPTION
 from routers.fidele.recensement_etape import get_fidele_recensement_completion_details
 from routers.utils.permissions import require_fidele_direction_fonction 
+from routers.utils.reference_data import get_reference_resources
 from utils.constants import ProjDepth
 
 fidele_statut_router = APIRouter(prefix="/{id}/statut", tags=["Fidele - Statut"])
@@ -45,22 +49,14 @@ async def get_fidele_paroisse_nation_iso_alpha_2(
     session: AsyncSession,
     fidele_paroisse: FideleParoisse,
 ) -> str | None:
-    
-    adresse_stmt = (
-        select(Adresse)
-        .where(
-            (Adresse.id_document_type == DocumentTypeEnum.PAROISSE.value)
-            & (Adresse.id_document == fidele_paroisse.id_paroisse)
-            & (Adresse.est_supprimee == False)
-        )
-        .options(selectinload(Adresse.nation))
-    )
-    adresse_result = await session.exec(adresse_stmt)
-    paroisse_adresse = adresse_result.first()
-    if not paroisse_adresse or not paroisse_adresse.nation:
+    """Code ISO de la nation de la paroisse, lue dans son chemin (voir modules.ancestry)."""
+    paroisse = await session.get(Paroisse, fidele_paroisse.id_paroisse)
+    id_nation = ancestry_document_id(paroisse.chemin if paroisse else None, DocumentTypeEnum.NATION)
+    if id_nation is None:
         return None
 
-    return paroisse_adresse.nation.iso_alpha_2
+    nation = (await get_reference_resources(Nation)).get(id_nation)
+    return nation.iso_alpha_2 if nation else None
 
 
 @fidele_statut_router.put("", description=FIDELE_STATUT_UPDATE_DESCRIPTION)
@@ -71,7 +67,7 @@ async def update_fidele_statut(
         TokenPayload,
         Depends(get_required_token_payload_dependency(TokenPayload)),
     ],
-    fidele: Annotated[Fidele, Depends(required_fidele)],
+    fidele: Annotated[Fidele, Depends(required_fidele_complete_data)],
     proj: Annotated[ProjDepth, Query()] = ProjDepth.SHALLOW,
 ) -> FideleProjFlat | FideleProjShallow:
     """
@@ -89,6 +85,10 @@ async def update_fidele_statut(
     Ex: Si le fidèle est dans une paroisse de Paris en France, alors les responsables (présidents), secrétaires et secrétaires adjoints de la paroisse, de la nation (France), du continent (Europe) et de la générale (Nkamba) peuvent faire cette opération.
     """
 
+    document_statut = await check_resource_exists(
+        DocumentStatut, session, filters={"id": body.id_document_statut}
+    )
+
     current_fidele_statut_id = fidele.id_document_statut
     target_fidele_statut_id = body.id_document_statut
     is_transition_pending_to_validated = (
@@ -150,6 +150,10 @@ async def update_fidele_statut(
 
         # 3: Assign the logged fidele as recenseur 
         fidele.id_fidele_recenseur = int(current_fidele.sub)
+        if proj == ProjDepth.SHALLOW:
+            fidele.fidele_recenseur = await check_resource_exists(
+                Fidele, session, filters={"id": fidele.id_fidele_recenseur}
+            )
 
         # 4: Assign a code matricule if the fidèle is a pratiquant (id_fidele_type=1).
         if fidele.id_fidele_type == FideleTypeEnum.PRATIQUANT.value:
@@ -186,13 +190,21 @@ async def update_fidele_statut(
 
     # 5: Update the fidèle's statut
     fidele.id_document_statut = target_fidele_statut_id
+    if proj == ProjDepth.SHALLOW:
+        # Keep the already loaded relation in sync instead of re-fetching the whole fidele
+        fidele.document_statut = document_statut
     fidele.date_modification = datetime.now(timezone.utc)
 
     session.add(fidele)
+    await record_census_event(
+        session,
+        CensusEventTypeEnum.STATUT,
+        id_fidele=fidele.id,
+        id_document_statut_precedent=current_fidele_statut_id,
+        id_document_statut=target_fidele_statut_id,
+        code_matriculation=fidele.code_matriculation,
+    )
     await session.commit()
 
-    if proj == ProjDepth.SHALLOW:
-        fidele = await get_fidele_complete_data_by_id(fidele.id, session, proj)
-
     projected_response = apply_projection(fidele, FideleProjFlat, FideleProjShallow, proj)
     return send200(projected_response)
@@ -17,7 +17,8 @@ from models.fidele.projection import (
     FideleStructureProjFlat,
     FideleStructureProjShallowWithoutFideleData,
 )
-from routers.utils import check_resource_exists
+from routers.utils import check_resource_exists, save_resource
+from routers.utils.reference_data import get_reference_resource
 from routers.fidele.docs import FIDELE_ADD_STRUCTURE_DESCRIPTION
 from routers.utils.http_utils import send200, send400
 from routers.fidele.recensement_etape import mark_fidele_recensement_etape_completed
@@ -52,8 +53,12 @@ async def _set_unique_principale_structure(
     session: AsyncSession,
     *,
     id_fidele: int,
-    keep_membership_id: int,
+    keep_membership: FideleStructure,
 ) -> None:
+    """Keep `keep_membership` as the only principale one (not committed).
+
+    The SELECT autoflushes `keep_membership`, so it works for a new membership too.
+    """
     statement = select(FideleStructure).where(
         (FideleStructure.id_fidele == id_fidele)
         & (FideleStructure.est_supprimee == False)
@@ -63,14 +68,12 @@ async def _set_unique_principale_structure(
 
     now = datetime.now(timezone.utc)
     for membership in memberships:
-        should_be_principale = membership.id == keep_membership_id
+        should_be_principale = membership.id == keep_membership.id
         if membership.est_structure_principale != should_be_principale:
             membership.est_structure_principale = should_be_principale
             membership.date_modification = now
             session.add(membership)
 
-    await session.commit()
-
 async def required_fidele_structure(
     id: Annotated[int, Path(..., description="Fidele's ID")],
     id_structure: Annotated[int, Path(..., description="Structure's ID")],
@@ -103,7 +106,7 @@ async def add_fidele_structure(
         )
 
     # Ensure structure exists
-    await check_resource_exists(Structure, session, filters={"id": body.id_structure})
+    structure = await get_reference_resource(Structure, session, body.id_structure)
 
     # Check existing membership (active or soft-deleted)
     existing_stmt = select(FideleStructure).where(
@@ -111,82 +114,46 @@ async def add_fidele_structure(
         & (FideleStructure.id_structure == body.id_structure)
     )
     existing_result = await session.exec(existing_stmt)
-    existing = existing_result.first()
+    fidele_structure = existing_result.first()
 
-    if existing and existing.est_supprimee == False:
+    if fidele_structure and fidele_structure.est_supprimee == False:
         return send400(["body", "id_structure"], "Ce fidèle appartient déjà à cette structure")
 
-    if existing and existing.est_supprimee == True:
-        if int(body.id_structure) == 1:
-            return send400(
-                ["body", "id_structure"],
-                "Restauration interdite: la structure 'Bureau ecclésiatique' (id=1) n'a pas de membres génériques. "
-                "Utilisez plutôt les mandats/fonctions (direction_fonction).",
-            )
-
-        active_count = await _count_active_fidele_structures(session, id_fidele=fidele.id)
-
-        should_be_principale = bool(body.est_structure_principale)
-        if active_count == 0:
-            should_be_principale = True
-
-        existing.est_supprimee = False
-        existing.date_suppression = None
-        existing.est_structure_principale = should_be_principale
-        existing.date_modification = datetime.now(timezone.utc)
-
-        session.add(existing)
-        await session.commit()
-        await session.refresh(existing)
-
-        if should_be_principale:
-            await _set_unique_principale_structure(
-                session,
-                id_fidele=fidele.id,
-                keep_membership_id=existing.id,
-            )
-
-        await mark_fidele_recensement_etape_completed(
-            session,
-            id_fidele=fidele.id,
-            id_recensement_etape=RecensementEtapeEnum.STRUCTURES,
-        )
-
-        existing = await get_fidele_structure_complete_data_by_id(existing.id, session)
-
-        return send200(FideleStructureProjShallowWithoutFideleData.model_validate(existing))
-
     active_count = await _count_active_fidele_structures(session, id_fidele=fidele.id)
 
     should_be_principale = bool(body.est_structure_principale)
     if active_count == 0:
         should_be_principale = True
 
-    fidele_structure = FideleStructure(
-        id_fidele=fidele.id,
-        id_structure=body.id_structure,
-        est_structure_principale=should_be_principale,
-    )
+    if fidele_structure and fidele_structure.est_supprimee == True:
+        fidele_structure.est_supprimee = False
+        fidele_structure.date_suppression = None
+        fidele_structure.est_structure_principale = should_be_principale
+        fidele_structure.date_modification = datetime.now(timezone.utc)
+    else:
+        fidele_structure = FideleStructure(
+            id_fidele=fidele.id,
+            id_structure=body.id_structure,
+            est_structure_principale=should_be_principale,
+        )
 
-    session.add(fidele_structure)
-    await session.commit()
-    await session.refresh(fidele_structure)
+    # Membership, principale flags and recensement step are committed together
+    await save_resource(session, fidele_structure, relations={"structure": structure}, commit=False)
 
     if should_be_principale:
         await _set_unique_principale_structure(
             session,
             id_fidele=fidele.id,
-            keep_membership_id=fidele_structure.id,
+            keep_membership=fidele_structure,
         )
 
     await mark_fidele_recensement_etape_completed(
         session,
         id_fidele=fidele.id,
         id_recensement_etape=RecensementEtapeEnum.STRUCTURES,
+        fidele=fidele,
     )
 
-    fidele_structure = await get_fidele_structure_complete_data_by_id(fidele_structure.id, session)
-
     return send200(FideleStructureProjShallowWithoutFideleData.model_validate(fidele_structure))
 
 
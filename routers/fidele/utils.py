@@ -2,6 +2,7 @@ import unicodedata
 from datetime import date
 from typing import Annotated
 from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import exists
 from sqlalchemy.orm import selectinload
 from sqlmodel import select
 
@@ -14,7 +15,8 @@ from models.fidele import (
     FideleOrigine,
     FideleOccupation,
 )
-from fastapi import Depends, Path
+from models.fidele.utils import FideleFilters
+from fastapi import Depends, Path, Query
 from routers.utils import check_resource_exists
 from core.db import get_session
 from utils.constants import ProjDepth
@@ -44,21 +46,50 @@ async def required_fidele(
     id: Annotated[int, Path(..., description="Fidele's ID")],
     session: Annotated[AsyncSession, Depends(get_session)],
 ) -> Fidele:
-    print(f"Checking existence of fidele with id:::::::------- {id}")
     return await check_resource_exists(Fidele, session, filters={"id": id})
 
 
-async def get_fidele_complete_data_by_id(
-    id: int,
-    session: AsyncSession,
+async def required_fidele_complete_data(
+    id: Annotated[int, Path(..., description="Fidele's ID")],
+    session: Annotated[AsyncSession, Depends(get_session)],
+    proj: Annotated[ProjDepth, Query()] = ProjDepth.SHALLOW,
+) -> Fidele:
+    """Same as `required_fidele` but eager-loads the relations needed by `proj` in the same fetch."""
+    return await check_resource_exists(
+        Fidele,
+        session,
+        filters={"id": id},
+        options=get_fidele_complete_data_options(proj),
+    )
+
+
+async def required_fidele_complete_data_with_include(
+    id: Annotated[int, Path(..., description="Fidele's ID")],
+    session: Annotated[AsyncSession, Depends(get_session)],
+    proj: Annotated[ProjDepth, Query()] = ProjDepth.SHALLOW,
+    include: Annotated[
+        str | None,
+        Query(description="Relations à inclure en flat (ex: photo_url)")
+    ] = None,
+) -> Fidele:
+    """Same as `required_fidele_complete_data`, also honouring `include` (ex: photo_url)."""
+    return await check_resource_exists(
+        Fidele,
+        session,
+        filters={"id": id},
+        options=get_fidele_complete_data_options(proj, parse_fidele_include(include)),
+    )
+
+
+def get_fidele_complete_data_options(
     proj: ProjDepth = ProjDepth.SHALLOW,
     include_fields: set[str] | None = None,
-) -> Fidele:
+) -> list:
+    """Eager-load options needed to project a Fidele with the given depth/includes."""
     include_fields = include_fields or set()
 
-    statement = select(Fidele).where(Fidele.id == id)
     if proj == ProjDepth.SHALLOW:
-        statement = statement.options(
+        return [
             selectinload(Fidele.grade),
             selectinload(Fidele.fidele_type),
             selectinload(Fidele.fidele_recenseur),
@@ -74,9 +105,71 @@ async def get_fidele_complete_data_by_id(
             selectinload(Fidele.origine).selectinload(FideleOrigine.nation),
             selectinload(Fidele.occupation).selectinload(FideleOccupation.niveau_etude),
             selectinload(Fidele.occupation).selectinload(FideleOccupation.profession),
+        ]
+    if "photo_url" in include_fields:
+        return [selectinload(Fidele.photo)]
+    return []
+
+
+def build_fidele_filters_conditions(filters: FideleFilters) -> list:
+    """SQL conditions of the list filters (each one served by an index, see the idx_fidele_liste_* ones)."""
+    conditions = [Fidele.est_supprimee == False]
+
+    for field in ("id_grade", "id_fidele_type", "id_document_statut", "sexe", "id_nation_nationalite"):
+        value = getattr(filters, field)
+        if value is not None:
+            conditions.append(getattr(Fidele, field) == value)
+
+    if filters.date_naissance_min is not None:
+        conditions.append(Fidele.date_naissance >= filters.date_naissance_min)
+    if filters.date_naissance_max is not None:
+        conditions.append(Fidele.date_naissance <= filters.date_naissance_max)
+    if filters.rencensement_statut_min is not None:
+        conditions.append(Fidele.rencensement_statut >= filters.rencensement_statut_min)
+    if filters.rencensement_statut_max is not None:
+        conditions.append(Fidele.rencensement_statut <= filters.rencensement_statut_max)
+
+    # Memberships: semi-joins driven by (id_paroisse|id_structure, est_supprimee, id_fidele)
+    if filters.id_paroisse is not None:
+        conditions.append(
+            exists().where(
+                (FideleParoisse.id_fidele == Fidele.id)
+                & (FideleParoisse.id_paroisse == filters.id_paroisse)
+                & (FideleParoisse.est_supprimee == False)
+            )
+        )
+    if filters.id_structure is not None:
+        conditions.append(
+            exists().where(
+                (FideleStructure.id_fidele == Fidele.id)
+                & (FideleStructure.id_structure == filters.id_structure)
+                & (FideleStructure.est_supprimee == False)
+            )
         )
-    elif "photo_url" in include_fields:
-        statement = statement.options(selectinload(Fidele.photo))
+    return conditions
+
+
+def build_fidele_list_statement(filters: FideleFilters, offset: int, limit: int, extra_conditions=()):
+    """Page of fideles matching `filters` (and `extra_conditions`, ex: the caller's scopes), ordered by id (stable pages)."""
+    return (
+        select(Fidele)
+        .where(*build_fidele_filters_conditions(filters), *extra_conditions)
+        .order_by(Fidele.id)
+        .offset(offset)
+        .limit(limit)
+    )
+
+
+async def get_fidele_complete_data_by_id(
+    id: int,
+    session: AsyncSession,
+    proj: ProjDepth = ProjDepth.SHALLOW,
+    include_fields: set[str] | None = None,
+) -> Fidele:
+    statement = select(Fidele).where(Fidele.id == id)
+    options = get_fidele_complete_data_options(proj, include_fields)
+    if options:
+        statement = statement.options(*options)
 
     result = await session.exec(statement)
     return result.first()
@@ -42,8 +42,16 @@ async def get_access_token(
     result = await session.exec(statement)
     fidele = result.first()
 
-    if not fidele or not Password.check(fidele_auth.password, fidele.password):
-        return send401(error_message="Password or username incorrect") 
+    if not fidele:
+        return send401(error_message="Password or username incorrect")
+    is_valid, new_hash = await Password.check_async(fidele_auth.password, fidele.password)
+    if not is_valid:
+        return send401(error_message="Password or username incorrect")
+    if new_hash:
+        # Hashed with older Argon2 parameters: upgraded now that the plain password is known
+        fidele.password = new_hash
+        session.add(fidele)
+        await session.commit()
     token = AccessToken(access_token=fidele.generate_token())
     # This route must respect an external "returned data" format to comply with oauth2
     return token
@@ -28,8 +28,18 @@ from models.constants.types import DocumentTypeEnum
 from models.constants import DocumentType
 
 from routers.utils import check_resource_exists
-from routers.utils import apply_projection
+from routers.utils import (
+    BatchProj,
+    apply_projection,
+    get_resources_by_ids_batch,
+    parse_ids_query,
+    save_resource,
+)
+from routers.utils.reference_data import get_reference_resource
+from modules.archive import restore_archived_resource
 from routers.utils.http_utils import send200, send404
+from routers.utils.count_cache import TotalQuery, get_total_meta
+from routers.utils.permissions import get_caller_scope_paths, scope_paroisse_condition
 from routers.paroisse.docs import PAROISSE_CREATE_DESCRIPTION
 
 # ============================================================================
@@ -42,8 +52,15 @@ def build_paroisse_code(document_type_code: str, paroisse_id: int) -> str:
     return f"{document_type_code}{str(paroisse_id).zfill(7)}"
 
 
-async def get_paroisse_any_by_id(paroisse_id: int, session: AsyncSession) -> Paroisse | None:
+async def get_paroisse_any_by_id(
+    paroisse_id: int,
+    session: AsyncSession,
+    proj: ProjDepth = ProjDepth.FLAT,
+) -> Paroisse | None:
     statement = select(Paroisse).where(Paroisse.id == paroisse_id)
+    options = get_paroisse_complete_data_options(proj)
+    if options:
+        statement = statement.options(*options)
     result = await session.exec(statement)
     return result.first()
 
@@ -55,19 +72,41 @@ async def required_paroisse(
     return await check_resource_exists(Paroisse, session, filters={"id": id})
 
 
-async def get_paroisse_complete_data_by_id(
-    id: int, session: AsyncSession, proj: ProjDepth = ProjDepth.SHALLOW
+async def required_paroisse_complete_data(
+    id: Annotated[int, Path(..., description="Paroisse's ID")],
+    session: Annotated[AsyncSession, Depends(get_session)],
+    proj: Annotated[ProjDepth, Query()] = ProjDepth.SHALLOW,
 ) -> Paroisse:
-    statement = select(Paroisse).where(Paroisse.id == id)
+    """Get and validate Paroisse exists, with the relations needed by `proj` (single fetch)"""
+    return await check_resource_exists(
+        Paroisse,
+        session,
+        filters={"id": id},
+        options=get_paroisse_complete_data_options(proj),
+    )
+
+
+def get_paroisse_complete_data_options(proj: ProjDepth = ProjDepth.SHALLOW) -> list:
+    """Eager-load options needed to project a Paroisse with the given depth."""
     if proj == ProjDepth.SHALLOW:
-            statement = statement.options(
+        return [
             selectinload(Paroisse.contact),
             (
                 selectinload(Paroisse.adresse)
                 .selectinload(Adresse.nation)
                 .selectinload(Nation.continent)
-            )
-        )
+            ),
+        ]
+    return []
+
+
+async def get_paroisse_complete_data_by_id(
+    id: int, session: AsyncSession, proj: ProjDepth = ProjDepth.SHALLOW
+) -> Paroisse:
+    statement = select(Paroisse).where(Paroisse.id == id)
+    options = get_paroisse_complete_data_options(proj)
+    if options:
+        statement = statement.options(*options)
 
     result = await session.exec(statement)
     return result.first()
@@ -114,25 +153,21 @@ async def create_paroisse(
         body (ParoisseBase): Les données de la paroisse à créer
         proj (str): Projection type 'flat' or 'shallow' (default: shallow)
     """
-    # Create new paroisse instance
-    paroisse = Paroisse(**body.model_dump(mode='json'))
+    document_type_paroisse = await get_reference_resource(
+        DocumentType, session, DocumentTypeEnum.PAROISSE.value
+    )
 
-    # Add to session and commit
-    session.add(paroisse)
-    await session.commit()
-    await session.refresh(paroisse)
+    def set_code_matriculation(paroisse: Paroisse) -> None:
+        paroisse.code_matriculation = build_paroisse_code(document_type_paroisse.code, paroisse.id)
 
-    document_type_paroisse = await check_resource_exists(
-        DocumentType,
+    # Create new paroisse instance: the code is derived from the id in the same transaction
+    paroisse = Paroisse(**body.model_dump(mode='json'))
+    await save_resource(
         session,
-        filters={"id": DocumentTypeEnum.PAROISSE.value},
+        paroisse,
+        relations={"contact": None, "adresse": None} if proj == ProjDepth.SHALLOW else None,
+        derive=set_code_matriculation,
     )
-    paroisse.code_matriculation = build_paroisse_code(document_type_paroisse.code, paroisse.id)
-    session.add(paroisse)
-    await session.commit()
-
-    if proj == ProjDepth.SHALLOW:
-        paroisse = await get_paroisse_complete_data_by_id(paroisse.id, session, proj)
 
     # Return the created paroisse
     projected_response = apply_projection(paroisse, ParoisseProjFlat, ParoisseProjShallow, proj)
@@ -142,22 +177,30 @@ async def create_paroisse(
 @paroisse_router.get("", tags=["Paroisse"])
 async def get_paroisses(
     session: Annotated[AsyncSession, Depends(get_session)],
+    total_query: Annotated[TotalQuery, Depends()],
+    scope_paths: Annotated[list[str] | None, Depends(get_caller_scope_paths)],
     offset: int = 0,
-    limit: int = Query(Config.DEFAULT_ITEMS_PER_PAGE, ge=1, le=Config.MAX_ITEMS_PER_PAGE),
+    limit: int = Query(Config.DEFAULT_ITEMS_PER_PAGE.value, ge=1, le=Config.MAX_ITEMS_PER_PAGE.value),
 ) -> List[ParoisseProjFlat | ParoisseProjShallow]:
     """
-    Recuperer la liste des paroisses avec pagination
+    Recuperer la liste des paroisses avec pagination, restreinte aux périmètres de
+    l'appelant (token requis): ses paroisses et celles de ses mandats
     
     Query:
         proj (str): Projection type 'flat' or 'shallow' (default: shallow)
         offset (int): Offset pour la pagination
         limit (int): Nombre maximum d'éléments à retourner
+        with_total (bool): Ajouter le nombre total de paroisses (meta.total)
+        exact (bool): false pour une estimation (information_schema)
     """
     
     # Fetching main data
+    conditions = [Paroisse.est_supprimee == False]
+    if scope_paths is not None:
+        conditions.append(scope_paroisse_condition(scope_paths))
     statement = (
         select(Paroisse)
-        .where(Paroisse.est_supprimee == False)
+        .where(*conditions)
         .offset(offset)
         .limit(limit)
     )
@@ -165,16 +208,48 @@ async def get_paroisses(
     result = await session.exec(statement)
     paroisse_list = result.all()
     projected_paroisse_list = [ParoisseProjFlat.model_validate(paroisse) for paroisse in paroisse_list]
+    meta = await get_total_meta(session, Paroisse, conditions, total_query, filtered=scope_paths is not None)
 
     # Returning the list
-    return send200(projected_paroisse_list)
+    return send200(projected_paroisse_list, meta=meta)
+
+
+@paroisse_router.get("/batch", tags=["Paroisse"])
+async def get_paroisses_batch(
+    session: Annotated[AsyncSession, Depends(get_session)],
+    scope_paths: Annotated[list[str] | None, Depends(get_caller_scope_paths)],
+    ids: Annotated[
+        str,
+        Query(description=f"Ids des paroisses séparés par des virgules (max {Config.MAX_BATCH_IDS.value})")
+    ],
+    proj: Annotated[ProjDepth, Query()] = ProjDepth.FLAT,
+) -> BatchProj[ParoisseProjFlat | ParoisseProjShallow]:
+    """
+    Recuperer plusieurs paroisses par leurs Ids en une seule requête (+1 requête par relation).
+
+    L'ordre des `ids` est conservé dans `items`; les ids introuvables, supprimés ou
+    hors des périmètres de l'appelant sont retournés dans `missing_ids`.
+    """
+    id_list = parse_ids_query(ids, max_items=Config.MAX_BATCH_IDS.value)
+
+    paroisse_list, missing_ids = await get_resources_by_ids_batch(
+        Paroisse,
+        session,
+        id_list,
+        options=get_paroisse_complete_data_options(proj),
+        conditions=[scope_paroisse_condition(scope_paths)] if scope_paths is not None else (),
+    )
+
+    projected_list = [
+        apply_projection(paroisse, ParoisseProjFlat, ParoisseProjShallow, proj)
+        for paroisse in paroisse_list
+    ]
+    return send200(BatchProj(items=projected_list, missing_ids=missing_ids))
 
 
 @paroisse_router.get("/{id}", tags=["Paroisse"])
 async def get_paroisse(
-    id: Annotated[int, Path(..., description="Paroisse's Id")],
-    session: Annotated[AsyncSession, Depends(get_session)],
-    paroisse: Annotated[Paroisse, Depends(required_paroisse)],
+    paroisse: Annotated[Paroisse, Depends(required_paroisse_complete_data)],
     proj: Annotated[ProjDepth, Query()] = ProjDepth.SHALLOW,
 ) -> ParoisseProjFlat | ParoisseProjShallow:
     """
@@ -185,10 +260,6 @@ async def get_paroisse(
         proj (str): Projection type 'flat' or 'shallow' (default: shallow)
     """
 
-    # Fetching related data for the shallow projection
-    if proj == ProjDepth.SHALLOW:
-        paroisse = await get_paroisse_complete_data_by_id(id, session, proj)
-
     # Return the fidele as projection
     projected_response = apply_projection(paroisse, ParoisseProjFlat, ParoisseProjShallow, proj)
     return send200(projected_response)
@@ -198,7 +269,7 @@ async def get_paroisse(
 async def update_paroisse(
     body: ParoisseUpdate,
     session: Annotated[AsyncSession, Depends(get_session)],
-    paroisse: Annotated[Paroisse, Depends(required_paroisse)],
+    paroisse: Annotated[Paroisse, Depends(required_paroisse_complete_data)],
     proj: Annotated[ProjDepth, Query()] = ProjDepth.SHALLOW,
 ) -> ParoisseProjFlat | ParoisseProjShallow:
     """
@@ -217,14 +288,9 @@ async def update_paroisse(
     # Update modification timestamp
     paroisse.date_modification = datetime.now(timezone.utc)
 
-    # Commit changes
+    # Commit changes (relations were loaded by the dependency, no re-fetch needed)
     session.add(paroisse)
     await session.commit()
-    await session.refresh(paroisse)
-
-    # re-fetch to get related data for the shallow projection
-    if proj == ProjDepth.SHALLOW:
-        paroisse = await get_paroisse_complete_data_by_id(paroisse.id, session, proj)
 
     # Return the updated paroisse with requested projection
     projected_response = apply_projection(paroisse, ParoisseProjFlat, ParoisseProjShallow, proj)
@@ -243,7 +309,10 @@ async def restore_paroisse(
         id (int): L'Id de la paroisse à restaurer
     """
 
-    paroisse = await get_paroisse_any_by_id(id, session)
+    paroisse = await get_paroisse_any_by_id(id, session, proj)
+    # Archived (see modules.archive): bring it back to the hot tables first
+    if not paroisse and await restore_archived_resource(session, Paroisse, id):
+        paroisse = await get_paroisse_any_by_id(id, session, proj)
     if not paroisse:
         return send404(["path", "id"], "Paroisse non trouvée")
 
@@ -256,10 +325,6 @@ async def restore_paroisse(
         session.add(paroisse)
         await session.commit()
 
-    # Re-query with eager loads so relationships are available for projection
-    if proj == ProjDepth.SHALLOW:
-        paroisse = await get_paroisse_complete_data_by_id(paroisse.id, session, proj)
-
     projected_response = apply_projection(paroisse, ParoisseProjFlat, ParoisseProjShallow, proj)
     return send200(projected_response)
 
@@ -335,31 +400,30 @@ async def update_paroisse_adresse(
     adresse = await get_paroisse_adresse_complete_data_by_id(paroisse.id, session, proj)
 
     if not adresse:
+        nation = None
         if body.id_nation is not None:
-            await check_resource_exists(Nation, session, filters={"id": body.id_nation})
-        await check_resource_exists(
-            DocumentType, session, filters={"id": DocumentTypeEnum.PAROISSE.value}
-        )
+            nation = await get_reference_resource(Nation, session, body.id_nation)
+        await get_reference_resource(DocumentType, session, DocumentTypeEnum.PAROISSE.value)
         # Create new adresse if not found
         new_adresse = Adresse(
             id_document_type=DocumentTypeEnum.PAROISSE.value,
             id_document=paroisse.id,
             **body.model_dump(mode="json", exclude_unset=True)
         )
-        session.add(new_adresse)
-        await session.commit()
-        await session.refresh(new_adresse)
-
-        if proj == ProjDepth.SHALLOW:
-            new_adresse = await get_paroisse_adresse_complete_data_by_id(paroisse.id, session, proj)
+        await save_resource(
+            session,
+            new_adresse,
+            relations={"nation": nation} if proj == ProjDepth.SHALLOW else None,
+        )
 
         projected_response = apply_projection(new_adresse, AdresseProjFlat, AdresseProjShallow, proj)
         return send200(projected_response)
 
     # Update fields (exclude document identifiers)
     update_data = body.model_dump(mode="json", exclude_unset=True, exclude={"id_document_type", "id_document"})
+    nation = None
     if "id_nation" in update_data and update_data["id_nation"] is not None:
-        await check_resource_exists(Nation, session, filters={"id": update_data["id_nation"]})
+        nation = await get_reference_resource(Nation, session, update_data["id_nation"])
     for field, value in update_data.items():
         setattr(adresse, field, value)
 
@@ -370,10 +434,12 @@ async def update_paroisse_adresse(
     # Update modification timestamp
     adresse.date_modification = datetime.now(timezone.utc)
 
-    # Commit changes
-    session.add(adresse)
-    await session.commit()
-    await session.refresh(adresse)
+    # Commit changes (keeping the loaded nation in sync instead of refreshing)
+    await save_resource(
+        session,
+        adresse,
+        relations={"nation": nation} if "id_nation" in update_data and proj == ProjDepth.SHALLOW else None,
+    )
 
     # Return the updated adresse
     projected_response = apply_projection(adresse, AdresseProjFlat, AdresseProjShallow, proj)
@@ -462,18 +528,14 @@ async def update_paroisse_contact(
     contact = contact_result.first()
 
     if not contact:
-        await check_resource_exists(
-            DocumentType, session, filters={"id": DocumentTypeEnum.PAROISSE.value}
-        )
+        await get_reference_resource(DocumentType, session, DocumentTypeEnum.PAROISSE.value)
         # Create new contact if not found
         new_contact = Contact(
             id_document_type=DocumentTypeEnum.PAROISSE.value,
             id_document=paroisse.id,
             **body.model_dump(mode="json", exclude_unset=True)
         )
-        session.add(new_contact)
-        await session.commit()
-        await session.refresh(new_contact)
+        await save_resource(session, new_contact)
         projected_response = apply_projection(new_contact, ContactProjFlat, ContactProjShallow, proj)
         return send200(projected_response)
 
@@ -492,9 +554,7 @@ async def update_paroisse_contact(
     contact.date_modification = datetime.now(timezone.utc)
 
     # Commit changes
-    session.add(contact)
-    await session.commit()
-    await session.refresh(contact)
+    await save_resource(session, contact)
 
     # Return the updated contact
     projected_response = apply_projection(contact, ContactProjFlat, ContactProjShallow, proj)
@@ -11,6 +11,9 @@ PAROISSE_LIST_FIDELES_DESCRIPTION = (
     "- `actif=None` : retourne **toutes** les appartenances (actives + non actives).\n\n"
     "### Règles appliquées\n"
     "- Les lignes soft-delete (`est_supprimee=true`) sont toujours exclues.\n"
+    "- Token requis. Si les périmètres de l'appelant (ses paroisses, ses mandats de paroisse, nation ou "
+    "continent) ne couvrent pas la paroisse, il ne voit que les fidèles également membres d'une paroisse "
+    "de ses périmètres.\n"
     "- La pagination est disponible via `offset` et `limit`.\n\n"
     "### Exemple\n"
     "- `GET /paroisse/{id}/fidele` → actifs uniquement (par défaut).\n"
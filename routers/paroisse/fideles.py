@@ -14,7 +14,9 @@ from models.fidele.projection import FideleParoisseProjShallowWithoutParoisseDat
 from models.paroisse import Paroisse
 from routers.utils import check_resource_exists
 from routers.paroisse.docs import PAROISSE_LIST_FIDELES_DESCRIPTION
+from routers.utils.count_cache import TotalQuery, get_total_meta
 from routers.utils.http_utils import send200
+from routers.utils.permissions import get_caller_scope_paths, is_path_in_scope, scope_fidele_condition
 
 
 paroisse_fideles_router = APIRouter(prefix="/{id}/fidele", tags=["Paroisse - Fideles"])
@@ -35,6 +37,8 @@ async def required_paroisse(
 async def list_paroisse_fideles(
     session: Annotated[AsyncSession, Depends(get_session)],
     paroisse: Annotated[Paroisse, Depends(required_paroisse)],
+    total_query: Annotated[TotalQuery, Depends()],
+    scope_paths: Annotated[list[str] | None, Depends(get_caller_scope_paths)],
     actif: bool | None = Query(
         True,
         description="Filtrer sur l'appartenance active actuelle (None = tous)",
@@ -46,22 +50,27 @@ async def list_paroisse_fideles(
 ) -> List[FideleParoisseProjShallowWithoutParoisseData]:
     """Lister les fidèles appartenant à une paroisse (via fidele_paroisse)."""
 
-    statement = select(FideleParoisse).where(
+    conditions = [
         (FideleParoisse.id_paroisse == paroisse.id)
         & (FideleParoisse.est_supprimee == False)
-    )
+    ]
     if actif is not None:
-        statement = statement.where(FideleParoisse.est_actif == actif)
+        conditions.append(FideleParoisse.est_actif == actif)
+    if not is_path_in_scope(paroisse.chemin, scope_paths):
+        conditions.append(scope_fidele_condition(scope_paths, FideleParoisse.id_fidele))
 
     statement = (
-        statement
+        select(FideleParoisse)
+        .where(*conditions)
         .options(selectinload(FideleParoisse.fidele))
         .offset(offset)
         .limit(limit)
     )
     result = await session.exec(statement)
     items = result.all()
+    meta = await get_total_meta(session, FideleParoisse, conditions, total_query)
 
-    return send200([
-        FideleParoisseProjShallowWithoutParoisseData.model_validate(i) for i in items
-    ])
+    return send200(
+        [FideleParoisseProjShallowWithoutParoisseData.model_validate(i) for i in items],
+        meta=meta,
+    )
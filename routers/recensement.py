@@ -0,0 +1,137 @@
+import asyncio
+import json
+from typing import Annotated, Any, AsyncIterator
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from core.config import Config
+from core.db import get_sessionmaker
+from models.oauth import TokenPayload
+from models.paroisse import Paroisse
+from modules.census_feed import (
+    CensusFeedSubscriber,
+    census_feed_hub,
+    get_census_events,
+    get_census_scope,
+    get_last_census_event_id,
+)
+from modules.oauth2.dependencies import get_required_token_payload_dependency
+from routers.utils.permissions import get_fidele_scope_paths, is_path_in_scope
+
+# ============================================================================
+# ROUTER SETUP
+# ============================================================================
+recensement_router = APIRouter(tags=["Recensement"])
+
+
+def _sse(event: str, data: Any, id: int | None = None) -> str:
+    lines = [f"id: {id}"] if id is not None else []
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(jsonable_encoder(data), separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def _stream(
+    request: Request,
+    subscriber: CensusFeedSubscriber,
+    replay: list[dict[str, Any]],
+    replay_truncated: bool,
+) -> AsyncIterator[str]:
+    last_id = subscriber.since_id
+    try:
+        if replay_truncated:
+            # Too many events missed: the dashboard reloads its figures from the list endpoints
+            yield _sse("reset", {"raison": "trop d'événements manqués"})
+        for payload in replay:
+            subscriber.mark_sent(payload["id"])
+            last_id = max(last_id, payload["id"])
+            yield _sse(payload["type"], payload, last_id)
+        subscriber.since_id = last_id
+
+        while not await request.is_disconnected():
+            try:
+                payload = await asyncio.wait_for(
+                    subscriber.queue.get(), Config.CENSUS_FEED_HEARTBEAT_SECONDS.value
+                )
+            except asyncio.TimeoutError:
+                # Keeps the proxies from closing an idle connection
+                yield ": ping\n\n"
+                continue
+            if payload is None:
+                yield _sse("reset", {"raison": "flux interrompu, se reconnecter avec Last-Event-ID"})
+                return
+            # Already sent by the replay
+            if not subscriber.mark_sent(payload["id"]):
+                continue
+            # SSE id: where to resume from (a late commit has a lower id than the last one sent)
+            last_id = max(last_id, payload["id"])
+            yield _sse(payload["type"], payload, last_id)
+    finally:
+        census_feed_hub.unsubscribe(subscriber)
+
+
+@recensement_router.get("/flux")
+async def census_feed(
+    request: Request,
+    current_fidele: Annotated[
+        TokenPayload,
+        Depends(get_required_token_payload_dependency(TokenPayload)),
+    ],
+    id_paroisse: Annotated[int | None, Query(description="Seulement les fidèles de cette paroisse principale")] = None,
+    id_nation: Annotated[int | None, Query(description="Seulement les fidèles des paroisses de cette nation")] = None,
+    last_event_id: Annotated[int | None, Header(description="Dernier événement reçu (reconnexion)")] = None,
+) -> StreamingResponse:
+    """
+    Flux (Server-Sent Events) de la progression du recensement: étapes complétées
+    (`recensement_etape`) et changements de statut (`statut`) des fidèles.
+
+    Seuls les événements des fidèles des périmètres de l'appelant sont envoyés (ses
+    paroisses et ses mandats, voir GET /fidele); `id_paroisse` ou `id_nation` hors de
+    ces périmètres: 403.
+
+    À la reconnexion, l'en-tête `Last-Event-ID` rejoue les événements manqués (et ceux
+    des dernières secondes, validés tardivement: dédupliquer par `id`). Un événement
+    `reset` demande au tableau de bord de recharger ses chiffres.
+    """
+    # Short session: the stream itself holds no connection (hence no get_caller_scope_paths)
+    async with get_sessionmaker()() as session:
+        scope_paths = await get_fidele_scope_paths(session, id_fidele=int(current_fidele.sub))
+        scope = await get_census_scope(session, scope_paths)
+        if id_paroisse is not None and scope_paths is not None:
+            chemin = (
+                await session.execute(select(Paroisse.chemin).where(Paroisse.id == id_paroisse))
+            ).scalar()
+            if not is_path_in_scope(chemin, scope_paths):
+                raise HTTPException(status_code=403, detail="Permission refusée: paroisse hors de vos périmètres.")
+        if id_nation is not None and scope is not None and id_nation not in scope.nation_ids:
+            raise HTTPException(status_code=403, detail="Permission refusée: nation hors de vos périmètres.")
+
+        since_id = last_event_id if last_event_id is not None else await get_last_census_event_id(session)
+        # Subscribed before the replay query: an event committed in between is either replayed or queued
+        subscriber = census_feed_hub.subscribe(since_id, id_paroisse, id_nation, scope)
+        try:
+            replay = await get_census_events(
+                session,
+                since_id,
+                Config.CENSUS_FEED_BATCH_SIZE.value + 1,
+                id_paroisse=id_paroisse,
+                id_nation=id_nation,
+                scope=scope,
+                with_late_commits=last_event_id is not None,
+            )
+            replay_truncated = len(replay) > Config.CENSUS_FEED_BATCH_SIZE.value
+            if replay_truncated:
+                replay = []
+                subscriber.since_id = await get_last_census_event_id(session)
+        except Exception:
+            census_feed_hub.unsubscribe(subscriber)
+            raise
+
+    return StreamingResponse(
+        _stream(request, subscriber, replay, replay_truncated),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,152 @@
+from enum import Enum
+from typing import Annotated, Any, List
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.db import get_session
+from models.adresse import Adresse, Nation
+from models.constants import DocumentStatut, FideleType, Grade
+from models.constants.types import DocumentTypeEnum
+from models.paroisse import Paroisse
+from models.utils.utils import Gender
+from modules.stats.models import StatsFidele
+from routers.utils.http_utils import send200
+from routers.utils.reference_data import get_reference_resources
+
+# ============================================================================
+# ROUTER SETUP
+# ============================================================================
+stats_router = APIRouter(tags=["Stats"])
+
+
+class StatsDimension(Enum):
+    CONTINENT = "continent"
+    NATION = "nation"
+    PAROISSE = "paroisse"
+    GRADE = "grade"
+    FIDELE_TYPE = "fidele_type"
+    SEXE = "sexe"
+    DOCUMENT_STATUT = "document_statut"
+    RECENSEMENT_COMPLETE = "recensement_complete"
+
+
+# Nation and continent come from the paroisse's adresse (Adresse -> Nation -> Continent)
+_DIMENSION_COLUMNS = {
+    StatsDimension.CONTINENT: Nation.id_continent,
+    StatsDimension.NATION: Adresse.id_nation,
+    StatsDimension.PAROISSE: StatsFidele.id_paroisse,
+    StatsDimension.GRADE: StatsFidele.id_grade,
+    StatsDimension.FIDELE_TYPE: StatsFidele.id_fidele_type,
+    StatsDimension.SEXE: StatsFidele.sexe,
+    StatsDimension.DOCUMENT_STATUT: StatsFidele.id_document_statut,
+    StatsDimension.RECENSEMENT_COMPLETE: StatsFidele.recensement_complete,
+}
+_GEO_DIMENSIONS = {StatsDimension.CONTINENT, StatsDimension.NATION}
+
+
+async def _dimension_labels(
+    session: AsyncSession,
+    dimension: StatsDimension,
+    ids: set[Any],
+) -> dict[Any, str]:
+    """Noms des valeurs d'une dimension (depuis le cache des données de référence quand possible)."""
+    if dimension == StatsDimension.PAROISSE:
+        result = await session.exec(select(Paroisse.id, Paroisse.nom).where(Paroisse.id.in_(ids)))
+        return dict(result.all())
+    if dimension == StatsDimension.CONTINENT:
+        nations = await get_reference_resources(Nation)
+        return {nation.id_continent: nation.continent.nom for nation in nations.values()}
+
+    model = {
+        StatsDimension.NATION: Nation,
+        StatsDimension.GRADE: Grade,
+        StatsDimension.FIDELE_TYPE: FideleType,
+        StatsDimension.DOCUMENT_STATUT: DocumentStatut,
+    }.get(dimension)
+    if model is None:
+        return {}
+    return {id: row.nom for id, row in (await get_reference_resources(model)).items()}
+
+
+# ============================================================================
+# ENDPOINTS
+# ============================================================================
+@stats_router.get("/fideles")
+async def get_fideles_stats(
+    session: Annotated[AsyncSession, Depends(get_session)],
+    group_by: Annotated[List[StatsDimension], Query()] = [StatsDimension.CONTINENT],
+    id_continent: int | None = None,
+    id_nation: int | None = None,
+    id_paroisse: int | None = None,
+    id_grade: int | None = None,
+    id_fidele_type: int | None = None,
+    sexe: Gender | None = None,
+    id_document_statut: int | None = None,
+    recensement_complete: bool | None = None,
+):
+    """
+    Nombre de fidèles par dimension, lu depuis la table de cumul stats_fidele.
+
+    Exploration: `group_by=continent`, puis `group_by=nation&id_continent=...`,
+    puis `group_by=paroisse&id_nation=...`. Plusieurs `group_by` se combinent.
+    """
+    group_by = list(dict.fromkeys(group_by))
+    columns = [_DIMENSION_COLUMNS[dimension] for dimension in group_by]
+
+    statement = select(*columns, func.sum(StatsFidele.nombre)).where(StatsFidele.nombre > 0)
+
+    filters = {
+        StatsDimension.PAROISSE: id_paroisse,
+        StatsDimension.GRADE: id_grade,
+        StatsDimension.FIDELE_TYPE: id_fidele_type,
+        StatsDimension.SEXE: sexe,
+        StatsDimension.DOCUMENT_STATUT: id_document_statut,
+        StatsDimension.RECENSEMENT_COMPLETE: recensement_complete,
+        StatsDimension.NATION: id_nation,
+        StatsDimension.CONTINENT: id_continent,
+    }
+    for dimension, value in filters.items():
+        if value is not None:
+            statement = statement.where(_DIMENSION_COLUMNS[dimension] == value)
+
+    used_dimensions = set(group_by) | {dimension for dimension, value in filters.items() if value is not None}
+    if used_dimensions & _GEO_DIMENSIONS:
+        statement = statement.outerjoin(
+            Adresse,
+            (Adresse.id_document_type == DocumentTypeEnum.PAROISSE.value)
+            & (Adresse.id_document == StatsFidele.id_paroisse)
+            & (Adresse.est_supprimee == False),
+        ).outerjoin(Nation, Nation.id == Adresse.id_nation)
+
+    if columns:
+        statement = statement.group_by(*columns)
+
+    result = await session.exec(statement)
+    rows = result.all()
+
+    labels = {}
+    for index, dimension in enumerate(group_by):
+        labels[dimension] = await _dimension_labels(session, dimension, {row[index] for row in rows})
+
+    groupes = []
+    for row in rows:
+        groupe = {}
+        for index, dimension in enumerate(group_by):
+            value = row[index]
+            if dimension in (StatsDimension.SEXE, StatsDimension.RECENSEMENT_COMPLETE):
+                groupe[dimension.value] = value
+            else:
+                # id 0 / NULL: fidèles sans paroisse principale (ou paroisse sans adresse)
+                value = value or None
+                groupe[dimension.value] = {"id": value, "nom": labels[dimension].get(value)}
+        groupe["nombre"] = int(row[-1] or 0)
+        groupes.append(groupe)
+    groupes.sort(key=lambda groupe: groupe["nombre"], reverse=True)
+
+    return send200({
+        "total": sum(groupe["nombre"] for groupe in groupes),
+        "groupes": groupes,
+    })
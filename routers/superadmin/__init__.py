@@ -1,7 +1,17 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
+from routers.superadmin.archive import superadmin_archive_router
+from routers.superadmin.doublon import superadmin_doublon_router
 from routers.superadmin.fidele import superadmin_fidele_router
+from routers.superadmin.metrics import superadmin_metrics_router
+from routers.superadmin.profile import superadmin_profile_router
+from routers.utils.permissions import require_superadmin
 
 
-superadmin_router = APIRouter()
+# Every /superadmin route: token of a fidele listed in SUPERADMIN_FIDELE_IDS
+superadmin_router = APIRouter(dependencies=[Depends(require_superadmin)])
 superadmin_router.include_router(superadmin_fidele_router, prefix="/fidele")
+superadmin_router.include_router(superadmin_archive_router, prefix="/archive")
+superadmin_router.include_router(superadmin_metrics_router, prefix="/metrics")
+superadmin_router.include_router(superadmin_profile_router, prefix="/profile")
+superadmin_router.include_router(superadmin_doublon_router, prefix="/doublon")
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from typing import Annotated
+
+from fastapi import APIRouter, Query
+
+from core.config import Config
+from modules.archive import archive_soft_deleted_rows
+from routers.utils.http_utils import send200
+
+
+superadmin_archive_router = APIRouter(tags=["Superadmin - Archive"])
+
+
+@superadmin_archive_router.post("")
+async def run_archive(
+    older_than_days: Annotated[int, Query(ge=0)] = Config.ARCHIVE_AFTER_DAYS.value,
+):
+    """Archiver maintenant les lignes supprimées (soft delete) depuis plus de `older_than_days` jours."""
+    archived = await archive_soft_deleted_rows(older_than_days)
+    return send200({"older_than_days": older_than_days, "archived": archived})
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+
+from modules.dedup import duplicate_detector
+from routers.utils.http_utils import send200, send202, send409
+
+
+superadmin_doublon_router = APIRouter(tags=["Superadmin - Doublon"])
+
+
+@superadmin_doublon_router.post("", status_code=202)
+async def run_doublon_detection():
+    """
+    Lancer en arrière-plan le recalcul des clés de blocage et des doublons probables
+    de tous les fidèles (par lots). Suivre la progression avec GET /superadmin/doublon.
+    """
+    if not duplicate_detector.start():
+        return send409(["body"], "Une détection des doublons est déjà en cours sur ce worker")
+    return send202(duplicate_detector.status())
+
+
+@superadmin_doublon_router.get("")
+async def get_doublon_detection_status():
+    """État de la dernière détection des doublons lancée sur ce worker (progression par id de fidèle)."""
+    return send200(duplicate_detector.status())
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+
+from core.logger import logging_metrics
+from core.tracing import tracing_metrics
+from modules.loop_watchdog import loop_watchdog
+from modules.oauth2.password_pool import password_pool
+from modules.verification.scans import scan_ingestor
+from routers.utils.http_utils import send200
+
+
+superadmin_metrics_router = APIRouter(tags=["Superadmin - Metrics"])
+
+
+@superadmin_metrics_router.get("")
+async def get_metrics():
+    """Métriques internes du worker (pool de hachage des mots de passe, journalisation, latence de la boucle, tampon des scans...)."""
+    return send200(
+        {
+            "password_pool": password_pool.metrics(),
+            "logging": logging_metrics(),
+            "event_loop": loop_watchdog.metrics(),
+            "tracing": tracing_metrics(),
+            "verification_scans": scan_ingestor.metrics(),
+        }
+    )
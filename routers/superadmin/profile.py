@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Query
+from fastapi.responses import PlainTextResponse
+
+from core.config import Config
+from modules.profiler import collapsed_profile, profile_cpu, profile_memory, profiling_in_progress
+from routers.utils.http_utils import send200, send409
+
+
+superadmin_profile_router = APIRouter(tags=["Superadmin - Profile"])
+
+_Duration = Annotated[float, Query(gt=0, le=Config.PROFILER_MAX_DURATION_SECONDS.value, description="Durée (secondes)")]
+
+
+@superadmin_profile_router.get("/cpu")
+async def get_cpu_profile(
+    duration_seconds: _Duration = 10,
+    rate_hz: Annotated[
+        int, Query(ge=1, le=Config.PROFILER_MAX_RATE_HZ.value, description="Échantillons par seconde")
+    ] = Config.PROFILER_DEFAULT_RATE_HZ.value,
+    format: Annotated[Literal["collapsed", "json"], Query()] = "collapsed",
+):
+    """
+    Profil CPU statistique du worker qui reçoit la requête: les piles de tous les
+    threads sont échantillonnées pendant `duration_seconds`.
+
+    Format `collapsed` (défaut): une ligne `frame;frame;... nombre` par pile, à
+    ouvrir avec flamegraph.pl ou speedscope.
+    """
+    if profiling_in_progress():
+        return send409(["query"], "Un profilage est déjà en cours sur ce worker")
+    profile = await profile_cpu(duration_seconds, rate_hz)
+    if format == "collapsed":
+        return PlainTextResponse(collapsed_profile(profile))
+    return send200(profile)
+
+
+@superadmin_profile_router.get("/memory")
+async def get_memory_profile(
+    duration_seconds: _Duration = 30,
+    top: Annotated[int, Query(ge=1, le=200)] = 25,
+    group_by: Annotated[Literal["lineno", "filename", "traceback"], Query()] = "lineno",
+):
+    """
+    Croissance de la mémoire du worker: deux instantanés `tracemalloc` pris à
+    `duration_seconds` d'intervalle, les plus fortes augmentations d'abord.
+    """
+    if profiling_in_progress():
+        return send409(["query"], "Un profilage est déjà en cours sur ce worker")
+    return send200(await profile_memory(duration_seconds, top, group_by))
@@ -0,0 +1,190 @@
+import base64
+import binascii
+import json
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import Config
+from core.db import get_session
+from models.adresse import Nation
+from models.adresse.projection import NationProjFlat
+from models.constants import DocumentStatut, FideleType, Fonction, Grade, Structure
+from models.constants.projections import (
+    DocumentStatutProjFlat,
+    FideleTypeProjFlat,
+    FonctionProjFlat,
+    GradeProjFlat,
+    StructureProjFlat,
+)
+from models.direction import Direction
+from models.direction.fonction import DirectionFonction
+from models.direction.fonction.projection import DirectionFonctionProjFlat
+from models.direction.projection import DirectionProjFlat
+from models.fidele import Fidele, FideleParoisse, FideleStructure
+from models.fidele.projection import FideleParoisseProjFlat, FideleProjFlat, FideleStructureProjFlat
+from models.paroisse import Paroisse
+from models.paroisse.projection import ParoisseProjFlat
+from modules.sync import Watermark, cursor_is_expired, get_sync_chunk
+from routers.utils.http_utils import send200
+from routers.utils.permissions import get_caller_scope_paths
+
+# ============================================================================
+# ROUTER SETUP
+# ============================================================================
+sync_router = APIRouter(tags=["Sync"])
+
+
+class SyncEntity(Enum):
+    FIDELE = "fidele"
+    FIDELE_PAROISSE = "fidele_paroisse"
+    FIDELE_STRUCTURE = "fidele_structure"
+    PAROISSE = "paroisse"
+    DIRECTION = "direction"
+    DIRECTION_FONCTION = "direction_fonction"
+    GRADE = "grade"
+    FIDELE_TYPE = "fidele_type"
+    DOCUMENT_STATUT = "document_statut"
+    STRUCTURE = "structure"
+    FONCTION = "fonction"
+    NATION = "nation"
+
+
+SYNC_ENTITIES: dict[SyncEntity, tuple[type[SQLModel], type[BaseModel]]] = {
+    SyncEntity.FIDELE: (Fidele, FideleProjFlat),
+    SyncEntity.FIDELE_PAROISSE: (FideleParoisse, FideleParoisseProjFlat),
+    SyncEntity.FIDELE_STRUCTURE: (FideleStructure, FideleStructureProjFlat),
+    SyncEntity.PAROISSE: (Paroisse, ParoisseProjFlat),
+    SyncEntity.DIRECTION: (Direction, DirectionProjFlat),
+    SyncEntity.DIRECTION_FONCTION: (DirectionFonction, DirectionFonctionProjFlat),
+    SyncEntity.GRADE: (Grade, GradeProjFlat),
+    SyncEntity.FIDELE_TYPE: (FideleType, FideleTypeProjFlat),
+    SyncEntity.DOCUMENT_STATUT: (DocumentStatut, DocumentStatutProjFlat),
+    SyncEntity.STRUCTURE: (Structure, StructureProjFlat),
+    SyncEntity.FONCTION: (Fonction, FonctionProjFlat),
+    SyncEntity.NATION: (Nation, NationProjFlat),
+}
+
+# Rows belonging to paroisses: only synced by callers whose scope is not restricted
+# (mandate at the generale). A scoped sync would have to report the rows leaving
+# the scope as deleted, which the watermarks can't tell.
+SCOPED_SYNC_ENTITIES = frozenset({
+    SyncEntity.FIDELE,
+    SyncEntity.FIDELE_PAROISSE,
+    SyncEntity.FIDELE_STRUCTURE,
+    SyncEntity.PAROISSE,
+    SyncEntity.DIRECTION,
+    SyncEntity.DIRECTION_FONCTION,
+})
+
+
+# ============================================================================
+# CURSOR (opaque for the client: base64 of {entity: [date_modification, id, issued_at]})
+# ============================================================================
+
+def _decode_cursor(cursor: str | None) -> dict[SyncEntity, tuple[Watermark, datetime]]:
+    if not cursor:
+        return {}
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        positions = {}
+        for entity, (date_modification, id, *issued_at) in raw.items():
+            watermark = (datetime.fromisoformat(date_modification), int(id))
+            # Cursors issued before issued_at was added: the watermark date is the best known bound
+            positions[SyncEntity(entity)] = (
+                watermark, datetime.fromisoformat(issued_at[0]) if issued_at else watermark[0]
+            )
+        return positions
+    except (binascii.Error, ValueError, TypeError, AttributeError) as e:
+        raise HTTPException(status_code=400, detail=f"Curseur de synchronisation invalide: {e}")
+
+
+def _encode_cursor(positions: dict[SyncEntity, tuple[Watermark, datetime]]) -> str:
+    raw = {
+        entity.value: [date_modification.isoformat(), id, issued_at.isoformat()]
+        for entity, ((date_modification, id), issued_at) in positions.items()
+    }
+    return base64.urlsafe_b64encode(json.dumps(raw, separators=(",", ":")).encode()).decode()
+
+
+def _parse_entities(entities: str | None, scope_paths: list[str] | None) -> list[SyncEntity]:
+    allowed = [entity for entity in SYNC_ENTITIES if scope_paths is None or entity not in SCOPED_SYNC_ENTITIES]
+    if not entities:
+        return allowed
+    try:
+        requested = list(dict.fromkeys(SyncEntity(entity.strip()) for entity in entities.split(",") if entity.strip()))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    forbidden = [entity.value for entity in requested if entity not in allowed]
+    if forbidden:
+        raise HTTPException(
+            status_code=403,
+            detail=f"Permission refusée: synchronisation de {forbidden} réservée aux mandats de la générale.",
+        )
+    return requested
+
+
+# ============================================================================
+# ENDPOINT
+# ============================================================================
+
+@sync_router.get("")
+async def sync(
+    session: Annotated[AsyncSession, Depends(get_session)],
+    scope_paths: Annotated[list[str] | None, Depends(get_caller_scope_paths)],
+    entities: Annotated[
+        str | None,
+        Query(description=f"Entités séparées par des virgules (défaut: toutes). {[e.value for e in SyncEntity]}"),
+    ] = None,
+    cursor: Annotated[
+        str | None,
+        Query(description="Curseur renvoyé par la synchronisation précédente (vide: synchronisation complète)"),
+    ] = None,
+    limit: int = Query(Config.SYNC_DEFAULT_CHUNK_SIZE.value, ge=1, le=Config.SYNC_MAX_CHUNK_SIZE.value),
+) -> dict[str, Any]:
+    """
+    Lignes modifiées depuis le curseur, par entité, triées par (date_modification, id).
+
+    Token requis. Les fideles, paroisses, directions et leurs relations ne sont
+    synchronisés que pour un mandat à la générale (403 sinon); par défaut, seules
+    les entités autorisées pour l'appelant sont renvoyées.
+
+    Les lignes supprimées (soft delete) sont renvoyées dans `deleted_ids`. Rappeler
+    avec le `cursor` renvoyé tant que `has_more` est vrai; le garder pour la
+    prochaine synchronisation. `reset` indique que l'entité repart de zéro (curseur
+    trop ancien, dernière synchronisation il y a plus de ARCHIVE_AFTER_DAYS jours):
+    le client doit vider ses données locales de cette entité.
+    """
+    positions = _decode_cursor(cursor)
+    issued_at = datetime.now(timezone.utc)
+    data: dict[str, Any] = {}
+    for entity in _parse_entities(entities, scope_paths):
+        model, projection = SYNC_ENTITIES[entity]
+        watermark, last_issued_at = positions.get(entity, (None, None))
+        reset = last_issued_at is not None and cursor_is_expired(last_issued_at)
+        if reset:
+            watermark = None
+
+        chunk = await get_sync_chunk(session, model, watermark, limit)
+        if chunk.watermark is not None:
+            positions[entity] = (chunk.watermark, issued_at)
+        else:
+            positions.pop(entity, None)
+        data[entity.value] = {
+            "items": [projection.model_validate(row) for row in chunk.rows],
+            "deleted_ids": chunk.deleted_ids,
+            "has_more": chunk.has_more,
+            "reset": reset,
+        }
+
+    return send200({
+        "cursor": _encode_cursor(positions),
+        "has_more": any(entity["has_more"] for entity in data.values()),
+        "entities": data,
+    })
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, Iterable, Mapping, Type, TypeVar
+import inspect
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Callable, Generic, Iterable, List, Mapping, Sequence, Type, TypeVar
 
 from fastapi import HTTPException
 from pydantic import BaseModel
@@ -22,8 +24,13 @@ async def check_resource_exists(
     session: AsyncSession,
     *,
     filters: Mapping[str, Any] | None = None,
+    options: Sequence[Any] | None = None,
 ) -> T:
-    """Generic dependency to check if a resource exists using MANY columns."""
+    """Generic dependency to check if a resource exists using MANY columns.
+
+    `options` (ex: selectinload) are applied to the same SELECT so callers that
+    also need relations don't have to fetch the row a second time.
+    """
     if not filters:
         raise ValueError("check_resource_exists requires at least one filter")
 
@@ -37,6 +44,8 @@ async def check_resource_exists(
         clauses.append(getattr(model, "est_supprimee") == False)
 
     statement = select(model).where(and_(*clauses))
+    if options:
+        statement = statement.options(*options)
     result = await session.exec(statement)
     resource = result.first()
 
@@ -48,6 +57,121 @@ async def check_resource_exists(
 
     return resource
 
+
+class BatchProj(BaseModel, Generic[P]):
+    """Result of a batch GET: found items (input order) + ids that were not found."""
+
+    items: List[P] = []
+    missing_ids: List[int] = []
+
+
+def parse_ids_query(raw_ids: str | None, *, max_items: int) -> list[int]:
+    """Parse a comma-separated `ids` query value into unique ints (input order kept)."""
+    if not raw_ids:
+        raise HTTPException(status_code=422, detail="ids est requis (ex: ids=1,2,3)")
+
+    ids: list[int] = []
+    seen: set[int] = set()
+    for item in raw_ids.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            value = int(item)
+        except ValueError:
+            raise HTTPException(status_code=422, detail=f"Invalid id in ids: {item!r}")
+        if value in seen:
+            continue
+        seen.add(value)
+        ids.append(value)
+
+    if not ids:
+        raise HTTPException(status_code=422, detail="ids est requis (ex: ids=1,2,3)")
+    if len(ids) > max_items:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Too many ids: {len(ids)} (max {max_items})",
+        )
+
+    return ids
+
+
+async def get_resources_by_ids_batch(
+    model: Type[T],
+    session: AsyncSession,
+    ids: Sequence[int],
+    *,
+    options: Sequence[Any] | None = None,
+    conditions: Sequence[Any] = (),
+) -> tuple[list[T], list[int]]:
+    """Batch-load many resources of the same model by id.
+
+    Same approach as `resolve_document_references_batch`: ONE `IN (...)` query for
+    the main rows, and eager-load `options` (selectinload) add one query per relation
+    for the whole batch instead of one per row.
+
+    Rows not matching the extra `conditions` (e.g. the caller's scope) are
+    reported as missing.
+
+    Returns (items in the same order as `ids`, ids not found or soft-deleted).
+    """
+    if not ids:
+        return [], []
+
+    statement = select(model).where(getattr(model, "id").in_(set(ids)))
+    if hasattr(model, "est_supprimee"):
+        statement = statement.where(getattr(model, "est_supprimee") == False)
+    if conditions:
+        statement = statement.where(*conditions)
+    if options:
+        statement = statement.options(*options)
+
+    result = await session.exec(statement)
+    by_id = {int(getattr(data, "id")): data for data in result.all()}
+
+    items = [by_id[id] for id in ids if id in by_id]
+    missing_ids = [id for id in ids if id not in by_id]
+    return items, missing_ids
+
+
+async def save_resource(
+    session: AsyncSession,
+    resource: T,
+    *,
+    relations: Mapping[str, Any] | None = None,
+    derive: Callable[[T], Any] | None = None,
+    commit: bool = True,
+) -> T:
+    """Persist `resource` with ONE commit, without refresh nor re-select.
+
+    - `relations`: related objects the caller already holds (validated rows, reference
+      data, None/[] for a new row). Set BEFORE the flush, so the shallow projection can
+      be built afterwards without lazy loading (not possible with AsyncSession).
+    - `derive(resource)`: computes the fields depending on the generated id (the flush
+      gets it back from the INSERT, MySQL having no RETURNING). May be async.
+    - `commit=False` flushes only, so the caller gets the id and can add more work to
+      the same transaction.
+    """
+    for name, value in (relations or {}).items():
+        setattr(resource, name, value)
+
+    session.add(resource)
+    if derive is not None or not commit:
+        await session.flush()
+
+    if derive is not None:
+        derived = derive(resource)
+        if inspect.isawaitable(derived):
+            await derived
+        # Set by us, otherwise `server_onupdate` expires it and reading it needs a SELECT
+        if hasattr(resource, "date_modification"):
+            resource.date_modification = datetime.now(timezone.utc)
+
+    if commit:
+        await session.commit()
+    return resource
+
+
 def _coerce_document_type(raw_document_type: Any) -> DocumentTypeEnum | None:
     """Coerce a raw document type value into DocumentTypeEnum.
 
@@ -161,6 +285,14 @@ def _document_to_projection(document_type: Any, data: SQLModel) -> BaseModel:
 
     return _FallbackDoc.model_validate({"id": getattr(data, "id", None)})
 
+def project_document_reference(id_document_type: Any, data: SQLModel) -> BaseModel | None:
+    """Projection of a document already loaded (ex: by `check_document_reference_exists`)."""
+
+    document_type = _coerce_document_type(id_document_type)
+    if document_type is None:
+        return None
+    return _document_to_projection(document_type, data)
+
 async def check_document_reference_exists(
     session: AsyncSession,
     *,
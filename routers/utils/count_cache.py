@@ -0,0 +1,180 @@
+"""Totals of the paginated lists (`with_total=true`), cached per normalized filter set.
+
+A total is the `COUNT(*)` of the list conditions. It is cached by table and
+conditions (compiled SQL + bound values: the same filters given in any order
+hit the same entry) for `Config.COUNT_CACHE_TTL_SECONDS`, and dropped as soon as
+a transaction of this process writing one of the tables it reads commits (see
+`_collect_written_tables`); other workers pick the change up after the TTL.
+
+With `exact=false`, the total of an unfiltered list is the InnoDB estimate of
+`information_schema.TABLES.TABLE_ROWS` (no scan at all, but approximate and
+soft-deleted rows included).
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Iterable
+
+from pydantic import BaseModel, Field
+from sqlalchemy import Table, event, func, select, text
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.sql import visitors
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import Config
+
+_WRITTEN_TABLES_KEY = "count_cache_written_tables"
+
+CacheKey = tuple[str, str, tuple[tuple[str, str], ...]]
+
+# key -> (loaded_at, tables read by the count, total)
+_cache: dict[CacheKey, tuple[float, frozenset[str], int]] = {}
+
+
+class TotalQuery(BaseModel):
+    with_total: bool = Field(False, description="Ajouter le nombre total d'éléments (meta.total)")
+    exact: bool = Field(
+        True,
+        description="false: estimation (information_schema) quand la liste n'est pas filtrée",
+    )
+
+
+def _cache_key(kind: str, statement) -> CacheKey:
+    compiled = statement.compile()
+    params = tuple(sorted((name, repr(value)) for name, value in compiled.params.items()))
+    return kind, str(compiled), params
+
+
+def _read_tables(statement) -> frozenset[str]:
+    # Walks the subqueries too (ex: the EXISTS of the membership filters)
+    return frozenset(
+        element.name for element in visitors.iterate(statement) if isinstance(element, Table)
+    )
+
+
+def _get_cached(key: CacheKey) -> int | None:
+    cached = _cache.get(key)
+    if cached and time.monotonic() - cached[0] < Config.COUNT_CACHE_TTL_SECONDS.value:
+        return cached[2]
+    return None
+
+
+def _set_cached(key: CacheKey, tables: frozenset[str], total: int) -> None:
+    _cache.pop(key, None)
+    if len(_cache) >= Config.COUNT_CACHE_MAX_ENTRIES.value:
+        # Dicts keep the insertion order: drop the oldest entry
+        _cache.pop(next(iter(_cache)))
+    _cache[key] = (time.monotonic(), tables, total)
+
+
+async def _estimate_table_rows(session: AsyncSession, table: Table) -> int | None:
+    if session.bind.dialect.name != "mysql":
+        return None
+    result = await session.execute(
+        text(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :name"
+        ),
+        {"name": table.name},
+    )
+    return result.scalar_one_or_none()
+
+
+async def count_resources(
+    session: AsyncSession,
+    model: type[SQLModel],
+    conditions: Iterable[Any],
+    *,
+    estimate: bool = False,
+) -> tuple[int, bool]:
+    """Number of `model` rows matching `conditions`. Returns (total, is_exact).
+
+    `estimate=True` (only meaningful for an unfiltered list) reads the table
+    estimate instead of counting, when the database provides one.
+    """
+    table = model.__table__
+    statement = select(func.count()).select_from(table).where(*conditions)
+
+    if estimate:
+        key: CacheKey = ("estimate", table.name, ())
+        total = _get_cached(key)
+        if total is None:
+            total = await _estimate_table_rows(session, table)
+            if total is not None:
+                _set_cached(key, frozenset({table.name}), total)
+        if total is not None:
+            return total, False
+
+    key = _cache_key("count", statement)
+    total = _get_cached(key)
+    if total is None:
+        total = (await session.execute(statement)).scalar_one()
+        _set_cached(key, _read_tables(statement), total)
+    return total, True
+
+
+async def get_total_meta(
+    session: AsyncSession,
+    model: type[SQLModel],
+    conditions: Iterable[Any],
+    total_query: TotalQuery,
+    filtered: bool = True,
+) -> dict[str, Any] | None:
+    """`meta` of a list response: None unless `with_total` was requested."""
+    if not total_query.with_total:
+        return None
+    total, is_exact = await count_resources(
+        session, model, conditions, estimate=not total_query.exact and not filtered
+    )
+    return {"total": total, "total_exact": is_exact}
+
+
+def invalidate_counts(*table_names: str) -> None:
+    """Drop the totals reading `table_names` (all of them when called without argument)."""
+    if not table_names:
+        _cache.clear()
+        return
+    written = set(table_names)
+    for key in [key for key, (_, tables, _) in _cache.items() if tables & written]:
+        del _cache[key]
+
+
+# ============================================================================
+# SESSION HOOKS
+# ============================================================================
+
+def _add_written_tables(session: Session, table_names: Iterable[str]) -> None:
+    session.info.setdefault(_WRITTEN_TABLES_KEY, set()).update(table_names)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_written_tables(session: Session, _flush_context) -> None:
+    table_names = {
+        instance.__table__.name
+        for instance in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(getattr(instance, "__table__", None), Table)
+    }
+    if table_names:
+        _add_written_tables(session, table_names)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_written_tables(orm_execute_state: ORMExecuteState) -> None:
+    # INSERT ... SELECT / UPDATE / DELETE statements run through the session (archival, bulk updates...)
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if isinstance(table, Table):
+            _add_written_tables(orm_execute_state.session, {table.name})
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_tables(session: Session) -> None:
+    table_names = session.info.pop(_WRITTEN_TABLES_KEY, None)
+    if table_names:
+        invalidate_counts(*table_names)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_written_tables(session: Session) -> None:
+    session.info.pop(_WRITTEN_TABLES_KEY, None)
@@ -7,6 +7,7 @@ from fastapi.encoders import jsonable_encoder
 from typing import List, TypedDict
 
 # Local modules
+from core.tracing import span
 from utils.utils import log
 
 # Custom HTTP codes
@@ -18,6 +19,10 @@ HTTP_CODES: dict[int, HTTPCodeEntry] = {
         "code": status.HTTP_200_OK,
         "message": "Ok"
     },
+    202: {
+        "code": status.HTTP_202_ACCEPTED,
+        "message": "Accepted: The request has been received but not yet acted upon."
+    },
     400: {
         "code": status.HTTP_400_BAD_REQUEST,
         "message": "Bad Request: The server could not understand the request due to invalid syntax."
@@ -45,6 +50,10 @@ HTTP_CODES: dict[int, HTTPCodeEntry] = {
     500: {
         "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
         "message": "Internal Server Error: The server has encountered a situation it doesn't know how to handle."
+    },
+    503: {
+        "code": status.HTTP_503_SERVICE_UNAVAILABLE,
+        "message": "Service Unavailable: The server is not ready to handle the request."
     }
 }
 
@@ -75,6 +84,7 @@ def send(
     error_location: str | None = None,
     error_field: str | None = None,
     error_type: str | None = None,
+    meta: dict | None = None,
 ):
     content = {
         "code": code,
@@ -90,12 +100,20 @@ def send(
             else None
         ),
     }
+    # Only list responses asking for it (ex: with_total) carry a meta
+    if meta is not None:
+        content["meta"] = meta
+
+    with span("response.serialize"):
+        return JSONResponse(jsonable_encoder(content), code)
+
 
-    return JSONResponse(jsonable_encoder(content), code)
+def send200(data: object, meta: dict | None = None):
+    return send(data, meta=meta)
 
 
-def send200(data: object):
-    return send(data)
+def send202(data: object):
+    return send(data, code=HTTP_CODES[202]["code"])
 
 
 def send400(error_location: List[str] | None = None, error_message: str | None = None):
@@ -199,3 +217,14 @@ def send500(e: Exception | None = None, error_message: str | None = None):
         code=HTTP_CODES[500]["code"],
     )
 
+
+
+def send503(error_message: str | None = None, retry_after: int | None = None):
+    response = send(
+        error_message=error_message or HTTP_CODES[503]["message"],
+        error_type=ErrorTypes.timeout_error.name,
+        code=HTTP_CODES[503]["code"],
+    )
+    if retry_after is not None:
+        response.headers["Retry-After"] = str(retry_after)
+    return response
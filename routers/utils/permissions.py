@@ -1,7 +1,30 @@
-from fastapi import HTTPException
+import os
+from typing import Annotated
+
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy import exists, false, or_, union
+from sqlalchemy.orm import aliased
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.db import get_session
 from models.constants.types import DocumentTypeEnum, FonctionEnum, StructureEnum
+from models.oauth import TokenPayload
+from modules.oauth2.dependencies import get_required_token_payload_dependency
+
+
+def get_superadmin_fidele_ids() -> set[int]:
+    """Fideles allowed on /superadmin, from SUPERADMIN_FIDELE_IDS (ids separated by commas)."""
+    return {int(id.strip()) for id in os.getenv("SUPERADMIN_FIDELE_IDS", "").split(",") if id.strip()}
+
+
+def require_superadmin(
+    current_fidele: Annotated[TokenPayload, Depends(get_required_token_payload_dependency(TokenPayload))],
+) -> TokenPayload:
+    """Dependency: 401 without token, 403 unless the fidele is in SUPERADMIN_FIDELE_IDS."""
+    if not str(current_fidele.sub).isdigit() or int(current_fidele.sub) not in get_superadmin_fidele_ids():
+        raise HTTPException(status_code=403, detail="Permission refusée: réservé aux superadmins.")
+    return current_fidele
 
 
 def _normalize_functions_set(
@@ -113,59 +136,44 @@ async def _resolve_direction_for_permission_check(
     return (await session.exec(statement)).first()
 
 
-async def _get_superior_scopes_for_direction(
+async def _has_active_superior_mandate(
     session: AsyncSession,
     *,
-    id_document_type: int,
-    id_document: int,
-) -> list[tuple[int, int | None]]:
+    direction,
+    id_fidele: int,
+    id_fonctions: list[int],
+) -> bool:
     """
-    Resolve supported superior echellons for a direction scope.
+    Return True if fidele holds an active mandate in a direction of the same
+    structure at a superior echellon of `direction`.
 
-    Supported upward traversal for now:
-    - PAROISSE -> NATION -> CONTINENT -> GENERALE
-    - NATION -> CONTINENT -> GENERALE
-    - CONTINENT -> GENERALE
+    The superior echellons (PAROISSE -> NATION -> CONTINENT -> GENERALE) are the
+    ancestors in `Direction.chemin`: one indexed query, whatever the depth.
     """
-    from models.constants.types import DocumentTypeEnum
-    from models.adresse import Adresse, Nation
-
-    if id_document_type == DocumentTypeEnum.PAROISSE.value:
-        adresse_stmt = select(Adresse).where(
-            (Adresse.id_document_type == DocumentTypeEnum.PAROISSE.value)
-            & (Adresse.id_document == id_document)
-            & (Adresse.est_supprimee == False)
-        )
-        adresse = (await session.exec(adresse_stmt)).first()
-        if not adresse:
-            return []
-
-        nation_stmt = select(Nation).where(Nation.id == adresse.id_nation)
-        nation = (await session.exec(nation_stmt)).first()
-        if not nation:
-            return []
-
-        return [
-            (DocumentTypeEnum.NATION.value, nation.id),
-            (DocumentTypeEnum.CONTINENT.value, nation.id_continent),
-            (DocumentTypeEnum.GENERALE.value, None),
-        ]
-
-    if id_document_type == DocumentTypeEnum.NATION.value:
-        nation_stmt = select(Nation).where(Nation.id == id_document)
-        nation = (await session.exec(nation_stmt)).first()
-        if not nation:
-            return []
-
-        return [
-            (DocumentTypeEnum.CONTINENT.value, nation.id_continent),
-            (DocumentTypeEnum.GENERALE.value, None),
-        ]
+    from models.direction import Direction
+    from models.direction.fonction import DirectionFonction
+    from modules.ancestry import ancestor_paths
 
-    if id_document_type == DocumentTypeEnum.CONTINENT.value:
-        return [(DocumentTypeEnum.GENERALE.value, None)]
+    if not id_fonctions or not direction.chemin:
+        return False
 
-    return []
+    statement = (
+        select(DirectionFonction.id)
+        .join(Direction, Direction.id == DirectionFonction.id_direction)
+        .where(
+            (Direction.chemin.in_(ancestor_paths(direction.chemin)))
+            & (Direction.id_structure == direction.id_structure)
+            & (Direction.est_supprimee == False)
+            & (DirectionFonction.id_fidele == id_fidele)
+            & (DirectionFonction.id_fonction.in_(id_fonctions))
+            & (DirectionFonction.est_supprimee == False)
+            & (DirectionFonction.est_actif == True)
+            & (DirectionFonction.est_suspendu == False)
+        )
+        .limit(1)
+    )
+    result = await session.exec(statement)
+    return result.first() is not None
 
 
 async def has_fidele_direction_fonction(
@@ -185,8 +193,6 @@ async def has_fidele_direction_fonction(
     When include_superior_echellons=True, also checks superior echellons
     while keeping the same structure (id_structure).
     """
-    from models.direction import Direction
-
     fonction_ids = _normalize_functions_set(functions_set=functions_set)
     if not fonction_ids:
         return False
@@ -212,37 +218,12 @@ async def has_fidele_direction_fonction(
     if not include_superior_echellons:
         return False
 
-    superior_scopes = await _get_superior_scopes_for_direction(
+    return await _has_active_superior_mandate(
         session,
-        id_document_type=direction.id_document_type,
-        id_document=direction.id_document,
+        direction=direction,
+        id_fidele=id_fidele,
+        id_fonctions=fonction_ids,
     )
-    if not superior_scopes:
-        return False
-
-    for superior_type, superior_doc_id in superior_scopes:
-        direction_stmt = select(Direction.id).where(
-            (Direction.est_supprimee == False)
-            & (Direction.id_structure == direction.id_structure)
-            & (Direction.id_document_type == superior_type)
-        )
-        if superior_doc_id is not None:
-            direction_stmt = direction_stmt.where(Direction.id_document == superior_doc_id)
-
-        direction_ids = (await session.exec(direction_stmt)).all()
-        if not direction_ids:
-            continue
-
-        for superior_direction_id in direction_ids:
-            if await _has_active_direction_mandate(
-                session,
-                id_direction=superior_direction_id,
-                id_fidele=id_fidele,
-                id_fonctions=fonction_ids,
-            ):
-                return True
-
-    return False
 
 
 async def require_fidele_direction_fonction(
@@ -283,3 +264,128 @@ async def require_fidele_direction_fonction(
                 "dans la direction cible ni dans les echelons superieurs autorises."
             ),
         )
+
+
+# ============================================================================
+# SCOPES (row filtering of the lists)
+# ============================================================================
+
+async def get_fidele_scope_paths(
+    session: AsyncSession,
+    *,
+    id_fidele: int,
+    functions_set: set[FonctionEnum] | None = None,
+    include_paroisses: bool = True,
+) -> list[str] | None:
+    """
+    Scopes of a fidele, as ancestry paths (see modules.ancestry): the scopes of
+    their active mandates plus (`include_paroisses`) their own active paroisses.
+
+    None when nothing restricts the fidele (a mandate at the generale), an empty
+    list when they have neither mandate nor paroisse. Nested scopes are merged
+    (a nation mandate covers the paroisses of that nation).
+    """
+    from models.direction import Direction
+    from models.direction.fonction import DirectionFonction
+    from models.fidele import FideleParoisse
+    from models.paroisse import Paroisse
+    from modules.ancestry import GENERALE_PATH
+
+    mandates = (
+        select(Direction.chemin)
+        .join(DirectionFonction, DirectionFonction.id_direction == Direction.id)
+        .where(
+            (DirectionFonction.id_fidele == id_fidele)
+            & (DirectionFonction.est_supprimee == False)
+            & (DirectionFonction.est_actif == True)
+            & (DirectionFonction.est_suspendu == False)
+            & (Direction.est_supprimee == False)
+            & (Direction.chemin.is_not(None))
+        )
+    )
+    fonction_ids = _normalize_functions_set(functions_set=functions_set)
+    if fonction_ids:
+        mandates = mandates.where(DirectionFonction.id_fonction.in_(fonction_ids))
+
+    statement = mandates
+    if include_paroisses:
+        paroisses = (
+            select(Paroisse.chemin)
+            .join(FideleParoisse, FideleParoisse.id_paroisse == Paroisse.id)
+            .where(
+                (FideleParoisse.id_fidele == id_fidele)
+                & (FideleParoisse.est_supprimee == False)
+                & (FideleParoisse.est_actif == True)
+                & (Paroisse.est_supprimee == False)
+                & (Paroisse.chemin.is_not(None))
+            )
+        )
+        # UNION: one round trip, duplicates removed
+        statement = union(mandates, paroisses)
+
+    paths = sorted((await session.execute(statement)).scalars().all())
+    if GENERALE_PATH in paths:
+        return None
+
+    merged: list[str] = []
+    for path in paths:
+        # Sorted: an ancestor comes right before its descendants
+        if not merged or not path.startswith(merged[-1]):
+            merged.append(path)
+    return merged
+
+
+async def get_caller_scope_paths(
+    request: Request,
+    session: Annotated[AsyncSession, Depends(get_session)],
+    current_fidele: Annotated[TokenPayload, Depends(get_required_token_payload_dependency(TokenPayload))],
+) -> list[str] | None:
+    """
+    Dependency: scopes the caller is allowed to read (None: not restricted).
+
+    401 without token. A leader sees the rows of their mandates' scopes and of
+    their own paroisses, a member only those of their own paroisses, a fidele
+    with neither sees nothing. A mandate at the generale lifts the restriction.
+    """
+    if not hasattr(request.state, "scope_paths"):
+        request.state.scope_paths = await get_fidele_scope_paths(session, id_fidele=int(current_fidele.sub))
+    return request.state.scope_paths
+
+
+def is_path_in_scope(path: str | None, scope_paths: list[str] | None) -> bool:
+    if scope_paths is None:
+        return True
+    return path is not None and any(path.startswith(scope_path) for scope_path in scope_paths)
+
+
+def scope_paroisse_condition(scope_paths: list[str]):
+    """SQL condition: the paroisse is in one of the scopes (range scans of idx_paroisse_chemin)."""
+    from models.paroisse import Paroisse
+    from modules.ancestry import in_subtree
+
+    if not scope_paths:
+        return false()
+    return or_(*(in_subtree(Paroisse.chemin, path) for path in scope_paths))
+
+
+def scope_fidele_condition(scope_paths: list[str], id_fidele_column=None):
+    """
+    SQL condition: the fidele (`id_fidele_column`, default Fidele.id) is an active
+    member of a paroisse in one of the scopes (a fidele who left it isn't seen by
+    its leaders anymore). Semi-join driven by the paroisses of the scopes
+    (idx_paroisse_chemin) then their members (idx_fidele_paroisse_membres).
+    """
+    from models.fidele import Fidele, FideleParoisse
+    from models.paroisse import Paroisse
+
+    if not scope_paths:
+        return false()
+
+    membre = aliased(FideleParoisse)
+    return exists().where(
+        (membre.id_fidele == (id_fidele_column if id_fidele_column is not None else Fidele.id))
+        & (membre.est_supprimee == False)
+        & (membre.est_actif == True)
+        & (membre.id_paroisse == Paroisse.id)
+        & scope_paroisse_condition(scope_paths)
+    )
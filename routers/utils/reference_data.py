@@ -0,0 +1,132 @@
+"""In-process cache for reference data (grade, fidele_type, nation, document_statut...).
+
+These tables are small and almost never written, but the write paths validate
+them on every request (one SELECT each). Rows are cached detached, per model,
+and re-attached to the caller's session with `session.merge(..., load=False)`
+which doesn't emit any SQL.
+
+The cache of a model is dropped as soon as one of its rows is flushed by this
+process (see `_invalidate_on_flush`); other workers pick the change up after
+`Config.REFERENCE_DATA_TTL_SECONDS`. An id missing from the cache is read from
+the database before answering 404, so a row just created by another worker is
+found right away.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Sequence, Type, TypeVar
+
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.orm import Session, selectinload
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import Config
+from core.db import get_sessionmaker
+from models.adresse import Nation
+from models.constants import (
+    DocumentStatut,
+    DocumentType,
+    EtatCivile,
+    FideleType,
+    Fonction,
+    Grade,
+    NiveauEtudes,
+    Profession,
+    RecensementEtape,
+    Structure,
+)
+
+T = TypeVar("T", bound=SQLModel)
+
+# Cached models and the relations loaded along with them
+REFERENCE_DATA_MODELS: dict[type[SQLModel], Sequence[Any]] = {
+    Grade: (),
+    FideleType: (),
+    DocumentStatut: (),
+    DocumentType: (),
+    EtatCivile: (),
+    Fonction: (),
+    NiveauEtudes: (),
+    Profession: (),
+    RecensementEtape: (),
+    Nation: (selectinload(Nation.continent),),
+    Structure: (selectinload(Structure.structure_type),),
+}
+
+# model -> (loaded_at, {id: detached row})
+_cache: dict[type[SQLModel], tuple[float, dict[int, SQLModel]]] = {}
+
+
+async def _get_cached_rows(model: Type[T]) -> dict[int, T]:
+    if model not in REFERENCE_DATA_MODELS:
+        raise ValueError(f"{model.__name__} is not a cached reference data model")
+
+    cached = _cache.get(model)
+    if cached and time.monotonic() - cached[0] < Config.REFERENCE_DATA_TTL_SECONDS.value:
+        return cached[1]
+
+    rows = {row.id: row for row in await _load_rows(model)}
+    _cache[model] = (time.monotonic(), rows)
+    return rows
+
+
+async def _load_rows(model: Type[T], *conditions: Any) -> list[T]:
+    statement = select(model).where(model.est_supprimee == False, *conditions)
+    options = REFERENCE_DATA_MODELS[model]
+    if options:
+        statement = statement.options(*options)
+
+    # Dedicated session: closing it detaches the rows without touching the caller's one
+    async with get_sessionmaker()() as cache_session:
+        result = await cache_session.exec(statement)
+        return list(result.all())
+
+
+async def get_reference_resource(model: Type[T], session: AsyncSession, id: int) -> T:
+    """Cached equivalent of `check_resource_exists(model, session, filters={"id": id})`."""
+    rows = await _get_cached_rows(model)
+    row = rows.get(int(id))
+    if row is None:
+        # Created since the cache was loaded (possibly by another worker)
+        loaded = await _load_rows(model, model.id == int(id))
+        if loaded:
+            row = rows[int(id)] = loaded[0]
+    if row is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"{model.__name__} not found for filters={dict(id=id)}",
+        )
+
+    return await session.merge(row, load=False)
+
+
+async def get_reference_resources(model: Type[T]) -> dict[int, T]:
+    """Cached (non deleted) rows of a reference data model by id. Detached: read only."""
+    return await _get_cached_rows(model)
+
+
+async def count_reference_resources(model: Type[T]) -> int:
+    """Number of (non deleted) rows of a reference data model."""
+    return len(await _get_cached_rows(model))
+
+
+def invalidate_reference_data(*models: type[SQLModel]) -> None:
+    """Drop the cache of `models` (all of them when called without argument)."""
+    if not models:
+        _cache.clear()
+        return
+    for model in models:
+        _cache.pop(model, None)
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_on_flush(session: Session, _flush_context) -> None:
+    changed = {
+        type(instance)
+        for instance in (*session.new, *session.dirty, *session.deleted)
+        if type(instance) in REFERENCE_DATA_MODELS
+    }
+    if changed:
+        invalidate_reference_data(*changed)
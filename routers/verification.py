@@ -0,0 +1,206 @@
+import base64
+from datetime import datetime, timezone
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from pydantic import BaseModel, Field, field_validator
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import Config
+from core.db import get_session
+from models.oauth import TokenPayload
+from modules.oauth2.dependencies import get_required_token_payload_dependency
+from modules.verification.credential import CredentialError, get_credential_jwks, verify_credential
+from modules.verification.lookup import VerificationProfile, lookup_verification_profiles
+from modules.verification.models import VerificationScanResultatEnum
+from modules.verification.scans import scan_ingestor
+from modules.verification.validity import get_validity_versions
+from routers.utils.http_utils import send200, send202, send404, send503
+
+# ============================================================================
+# ROUTER SETUP
+# ============================================================================
+verification_router = APIRouter(tags=["Verification"])
+
+
+class CredentialIn(BaseModel):
+    credential: str = Field(..., max_length=1024, description="Contenu du QR code scanné")
+
+
+@verification_router.post("/credential")
+async def verify_scanned_credential(body: CredentialIn) -> dict[str, Any]:
+    """
+    Vérifier un justificatif QR (signature et expiration), sans aucun accès à la base.
+    `valide=false` avec `raison` quand il est falsifié, expiré ou illisible.
+    """
+    try:
+        claims = verify_credential(body.credential)
+    except CredentialError as e:
+        return send200({"valide": False, "raison": str(e), "justificatif": None})
+    return send200({"valide": True, "raison": None, "justificatif": claims})
+
+
+@verification_router.get("/credential/jwks")
+async def get_verification_jwks() -> dict[str, Any]:
+    """
+    Clés publiques (JWKS, Ed25519) vérifiant les justificatifs QR hors ligne.
+    Le `kid` de l'en-tête du justificatif désigne la clé; les anciennes clés restent
+    publiées le temps que leurs justificatifs expirent.
+    """
+    return send200(get_credential_jwks())
+
+
+def _b64(data: bytes | None) -> str | None:
+    return base64.b64encode(data).decode() if data is not None else None
+
+
+@verification_router.get("/validite")
+async def get_validity(
+    session: Annotated[AsyncSession, Depends(get_session)],
+    since_version: Annotated[
+        int | None,
+        Query(description="Version détenue par l'appareil (vide: copie complète)"),
+    ] = None,
+) -> dict[str, Any]:
+    """
+    Ensemble des matricules valides (non révoqués), pour la vérification hors ligne.
+
+    Avec `since_version`, seules les différences depuis cette version sont renvoyées
+    (`deltas`), sinon (ou si elle est trop ancienne) la copie complète (`complet`).
+    Empreintes: 4 premiers octets du sha256 du matricule, triées, deltas en varint,
+    zlib puis base64 (voir modules.verification.validity).
+    """
+    full, deltas = await get_validity_versions(session, since_version)
+    version = full.version if full is not None else deltas[-1].version if deltas else since_version
+    return send200({
+        "version": version,
+        "complet": (
+            {"nombre": full.nombre, "empreintes": _b64(full.empreintes)}
+            if full is not None
+            else None
+        ),
+        "deltas": [
+            {"version": delta.version, "ajouts": _b64(delta.ajouts), "retraits": _b64(delta.retraits)}
+            for delta in deltas
+        ],
+    })
+
+
+class VerificationLookupIn(BaseModel):
+    codes: list[str] = Field(..., min_length=1, max_length=Config.VERIFICATION_MAX_BATCH_CODES.value)
+
+    @field_validator("codes")
+    @classmethod
+    def normalize_codes(cls, codes: list[str]) -> list[str]:
+        # Input order kept, duplicates (same badge scanned twice) removed
+        return list(dict.fromkeys(code.strip() for code in codes if code.strip()))
+
+
+class VerificationLookupBatch(BaseModel):
+    items: list[VerificationProfile] = []
+    missing_codes: list[str] = []
+
+
+@verification_router.get(
+    "/fidele/{code_matriculation}",
+    dependencies=[Depends(get_required_token_payload_dependency(TokenPayload))],
+)
+async def lookup_fidele(
+    session: Annotated[AsyncSession, Depends(get_session)],
+    code_matriculation: Annotated[str, Path(max_length=12)],
+) -> VerificationProfile:
+    """
+    Identité d'un fidèle à partir de son code de matriculation scanné: nom, grade,
+    paroisse principale, statut (`valide`) et URL signée de la photo. Token requis
+    (agent de contrôle).
+    """
+    items, _ = await lookup_verification_profiles(session, [code_matriculation.strip()])
+    if not items:
+        return send404(["path", "code_matriculation"], "Fidele non trouvé")
+    return send200(items[0])
+
+
+@verification_router.post(
+    "/fidele/batch",
+    dependencies=[Depends(get_required_token_payload_dependency(TokenPayload))],
+)
+async def lookup_fideles_batch(
+    session: Annotated[AsyncSession, Depends(get_session)],
+    body: VerificationLookupIn,
+) -> VerificationLookupBatch:
+    """
+    Identités de plusieurs codes scannés en une seule requête (file d'un appareil).
+    Token requis (agent de contrôle).
+    L'ordre des `codes` est conservé dans `items`; les codes introuvables sont dans `missing_codes`.
+    """
+    items, missing_codes = await lookup_verification_profiles(session, body.codes)
+    return send200(VerificationLookupBatch(items=items, missing_codes=missing_codes))
+
+
+class ScanIn(BaseModel):
+    date_scan: datetime = Field(..., description="Date du scan sur l'appareil (les scans hors ligne arrivent plus tard)")
+    code_matriculation: str | None = Field(None, max_length=12)
+    id_fidele: int | None = Field(None, description="Vide: retrouvé à partir du code_matriculation")
+    resultat: VerificationScanResultatEnum
+    point_controle: str | None = Field(None, max_length=64)
+    id_appareil: str | None = Field(None, max_length=64)
+    duree_ms: int | None = Field(None, ge=0, description="Temps de vérification (ms)")
+
+
+class ScanBatchIn(BaseModel):
+    scans: list[ScanIn] = Field(..., min_length=1, max_length=Config.VERIFICATION_SCAN_MAX_PER_REQUEST.value)
+
+
+def _scan_row(scan: ScanIn, id_fidele_agent: int) -> dict[str, Any]:
+    date_scan = scan.date_scan
+    if date_scan.tzinfo is not None:
+        date_scan = date_scan.astimezone(timezone.utc).replace(tzinfo=None)
+    return {
+        "date_scan": date_scan,
+        "date_reception": datetime.now(timezone.utc).replace(tzinfo=None),
+        "id_fidele": scan.id_fidele,
+        "code_matriculation": scan.code_matriculation.strip() if scan.code_matriculation else None,
+        "resultat": scan.resultat.value,
+        "point_controle": scan.point_controle,
+        "id_appareil": scan.id_appareil,
+        "id_fidele_agent": id_fidele_agent,
+        "duree_ms": scan.duree_ms,
+    }
+
+
+def _ingest_scans(scans: list[ScanIn], current_fidele: TokenPayload):
+    if not str(current_fidele.sub).isdigit():
+        raise HTTPException(status_code=401, detail="Invalid token subject")
+    id_fidele_agent = int(current_fidele.sub)
+    if not scan_ingestor.enqueue([_scan_row(scan, id_fidele_agent) for scan in scans]):
+        return send503(
+            "Trop de scans en attente d'enregistrement, réessayer plus tard",
+            retry_after=Config.VERIFICATION_SCAN_FLUSH_INTERVAL_SECONDS.value * 5,
+        )
+    return send202({"acceptes": len(scans)})
+
+
+@verification_router.post("/scan", status_code=202)
+async def record_scan(
+    scan: ScanIn,
+    current_fidele: Annotated[TokenPayload, Depends(get_required_token_payload_dependency(TokenPayload))],
+) -> dict[str, Any]:
+    """
+    Enregistrer un scan de point de contrôle (token de l'agent requis). La réponse est
+    immédiate (202): le scan est écrit en arrière-plan. 503 (`Retry-After`) quand le
+    tampon est plein.
+    """
+    return _ingest_scans([scan], current_fidele)
+
+
+@verification_router.post("/scan/batch", status_code=202)
+async def record_scans_batch(
+    body: ScanBatchIn,
+    current_fidele: Annotated[TokenPayload, Depends(get_required_token_payload_dependency(TokenPayload))],
+) -> dict[str, Any]:
+    """
+    Enregistrer plusieurs scans (file hors ligne d'un appareil), acceptés tous ou aucun.
+    Token de l'agent requis. La réponse est immédiate (202); 503 (`Retry-After`) quand
+    le tampon est plein.
+    """
+    return _ingest_scans(body.scans, current_fidele)
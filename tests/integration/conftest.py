@@ -7,6 +7,7 @@ import docker
 import pytest
 from docker.errors import DockerException
 from fastapi.testclient import TestClient
+from sqlalchemy import bindparam, create_engine, text
 from testcontainers.core.container import DockerContainer
 from testcontainers.mysql import MySqlContainer
 
@@ -103,6 +104,7 @@ def app_client(mysql_container, localstack_container):
             "AWS_S3_BUCKET": localstack_container["bucket"],
         }
     )
+    os.environ.setdefault("JWT_TOKEN_KEY", "integration-tests")
 
     import core.db as db_module
 
@@ -113,3 +115,280 @@ def app_client(mysql_container, localstack_container):
 
     with TestClient(app) as client:
         yield client
+
+
+# ============================================================================
+# CALLERS (tokens of fideles with or without mandates)
+# ============================================================================
+
+def _insert_fidele(conn, nom: str, tel: str) -> int:
+    return conn.execute(
+        text(
+            """
+            INSERT INTO fidele (
+                nom, prenom, sexe, date_naissance, est_baptise, tel,
+                id_grade, id_fidele_type, id_nation_nationalite, id_document_statut,
+                est_supprimee, date_creation, date_modification
+            ) VALUES (
+                :nom, 'Token', 'M', '1970-01-01', 1, :tel,
+                1, 1, 171, 1, 0, NOW(), NOW()
+            )
+            """
+        ),
+        {"nom": nom, "tel": tel},
+    ).lastrowid
+
+
+def _insert_mandate(conn, id_fidele: int, id_document_type: int, id_document: int, chemin: str) -> int:
+    """Direction (bureau ecclesiastique) of the scope `chemin`, with `id_fidele` as its president."""
+    id_direction = conn.execute(
+        text(
+            """
+            INSERT INTO direction (id_structure, id_document_type, id_document, nom, chemin, est_supprimee)
+            VALUES (1, :id_document_type, :id_document, 'Direction Token', :chemin, 0)
+            """
+        ),
+        {"id_document_type": id_document_type, "id_document": id_document, "chemin": chemin},
+    ).lastrowid
+    conn.execute(
+        text(
+            """
+            INSERT INTO direction_fonction (
+                date_debut, est_suspendu, id_direction, id_fidele, id_fonction, est_actif, est_supprimee
+            ) VALUES (CURDATE(), 0, :id_direction, :id_fidele, 1, 1, 0)
+            """
+        ),
+        {"id_direction": id_direction, "id_fidele": id_fidele},
+    )
+    return id_direction
+
+
+def _bearer(id_fidele: int) -> dict[str, str]:
+    from models.fidele import Fidele
+
+    return {"Authorization": f"Bearer {Fidele(id=id_fidele).generate_token()}"}
+
+
+@pytest.fixture(scope="session")
+def auth_headers(app_client):
+    """Bearer token of a fidele with a mandate at the generale: the scoped lists are not restricted."""
+    engine = create_engine(os.environ["MYSQL_DB_SYNC_URL"])
+    with engine.begin() as conn:
+        id_fidele = _insert_fidele(conn, "Generale", "+243900000099")
+        id_direction = _insert_mandate(conn, id_fidele, 8, 1, "/GENERALE")
+
+    yield _bearer(id_fidele)
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM direction WHERE id = :id"), {"id": id_direction})
+        conn.execute(text("DELETE FROM fidele WHERE id = :id"), {"id": id_fidele})
+    engine.dispose()
+
+
+# Continent id of the scoped paroisses' paths: no other test data falls in these subtrees
+SCOPE_CONTINENT = 999999
+
+
+@pytest.fixture(scope="session")
+def scoped_callers(app_client):
+    """
+    Paroisses A1, A2 (nation 171) and B1 (nation 1) under SCOPE_CONTINENT, one member
+    in each, a member who left A1, and the callers: a leader of nation 171, a member
+    of A1 and a fidele with neither mandate nor paroisse.
+    """
+    from modules.ancestry import ancestry_path
+
+    engine = create_engine(os.environ["MYSQL_DB_SYNC_URL"])
+    with engine.begin() as conn:
+        paroisses = {}
+        for name, id_nation in (("A1", 171), ("A2", 171), ("B1", 1)):
+            id_paroisse = conn.execute(
+                text(
+                    """
+                    INSERT INTO paroisse (nom, est_supprimee, date_creation, date_modification)
+                    VALUES (:nom, 0, NOW(), NOW())
+                    """
+                ),
+                {"nom": f"Scope {name}"},
+            ).lastrowid
+            conn.execute(
+                text("UPDATE paroisse SET chemin = :chemin WHERE id = :id"),
+                {"chemin": ancestry_path(SCOPE_CONTINENT, id_nation, id_paroisse), "id": id_paroisse},
+            )
+            paroisses[name] = id_paroisse
+
+        fideles = {
+            name: _insert_fidele(conn, f"Scope {name}", f"+2439100000{n:02d}")
+            for n, name in enumerate(("membre_a1", "membre_a2", "membre_b1", "parti_a1", "leader", "caller_a1", "seul"))
+        }
+        for name, paroisse, est_actif in (
+            ("membre_a1", "A1", 1),
+            ("membre_a2", "A2", 1),
+            ("membre_b1", "B1", 1),
+            ("parti_a1", "A1", 0),
+            ("caller_a1", "A1", 1),
+        ):
+            conn.execute(
+                text(
+                    """
+                    INSERT INTO fidele_paroisse (
+                        id_fidele, id_paroisse, est_actif, est_supprimee, date_creation, date_modification
+                    ) VALUES (:id_fidele, :id_paroisse, :est_actif, 0, NOW(), NOW())
+                    """
+                ),
+                {"id_fidele": fideles[name], "id_paroisse": paroisses[paroisse], "est_actif": est_actif},
+            )
+        id_direction = _insert_mandate(conn, fideles["leader"], 6, 171, ancestry_path(SCOPE_CONTINENT, 171))
+
+    yield {
+        "paroisses": paroisses,
+        "fideles": fideles,
+        "leader": _bearer(fideles["leader"]),
+        "membre": _bearer(fideles["caller_a1"]),
+        "seul": _bearer(fideles["seul"]),
+    }
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM direction WHERE id = :id"), {"id": id_direction})
+        for table, ids in (("fidele", fideles.values()), ("paroisse", paroisses.values())):
+            conn.execute(
+                text(f"DELETE FROM {table} WHERE id IN :ids").bindparams(bindparam("ids", expanding=True)),
+                {"ids": list(ids)},
+            )
+    engine.dispose()
+
+
+# ============================================================================
+# SEEDED DATA (query plan tests: enough rows for the optimizer to prefer indexes)
+# ============================================================================
+
+SEEDED_FIDELES = 5000
+
+
+def _seed_fideles(conn) -> int:
+    conn.execute(text("SET SESSION cte_max_recursion_depth = 100000"))
+    conn.execute(
+        text(
+            """
+            INSERT INTO fidele (
+                nom, prenom, sexe, date_naissance, est_baptise, tel, code_matriculation,
+                id_grade, id_fidele_type, id_nation_nationalite, id_document_statut,
+                rencensement_statut, est_supprimee, date_creation, date_modification
+            )
+            WITH RECURSIVE seq (n) AS (
+                SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < :count
+            )
+            SELECT
+                CONCAT('Explain', n), 'Plan', IF(n % 2 = 0, 'M', 'F'),
+                DATE_ADD('1950-01-01', INTERVAL n * 7 DAY), 1, CONCAT('+2438', LPAD(n, 8, '0')),
+                CONCAT('EX', LPAD(n, 10, '0')),
+                1 + n % 5, 1 + n % 2, IF(n % 10 = 0, 171, 1), 1 + n % 3,
+                n % 101, n % 20 = 0, NOW(), NOW()
+            FROM seq
+            """
+        ),
+        {"count": SEEDED_FIDELES},
+    )
+    conn.execute(
+        text(
+            """
+            INSERT INTO paroisse (nom, est_supprimee, date_creation, date_modification)
+            VALUES ('Paroisse Explain', 0, NOW(), NOW())
+            """
+        )
+    )
+    id_paroisse = conn.execute(text("SELECT id FROM paroisse WHERE nom = 'Paroisse Explain'")).scalar_one()
+    conn.execute(
+        text(
+            """
+            INSERT INTO fidele_paroisse (id_fidele, id_paroisse, est_supprimee, date_creation, date_modification)
+            SELECT id, :id_paroisse, 0, NOW(), NOW() FROM fidele WHERE nom LIKE 'Explain%' AND id % 50 = 0
+            """
+        ),
+        {"id_paroisse": id_paroisse},
+    )
+    conn.execute(
+        text(
+            """
+            INSERT INTO fidele_structure (id_fidele, id_structure, est_supprimee, date_creation, date_modification)
+            SELECT id, 1, 0, NOW(), NOW() FROM fidele WHERE nom LIKE 'Explain%' AND id % 40 = 0
+            """
+        )
+    )
+    # Polymorphic (id_document_type, id_document) rows of one fidele out of five
+    conn.execute(
+        text(
+            """
+            INSERT INTO adresse (
+                id_document_type, id_document, id_nation, province_etat, ville, avenue, numero,
+                est_supprimee, date_creation, date_modification
+            )
+            SELECT 1, id, 171, 'Kinshasa', 'Kinshasa', 'Explain', '1', 0, NOW(), NOW()
+            FROM fidele WHERE nom LIKE 'Explain%' AND id % 5 = 0
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            INSERT INTO contact (id_document_type, id_document, tel1, est_supprimee, date_creation, date_modification)
+            SELECT 1, id, tel, 0, NOW(), NOW() FROM fidele WHERE nom LIKE 'Explain%' AND id % 5 = 0
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            INSERT INTO file (
+                original_name, file_name, mimetype, size, id_document_type, id_document,
+                est_supprimee, date_creation, date_modification
+            )
+            SELECT 'photo.jpg', CONCAT('fidele/', id, '/explain_photo.jpg'), 'image/jpeg', 128, 1, id, 0, NOW(), NOW()
+            FROM fidele WHERE nom LIKE 'Explain%' AND id % 5 = 0
+            """
+        )
+    )
+    for table in ("fidele", "fidele_paroisse", "fidele_structure", "adresse", "contact", "file"):
+        conn.execute(text(f"ANALYZE TABLE {table}"))
+    return id_paroisse
+
+
+@pytest.fixture(scope="session")
+def seeded_fideles(app_client):
+    engine = create_engine(os.environ["MYSQL_DB_SYNC_URL"])
+    with engine.begin() as conn:
+        id_paroisse = _seed_fideles(conn)
+        id_fidele = conn.execute(
+            text("SELECT MIN(id) FROM fidele WHERE nom LIKE 'Explain%' AND id % 5 = 0 AND est_supprimee = 0")
+        ).scalar_one()
+        code_matriculation = conn.execute(
+            text("SELECT code_matriculation FROM fidele WHERE id = :id"), {"id": id_fidele}
+        ).scalar_one()
+
+    yield {"id_paroisse": id_paroisse, "id_fidele": id_fidele, "code_matriculation": code_matriculation}
+
+    # Leave the database as the other tests expect it
+    with engine.begin() as conn:
+        for table in ("adresse", "contact", "file"):
+            conn.execute(
+                text(
+                    f"""
+                    DELETE t FROM {table} t
+                    JOIN fidele f ON f.id = t.id_document
+                    WHERE t.id_document_type = 1 AND f.nom LIKE 'Explain%'
+                    """
+                )
+            )
+        conn.execute(text("DELETE FROM fidele_paroisse WHERE id_paroisse = :id"), {"id": id_paroisse})
+        conn.execute(text("DELETE FROM paroisse WHERE id = :id"), {"id": id_paroisse})
+        conn.execute(
+            text(
+                """
+                DELETE fs FROM fidele_structure fs
+                JOIN fidele f ON f.id = fs.id_fidele
+                WHERE f.nom LIKE 'Explain%'
+                """
+            )
+        )
+        conn.execute(text("DELETE FROM fidele WHERE nom LIKE 'Explain%'"))
+    engine.dispose()
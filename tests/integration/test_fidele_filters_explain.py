@@ -0,0 +1,55 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import mysql
+
+from models.fidele.utils import FideleFilters
+from routers.fidele.utils import build_fidele_list_statement
+
+
+# Every supported filter alone, plus a few combinations used by the admin web
+FILTER_COMBINATIONS = [
+    {},
+    {"id_document_statut": 2},
+    {"id_grade": 3},
+    {"id_fidele_type": 2},
+    {"sexe": "F"},
+    {"id_nation_nationalite": 171},
+    {"date_naissance_min": "1990-01-01", "date_naissance_max": "1990-02-01"},
+    {"rencensement_statut_min": 100},
+    {"rencensement_statut_max": 10},
+    {"id_paroisse": "PAROISSE"},
+    {"id_structure": 1},
+    {"id_grade": 3, "id_document_statut": 2},
+    {"id_document_statut": 1, "rencensement_statut_min": 100},
+    {"id_paroisse": "PAROISSE", "id_document_statut": 2},
+    {"id_structure": 1, "sexe": "M"},
+]
+
+
+@pytest.fixture(scope="module")
+def explain_conn(seeded_fideles):
+    engine = create_engine(os.environ["MYSQL_DB_SYNC_URL"])
+    with engine.connect() as conn:
+        yield conn, seeded_fideles["id_paroisse"]
+    engine.dispose()
+
+
+@pytest.mark.parametrize("raw_filters", FILTER_COMBINATIONS, ids=lambda f: ",".join(f) or "none")
+def test_fidele_list_filters_use_an_index(explain_conn, raw_filters):
+    conn, id_paroisse = explain_conn
+    raw_filters = {
+        key: id_paroisse if value == "PAROISSE" else value
+        for key, value in raw_filters.items()
+    }
+
+    statement = build_fidele_list_statement(FideleFilters(**raw_filters), offset=0, limit=10)
+    sql = str(statement.compile(dialect=mysql.dialect(), compile_kwargs={"literal_binds": True}))
+    plan = conn.execute(text(f"EXPLAIN {sql}")).mappings().all()
+
+    for row in plan:
+        if row["table"] not in ("fidele", "fidele_paroisse", "fidele_structure"):
+            continue
+        assert row["type"] != "ALL", f"full scan of {row['table']} for {raw_filters}: {dict(row)}"
+        assert row["key"] is not None, f"no index on {row['table']} for {raw_filters}: {dict(row)}"
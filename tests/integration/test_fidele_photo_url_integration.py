@@ -63,14 +63,14 @@ async def _insert_minimum_fidele_and_photo(async_db_url: str) -> None:
     await engine.dispose()
 
 
-def test_fidele_list_include_photo_url_returns_signed_url(app_client):
+def test_fidele_list_include_photo_url_returns_signed_url(app_client, auth_headers):
     import os
     import asyncio
 
     async_db_url = os.environ["MYSQL_DB_ASYNC_URL"]
     asyncio.run(_insert_minimum_fidele_and_photo(async_db_url))
 
-    response = app_client.get("/fidele?offset=0&limit=10&include=photo_url")
+    response = app_client.get("/fidele?offset=0&limit=10&include=photo_url", headers=auth_headers)
     assert response.status_code == 200
 
     payload = response.json()
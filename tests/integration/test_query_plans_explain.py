@@ -0,0 +1,133 @@
+"""Query plan regression tests.
+
+Every SQL statement emitted while serving the hot routes below is captured
+(SQLAlchemy `before_cursor_execute`), then run through `EXPLAIN FORMAT=JSON` on
+the seeded database. A statement fails the test when its plan reads a table
+with a full scan, or sorts with a filesort, over more than `MAX_UNINDEXED_ROWS`
+rows: an index missing (or no longer usable) after a query or schema change.
+"""
+import asyncio
+import json
+import os
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.db import get_engine
+from routers.fidele.utils import _get_next_matricule_suffix_letter
+
+
+# Above the reference tables (nation, grade...), far below the seeded fideles
+MAX_UNINDEXED_ROWS = 1000
+
+# (route, path); {id_fidele}, {id_paroisse}, {code_matriculation} come from the seed
+HOT_ROUTES = [
+    ("fidele list", "/fidele?offset=0&limit=10"),
+    ("fidele list with photos", "/fidele?offset=0&limit=10&include=photo_url"),
+    ("fidele list by paroisse", "/fidele?offset=0&limit=10&id_paroisse={id_paroisse}"),
+    ("fidele list with total", "/fidele?offset=0&limit=10&id_document_statut=2&with_total=true"),
+    ("fidele by id", "/fidele/{id_fidele}?proj=flat&include=photo_url"),
+    ("fidele batch", "/fidele/batch?ids={id_fidele}"),
+    ("fidele adresse", "/fidele/{id_fidele}/adresse"),
+    ("fidele contact", "/fidele/{id_fidele}/contact"),
+    ("fidele paroisses", "/fidele/{id_fidele}/paroisse"),
+    ("paroisse fideles", "/paroisse/{id_paroisse}/fidele"),
+    ("verification lookup", "/verification/fidele/{code_matriculation}"),
+]
+
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+
+@contextmanager
+def capture_statements(engine) -> Iterator[list[tuple[str, Any]]]:
+    """SQL statements (with their parameters) executed on `engine` inside the block."""
+    statements: list[tuple[str, Any]] = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany) -> None:
+        if not executemany and statement.lstrip().upper().startswith(_EXPLAINABLE):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+
+
+def _max_rows(node: Any) -> int:
+    if isinstance(node, dict):
+        rows = node.get("rows_examined_per_scan", 0) if "table_name" in node else 0
+        return max([rows, *(_max_rows(value) for value in node.values())])
+    if isinstance(node, list):
+        return max((_max_rows(item) for item in node), default=0)
+    return 0
+
+
+def plan_problems(node: Any, max_rows: int = MAX_UNINDEXED_ROWS) -> list[str]:
+    """Full scans and filesorts over more than `max_rows` rows in an EXPLAIN FORMAT=JSON plan."""
+    problems: list[str] = []
+    if isinstance(node, dict):
+        table_name = node.get("table_name")
+        # Derived tables and unions: their own query blocks are checked below
+        if table_name and not table_name.startswith("<"):
+            rows = node.get("rows_examined_per_scan", 0)
+            if node.get("access_type") == "ALL" and rows > max_rows:
+                problems.append(f"full scan of {table_name} ({rows} rows)")
+        if node.get("using_filesort") and _max_rows(node) > max_rows:
+            problems.append(f"filesort over {_max_rows(node)} rows")
+        for value in node.values():
+            problems.extend(plan_problems(value, max_rows))
+    elif isinstance(node, list):
+        for item in node:
+            problems.extend(plan_problems(item, max_rows))
+    return problems
+
+
+@pytest.fixture(scope="module")
+def explain(seeded_fideles):
+    engine = create_engine(os.environ["MYSQL_DB_SYNC_URL"])
+    with engine.connect() as conn:
+
+        def _explain(statements: list[tuple[str, Any]]) -> list[str]:
+            failures = []
+            # Same statement text, same plan shape: explained once
+            for statement, parameters in dict(statements).items():
+                plan = conn.exec_driver_sql(f"EXPLAIN FORMAT=JSON {statement}", parameters).scalar_one()
+                problems = plan_problems(json.loads(plan))
+                if problems:
+                    failures.append(f"{', '.join(problems)}:\n{statement}")
+            return failures
+
+        yield _explain
+    engine.dispose()
+
+
+@pytest.mark.parametrize("path", [path for _, path in HOT_ROUTES], ids=[name for name, _ in HOT_ROUTES])
+def test_hot_route_statements_use_indexes(app_client, auth_headers, seeded_fideles, explain, path):
+    with capture_statements(get_engine().sync_engine) as statements:
+        response = app_client.get(path.format(**seeded_fideles), headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert statements, f"no SQL captured for {path}"
+
+    failures = explain(statements)
+    assert not failures, "\n\n".join(failures)
+
+
+def test_matricule_prefix_lookup_uses_an_index(seeded_fideles, explain):
+    """`code_matriculation LIKE 'prefix%'` (matricule suffix allocation) must range scan the unique index."""
+    engine = create_async_engine(os.environ["MYSQL_DB_ASYNC_URL"])
+
+    async def _lookup() -> None:
+        async with AsyncSession(engine) as session:
+            await _get_next_matricule_suffix_letter(session, prefix=seeded_fideles["code_matriculation"][:11])
+
+    with capture_statements(engine.sync_engine) as statements:
+        asyncio.run(_lookup())
+    asyncio.run(engine.dispose())
+
+    failures = explain(statements)
+    assert not failures, "\n\n".join(failures)
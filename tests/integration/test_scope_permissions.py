@@ -0,0 +1,66 @@
+"""Rows of the lists restricted to the caller's scope (routers.utils.permissions)."""
+
+
+def _ids(response, key="id"):
+    assert response.status_code == 200, response.text
+    return {item[key] for item in response.json()["data"]}
+
+
+def _fideles(app_client, headers):
+    return _ids(app_client.get("/fidele", params={"limit": 100}, headers=headers))
+
+
+def _paroisses(app_client, headers):
+    return _ids(app_client.get("/paroisse", params={"limit": 100}, headers=headers))
+
+
+def test_lists_require_a_token(app_client):
+    for path in ("/fidele", "/paroisse", "/fidele/batch?ids=1", "/paroisse/batch?ids=1"):
+        assert app_client.get(path).status_code == 401, path
+
+
+def test_nation_leader_sees_the_nation_only(app_client, scoped_callers):
+    fideles, paroisses = scoped_callers["fideles"], scoped_callers["paroisses"]
+
+    assert _fideles(app_client, scoped_callers["leader"]) == {
+        fideles["membre_a1"], fideles["membre_a2"], fideles["caller_a1"]
+    }
+    assert _paroisses(app_client, scoped_callers["leader"]) == {paroisses["A1"], paroisses["A2"]}
+
+
+def test_member_sees_their_paroisse_only(app_client, scoped_callers):
+    fideles, paroisses = scoped_callers["fideles"], scoped_callers["paroisses"]
+
+    # parti_a1 left A1: not listed anymore
+    assert _fideles(app_client, scoped_callers["membre"]) == {fideles["membre_a1"], fideles["caller_a1"]}
+    assert _paroisses(app_client, scoped_callers["membre"]) == {paroisses["A1"]}
+
+    response = app_client.get(f"/paroisse/{paroisses['B1']}/fidele", headers=scoped_callers["membre"])
+    assert _ids(response, "id_fidele") == set()
+
+
+def test_fidele_without_mandate_nor_paroisse_sees_nothing(app_client, scoped_callers):
+    assert _fideles(app_client, scoped_callers["seul"]) == set()
+    assert _paroisses(app_client, scoped_callers["seul"]) == set()
+
+
+def test_batch_reports_out_of_scope_ids_as_missing(app_client, scoped_callers):
+    fideles, paroisses = scoped_callers["fideles"], scoped_callers["paroisses"]
+    ids = [fideles["membre_a1"], fideles["membre_b1"], fideles["parti_a1"]]
+
+    response = app_client.get(
+        "/fidele/batch", params={"ids": ",".join(map(str, ids))}, headers=scoped_callers["membre"]
+    )
+    assert response.status_code == 200, response.text
+    data = response.json()["data"]
+    assert [item["id"] for item in data["items"]] == [fideles["membre_a1"]]
+    assert data["missing_ids"] == [fideles["membre_b1"], fideles["parti_a1"]]
+
+    response = app_client.get(
+        "/paroisse/batch",
+        params={"ids": f"{paroisses['A1']},{paroisses['B1']}"},
+        headers=scoped_callers["leader"],
+    )
+    data = response.json()["data"]
+    assert [item["id"] for item in data["items"]] == [paroisses["A1"]]
+    assert data["missing_ids"] == [paroisses["B1"]]
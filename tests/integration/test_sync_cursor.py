@@ -0,0 +1,67 @@
+"""/sync pagination over rows last modified long before the sync."""
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from core.config import Config
+
+OLD_PAROISSES = 25
+LIMIT = 10
+
+
+@pytest.fixture
+def old_paroisses(app_client):
+    engine = create_engine(os.environ["MYSQL_DB_SYNC_URL"])
+    days = Config.ARCHIVE_AFTER_DAYS.value + 30
+    with engine.begin() as conn:
+        for n in range(OLD_PAROISSES):
+            conn.execute(
+                text(
+                    """
+                    INSERT INTO paroisse (nom, est_supprimee, date_creation, date_modification)
+                    VALUES (:nom, 0, NOW() - INTERVAL :days DAY, NOW() - INTERVAL :days DAY)
+                    """
+                ),
+                {"nom": f"Sync old {n}", "days": days},
+            )
+        ids = set(conn.execute(text("SELECT id FROM paroisse WHERE nom LIKE 'Sync old %'")).scalars())
+
+    yield ids
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM paroisse WHERE nom LIKE 'Sync old %'"))
+    engine.dispose()
+
+
+def _sync(app_client, auth_headers, cursor):
+    params = {"entities": "paroisse", "limit": LIMIT}
+    if cursor:
+        params["cursor"] = cursor
+    response = app_client.get("/sync", params=params, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    return response.json()["data"]
+
+
+def test_sync_requires_a_token(app_client):
+    assert app_client.get("/sync", params={"entities": "grade"}).status_code == 401
+
+
+def test_sync_of_rows_older_than_the_archive_delay_terminates(app_client, auth_headers, old_paroisses):
+    received, cursor = set(), None
+    for _ in range(100):
+        data = _sync(app_client, auth_headers, cursor)
+        entity = data["entities"]["paroisse"]
+        assert not entity["reset"]
+        received.update(item["id"] for item in entity["items"])
+        cursor = data["cursor"]
+        if not data["has_more"]:
+            break
+    else:
+        pytest.fail("/sync kept returning has_more")
+
+    assert old_paroisses <= received
+
+    # Nothing new: the next sync is incremental, not a reset
+    data = _sync(app_client, auth_headers, cursor)
+    assert data["entities"]["paroisse"] == {"items": [], "deleted_ids": [], "has_more": False, "reset": False}
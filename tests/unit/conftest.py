@@ -0,0 +1,9 @@
+# Every mapped model, so the relationships between them resolve (as in alembic/env.py)
+import models.adresse  # noqa: F401
+import models.contact  # noqa: F401
+import models.constants  # noqa: F401
+import models.direction  # noqa: F401
+import models.direction.fonction  # noqa: F401
+import models.fidele  # noqa: F401
+import models.paroisse  # noqa: F401
+import modules.file.models  # noqa: F401
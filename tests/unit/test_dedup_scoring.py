@@ -0,0 +1,92 @@
+"""Blocking keys and pair scores of the duplicate fidele detection (no database)."""
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from core.config import Config
+from modules.dedup import consonant_key, fidele_blocking_keys, is_probable_duplicate, score_fidele_pair
+
+
+def _fidele(nom="Mulamba", prenom="Jean", postnom=None, sexe="M", date_naissance=date(1990, 3, 14), tel=None):
+    return SimpleNamespace(
+        nom=nom, postnom=postnom, prenom=prenom, sexe=sexe, date_naissance=date_naissance, tel=tel
+    )
+
+
+def _keys(fidele) -> set[str]:
+    return fidele_blocking_keys(fidele.nom, fidele.prenom, fidele.sexe, fidele.date_naissance, fidele.tel)
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ("MOULAMBA", "MULAMBA"),
+        ("Mulamba", "mulamba"),
+        ("Kasongo", "Cassongo"),
+        ("Philippe", "Filipe"),
+    ],
+)
+def test_consonant_key_merges_spellings(a, b):
+    assert consonant_key(a) == consonant_key(b)
+
+
+def test_consonant_key_of_distinct_names():
+    assert consonant_key("MULAMBA") != consonant_key("KABILA")
+    assert consonant_key("") == consonant_key(None) == ""
+
+
+def test_spelling_variant_shares_a_key_and_scores_above_threshold():
+    a, b = _fidele(nom="MULAMBA"), _fidele(nom="MOULAMBA")
+    assert _keys(a) & _keys(b)
+
+    score, details = score_fidele_pair(a, b)
+    assert is_probable_duplicate(score)
+    assert details["naissance"] == 1.0 and details["sexe"] == 1.0
+
+
+def test_swapped_nom_prenom_shares_a_key_and_scores_as_identical():
+    a, b = _fidele(nom="Mulamba", prenom="Jean"), _fidele(nom="Jean", prenom="Mulamba")
+    assert _keys(a) & _keys(b)
+
+    score, details = score_fidele_pair(a, b)
+    assert details["noms"] == 1.0
+    assert is_probable_duplicate(score)
+
+
+def test_day_and_month_swapped():
+    a, b = _fidele(date_naissance=date(1990, 3, 12)), _fidele(date_naissance=date(1990, 12, 3))
+
+    score, details = score_fidele_pair(a, b)
+    assert details["naissance"] == 0.8
+    assert is_probable_duplicate(score)
+    # Same birth year: the name key still brings them together
+    assert _keys(a) & _keys(b)
+
+
+def test_relative_with_same_nom_is_below_threshold():
+    score, _ = score_fidele_pair(_fidele(prenom="Jean"), _fidele(prenom="Pierre", date_naissance=date(1962, 1, 5)))
+    assert not is_probable_duplicate(score)
+
+
+def test_same_tel_shares_a_key():
+    a, b = _fidele(tel="+243811000001"), _fidele(nom="Kabila", tel="0811000001")
+    assert "T:811000001" in _keys(a) & _keys(b)
+
+
+def test_threshold_boundary():
+    threshold = Config.DEDUP_MIN_SCORE.value
+    assert is_probable_duplicate(threshold)
+    assert not is_probable_duplicate(round(threshold - 0.0001, 4))
+
+    # Same names, sexe and tel, birth year only: 0.6 + 0.25 * 0.4 + 0.1 + 0.05 = 0.85
+    score, details = score_fidele_pair(
+        _fidele(date_naissance=date(1990, 3, 14), tel="+243811000001"),
+        _fidele(date_naissance=date(1990, 7, 2), tel="+243811000001"),
+    )
+    assert details["naissance"] == 0.4
+    assert score == pytest.approx(threshold) and is_probable_duplicate(score)
+
+    # Without the tel: just below
+    score, _ = score_fidele_pair(_fidele(date_naissance=date(1990, 3, 14)), _fidele(date_naissance=date(1990, 7, 2)))
+    assert not is_probable_duplicate(score)
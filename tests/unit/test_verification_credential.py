@@ -0,0 +1,110 @@
+"""Signed QR credentials: signature, expiry, tampering and key rotation (no database)."""
+import base64
+import json
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+from modules.verification import credential
+from modules.verification.credential import (
+    CredentialClaims,
+    CredentialError,
+    get_credential_jwks,
+    issue_credential,
+    verify_credential,
+)
+
+
+def _private_pem(key: Ed25519PrivateKey) -> str:
+    return key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+
+
+def _public_pem(key: Ed25519PrivateKey) -> str:
+    return key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+
+
+def _use_keys(monkeypatch, signing_key: Ed25519PrivateKey, *previous_keys: Ed25519PrivateKey) -> None:
+    monkeypatch.setenv("CREDENTIAL_SIGNING_KEY", _private_pem(signing_key))
+    monkeypatch.setenv("CREDENTIAL_PREVIOUS_PUBLIC_KEYS", "\n".join(_public_pem(key) for key in previous_keys))
+    credential.get_credential_signing_key.cache_clear()
+    credential.get_credential_public_keys.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def signing_key(monkeypatch):
+    key = Ed25519PrivateKey.generate()
+    _use_keys(monkeypatch, key)
+    yield key
+    credential.get_credential_signing_key.cache_clear()
+    credential.get_credential_public_keys.cache_clear()
+
+
+def _claims(**overrides) -> CredentialClaims:
+    now = int(time.time())
+    values = {"m": "FDL0000001A", "i": "MJ", "p": "0123456789abcdef", "s": 2, "iat": now, "exp": now + 3600}
+    values.update(overrides)
+    return CredentialClaims(**values)
+
+
+def _b64url_json(data: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+
+def test_issued_credential_verifies():
+    claims = _claims()
+    assert verify_credential(issue_credential(claims)) == claims
+
+
+def test_expired_credential_is_rejected():
+    now = int(time.time())
+    token = issue_credential(_claims(iat=now - 7200, exp=now - 3600))
+    with pytest.raises(CredentialError, match="expiré"):
+        verify_credential(token)
+
+
+def test_tampered_payload_is_rejected():
+    header, _, signature = issue_credential(_claims()).split(".")
+    forged = _claims(m="FDL0000002B").model_dump(exclude_none=True)
+    with pytest.raises(CredentialError, match="invalide"):
+        verify_credential(f"{header}.{_b64url_json(forged)}.{signature}")
+
+
+def test_credential_signed_by_another_key_is_rejected(monkeypatch):
+    token = issue_credential(_claims())
+    _use_keys(monkeypatch, Ed25519PrivateKey.generate())
+    with pytest.raises(CredentialError, match="clé inconnue"):
+        verify_credential(token)
+
+
+def test_symmetric_credential_is_rejected(signing_key):
+    """A token HMAC-signed (algorithm confusion) doesn't verify."""
+    kid = get_credential_jwks()["keys"][0]["kid"]
+    token = jwt.encode(
+        _claims().model_dump(exclude_none=True), "not-the-key", algorithm="HS256", headers={"typ": "EJCV", "kid": kid}
+    )
+    with pytest.raises(CredentialError, match="invalide"):
+        verify_credential(token)
+
+
+def test_previous_key_still_verifies_after_rotation(monkeypatch, signing_key):
+    token = issue_credential(_claims())
+    _use_keys(monkeypatch, Ed25519PrivateKey.generate(), signing_key)
+
+    assert verify_credential(token).m == "FDL0000001A"
+    assert len(get_credential_jwks()["keys"]) == 2
+
+
+def test_jwks_publishes_only_public_keys(signing_key):
+    (jwk,) = get_credential_jwks()["keys"]
+    assert jwk["kty"] == "OKP" and jwk["crv"] == "Ed25519" and jwk["alg"] == "EdDSA"
+    assert "d" not in jwk
+    assert jwk["kid"] == json.loads(
+        base64.urlsafe_b64decode(issue_credential(_claims()).split(".")[0] + "==")
+    )["kid"]
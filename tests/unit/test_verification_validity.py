@@ -0,0 +1,124 @@
+"""Fingerprint encoding and delta chain of the offline validity set (no database)."""
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from modules.verification.models import VerificationValidite
+from modules.verification.validity import (
+    ValidityIndex,
+    code_fingerprint,
+    decode_fingerprints,
+    encode_fingerprints,
+    get_validity_versions,
+)
+
+
+def test_code_fingerprint_is_32_bits_and_stable():
+    fingerprint = code_fingerprint("FDL0000001A")
+    assert 0 <= fingerprint < 2**32
+    assert fingerprint == code_fingerprint("FDL0000001A") != code_fingerprint("FDL0000001B")
+
+
+@pytest.mark.parametrize(
+    "fingerprints",
+    [set(), {0}, {2**32 - 1}, {0, 127, 128, 16383, 16384, 2**32 - 1}],
+    ids=["empty", "zero", "max", "varint boundaries"],
+)
+def test_encode_decode_round_trip(fingerprints):
+    assert decode_fingerprints(encode_fingerprints(fingerprints)) == sorted(fingerprints)
+
+
+def test_encode_decode_round_trip_of_matricules():
+    fingerprints = {code_fingerprint(f"FDL{n:07d}A") for n in range(5000)}
+    encoded = encode_fingerprints(fingerprints)
+    assert decode_fingerprints(encoded) == sorted(fingerprints)
+    # Sorted deltas as varints: well below 4 bytes per fingerprint
+    assert len(encoded) < 4 * len(fingerprints)
+
+
+def test_incremental_deltas_rebuild_the_latest_set():
+    rng = random.Random(37)
+    versions = [set(rng.sample(range(2**32), 300))]
+    for _ in range(5):
+        current = set(versions[-1])
+        current -= set(rng.sample(sorted(current), 20))
+        current |= set(rng.sample(range(2**32), 25))
+        versions.append(current)
+
+    index = ValidityIndex(1, encode_fingerprints(versions[0]))
+    for number, (previous, current) in enumerate(zip(versions, versions[1:]), start=2):
+        index.apply_delta(number, encode_fingerprints(current - previous), encode_fingerprints(previous - current))
+
+    assert index.version == len(versions)
+    assert index._fingerprints == versions[-1]
+
+
+def test_validity_index_lookup():
+    index = ValidityIndex(1, encode_fingerprints({code_fingerprint("FDL0000001A")}))
+    assert index.is_valid("FDL0000001A")
+    assert not index.is_valid("FDL0000002B")
+    index.apply_delta(2, None, encode_fingerprints({code_fingerprint("FDL0000001A")}))
+    assert not index.is_valid("FDL0000001A") and len(index) == 0
+
+
+# ============================================================================
+# VERSIONS SERVED (get_validity_versions)
+# ============================================================================
+
+class _VersionsSession:
+    """The statements of get_validity_versions answered from stored versions (kept ones only)."""
+
+    def __init__(self, versions: list[VerificationValidite]) -> None:
+        self.versions = {validite.version: validite for validite in versions}
+
+    async def execute(self, statement):
+        if statement.whereclause is None:
+            # SELECT max(version)
+            return SimpleNamespace(scalar=lambda: max(self.versions, default=None))
+        since_version = statement.whereclause.right.value
+        rows = [self.versions[version] for version in sorted(self.versions) if version > since_version]
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: rows))
+
+    async def get(self, _model, version):
+        return self.versions.get(version)
+
+
+def _versions(*numbers: int) -> list[VerificationValidite]:
+    return [
+        VerificationValidite(
+            version=number,
+            nombre=number,
+            empreintes=encode_fingerprints(range(number)),
+            ajouts=encode_fingerprints({number - 1}) if number > 1 else None,
+            retraits=encode_fingerprints(set()) if number > 1 else None,
+        )
+        for number in numbers
+    ]
+
+
+async def test_up_to_date_device_gets_nothing():
+    assert await get_validity_versions(_VersionsSession(_versions(1, 2, 3)), 3) == (None, [])
+
+
+async def test_device_behind_gets_the_deltas():
+    full, deltas = await get_validity_versions(_VersionsSession(_versions(1, 2, 3, 4)), 2)
+    assert full is None
+    assert [delta.version for delta in deltas] == [3, 4]
+
+
+async def test_new_device_gets_the_full_copy():
+    full, deltas = await get_validity_versions(_VersionsSession(_versions(1, 2, 3)), None)
+    assert full.version == 3 and deltas == []
+
+
+async def test_purged_version_gets_the_full_copy():
+    # Versions 2 and 3 purged: the chain from 1 is broken
+    full, deltas = await get_validity_versions(_VersionsSession(_versions(4, 5, 6)), 1)
+    assert full.version == 6 and deltas == []
+
+
+async def test_version_ahead_of_the_server_gets_the_full_copy():
+    # Device holding a version the server doesn't have (database restored from a backup)
+    full, deltas = await get_validity_versions(_VersionsSession(_versions(1, 2)), 9)
+    assert full.version == 2 and deltas == []
@@ -1,5 +1,4 @@
-import traceback
-from datetime import datetime
+from core.logger import logger
 
 # used evrywhere: don't delete them
 from pydantic import Field as PydanticField
@@ -8,11 +7,5 @@ from sqlmodel import Field as SQLModelField
 
 
 def log(e: Exception):
-  exc = traceback.format_exc()
-  print(
-    "\n***************************************\n", 
-    "Error:", exc, "\nDate:", datetime.now(),
-    "\n\nDetails:", "\n--------\n", exc,
-    "\n***************************************\n"
-  )
+  logger.error(str(e) or type(e).__name__, exc_info=e)
 